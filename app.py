@@ -39,6 +39,11 @@ from mylib.common.proj_error import ProjError, ProjRedfishError
 from mylib.auth.rf_auth import check_basic_auth, check_session_auth, AuthStatus
 from mylib.services.debug_service import DebugService
 from mylib.managements.FlaskConfiger import FlaskConfiger
+from mylib.utils.DataFreshnessUtil import DataFreshnessUtil
+from mylib.utils.ExpandQueryUtil import ExpandQueryUtil
+from mylib.adapters.sensor_csv_adapter import SensorCsvAdapter
+from mylib.adapters.sensor_pg_ingest_worker import SensorPgIngestWorker
+from mylib.services.rf_telemetry_service import RfTelemetryService
 # from mylib.utils.ServerSentEvent import start_SSE_threading
 from load_env import AppPathInitializer, redfish_info
 
@@ -97,104 +102,13 @@ class MyNamespaceHelper():
     
 
 
-app = Flask(__name__)
-
-path_info = AppPathInitializer().initialize()
-db_filepath = path_info["db_filepath"]
-
-# initialize sqlalchemy
-app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_filepath}"
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_size": 5,
-    "max_overflow": 1,
-    "pool_timeout": 10,
-}
-app.config["JSON_SORT_KEYS"] = False
-app.config['JSON_AS_ASCII'] = False
-
-app.json_provider_class = MyJSONProvider
-app.json = app.json_provider_class(app)
-
-ext_engine.init_db(app)
-init_orm(ext_engine.get_app(), ext_engine.get_db())
-
-api = Api(
-    app,
-    version="0.6.6",
-    title="Redfish API",
-    description="API for redfish system",
-    doc="/",
-)
-
-
-
-
-
-@app.route("/debug", methods=["GET"])
 def debug():
     return jsonify(DebugService().load_report())
 
 
-# 引入資料夾中的所有路由模組
-from mylib.routers.root_router import root_ns
-
-api.add_namespace(root_ns, path="/redfish")
-
-from mylib.routers.version_entry_router import version_entry_ns
-
-api.add_namespace(version_entry_ns, path="/redfish/v1")
-
-from mylib.routers.updateService_router import update_ns
-
-api.add_namespace(update_ns, path="/redfish/v1")
-
-# from mylib.routers.Chassis_router import Chassis_ns, Chassis_ThermalSubsystem_Fans_ns
-MyNamespaceHelper(api).register_namespaces(
-    "mylib.routers.Chassis_router", 
-    ["Chassis_ns", "Chassis_ThermalSubsystem_Fans_ns"]
-)
-
-from mylib.routers.managers_router import managers_ns
-
-api.add_namespace(managers_ns, path="/redfish/v1")
-
-from mylib.routers.TelemetryService_router import TelemetryService_ns
-
-api.add_namespace(TelemetryService_ns, path="/redfish/v1")
-
-from mylib.routers.ThermalEquipment_router import ThermalEquipment_ns
-
-api.add_namespace(ThermalEquipment_ns, path="/redfish/v1")
-
-from mylib.routers.account_service_router import AccountService_ns
-
-api.add_namespace(AccountService_ns, path="/redfish/v1")
-
-from mylib.routers.session_service_router import SessionService_ns
-
-api.add_namespace(SessionService_ns, path="/redfish/v1")
-
-from mylib.routers.CertificateService_router import CertificateService_ns
-
-api.add_namespace(CertificateService_ns, path="/redfish/v1")
-
-from mylib.routers.EventService_router import EventService_ns
-
-api.add_namespace(EventService_ns, path="/redfish/v1")
-
-from mylib.routers.registries_router import Registries_ns
-api.add_namespace(Registries_ns, path="/redfish/v1")
-
-# from mylib.routers.systems_router import system_ns
-# api.add_namespace(system_ns, path='/redfish/v1')
-
-# from mylib.routers.ComponentIntegrity_router import ComponentIntegrity_ns
-# api.add_namespace(ComponentIntegrity_ns, path='/redfish/v1')
-
 from mylib.models.example_model import ExampleModel
 
 
-@app.route("/examples")
 def examples():
     all_examples = ExampleModel.all()
     return jsonify({"examples": all_examples})
@@ -230,7 +144,6 @@ SUPPORTED_DOLLAR_PARAMS = {
 
 
 ###------------------------------------------------------
-@app.before_request
 def require_auth_on_all_routes():
     ###----------------處理$--------------------------------------
     if not request.path.startswith("/"):
@@ -276,15 +189,30 @@ def require_auth_on_all_routes():
     return authenticate()
 
 
+def reject_unsupported_expand():
+    """
+    $expand 只在 ExpandQueryUtil.EXPANDABLE_RULES 的 collection 生效，其他 resource 回 400
+    @note before_request 丟出的 exception 不會經過 api.errorhandler，這裡直接組 response
+    """
+    try:
+        ExpandQueryUtil.check_request_supported()
+    except ProjRedfishError as e:
+        return make_response(jsonify(e.to_dict()), e.http_status)
+
+
 ###----------------處理標頭--------------------------------------
-@app.after_request
+def mark_stale_data(response):
+    """
+    上游 (RestAPI) 無法即時回應時會改用舊資料，這裡加上 `Age` header 並將 Status.Health 標示為 Warning
+    """
+    return DataFreshnessUtil.apply_to_response(response)
+
 def add_link_describedby(response):
     if request.method in ("GET", "HEAD") and request.path.startswith("/redfish/v1"):
         response.headers["Link"] = '</redfish/v1/$metadata>; rel="describedby"'
         response.headers["OData-Version"] = "4.0"
     return response
 
-@app.after_request
 def remove_message_from_response(response):
     """
     @note If there is no `message` in response, Flask-restx will add `message` to response automatically!
@@ -309,7 +237,6 @@ def remove_message_from_response(response):
         pass
     return response
 
-@api.errorhandler(HTTPException)
 def handle_http_exception(e):
     """
     Catch exception from Flask abort().
@@ -322,7 +249,6 @@ def handle_http_exception(e):
     return ProjError(e.code, e.description).to_redfish_error_dict(), e.code
 
 
-@api.errorhandler(ProjError)
 def handle_proj_error(e):
     """
     Catch exception from custom exception, ProjError.
@@ -333,7 +259,6 @@ def handle_proj_error(e):
     status_code = e.code if e.code < 1000 else HTTPStatus.INTERNAL_SERVER_ERROR.value
     return e.to_redfish_error_dict(), status_code
 
-@api.errorhandler(ProjRedfishError)
 def handle_proj_redfish_error(e):
     """
     Catch exception from custom redfish error, ProjRedfishError.
@@ -343,7 +268,6 @@ def handle_proj_redfish_error(e):
     """
     return e.to_dict(), e.http_status
 
-@api.errorhandler(Exception)
 def handle_exception(e):
     """
     Catch other exception
@@ -352,6 +276,153 @@ def handle_exception(e):
     return ProjError(http_status, str(e)).to_redfish_error_dict(), http_status
 
 
+def create_app() -> Flask:
+    """
+    建立 Flask app 並註冊所有 namespace 與 request hook
+    @note 匯入 app.py 本身沒有副作用 (不建立 app、不初始化資料庫)。
+        spawn/forkserver 的子 process (ex: SensorCsvParallelLoader) 會以 `__mp_main__` 重新匯入 app.py，
+        不會再次建立 app 或對同一個 sqlite 執行 init_orm。
+    """
+    app = Flask(__name__)
+
+    path_info = AppPathInitializer().initialize()
+    db_filepath = path_info["db_filepath"]
+
+    # initialize sqlalchemy
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_filepath}"
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_size": 5,
+        "max_overflow": 1,
+        "pool_timeout": 10,
+    }
+    app.config["JSON_SORT_KEYS"] = False
+    app.config['JSON_AS_ASCII'] = False
+
+    app.json_provider_class = MyJSONProvider
+    app.json = app.json_provider_class(app)
+
+    ext_engine.init_db(app)
+    init_orm(ext_engine.get_app(), ext_engine.get_db())
+
+    api = Api(
+        app,
+        version="0.6.6",
+        title="Redfish API",
+        description="API for redfish system",
+        doc="/",
+    )
+
+    app.add_url_rule("/debug", view_func=debug, methods=["GET"])
+    app.add_url_rule("/examples", view_func=examples)
+
+    # 引入資料夾中的所有路由模組
+    from mylib.routers.root_router import root_ns
+
+    api.add_namespace(root_ns, path="/redfish")
+
+    from mylib.routers.version_entry_router import version_entry_ns
+
+    api.add_namespace(version_entry_ns, path="/redfish/v1")
+
+    from mylib.routers.updateService_router import update_ns
+
+    api.add_namespace(update_ns, path="/redfish/v1")
+
+    # from mylib.routers.Chassis_router import Chassis_ns, Chassis_ThermalSubsystem_Fans_ns
+    MyNamespaceHelper(api).register_namespaces(
+        "mylib.routers.Chassis_router", 
+        ["Chassis_ns", "Chassis_ThermalSubsystem_Fans_ns"]
+    )
+
+    from mylib.routers.managers_router import managers_ns
+
+    api.add_namespace(managers_ns, path="/redfish/v1")
+
+    from mylib.routers.TelemetryService_router import TelemetryService_ns
+
+    api.add_namespace(TelemetryService_ns, path="/redfish/v1")
+
+    from mylib.routers.ThermalEquipment_router import ThermalEquipment_ns
+
+    api.add_namespace(ThermalEquipment_ns, path="/redfish/v1")
+
+    from mylib.routers.account_service_router import AccountService_ns
+
+    api.add_namespace(AccountService_ns, path="/redfish/v1")
+
+    from mylib.routers.session_service_router import SessionService_ns
+
+    api.add_namespace(SessionService_ns, path="/redfish/v1")
+
+    from mylib.routers.CertificateService_router import CertificateService_ns
+
+    api.add_namespace(CertificateService_ns, path="/redfish/v1")
+
+    from mylib.routers.EventService_router import EventService_ns
+
+    api.add_namespace(EventService_ns, path="/redfish/v1")
+
+    from mylib.routers.registries_router import Registries_ns
+    api.add_namespace(Registries_ns, path="/redfish/v1")
+
+    # from mylib.routers.systems_router import system_ns
+    # api.add_namespace(system_ns, path='/redfish/v1')
+
+    # from mylib.routers.ComponentIntegrity_router import ComponentIntegrity_ns
+    # api.add_namespace(ComponentIntegrity_ns, path='/redfish/v1')
+
+    app.before_request(require_auth_on_all_routes)
+    app.before_request(reject_unsupported_expand)
+
+    app.after_request(mark_stale_data)
+    app.after_request(add_link_describedby)
+    app.after_request(remove_message_from_response)
+
+    api.errorhandler(HTTPException)(handle_http_exception)
+    api.errorhandler(ProjError)(handle_proj_error)
+    api.errorhandler(ProjRedfishError)(handle_proj_redfish_error)
+    api.errorhandler(Exception)(handle_exception)
+    return app
+
+
+_app: Flask | None = None
+
+
+def get_app() -> Flask:
+    """
+    取得共用的 Flask app (第一次呼叫時以 create_app() 建立)
+    """
+    global _app
+    if _app is None:
+        _app = create_app()
+    return _app
+
+
+def __getattr__(name: str):
+    """
+    讓 `from app import app` 維持可用 (ex: 測試)，第一次取用時才建立 app
+    """
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def start_background_services(app: Flask):
+    """
+    app 啟動時在背景預先載入資料，避免第一個 request 等待冷啟動
+    """
+    # 載入歷史資料存檔並補讀 CSV，之後定期讀取新資料與存檔
+    SensorCsvAdapter.start_background_refresh()
+    # 把 CSV 寫入 Postgres sensor_data 與彙總表 (統計查詢的資料來源)
+    if SensorPgIngestWorker.ENABLED:
+        SensorPgIngestWorker.get_instance().start()
+    with app.app_context():
+        # 載入 MetricReportDefinitions 並啟動排程，載入 Triggers 並開始評估
+        telemetry_service = RfTelemetryService()
+        telemetry_service.start_metric_report_engine()
+        telemetry_service.start_trigger_engine()
+
+
 if __name__ == "__main__":
     proj_root = os.path.dirname(os.path.abspath(__file__))
     sys.path.append(proj_root)
@@ -360,12 +431,16 @@ if __name__ == "__main__":
     cert_pem_path = os.path.join(proj_root, "cert.pem")
     key_pem_path = os.path.join(proj_root, "key.pem")
 
+    app = get_app()
+
     # disable strict slashes
     FlaskConfiger.disable_strict_slashes_for_all_urls(app, "/redfish")
     
     # 啟動 SSE threads
     # start_SSE_threading()
 
+    start_background_services(app)
+
     # ssl_context=(憑證檔, 私鑰檔)
     redfish_port = int(os.environ.get("ITG_REDFISH_API_PORT", "5000"))
     app.run(
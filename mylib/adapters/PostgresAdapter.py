@@ -1,14 +1,25 @@
 import psycopg2
+import psycopg2.errors
 import os
+import hashlib
+import threading
 from psycopg2 import sql 
 from psycopg2.extras import RealDictCursor
 from mylib.models.sensor_log_model_factory import SensorLogModelFactory
 from contextlib import contextmanager
-from typing import List
+from mylib.adapters.pg_connection_pool import PgConnectionPool
+from mylib.adapters.sensor_data_migration import SensorDataMigration
+from mylib.adapters.sensor_rollup import SensorRollup
+from typing import Dict, List, Sequence, Set, Tuple
 from pathlib import Path
 SQL_DIR = Path(__file__).with_suffix('').parent / '..' / 'db' / 'sql'
 
 class PostgresAdapter():
+    # 已經 PREPARE 的 statement: {(dbname, backend pid): {statement name}}
+    # prepared statement 屬於 server 端的 session，連線池關閉連線時清除 (見 _forget_prepared_statements)
+    _prepared_statements: Dict[Tuple[str, int], Set[str]] = {}
+    _prepared_lock = threading.Lock()
+
     def __init__(self, dbname=None):
         user = os.getenv("POSTGRES_USER", "")
         password = os.getenv("POSTGRES_PASSWORD", "")
@@ -25,6 +36,9 @@ class PostgresAdapter():
         METRIC_TYPE_MAP = {
             "String": "TEXT",
             "Decimal": "NUMERIC(10,2)",
+            "Integer": "BIGINT",
+            "Boolean": "BOOLEAN",
+            "DateTime": "TIMESTAMPTZ",
         }
         dynamic_cols = []
         for item in cols:
@@ -36,20 +50,74 @@ class PostgresAdapter():
             dynamic_cols.append((name, pg_type))
         return dynamic_cols
     
+    def get_pool(self, dbname: str | None = None) -> PgConnectionPool:
+        """依資料庫名稱取得 process 內共用的連線池"""
+        return PgConnectionPool.get_instance(
+            dbname or self.DB_NAME, self.PG, on_close=self._forget_prepared_statements
+        )
+
     @contextmanager
     def get_connection(self, dbname: str | None = None, autocommit: bool = False):
-        conn = psycopg2.connect(dbname=dbname or self.DB_NAME, **self.PG)
-        conn.autocommit = autocommit
+        """由連線池借出連線，結束後 commit (例外時 rollback) 並歸還"""
+        with self.get_pool(dbname).connection() as conn:
+            conn.autocommit = autocommit
+            try:
+                yield conn
+                if not autocommit:
+                    conn.commit()
+            except Exception:
+                if not autocommit and not conn.closed:
+                    conn.rollback()
+                raise
+
+    @classmethod
+    def _forget_prepared_statements(cls, conn):
+        """連線關閉後 server 端的 prepared statement 也會消失"""
+        if not cls._prepared_statements or conn.closed:
+            return
         try:
-            yield conn
-            if not autocommit:
-                conn.commit()
-        except Exception:
-            if not autocommit:
-                conn.rollback()
-            raise
-        finally:
-            conn.close()
+            key = (conn.info.dbname, conn.get_backend_pid())
+        except psycopg2.Error:
+            return
+        with cls._prepared_lock:
+            cls._prepared_statements.pop(key, None)
+
+    @staticmethod
+    def build_statement_name(prefix: str, statement: str) -> str:
+        """同一段 SQL 產生固定的 prepared statement 名稱"""
+        return f"{prefix}_{hashlib.sha1(statement.encode('utf-8')).hexdigest()[:16]}"
+
+    def execute_prepared(self, conn, name: str, statement: str, param_types: Sequence[str], params: Sequence):
+        """
+        以 server 端的 prepared statement 執行: 同一個 session 只 PREPARE 一次，之後只送 EXECUTE
+        :param name: statement 名稱 (ex: build_statement_name() 的結果)
+        :param statement: 以 $1, $2, ... 表示參數的 SQL
+        :param param_types: 參數的型別，ex: ["timestamptz", "integer"]
+        :return: 執行後的 cursor
+        """
+        key = (conn.info.dbname, conn.get_backend_pid())
+        with self._prepared_lock:
+            prepared = name in self._prepared_statements.get(key, ())
+        cur = conn.cursor()
+        execute_sql = sql.SQL("EXECUTE {} ({})").format(
+            sql.Identifier(name), sql.SQL(", ").join([sql.Placeholder()] * len(params))
+        )
+        if prepared:
+            try:
+                cur.execute(execute_sql, params)
+                return cur
+            except psycopg2.errors.InvalidSqlStatementName:
+                conn.rollback() # backend pid 被重複使用，statement 已不存在
+        try:
+            cur.execute(sql.SQL("PREPARE {} ({}) AS {}").format(
+                sql.Identifier(name), sql.SQL(", ".join(param_types)), sql.SQL(statement)
+            ))
+        except psycopg2.errors.DuplicatePreparedStatement:
+            conn.rollback()
+        with self._prepared_lock:
+            self._prepared_statements.setdefault(key, set()).add(name)
+        cur.execute(execute_sql, params)
+        return cur
 
     def query(self, sql_string: str, params=None, *, dbname: str | None = None) -> List[dict]:
         with self.get_connection(dbname=dbname) as conn, conn.cursor() as cur:
@@ -106,6 +174,20 @@ class PostgresAdapter():
             )
             self.exec(create_sql)
 
+            # 舊版資料表缺少的欄位 (只改 metadata)
+            for n, t in dynamic_cols:
+                self.exec(sql.SQL("ALTER TABLE sensor_data ADD COLUMN IF NOT EXISTS {} {}").format(sql.Identifier(n), sql.SQL(t)))
+
+            self.exec(sql.SQL(self.load_sql('sensor_ingest_watermark.sql')))
+
+            SensorDataMigration(
+                self,
+                batch_size=int(os.getenv("POSTGRES_MIGRATION_BATCH_SIZE", 5000)),
+                batch_sleep_sec=float(os.getenv("POSTGRES_MIGRATION_BATCH_SLEEP_SEC", 0.05)),
+            ).run()
+
+            SensorRollup.from_metric_definitions(cols).ensure_tables(self)
+
         except psycopg2.Error as e:
             print(f"[DB ERROR] {type(e).__name__}: {e}")
             raise
@@ -1,7 +1,7 @@
 import os
 from typing import Dict
 import copy
-from cachetools import cached, TTLCache
+from mylib.utils.SingleFlightCache import SingleFlightCache, single_flight_cached
 from load_env import hardware_info
 from mylib.utils.HttpRequestUtil import HttpRequestUtil
 from mylib.common.proj_error import ProjError
@@ -19,7 +19,7 @@ class HardwareInfoAdapter:
         return info
 
     @classmethod
-    @cached(cache=TTLCache(maxsize=1, ttl=5))
+    @single_flight_cached(cache=SingleFlightCache(maxsize=1, ttl=5))
     def _load_serial_number(cls) -> Dict:
         """Get serial number from webapp api
         @note api: /read_version
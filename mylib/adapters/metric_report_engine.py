@@ -0,0 +1,299 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from mylib.adapters.sensor_history_store import SensorHistoryStore
+from mylib.utils.TimerWheelUtil import TimerWheel
+
+"""
+MetricReportDefinition 的排程與報告產生: 每個定義依 RecurrenceInterval 定期由 SensorHistoryStore 產生報告。
+
+@note
+    (1) 所有定義共用一個 TimerWheel (1 秒一個 tick) 與一個背景 thread，到期時間對齊 RecurrenceInterval (UTC epoch)。
+    (2) 每次只讀取該次到期的時間區間: 有 CollectionFunction 的 metric 計算 [due - CollectionDuration, due) 的統計值，
+        沒有的取區間內最新的一筆；thread 延遲時跳過錯過的週期，不補產生。
+    (3) ReportUpdates:
+            Overwrite: 報告只保留最新一次的 MetricValues
+            AppendWrapsWhenFull: 附加到報告，超過 AppendLimit 時移除最舊的
+            AppendStopsWhenFull: 附加到報告，達到 AppendLimit 後停止更新
+            NewReport: 每次產生一份新的報告 (Id: <definition id>_<時間>)，超過 AppendLimit 個 MetricValues 時移除最舊的報告
+        因此每個定義最多保留 AppendLimit 個 MetricValues。
+    (4) 定義由 RfTelemetryService 從 Redfish 內容轉換 (見 ReportDefinition)，本模組不存取資料庫。
+
+Usage:
+    engine = MetricReportEngine.get_instance()
+    engine.upsert(ReportDefinition("fans", "Fans", (ReportMetric("fan1", "Fan1 Speed"),), recurrence_sec=60))
+    engine.start()
+    engine.get_report("fans")
+"""
+
+@dataclass(frozen=True)
+class ReportMetric:
+    """
+    :param metric_id: MetricDefinition 的 Id
+    :param column: SensorHistoryStore 的欄位名稱
+    :param function: CollectionFunction (Average/Maximum/Minimum/Summation)，None 表示取最新的一筆
+    :param duration_sec: CollectionDuration 的秒數，None 表示與 RecurrenceInterval 相同
+    """
+    metric_id: str
+    column: str
+    function: Optional[str] = None
+    duration_sec: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class ReportDefinition:
+    """
+    :param settings: 定義的 Redfish 內容 (GET MetricReportDefinition 時輸出)
+    """
+    id: str
+    name: str
+    metrics: Tuple[ReportMetric, ...]
+    recurrence_sec: int
+    report_updates: str = "AppendWrapsWhenFull"
+    append_limit: int = 256
+    enabled: bool = True
+    settings: Dict[str, Any] = field(default_factory=dict, compare=False)
+
+
+class _ReportState:
+    """單一定義已產生的報告 (MetricValues 的數量上限為 append_limit)"""
+    def __init__(self, definition: ReportDefinition):
+        self.definition = definition
+        self.values: Deque[dict] = deque(maxlen=definition.append_limit if definition.report_updates == "AppendWrapsWhenFull" else None)
+        # NewReport: [(report id, timestamp, sequence, MetricValues)]
+        self.reports: Deque[Tuple[str, float, int, List[dict]]] = deque()
+        self.timestamp: Optional[float] = None
+        self.sequence = 0
+        self.full = False
+
+
+class MetricReportEngine:
+    TICK_SEC = 1.0
+    WHEEL_SLOTS = 512
+    MAX_DEFINITIONS = int(os.getenv("METRIC_REPORT_MAX_DEFINITIONS", "16"))
+    MAX_APPEND_LIMIT = int(os.getenv("METRIC_REPORT_MAX_APPEND_LIMIT", "4096"))
+
+    _instance: Optional["MetricReportEngine"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, get_store: Callable[[], SensorHistoryStore]):
+        """
+        :param get_store: 回傳 SensorHistoryStore
+        """
+        self._get_store = get_store
+        self._states: Dict[str, _ReportState] = {}
+        self._wheel = TimerWheel(self.TICK_SEC, self.WHEEL_SLOTS)
+        self.lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"reports_generated": 0, "errors": 0, "last_error": None}
+
+    @classmethod
+    def get_instance(cls) -> "MetricReportEngine":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    from mylib.adapters.sensor_csv_adapter import SensorCsvAdapter
+                    cls._instance = cls(SensorCsvAdapter.get_sensor_history_store)
+        return cls._instance
+
+    # --- 定義 ---
+
+    def upsert(self, definition: ReportDefinition, now: float = None):
+        """
+        新增或取代定義 (已產生的報告會清除)
+        :raise ValueError: 定義數量已達上限
+        """
+        with self.lock:
+            if definition.id not in self._states and len(self._states) >= self.MAX_DEFINITIONS:
+                raise ValueError(f"At most {self.MAX_DEFINITIONS} MetricReportDefinitions are allowed")
+            self._states[definition.id] = _ReportState(definition)
+            self._wheel.cancel(definition.id)
+            if definition.enabled:
+                self._wheel.schedule(definition.id, self._next_due(definition, time.time() if now is None else now))
+
+    def remove(self, definition_id: str) -> bool:
+        with self.lock:
+            self._wheel.cancel(definition_id)
+            return self._states.pop(definition_id, None) is not None
+
+    def get_definition(self, definition_id: str) -> Optional[ReportDefinition]:
+        with self.lock:
+            state = self._states.get(definition_id)
+            return state.definition if state else None
+
+    def definitions(self) -> List[ReportDefinition]:
+        with self.lock:
+            return [state.definition for state in self._states.values()]
+
+    @staticmethod
+    def _next_due(definition: ReportDefinition, now: float) -> float:
+        """下一個對齊 RecurrenceInterval 的時間 (> now)"""
+        return (math.floor(now / definition.recurrence_sec) + 1) * definition.recurrence_sec
+
+    # --- 排程 ---
+
+    def start(self) -> None:
+        """啟動背景排程 (daemon thread)，重複呼叫無副作用"""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._instance_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="MetricReportEngine", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        self._stop_event.set()
+        thread = self._thread
+        if thread and thread.is_alive():
+            thread.join(timeout)
+        self._thread = None
+
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.run_due(time.time())
+            except Exception as e:
+                self._stats["errors"] += 1
+                self._stats["last_error"] = str(e)
+                print(f"MetricReportEngine error: {e}")
+            self._stop_event.wait(self.TICK_SEC)
+
+    def run_due(self, now: float) -> int:
+        """
+        產生所有到期的報告並排定下一次
+        :return: 產生的報告數
+        """
+        with self.lock:
+            due = self._wheel.advance(now)
+        if not due:
+            return 0
+        # 取得 store 可能需要讀取 CSV，不持有 self.lock，避免 GET 報告時等待
+        store = self._get_store()
+        generated = 0
+        with self.lock:
+            for definition_id, due_ts in due:
+                state = self._states.get(definition_id)
+                if state is None or definition_id in self._wheel:
+                    continue # 期間內已移除或更新 (upsert 已重新排定)
+                if self._collect(state, due_ts, store):
+                    generated += 1
+                self._wheel.schedule(definition_id, self._next_due(state.definition, max(now, due_ts)))
+        self._stats["reports_generated"] += generated
+        return generated
+
+    # --- 報告 ---
+
+    def _read_values(self, definition: ReportDefinition, due_ts: float, store: SensorHistoryStore) -> List[dict]:
+        values = []
+        with store.lock:
+            for metric in definition.metrics:
+                duration_sec = metric.duration_sec or definition.recurrence_sec
+                lo, hi = store.time_range(due_ts - duration_sec, due_ts)
+                try:
+                    if metric.function:
+                        value, ts = store.aggregate(metric.column, metric.function, lo, hi), due_ts
+                    elif hi > lo:
+                        value, ts = store.get_column(metric.column, hi - 1, hi)[0], store.get_timestamp(hi - 1)
+                    else:
+                        value = None
+                except KeyError:
+                    # 歷史資料沒有此欄位
+                    value = None
+                if value is None or (isinstance(value, float) and math.isnan(value)):
+                    continue
+                values.append({
+                    "MetricId": metric.metric_id,
+                    "MetricValue": str(value),
+                    "Timestamp": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(),
+                })
+        return values
+
+    def _collect(self, state: _ReportState, due_ts: float, store: SensorHistoryStore) -> bool:
+        """:return: 是否產生了報告 (AppendStopsWhenFull 已滿時不產生)"""
+        definition = state.definition
+        if state.full:
+            return False
+        values = self._read_values(definition, due_ts, store)
+        state.sequence += 1
+        state.timestamp = due_ts
+        if definition.report_updates == "Overwrite":
+            state.values = deque(values)
+        elif definition.report_updates == "AppendStopsWhenFull":
+            room = definition.append_limit - len(state.values)
+            state.values.extend(values[:room])
+            state.full = len(values) >= room
+        elif definition.report_updates == "NewReport":
+            state.reports.append((self.build_report_id(definition.id, due_ts), due_ts, state.sequence, values))
+            while len(state.reports) > 1 and sum(len(r[3]) for r in state.reports) > definition.append_limit:
+                state.reports.popleft()
+        else:
+            state.values.extend(values)
+        return True
+
+    @staticmethod
+    def build_report_id(definition_id: str, ts: float) -> str:
+        """NewReport 的報告 Id，ex: fans_20250701T000300Z"""
+        return f"{definition_id}_{datetime.fromtimestamp(ts, tz=timezone.utc).strftime('%Y%m%dT%H%M%SZ')}"
+
+    def report_ids(self) -> List[str]:
+        """已產生的報告 Id"""
+        with self.lock:
+            report_ids = []
+            for definition_id, state in self._states.items():
+                if state.definition.report_updates == "NewReport":
+                    report_ids += [report[0] for report in state.reports]
+                elif state.timestamp is not None:
+                    report_ids.append(definition_id)
+            return report_ids
+
+    def get_report(self, report_id: str) -> Optional[dict]:
+        """
+        :return: {"Id", "Name", "Timestamp", "ReportSequence", "MetricReportDefinition" (定義 Id), "MetricValues"}，
+                 沒有此報告時回傳 None
+        """
+        with self.lock:
+            state = self._states.get(report_id)
+            if state is not None and state.definition.report_updates != "NewReport":
+                if state.timestamp is None:
+                    return None
+                return self._build_report(state.definition, report_id, state.timestamp, state.sequence, list(state.values))
+            definition_id, _, _ = report_id.rpartition("_")
+            state = self._states.get(definition_id)
+            if state is None:
+                return None
+            for rid, ts, sequence, values in state.reports:
+                if rid == report_id:
+                    return self._build_report(state.definition, report_id, ts, sequence, list(values))
+            return None
+
+    @staticmethod
+    def _build_report(definition: ReportDefinition, report_id: str, ts: float, sequence: int, values: List[dict]) -> dict:
+        return {
+            "Id": report_id,
+            "Name": definition.name,
+            "Timestamp": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(),
+            "ReportSequence": str(sequence),
+            "MetricReportDefinition": definition.id,
+            "MetricValues": values,
+        }
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                **self._stats,
+                "definitions": len(self._states),
+                "scheduled": len(self._wheel),
+                "metric_values": sum(len(s.values) + sum(len(r[3]) for r in s.reports) for s in self._states.values()),
+                "running": self.is_running(),
+            }
@@ -0,0 +1,304 @@
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Optional, Tuple
+import psycopg2
+import psycopg2.pool
+from psycopg2 import extensions
+
+"""
+PostgreSQL 連線池，依資料庫名稱共用 (process 內每個 dbname 一個 pool)，避免每次查詢都重新建立 TCP 連線與驗證。
+
+@note 設定 (env)
+    POSTGRES_POOL_MIN_SIZE: 第一次使用時先建立的連線數，預設 1
+    POSTGRES_POOL_MAX_SIZE: 最多同時存在的連線數，預設 5
+    POSTGRES_POOL_MAX_LIFETIME_SEC: 連線存在超過此時間後關閉重建，預設 1800 秒
+    POSTGRES_POOL_WAIT_TIMEOUT_SEC: 連線都在使用中時最多等待的時間，逾時拋出 PgPoolTimeoutError，預設 5 秒
+    POSTGRES_POOL_HEALTH_CHECK_IDLE_SEC: 取出閒置超過此時間的連線前先以 SELECT 1 檢查，預設 10 秒 (0 表示每次都檢查)
+
+Usage:
+    pool = PgConnectionPool.get_instance("sidecar_redfish", dict(host=..., port=..., user=..., password=...))
+    with pool.connection() as conn:
+        ...
+    pool.stats()
+"""
+
+class PgPoolTimeoutError(psycopg2.pool.PoolError):
+    pass
+
+
+class PgConnectionPool:
+    _instances: Dict[str, "PgConnectionPool"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        dbname: str,
+        connect: Callable[[], extensions.connection],
+        min_size: int = 1,
+        max_size: int = 5,
+        max_lifetime_sec: float = 1800,
+        wait_timeout_sec: float = 5,
+        health_check_idle_sec: float = 10,
+        on_close: Optional[Callable[[extensions.connection], None]] = None,
+    ):
+        """
+        :param connect: 建立新連線的函式
+        :param on_close: 連線關閉前呼叫 (ex: 清除該 session 的 prepared statement 紀錄)
+        """
+        if max_size <= 0 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}")
+        self.dbname = dbname
+        self.connect = connect
+        self.min_size = max(0, min_size)
+        self.max_size = max_size
+        self.max_lifetime_sec = max_lifetime_sec
+        self.wait_timeout_sec = wait_timeout_sec
+        self.health_check_idle_sec = health_check_idle_sec
+        self.on_close = on_close
+        self._cond = threading.Condition()
+        self._idle: Deque[Tuple[extensions.connection, float]] = deque() # (conn, 歸還時間)
+        self._created_at: Dict[int, float] = {} # id(conn) -> 建立時間
+        self._in_use = 0
+        self._pending = 0 # 正在建立中的連線
+        self._closed = False
+        self._warmed_up = False
+        self._stats = {
+            "created": 0, "closed": 0, "checkouts": 0, "waits": 0, "wait_timeouts": 0,
+            "health_check_failures": 0, "expired": 0, "max_in_use": 0, "wait_time_sec": 0.0,
+        }
+
+    @classmethod
+    def get_instance(cls, dbname: str, connect_kwargs: dict, on_close=None) -> "PgConnectionPool":
+        """
+        依資料庫名稱取得共用的 pool
+        :param connect_kwargs: psycopg2.connect 的參數 (host, port, user, password)
+        """
+        pool = cls._instances.get(dbname)
+        if pool is None:
+            with cls._instances_lock:
+                pool = cls._instances.get(dbname)
+                if pool is None:
+                    pool = cls(
+                        dbname=dbname,
+                        connect=lambda: psycopg2.connect(dbname=dbname, **connect_kwargs),
+                        min_size=int(os.getenv("POSTGRES_POOL_MIN_SIZE", 1)),
+                        max_size=int(os.getenv("POSTGRES_POOL_MAX_SIZE", 5)),
+                        max_lifetime_sec=float(os.getenv("POSTGRES_POOL_MAX_LIFETIME_SEC", 1800)),
+                        wait_timeout_sec=float(os.getenv("POSTGRES_POOL_WAIT_TIMEOUT_SEC", 5)),
+                        health_check_idle_sec=float(os.getenv("POSTGRES_POOL_HEALTH_CHECK_IDLE_SEC", 10)),
+                        on_close=on_close,
+                    )
+                    cls._instances[dbname] = pool
+        return pool
+
+    @classmethod
+    def all_stats(cls) -> Dict[str, dict]:
+        """:return: {dbname: stats}"""
+        with cls._instances_lock:
+            pools = list(cls._instances.values())
+        return {pool.dbname: pool.stats() for pool in pools}
+
+    @classmethod
+    def close_all_instances(cls):
+        with cls._instances_lock:
+            pools, cls._instances = list(cls._instances.values()), {}
+        for pool in pools:
+            pool.close()
+
+    def _total(self) -> int:
+        return len(self._idle) + self._in_use + self._pending
+
+    def _is_expired(self, conn, now: float) -> bool:
+        return now - self._created_at.get(id(conn), now) >= self.max_lifetime_sec
+
+    def _close_connection(self, conn):
+        """@note 不需要持有 self._cond"""
+        try:
+            if self.on_close is not None:
+                self.on_close(conn)
+        except Exception as e:
+            print(f"PgConnectionPool[{self.dbname}] on_close failed: {e}")
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _forget(self, conn):
+        """@note 需持有 self._cond"""
+        self._created_at.pop(id(conn), None)
+        self._stats["closed"] += 1
+
+    def _new_connection(self) -> extensions.connection:
+        """
+        建立新連線 (呼叫前已在 _pending 預留名額)
+        """
+        try:
+            conn = self.connect()
+        except Exception:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._pending -= 1
+            self._created_at[id(conn)] = time.monotonic()
+            self._stats["created"] += 1
+        return conn
+
+    def _is_healthy(self, conn, idle_sec: float) -> bool:
+        if conn.closed or conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if idle_sec < self.health_check_idle_sec:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _warm_up(self):
+        """第一次使用時先建立 min_size 個連線"""
+        with self._cond:
+            if self._warmed_up:
+                return
+            self._warmed_up = True
+        while True:
+            with self._cond:
+                if self._closed or self._total() >= self.min_size:
+                    return
+                self._pending += 1
+            try:
+                conn = self._new_connection()
+            except psycopg2.Error as e:
+                print(f"PgConnectionPool[{self.dbname}] failed to warm up: {e}")
+                return
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def acquire(self, timeout: Optional[float] = None) -> extensions.connection:
+        """
+        取出一個連線 (閒置的優先，其次建立新連線，都沒有時等待歸還)
+        :param timeout: 最多等待的秒數，None 使用 wait_timeout_sec
+        :raise PgPoolTimeoutError: 等待逾時
+        """
+        if not self._warmed_up:
+            self._warm_up()
+        timeout = self.wait_timeout_sec if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise psycopg2.pool.PoolError(f"Connection pool {self.dbname} is closed")
+                candidate = None
+                if self._idle:
+                    candidate = self._idle.pop() # LIFO: 最近使用的連線最可能還活著
+                    self._in_use += 1
+                elif self._total() < self.max_size:
+                    self._pending += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["wait_timeouts"] += 1
+                        raise PgPoolTimeoutError(
+                            f"Timed out after {timeout}s waiting for a connection to {self.dbname} (max_size={self.max_size})"
+                        )
+                    if not waited:
+                        waited = True
+                        self._stats["waits"] += 1
+                    started = time.monotonic()
+                    self._cond.wait(remaining)
+                    self._stats["wait_time_sec"] += time.monotonic() - started
+                    continue
+
+            if candidate is None:
+                conn = self._new_connection()
+                with self._cond:
+                    self._in_use += 1
+                    self._checkout()
+                return conn
+
+            conn, released_at = candidate
+            now = time.monotonic()
+            expired = self._is_expired(conn, now)
+            if not expired and self._is_healthy(conn, now - released_at):
+                with self._cond:
+                    self._checkout()
+                return conn
+            # 連線過期或已失效，關閉後重新取得
+            with self._cond:
+                self._in_use -= 1
+                self._forget(conn)
+                self._stats["expired" if expired else "health_check_failures"] += 1
+                self._cond.notify()
+            self._close_connection(conn)
+
+    def _checkout(self):
+        """@note 需持有 self._cond"""
+        self._stats["checkouts"] += 1
+        self._stats["max_in_use"] = max(self._stats["max_in_use"], self._in_use)
+
+    def release(self, conn: extensions.connection, discard: bool = False):
+        """
+        歸還連線；未結束的 transaction 會被 rollback
+        :param discard: True 表示連線已不可用，直接關閉
+        """
+        if not discard and not conn.closed:
+            try:
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            except psycopg2.Error:
+                discard = True
+        with self._cond:
+            self._in_use -= 1
+            discard = discard or conn.closed or self._closed or self._is_expired(conn, time.monotonic())
+            if discard:
+                self._forget(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if discard:
+            self._close_connection(conn)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True # 連線中斷
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def close(self):
+        """關閉所有閒置連線，使用中的連線在歸還時關閉"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            for conn, _ in idle:
+                self._forget(conn)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close_connection(conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "dbname": self.dbname,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                **self._stats,
+                "wait_time_sec": round(self._stats["wait_time_sec"], 3),
+            }
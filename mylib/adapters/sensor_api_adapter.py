@@ -75,6 +75,18 @@ class SensorAPIAdapter:
         summary_json = response.json()
         return summary_json
 
-    
-    
-    
\ No newline at end of file
+    @classmethod
+    def fetch_status_sensor_value(cls) -> dict:
+        """
+        @note api response from /api/v1/cdu/status/sensor_value
+            {
+                "temp_coolant_supply": 0,
+                "temp_coolant_return": 0,
+                ...
+                "fan8_speed": 0
+            }
+        """
+        url = f"{os.environ['ITG_REST_HOST']}/api/v1/cdu/status/sensor_value"
+        response = HttpRequestUtil.send_get(url, {})
+        sensor_value_json = response.json()
+        return sensor_value_json
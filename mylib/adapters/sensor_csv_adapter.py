@@ -1,13 +1,17 @@
 # mylib/adapters/sensor_csv_adapter.py
 
 import os
-import glob
-import csv
+import time
+import atexit
+import signal
+import threading
 from datetime import datetime
-from functools import lru_cache
-from mylib.models.sensor_log_model import SensorLogModel
 from mylib.models.sensor_log_model_factory import SensorLogModelFactory
-from cachetools import cached, TTLCache
+from mylib.adapters.sensor_csv_tailer import SensorCsvTailer
+from mylib.adapters.sensor_csv_decoder import SensorCsvRowDecoder
+from mylib.adapters.sensor_csv_parallel_loader import SensorCsvParallelLoader
+from mylib.adapters.sensor_history_store import SensorHistoryStore
+from mylib.adapters.sensor_history_persistence import SensorHistoryPersistence
 
 
 class SensorCsvAdapter:
@@ -25,63 +29,254 @@ class SensorCsvAdapter:
 
     @classmethod
     def _get_root_path(cls) -> str | None:
-        """獲取並驗證日誌根目錄是否存在。"""
-        if not os.path.isdir(cls.SENSOR_ROOT):
-            print(f"Warning: Telemetry log directory not found at '{cls.SENSOR_ROOT}'")
+        """
+        獲取並驗證日誌根目錄是否存在。
+        @note 目錄不存在時，POLL_INTERVAL_SEC 內直接回傳 None 不再檢查；警告只在目錄由存在變為不存在時輸出一次
+        """
+        root_path = cls.SENSOR_ROOT
+        missing_path, missing_until = cls._missing_root
+        if missing_path == root_path and time.monotonic() < missing_until:
+            return None
+        if not os.path.isdir(root_path):
+            if missing_path != root_path:
+                print(f"Warning: Telemetry log directory not found at '{root_path}'")
+            cls._missing_root = (root_path, time.monotonic() + cls.POLL_INTERVAL_SEC)
             return None
-        return cls.SENSOR_ROOT
+        cls._missing_root = (None, 0.0)
+        return root_path
+
+    # 兩次檢查檔案新增內容的最短間隔 (秒)
+    POLL_INTERVAL_SEC = float(os.getenv("TELEMETRY_CSV_POLL_INTERVAL_SEC", "5"))
+
+    # 歷史資料 ring buffer 的容量 (筆數)，預設為 DAYS_TO_LOAD 天的 1Hz 資料
+    HISTORY_CAPACITY = int(os.getenv("TELEMETRY_HISTORY_CAPACITY", str(DAYS_TO_LOAD * 86400)))
+
+    # 歷史資料的存檔目錄，重新啟動時直接載入 (空字串表示不存檔)
+    HISTORY_CACHE_DIR = os.getenv("TELEMETRY_HISTORY_CACHE_DIR", "")
+    # 兩次存檔的最短間隔 (秒)，每次只附加新增的資料
+    HISTORY_PERSIST_INTERVAL_SEC = float(os.getenv("TELEMETRY_HISTORY_PERSIST_INTERVAL_SEC", "60"))
+
+    # true: 每一行都以 pydantic model 驗證 (較慢)；false: 使用依 header 編譯的 SensorCsvRowDecoder
+    STRICT_ROW_VALIDATION = os.getenv("TELEMETRY_CSV_STRICT_VALIDATION", "false").lower() == "true"
+
+    # 冷啟動時平行解析 CSV 的 worker process 數量 (<= 1 表示不使用 process pool)
+    INGEST_WORKERS = int(os.getenv("TELEMETRY_CSV_INGEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # 每個 worker 一次解析的大小 (bytes)
+    INGEST_CHUNK_BYTES = int(os.getenv("TELEMETRY_CSV_INGEST_CHUNK_BYTES", str(16 * 1024 * 1024)))
+    # CSV 總大小小於此值時在目前的 process 內解析 (bytes)
+    INGEST_PARALLEL_MIN_BYTES = int(os.getenv("TELEMETRY_CSV_INGEST_PARALLEL_MIN_BYTES", str(8 * 1024 * 1024)))
+
+    _tailer: SensorCsvTailer | None = None
+    _tailer_lock = threading.Lock()
+    _last_poll_time = 0.0
+    _persistence: SensorHistoryPersistence | None = None
+    _last_persist_time = 0.0
+    _atexit_registered = False
+    _refresh_thread: threading.Thread | None = None
+    _refresh_stop = threading.Event()
+    _sigterm_handler_installed = False
+    _missing_root: tuple = (None, 0.0) # (不存在的日誌目錄, 下一次檢查的時間)
 
     @classmethod
-    # @lru_cache(maxsize=1)  # 使用LRU快取，避免重複讀取和處理檔案
-    @cached(cache=TTLCache(maxsize=2, ttl=60))
-    def get_all_sensor_data_as_list_of_dicts(cls) -> list[dict]:
-        """
-        掃描日誌目錄，讀取最近 N 天的 CSV 檔案，並將它們合併成一個按時間排序的字典列表。
+    def _parse_row(cls, row: dict) -> dict | None:
+        # 核心步驟：將 'time' 字串轉換為 datetime 物件
+        try:
+            row["time"] = datetime.fromisoformat(row["time"])
+        except (ValueError, KeyError, TypeError):
+            # 如果時間格式錯誤或沒有 'time' 欄位，則跳過此行
+            return None
+        # select fields: fan1-6 for customer SMC
+        sensor_log = SensorLogModelFactory.create_model(row)
+        return sensor_log.to_dict()
 
-        Returns:
-            A list of dictionaries containing all sensor data, or an empty list if no data found.
-        """
-        root_path = cls._get_root_path()
-        if not root_path:
-            return []
+    @classmethod
+    def _compile_row_decoder(cls, header: list) -> SensorCsvRowDecoder:
+        model_class = SensorLogModelFactory.get_model(os.getenv("PROJ_NAME"))
+        return SensorCsvRowDecoder.compile(model_class, tuple(header))
 
-        all_files = sorted(
-            glob.glob(os.path.join(root_path, "sensor.log.*.csv")), reverse=True
+    @classmethod
+    def _create_bulk_loader(cls, store: SensorHistoryStore) -> SensorCsvParallelLoader:
+        return SensorCsvParallelLoader(
+            SensorLogModelFactory.get_model(os.getenv("PROJ_NAME")),
+            store.numeric_names,
+            store.object_names,
+            workers=cls.INGEST_WORKERS,
+            chunk_bytes=cls.INGEST_CHUNK_BYTES,
+            min_parallel_bytes=cls.INGEST_PARALLEL_MIN_BYTES,
         )
-        files_to_process = all_files[: cls.DAYS_TO_LOAD]
 
-        if not files_to_process:
-            print(f"Warning: No sensor CSV files found to process.")
-            return []
+    @classmethod
+    def _create_history_store(cls) -> SensorHistoryStore:
+        metric_definitions = SensorLogModelFactory.get_model(os.getenv("PROJ_NAME")).to_metric_definitions()
+        return SensorHistoryStore.from_metric_definitions(metric_definitions, capacity=cls.HISTORY_CAPACITY)
 
-        print(
-            f"Total files found: {len(all_files)}. Processing the latest {len(files_to_process)} files (up to {cls.DAYS_TO_LOAD} days)."
-        )
+    @classmethod
+    def _get_tailer(cls, root_path: str) -> SensorCsvTailer:
+        def is_outdated(tailer: SensorCsvTailer) -> bool:
+            return (
+                tailer is None
+                or tailer.root_path != root_path
+                or tailer.days_to_load != cls.DAYS_TO_LOAD
+                or tailer.sink.capacity != cls.HISTORY_CAPACITY
+                or (tailer.compile_row_decoder is None) != cls.STRICT_ROW_VALIDATION
+            )
 
-        all_records = []
-        for path in reversed(files_to_process):
+        tailer = cls._tailer
+        if is_outdated(tailer):
+            with cls._tailer_lock:
+                tailer = cls._tailer
+                if is_outdated(tailer):
+                    store = cls._create_history_store()
+                    tailer = SensorCsvTailer(
+                        root_path,
+                        cls._parse_row,
+                        store,
+                        days_to_load=cls.DAYS_TO_LOAD,
+                        compile_row_decoder=None if cls.STRICT_ROW_VALIDATION else cls._compile_row_decoder,
+                        bulk_loader=None if cls.STRICT_ROW_VALIDATION else cls._create_bulk_loader(store),
+                    )
+                    cls._persistence = cls._load_persisted_history(tailer)
+                    cls._tailer = tailer
+                    cls._last_poll_time = 0.0
+        return tailer
+
+    @classmethod
+    def _load_persisted_history(cls, tailer: SensorCsvTailer) -> SensorHistoryPersistence | None:
+        """
+        載入存檔並還原 CSV 讀取進度，之後的 poll() 只解析存檔之後寫入的資料
+        """
+        if not cls.HISTORY_CACHE_DIR:
+            return None
+        persistence = SensorHistoryPersistence(cls.HISTORY_CACHE_DIR)
+        try:
+            cursors = persistence.load(tailer.sink)
+        except Exception as e:
+            print(f"Failed to load telemetry history cache: {e}")
+            cursors = None
+        root_path = os.path.abspath(tailer.root_path)
+        if cursors is not None and all(os.path.dirname(os.path.abspath(c["path"])) == root_path for c in cursors):
+            tailer.restore_cursors(cursors)
+            print(f"Telemetry history cache loaded. Total records: {len(tailer.sink)}")
+        elif len(tailer.sink):
+            tailer.sink.clear() # 存檔來自其他目錄
+
+        if not cls._atexit_registered:
+            atexit.register(cls.persist_history)
+            cls._atexit_registered = True
+        cls._last_persist_time = time.monotonic()
+        return persistence
+
+    @classmethod
+    def persist_history(cls):
+        """
+        把目前的歷史資料寫入存檔 (只附加上次存檔之後新增的資料)
+        """
+        tailer, persistence = cls._tailer, cls._persistence
+        if tailer is None or persistence is None:
+            return
+        with tailer.lock:
             try:
-                with open(path, mode="r", encoding="utf-8") as f:
-                    reader = csv.DictReader(f)  # 使用 DictReader 自動處理 header
-                    for row in reader:
-                        # 核心步驟：將 'time' 字串轉換為 datetime 物件
-                        try:
-                            row["time"] = datetime.fromisoformat(row["time"])
-                        except (ValueError, KeyError):
-                            # 如果時間格式錯誤或沒有 'time' 欄位，則跳過此行
-                            continue
-                        # select fields: fan1-6 for customer SMC
-                        # sensor_log = SensorLogModel.model_validate(row) # parse_obj() is deprecated
-                        sensor_log = SensorLogModelFactory.create_model(row)
-                        all_records.append(sensor_log.to_dict())
+                persistence.save(tailer.sink, tailer.export_cursors())
             except Exception as e:
-                print(f"Error reading or processing file {path}: {e}")
-                continue
+                print(f"Failed to save telemetry history cache: {e}")
+        cls._last_persist_time = time.monotonic()
 
-        # 確保所有記錄都按時間排序，這是後續處理的基礎
-        all_records.sort(key=lambda x: x["time"])
+    @classmethod
+    def start_background_refresh(cls):
+        """
+        app 啟動時呼叫: 在背景 thread 載入存檔並補讀 CSV，第一個 request 不必等待冷啟動。
+        之後每 POLL_INTERVAL_SEC 讀取新資料，並依 HISTORY_PERSIST_INTERVAL_SEC 定期存檔 (不依賴 request)。
+        @note 必須在 main thread 呼叫，才能註冊 SIGTERM handler
+        """
+        cls._install_sigterm_handler()
+        with cls._tailer_lock:
+            if cls._refresh_thread is not None and cls._refresh_thread.is_alive():
+                return
+            cls._refresh_stop.clear()
+            cls._refresh_thread = threading.Thread(target=cls._run_refresh, name="SensorHistoryRefresh", daemon=True)
+            cls._refresh_thread.start()
 
-        print(
-            f"Successfully processed and merged all sensor data. Total records: {len(all_records)}"
-        )
-        return all_records
+    @classmethod
+    def stop_background_refresh(cls, timeout: float = 5.0):
+        cls._refresh_stop.set()
+        thread, cls._refresh_thread = cls._refresh_thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    @classmethod
+    def _run_refresh(cls):
+        while not cls._refresh_stop.is_set():
+            try:
+                cls.get_sensor_history_store()
+            except Exception as e:
+                print(f"Failed to refresh telemetry history: {e}")
+            cls._refresh_stop.wait(max(cls.POLL_INTERVAL_SEC, 1.0))
+
+    @classmethod
+    def _install_sigterm_handler(cls):
+        """
+        systemd/docker 以 SIGTERM 停止服務時不會執行 atexit，收到 SIGTERM 時先存檔再交給原本的 handler
+        """
+        if cls._sigterm_handler_installed or threading.current_thread() is not threading.main_thread():
+            return
+        previous_handler = signal.getsignal(signal.SIGTERM)
+
+        def handle_sigterm(signum, frame):
+            cls.persist_history()
+            if callable(previous_handler):
+                previous_handler(signum, frame)
+            elif previous_handler != signal.SIG_IGN:
+                raise SystemExit(128 + signum)
+
+        signal.signal(signal.SIGTERM, handle_sigterm)
+        cls._sigterm_handler_installed = True
+
+    @classmethod
+    def reset(cls):
+        """清除已讀取的 offset 與資料 (測試用)"""
+        cls.stop_background_refresh()
+        with cls._tailer_lock:
+            cls._tailer = None
+            cls._persistence = None
+            cls._last_poll_time = 0.0
+            cls._missing_root = (None, 0.0)
+
+    @classmethod
+    def get_sensor_history_store(cls) -> SensorHistoryStore:
+        """
+        讀取最近 N 天的 CSV 檔案到欄式的 SensorHistoryStore。
+        第一次呼叫時讀取全部檔案 (有存檔時先載入存檔)，之後只解析各檔案新附加的行 (見 SensorCsvTailer)。
+
+        Returns:
+            SensorHistoryStore (共用資料，請勿修改)，找不到日誌目錄時回傳空的 store
+        """
+        root_path = cls._get_root_path()
+        if not root_path:
+            return cls._create_history_store()
+
+        tailer = cls._get_tailer(root_path)
+        now = time.monotonic()
+        if cls._last_poll_time and now - cls._last_poll_time < cls.POLL_INTERVAL_SEC:
+            return tailer.sink
+        is_first_poll = not cls._last_poll_time
+        cls._last_poll_time = now
+
+        changed = tailer.poll()
+        if changed and cls._persistence and (is_first_poll or now - cls._last_persist_time >= cls.HISTORY_PERSIST_INTERVAL_SEC):
+            cls.persist_history()
+        if is_first_poll:
+            print(
+                f"Successfully processed and merged all sensor data. Total records: {len(tailer.sink)}"
+            )
+        return tailer.sink
+
+    @classmethod
+    def get_all_sensor_data_as_list_of_dicts(cls) -> list[dict]:
+        """
+        讀取最近 N 天的 CSV 檔案，並將它們合併成一個按時間排序的字典列表。
+        @note 由 get_sensor_history_store() 轉換而來，資料量大時請直接使用 store
+
+        Returns:
+            A list of dictionaries containing all sensor data, or an empty list if no data found.
+        """
+        return cls.get_sensor_history_store().to_records()
@@ -0,0 +1,239 @@
+import math
+from array import array
+from datetime import datetime, timezone
+from functools import lru_cache, partial
+from operator import attrgetter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union, get_args, get_origin
+from mylib.models.sensor_log_model import SensorLogBaseModel
+from mylib.adapters.sensor_history_store import to_epoch_seconds
+
+"""
+依 CSV header 編譯一次的 row decoder，取代每一行都建立 pydantic model (SensorLogModelFactory.create_model(row).to_dict())。
+
+@note
+    (1) 編譯時決定「欄位索引 -> 輸出 key (alias) + 轉換函式」，解析時只做 list 索引與轉換。
+    (2) 轉換規則與 SensorLogBaseModel.auto_clean 相同: float/int 欄位轉換失敗 ("N/A"、空字串) 為 None，
+        其他欄位保留原始字串；bool 欄位依 pydantic 的寬鬆規則轉換，無法轉換時為 None (pydantic 會讓整行失敗)。
+    (3) 輸出的 dict 包含 model 的所有欄位 (CSV 沒有的欄位為 None)，與 to_dict() 相同。
+    (4) time 以 datetime.fromisoformat 解析 (C 實作)，格式錯誤時略過此行。
+    (5) 需要完整 pydantic 驗證時，改用 SensorCsvAdapter 的 strict 模式 (TELEMETRY_CSV_STRICT_VALIDATION)。
+    (6) decode_columns() 直接輸出 SensorHistoryStore 的欄位 (array('d') / list)，不建立每一行的 dict:
+        先以 zip(*rows) 轉置，每個欄位以 map(float, ...) 整欄轉換 (C 迴圈)，
+        欄位內有 "N/A" 等無法轉換的值、欄位數不足或 time 無法解析時，才改為逐格轉換。
+
+Usage:
+    decoder = SensorCsvRowDecoder.compile(SidecarSensorLogModel, header)
+    record = decoder(["2025-07-01T00:00:00", "25.1", "N/A", ...])
+"""
+
+_NA_VALUES = frozenset(["", "N/A", "n/a", "N.A.", "n.a."])
+_TRUE_VALUES = frozenset(["1", "on", "t", "true", "y", "yes"])
+_FALSE_VALUES = frozenset(["0", "off", "f", "false", "n", "no"])
+
+
+def _to_float(value: str) -> Optional[float]:
+    if value in _NA_VALUES:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value: str) -> Optional[int]:
+    if value in _NA_VALUES:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_bool(value: str) -> Optional[bool]:
+    if value is None:
+        return None
+    value = value.strip().lower()
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    return None
+
+
+def _to_str(value: str) -> str:
+    return value
+
+
+def _to_float_or_nan(value: str) -> float:
+    if value in _NA_VALUES:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+_as_utc = partial(datetime.replace, tzinfo=timezone.utc)
+
+
+def _decode_numeric_column(values: Sequence[str], convert: Callable[[str], object]) -> array:
+    if convert is _to_float:
+        try:
+            return array("d", map(float, values))
+        except ValueError:
+            return array("d", map(_to_float_or_nan, values))
+    return array("d", map(_or_nan(convert), values))
+
+
+def _or_nan(convert: Callable[[str], object]) -> Callable[[str], float]:
+    def convert_or_nan(value: str) -> float:
+        value = convert(value)
+        return math.nan if value is None else float(value)
+    return convert_or_nan
+
+
+class SensorCsvRowDecoder:
+    TIME_FIELD = "time"
+
+    def __init__(self, model_class: Type[SensorLogBaseModel], header: Sequence[str]):
+        """
+        :param model_class: ex: SidecarSensorLogModel, InrowcduSensorLogModel
+        :param header: CSV header
+        """
+        self.model_class = model_class
+        self.header = tuple(header)
+        self.keys: Tuple[str, ...] = tuple(field_info.alias or name for name, field_info in model_class.model_fields.items())
+
+        # header 的欄位可以是 alias 或 field name (與 validate_by_name=True 相同)
+        targets = {}
+        for name, field_info in model_class.model_fields.items():
+            key = field_info.alias or name
+            targets.setdefault(name, (key, field_info.annotation))
+            targets[key] = (key, field_info.annotation)
+
+        self.time_index: Optional[int] = None
+        plan: List[Tuple[int, str, Callable]] = []
+        used_keys = set()
+        for index, column in enumerate(self.header):
+            target = targets.get(column)
+            if target is None or target[0] in used_keys:
+                continue # 不在 model 內的欄位、重複的欄位
+            key, annotation = target
+            used_keys.add(key)
+            if key == self.TIME_FIELD:
+                self.time_index = index
+            else:
+                plan.append((index, key, self._get_converter(annotation)))
+        self._plan = tuple(plan)
+
+    @classmethod
+    @lru_cache(maxsize=32)
+    def compile(cls, model_class: Type[SensorLogBaseModel], header: Tuple[str, ...]) -> "SensorCsvRowDecoder":
+        """同一個 model 與 header 只編譯一次"""
+        return cls(model_class, header)
+
+    @staticmethod
+    def _get_converter(annotation) -> Callable[[str], object]:
+        types = set(get_args(annotation)) if get_origin(annotation) is Union else {annotation}
+        if float in types:
+            return _to_float
+        if int in types:
+            return _to_int
+        if bool in types:
+            return _to_bool
+        return _to_str
+
+    def __call__(self, row: Sequence[str]) -> Optional[dict]:
+        """
+        :param row: csv.reader 產生的一行
+        :return: 與 SensorLogModel.to_dict() 相同格式的 dict，time 無法解析時回傳 None
+        """
+        time_index = self.time_index
+        if time_index is None or time_index >= len(row):
+            return None
+        try:
+            ts = datetime.fromisoformat(row[time_index])
+        except ValueError:
+            return None
+        record = dict.fromkeys(self.keys)
+        record[self.TIME_FIELD] = ts
+        if len(row) >= len(self.header):
+            for index, key, convert in self._plan:
+                record[key] = convert(row[index])
+        else:
+            # 欄位數不足 (寫到一半的行)
+            for index, key, convert in self._plan:
+                if index < len(row):
+                    record[key] = convert(row[index])
+        return record
+
+    def decode_columns(
+        self, rows: Iterable[Sequence[str]], numeric_names: Sequence[str], object_names: Sequence[str]
+    ) -> Tuple[array, Dict[str, array], Dict[str, list], int]:
+        """
+        把多行資料直接解析成 SensorHistoryStore 的欄位
+        :param rows: csv.reader 產生的行
+        :param numeric_names: 數值欄位 (缺值為 NaN)
+        :param object_names: 非數值欄位
+        :return: (timestamps (epoch 秒), {數值欄位: array('d')}, {非數值欄位: list}, 解析的行數)
+        """
+        rows = list(filter(None, rows))
+        parsed_rows = len(rows)
+        width = len(self.header)
+        columns = list(zip(*rows)) if rows and set(map(len, rows)) == {width} else None
+        if columns is not None and self.time_index is not None:
+            try:
+                times = list(map(datetime.fromisoformat, columns[self.time_index]))
+            except ValueError:
+                times = None
+            if times is not None and not any(map(attrgetter("tzinfo"), times)):
+                timestamps = array("d", map(datetime.timestamp, map(_as_utc, times)))
+                numeric, objects = {}, {}
+                for index, key, convert in self._plan:
+                    if key in numeric_names:
+                        numeric[key] = _decode_numeric_column(columns[index], convert)
+                    elif key in object_names:
+                        objects[key] = list(map(convert, columns[index]))
+                return (timestamps, *self._fill_missing_columns(len(timestamps), numeric, objects, numeric_names, object_names), parsed_rows)
+        return (*self._decode_rows(rows, numeric_names, object_names), parsed_rows)
+
+    def _decode_rows(self, rows: List[Sequence[str]], numeric_names: Sequence[str], object_names: Sequence[str]):
+        """逐行逐格轉換 (欄位數不足、time 無法解析、有時區等少見的情況)"""
+        timestamps = array("d")
+        numeric = {name: array("d") for name in numeric_names}
+        objects = {name: [] for name in object_names}
+        numeric_plan, object_plan = [], []
+        for index, key, convert in self._plan:
+            if key in numeric:
+                numeric_plan.append((index, numeric[key].append, _to_float_or_nan if convert is _to_float else _or_nan(convert)))
+            elif key in objects:
+                object_plan.append((index, objects[key].append, convert))
+
+        time_index, width = self.time_index, len(self.header)
+        for row in rows if time_index is not None else ():
+            if len(row) < width:
+                row = list(row) + [None] * (width - len(row)) # 欄位數不足 (寫到一半的行)
+            try:
+                ts = to_epoch_seconds(datetime.fromisoformat(row[time_index]))
+            except (TypeError, ValueError):
+                continue
+            timestamps.append(ts)
+            for index, append, convert in numeric_plan:
+                append(convert(row[index]))
+            for index, append, convert in object_plan:
+                append(convert(row[index]))
+
+        return (timestamps, *self._fill_missing_columns(len(timestamps), numeric, objects, numeric_names, object_names))
+
+    @staticmethod
+    def _fill_missing_columns(size: int, numeric: Dict[str, array], objects: Dict[str, list], numeric_names, object_names):
+        """CSV 沒有的欄位以 NaN / None 補齊"""
+        numeric = {
+            name: numeric[name] if name in numeric and len(numeric[name]) == size else array("d", [math.nan]) * size
+            for name in numeric_names
+        }
+        objects = {
+            name: objects[name] if name in objects and len(objects[name]) == size else [None] * size
+            for name in object_names
+        }
+        return numeric, objects
@@ -0,0 +1,191 @@
+import os
+import csv
+import multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+from mylib.models.sensor_log_model import SensorLogBaseModel
+from mylib.adapters.sensor_csv_decoder import SensorCsvRowDecoder
+
+"""
+冷啟動 (沒有讀取進度) 時，以多個 process 平行解析多天的 sensor CSV。
+
+@note
+    (1) 每個檔案依 chunk_bytes 切成數段 (切點對齊換行)，每段交給一個 worker 以 SensorCsvRowDecoder.decode_columns() 解析。
+    (2) worker 回傳欄位的 bytes (array('d').tobytes()) 而不是 pickle 每一行的 dict，傳輸量與反序列化成本都小很多。
+    (3) 結果依檔名順序、段落順序合併，檔案內的資料本來就依時間遞增，不需要整體排序。
+    (4) 資料量小於 min_parallel_bytes 或 workers <= 1 時，在目前的 process 內解析 (省去建立 process 的成本)。
+    (5) 最新的檔案可能正在寫入，最後一行若沒有換行符號則不讀 (與 SensorCsvTailer 相同)。
+    (6) process 以 spawn 建立，避免在有其他 thread 的 process 內 fork。
+        spawn 的子 process 會以 __mp_main__ 重新 import 主程式 (app.py)，所以 app.py 在 import 時不可有副作用 (見 app.create_app())。
+
+Usage:
+    loader = SensorCsvParallelLoader(SidecarSensorLogModel, store.numeric_names, store.object_names, workers=4)
+    for file_columns in loader(paths):
+        store.extend_columns(file_columns.timestamps, file_columns.numeric, file_columns.objects)
+"""
+
+@dataclass
+class CsvFileColumns:
+    """
+    單一檔案的解析結果與讀取進度 (給 SensorCsvTailer 的 cursor)
+    :param path: 檔案路徑
+    :param inode: 用來判斷檔案是否被置換
+    :param offset: 已讀取的 byte offset
+    :param header: CSV header (檔案是空的時為 None)
+    :param tail_bytes: offset 之前的最後幾個 byte
+    :param parsed_rows: 解析的行數 (含 time 無法解析而略過的行)
+    """
+    path: str
+    inode: int = 0
+    offset: int = 0
+    header: Optional[List[str]] = None
+    tail_bytes: bytes = b""
+    parsed_rows: int = 0
+    timestamps: array = field(default_factory=lambda: array("d"))
+    numeric: Dict[str, array] = field(default_factory=dict)
+    objects: Dict[str, list] = field(default_factory=dict)
+
+
+def parse_csv_chunk(
+    path: str,
+    start: int,
+    end: int,
+    header: Sequence[str],
+    model_class: Type[SensorLogBaseModel],
+    numeric_names: Sequence[str],
+    object_names: Sequence[str],
+    is_partial_tail: bool,
+) -> dict:
+    """
+    解析檔案 [start, end) 的內容 (worker 執行)
+    :param is_partial_tail: 最後一行可能寫到一半 (最新檔案的最後一段)
+    :return: {"end": 實際讀到的位置, "parsed_rows": int, "timestamps": bytes, "numeric": {name: bytes}, "objects": {name: list}}
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        chunk = f.read(max(0, end - start))
+    if is_partial_tail:
+        chunk = chunk[:chunk.rfind(b"\n") + 1]
+    decoder = SensorCsvRowDecoder.compile(model_class, tuple(header))
+    timestamps, numeric, objects, parsed_rows = decoder.decode_columns(
+        csv.reader(chunk.decode("utf-8").splitlines()), numeric_names, object_names
+    )
+    return {
+        "end": start + len(chunk),
+        "parsed_rows": parsed_rows,
+        "timestamps": timestamps.tobytes(),
+        "numeric": {name: col.tobytes() for name, col in numeric.items()},
+        "objects": objects,
+    }
+
+
+class SensorCsvParallelLoader:
+    TAIL_BYTES_SIZE = 64
+
+    def __init__(
+        self,
+        model_class: Type[SensorLogBaseModel],
+        numeric_names: Sequence[str],
+        object_names: Sequence[str],
+        workers: int = 4,
+        chunk_bytes: int = 16 * 1024 * 1024,
+        min_parallel_bytes: int = 8 * 1024 * 1024,
+    ):
+        """
+        :param model_class: ex: SidecarSensorLogModel
+        :param numeric_names: SensorHistoryStore.numeric_names
+        :param object_names: SensorHistoryStore.object_names
+        :param workers: worker process 數量
+        :param chunk_bytes: 每個 worker 一次解析的大小
+        :param min_parallel_bytes: 總大小小於此值時在目前的 process 內解析
+        """
+        if chunk_bytes <= 0:
+            raise ValueError(f"chunk_bytes must be positive: {chunk_bytes}")
+        self.model_class = model_class
+        self.numeric_names = tuple(numeric_names)
+        self.object_names = tuple(object_names)
+        self.workers = workers
+        self.chunk_bytes = chunk_bytes
+        self.min_parallel_bytes = min_parallel_bytes
+
+    def _read_header(self, f, is_latest: bool) -> Tuple[Optional[List[str]], int]:
+        """:return: (header, header 之後的 offset)"""
+        line = f.readline()
+        if not line or (is_latest and not line.endswith(b"\n")):
+            return None, 0
+        header = next(csv.reader([line.decode("utf-8").rstrip("\r\n")]), None)
+        return (header, len(line)) if header else (None, 0)
+
+    def _split(self, f, start: int, size: int) -> List[Tuple[int, int]]:
+        """把 [start, size) 切成約 chunk_bytes 的段落，切點在換行之後"""
+        ranges = []
+        while start < size:
+            end = start + self.chunk_bytes
+            if end < size:
+                f.seek(end - 1)
+                f.readline()
+                end = f.tell()
+            end = min(end, size)
+            ranges.append((start, end))
+            start = end
+        return ranges
+
+    def _plan(self, paths: List[str]) -> Tuple[List[CsvFileColumns], List[tuple]]:
+        files, tasks = [], []
+        for i, path in enumerate(paths):
+            is_latest = (i == len(paths) - 1)
+            stat = os.stat(path)
+            file_columns = CsvFileColumns(path=path, inode=stat.st_ino)
+            with open(path, "rb") as f:
+                file_columns.header, data_start = self._read_header(f, is_latest)
+                file_columns.offset = data_start
+                if file_columns.header is not None:
+                    ranges = self._split(f, data_start, stat.st_size)
+                    for j, (start, end) in enumerate(ranges):
+                        is_partial_tail = is_latest and j == len(ranges) - 1
+                        tasks.append((i, (
+                            path, start, end, file_columns.header,
+                            self.model_class, self.numeric_names, self.object_names, is_partial_tail,
+                        )))
+            files.append(file_columns)
+        return files, tasks
+
+    def __call__(self, paths: List[str]) -> List[CsvFileColumns]:
+        """
+        :param paths: 依檔名 (日期) 由舊到新，最後一個為最新的檔案
+        :return: 各檔案的解析結果 (順序與 paths 相同)
+        """
+        files, tasks = self._plan(paths)
+        total_bytes = sum(args[2] - args[1] for _, args in tasks)
+        if self.workers > 1 and len(tasks) > 1 and total_bytes >= self.min_parallel_bytes:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)), mp_context=context) as executor:
+                results = list(executor.map(parse_csv_chunk, *zip(*(args for _, args in tasks))))
+        else:
+            results = [parse_csv_chunk(*args) for _, args in tasks]
+
+        chunks: Dict[int, List[dict]] = {}
+        for (i, _), result in zip(tasks, results):
+            chunks.setdefault(i, []).append(result)
+        for i, file_columns in enumerate(files):
+            self._merge(file_columns, chunks.get(i, []))
+        return files
+
+    def _merge(self, file_columns: CsvFileColumns, chunks: List[dict]):
+        """依段落順序串接欄位，並計算讀取進度"""
+        file_columns.numeric = {name: array("d") for name in self.numeric_names}
+        file_columns.objects = {name: [] for name in self.object_names}
+        for chunk in chunks:
+            file_columns.timestamps.frombytes(chunk["timestamps"])
+            for name in self.numeric_names:
+                file_columns.numeric[name].frombytes(chunk["numeric"][name])
+            for name in self.object_names:
+                file_columns.objects[name].extend(chunk["objects"][name])
+            file_columns.parsed_rows += chunk["parsed_rows"]
+            file_columns.offset = chunk["end"]
+        if file_columns.offset:
+            with open(file_columns.path, "rb") as f:
+                f.seek(max(0, file_columns.offset - self.TAIL_BYTES_SIZE))
+                file_columns.tail_bytes = f.read(file_columns.offset - f.tell())
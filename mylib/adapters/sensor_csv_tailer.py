@@ -0,0 +1,281 @@
+import os
+import csv
+import glob
+import base64
+import threading
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional
+
+"""
+增量讀取 (tail) sensor CSV 檔案。
+每個檔案記住已讀取的 byte offset 與 header，之後只解析新寫入的行，並把新資料寫入 sink (SensorHistoryStore)。
+
+@note
+    (1) 檔名依日期命名 (sensor.log.<date>.csv)，同一檔案內的資料依時間附加，
+        因此歷史資料 = 依檔名順序串接各檔案的資料，新資料只需要附加在尾端。
+    (2) 每日輪替: 新檔案出現時從頭讀取；超出最近 N 天的檔案從 sink 的頭端移除。
+    (3) 檔案被截斷 (size < offset、offset 前的內容改變) 或被置換 (inode 改變) 時，該檔案重新讀取。
+        最新的檔案只需要移除 sink 尾端該檔案的資料；其他情況 (舊檔案被改寫、中間插入檔案) 全部重新讀取。
+    (4) 最新的檔案可能正在寫入，最後一行若沒有換行符號則留到下一次再讀。
+        無法解碼 (ex: 寫壞的 byte) 或解析失敗的行逐行略過；讀取失敗時 cursor 不前進，下一次重新讀取。
+    (5) sink 需提供: __len__()、extend_records(records)、drop_head(n)、drop_tail(n)、clear()
+    (6) 提供 compile_row_decoder 時，每個 header 編譯一次 decoder，直接解析 csv.reader 的 list (不建立 {header: cell})
+    (7) 提供 bulk_loader (ex: SensorCsvParallelLoader) 時，冷啟動與全部重新讀取改為整批解析成欄位，
+        以 sink.extend_columns() 寫入；bulk_loader 失敗時改回逐檔讀取。
+"""
+
+def iter_csv_rows(chunk: bytes, on_error: Callable[[Exception], None]):
+    """
+    逐行以 utf-8 解碼並以 csv 解析 chunk (略過空行)
+    無法解碼或解析的行 (ex: 寫壞的 byte) 呼叫 on_error(exception) 後略過，不影響後面的行
+    """
+    rows = csv.reader(_iter_lines(chunk, on_error))
+    while True:
+        try:
+            row = next(rows)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            on_error(e)
+            continue
+        if row:
+            yield row
+
+
+def _iter_lines(chunk: bytes, on_error: Callable[[Exception], None]):
+    for line in chunk.splitlines():
+        try:
+            yield line.decode("utf-8")
+        except UnicodeDecodeError as e:
+            on_error(e)
+
+
+@dataclass
+class CsvFileCursor:
+    """
+    :param path: 檔案路徑
+    :param inode: 用來判斷檔案是否被置換
+    :param offset: 已讀取的 byte offset
+    :param header: CSV header (尚未讀到時為 None)
+    :param tail_bytes: offset 之前的最後幾個 byte，用來判斷檔案是否被截斷後重寫
+    :param row_count: 此檔案已寫入 sink 的筆數
+    """
+    path: str
+    inode: int = 0
+    offset: int = 0
+    header: Optional[List[str]] = None
+    tail_bytes: bytes = b""
+    row_count: int = 0
+
+
+class SensorCsvTailer:
+    TAIL_BYTES_SIZE = 64
+
+    def __init__(
+        self,
+        root_path: str,
+        decode_row: Callable[[dict], Optional[dict]],
+        sink,
+        days_to_load: int = 7,
+        file_pattern: str = "sensor.log.*.csv",
+        compile_row_decoder: Optional[Callable[[List[str]], Callable[[List[str]], Optional[dict]]]] = None,
+        bulk_loader: Optional[Callable[[List[str]], list]] = None,
+    ):
+        """
+        :param root_path: CSV 目錄
+        :param decode_row: 把 {header: cell} 轉成一筆資料 (需有 "time")，回傳 None 表示略過此行
+        :param sink: 資料寫入的目標，ex: SensorHistoryStore
+        :param days_to_load: 只保留最近 N 個檔案 (1 天 1 個檔案)
+        :param compile_row_decoder: 由 header 產生 decoder (把 csv row 的 list 轉成一筆資料)，提供時取代 decode_row
+        :param bulk_loader: 整批解析多個檔案，回傳各檔案的 CsvFileColumns (順序與輸入相同)
+        """
+        self.root_path = root_path
+        self.decode_row = decode_row
+        self.compile_row_decoder = compile_row_decoder
+        self.bulk_loader = bulk_loader
+        self.sink = sink
+        self.days_to_load = days_to_load
+        self.file_pattern = file_pattern
+        self._cursors: Dict[str, CsvFileCursor] = {}
+        self.lock = threading.RLock()
+        self.parsed_row_count = 0 # 累計解析的行數 (觀察用)
+        self.skipped_row_count = 0 # 累計無法解碼或解析而略過的行數 (觀察用)
+
+    def list_files(self) -> List[str]:
+        """
+        :return: 最近 N 天的檔案，依檔名 (日期) 由舊到新
+        """
+        all_files = sorted(glob.glob(os.path.join(self.root_path, self.file_pattern)))
+        return all_files[-self.days_to_load:] if self.days_to_load > 0 else []
+
+    def export_cursors(self) -> List[dict]:
+        """
+        :return: 各檔案讀取進度，可存檔後以 restore_cursors() 還原
+        """
+        with self.lock:
+            states = []
+            for path in sorted(self._cursors.keys()):
+                state = asdict(self._cursors[path])
+                state["tail_bytes"] = base64.b64encode(state["tail_bytes"]).decode("ascii")
+                states.append(state)
+            return states
+
+    def restore_cursors(self, states: List[dict]):
+        """
+        還原讀取進度 (sink 的內容需與存檔時相同)。
+        檔案在這之後被截斷或置換時，下一次 poll() 會照一般流程重新讀取。
+        """
+        with self.lock:
+            self._cursors = {}
+            for state in states:
+                state = dict(state)
+                state["tail_bytes"] = base64.b64decode(state.get("tail_bytes") or b"")
+                cursor = CsvFileCursor(**state)
+                self._cursors[cursor.path] = cursor
+
+    def poll(self) -> bool:
+        """
+        讀取所有檔案新增的內容並寫入 sink
+        :return: sink 是否有變動
+        """
+        with self.lock:
+            files = self.list_files()
+            known = sorted(self._cursors.keys())
+            removed = [path for path in known if path not in files]
+            kept = [path for path in known if path in files]
+            added = [path for path in files if path not in self._cursors]
+
+            if not self._cursors and files and self.bulk_loader is not None:
+                return self._rebuild(files) # 冷啟動
+            if removed and known[:len(removed)] != removed:
+                return self._rebuild(files) # 中間的檔案消失
+            if added and kept and added[0] < kept[-1]:
+                return self._rebuild(files) # 在舊檔案之間插入新檔案
+
+            changed = False
+            if removed:
+                # ring buffer 可能已經丟掉最舊的部份資料
+                evicted = sum(c.row_count for c in self._cursors.values()) - len(self.sink)
+                removed_rows = sum(self._cursors.pop(path).row_count for path in removed)
+                self.sink.drop_head(removed_rows - max(0, evicted))
+                changed = True
+            for path in added:
+                self._cursors[path] = CsvFileCursor(path=path)
+
+            for i, path in enumerate(files):
+                cursor = self._cursors[path]
+                is_latest = (i == len(files) - 1)
+                has_later_rows = any(self._cursors[p].row_count for p in files[i + 1:])
+                try:
+                    reset, new_records = self._read_file(cursor, is_latest)
+                except Exception as e:
+                    print(f"Error reading or processing file {path}: {e}")
+                    continue
+                if (reset or new_records) and has_later_rows:
+                    # 舊檔案變動，資料無法直接附加在尾端
+                    return self._rebuild(files)
+                if reset:
+                    self.sink.drop_tail(cursor.row_count)
+                    cursor.row_count = 0
+                    changed = True
+                if new_records:
+                    self.sink.extend_records(new_records)
+                    cursor.row_count += len(new_records)
+                    changed = True
+            return changed
+
+    def _rebuild(self, files: List[str]) -> bool:
+        self._cursors = {path: CsvFileCursor(path=path) for path in files}
+        self.sink.clear()
+        if self.bulk_loader is not None and files:
+            try:
+                return self._bulk_load(files)
+            except Exception as e:
+                print(f"Error loading files in bulk, fall back to reading one by one: {e}")
+                self._cursors = {path: CsvFileCursor(path=path) for path in files}
+                self.sink.clear()
+        for i, path in enumerate(files):
+            cursor = self._cursors[path]
+            try:
+                _, new_records = self._read_file(cursor, i == len(files) - 1)
+            except Exception as e:
+                print(f"Error reading or processing file {path}: {e}")
+                continue
+            self.sink.extend_records(new_records)
+            cursor.row_count = len(new_records)
+        return True
+
+    def _bulk_load(self, files: List[str]) -> bool:
+        for file_columns in self.bulk_loader(files):
+            cursor = self._cursors[file_columns.path]
+            cursor.inode, cursor.offset = file_columns.inode, file_columns.offset
+            cursor.header, cursor.tail_bytes = file_columns.header, file_columns.tail_bytes
+            self.parsed_row_count += file_columns.parsed_rows
+            cursor.row_count = self.sink.extend_columns(file_columns.timestamps, file_columns.numeric, file_columns.objects)
+        return True
+
+    def _read_file(self, cursor: CsvFileCursor, is_latest: bool):
+        """
+        :return: (檔案是否被截斷/置換, 新解析的資料)
+        @note 整段資料解析完成後才更新 cursor，讀取失敗時 cursor 維持原狀，下一次 poll() 會重新讀取同一段
+        """
+        stat = os.stat(cursor.path)
+        offset, header, tail_bytes = cursor.offset, cursor.header, cursor.tail_bytes
+        with open(cursor.path, mode="rb") as f:
+            reset = False
+            if cursor.inode:
+                if stat.st_ino != cursor.inode or stat.st_size < offset:
+                    reset = True
+                else:
+                    f.seek(offset - len(tail_bytes))
+                    reset = f.read(len(tail_bytes)) != tail_bytes
+            if reset:
+                # 檔案被置換或截斷
+                offset, header, tail_bytes = 0, None, b""
+            chunk = b""
+            if stat.st_size > offset:
+                f.seek(offset)
+                chunk = f.read(stat.st_size - offset)
+
+        if is_latest:
+            # 最後一行可能寫到一半
+            end = chunk.rfind(b"\n") + 1
+            chunk = chunk[:end]
+        header, new_records = self._parse_chunk(chunk, header)
+        cursor.inode = stat.st_ino
+        cursor.offset, cursor.header = offset + len(chunk), header
+        cursor.tail_bytes = (tail_bytes + chunk)[-self.TAIL_BYTES_SIZE:]
+        return reset, new_records
+
+    def _parse_chunk(self, chunk: bytes, header: Optional[List[str]]):
+        """
+        :param header: 檔案的 header，尚未讀到時為 None (chunk 的第一行即為 header)
+        :return: (header, 新解析的資料)
+        """
+        rows = iter_csv_rows(chunk, self._skip_row)
+        if header is None:
+            header = next(rows, None)
+            if header is None:
+                return None, []
+
+        new_records = []
+        if self.compile_row_decoder is not None:
+            decode = self.compile_row_decoder(header)
+        else:
+            decode = lambda row: self.decode_row(dict(zip(header, row)))
+        for row in rows:
+            self.parsed_row_count += 1
+            try:
+                record = decode(row)
+            except (TypeError, ValueError) as e:
+                # ex: strict 模式的 ValidationError，只略過這一行
+                self._skip_row(e)
+                continue
+            if record is not None:
+                new_records.append(record)
+        return header, new_records
+
+    def _skip_row(self, error: Exception):
+        self.skipped_row_count += 1
+        if self.skipped_row_count in (1, 10, 100) or self.skipped_row_count % 1000 == 0:
+            print(f"Skip malformed sensor CSV row (total {self.skipped_row_count}): {error}")
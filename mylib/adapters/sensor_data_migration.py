@@ -0,0 +1,220 @@
+import time
+from typing import List, Sequence
+import psycopg2
+import psycopg2.errors
+
+"""
+sensor_data 的 schema 版本與線上 (online) 遷移。
+
+版本:
+    1: time、created_at、updated_at 為 TEXT，查詢時每一行都要 "time"::timestamptz，無法使用索引
+    2: time、created_at、updated_at 為 TIMESTAMPTZ，time 有 BRIN 索引 (資料依時間附加，BRIN 很小且足夠)
+
+遷移步驟 (可中斷，重新執行時從目前的狀態繼續):
+    (1) 新增 <column>_tz 欄位 (只改 metadata，不重寫資料表)
+    (2) 安裝 trigger，之後新增/修改的資料同步寫入 <column>_tz
+    (3) 依 id 分批 (batch_size) 回填舊資料，每批一個 transaction，不會長時間鎖住資料表
+    (4) 以 CREATE INDEX CONCURRENTLY 建立 time 的 BRIN 索引
+    (5) 在一個短 transaction 內移除 trigger 並交換欄位名稱 (lock_timeout 逾時則稍後重試，不會讓讀取端排隊)
+
+@note
+    (1) 沒有時區的時間字串視為 UTC (與 SensorHistoryStore 一致)，無法解析的值為 NULL。
+    (2) 資料庫的 timezone 設為 UTC，寫入端繼續寫入沒有時區的字串時也以 UTC 解讀。
+    (3) 版本記錄在 schema_version 資料表。
+    (4) 回填時設定 sidecar.migrating，updated_time() trigger 不會把 updated_at 改成回填的時間。
+    (5) 設定 (env): POSTGRES_MIGRATION_BATCH_SIZE (預設 5000)、POSTGRES_MIGRATION_BATCH_SLEEP_SEC (預設 0.05)
+
+Usage:
+    SensorDataMigration(PostgresAdapter(dbname)).run()
+"""
+
+class SensorDataMigration:
+    TABLE = "sensor_data"
+    SCHEMA_VERSION = 2
+    TIMESTAMP_COLUMNS = ("time", "created_at", "updated_at")
+    SHADOW_SUFFIX = "_tz"
+    TO_TIMESTAMPTZ_FUNCTION = "sensor_data_to_timestamptz"
+    SYNC_FUNCTION = "sensor_data_timestamptz_sync"
+    SYNC_TRIGGER = "zz_sensor_data_timestamptz_sync" # 在 updated_time_trigger 之後執行
+    TIME_INDEX = "sensor_data_time_brin_idx"
+
+    def __init__(
+        self,
+        db,
+        batch_size: int = 5000,
+        batch_sleep_sec: float = 0.05,
+        lock_timeout_ms: int = 2000,
+        max_lock_retries: int = 10,
+    ):
+        """
+        :param db: PostgresAdapter
+        :param batch_size: 每批回填的筆數
+        :param batch_sleep_sec: 每批之間的間隔，讓出 I/O 給其他查詢
+        :param lock_timeout_ms: 交換欄位時等待 lock 的上限
+        :param max_lock_retries: 交換欄位的重試次數
+        """
+        self.db = db
+        self.batch_size = batch_size
+        self.batch_sleep_sec = batch_sleep_sec
+        self.lock_timeout_ms = lock_timeout_ms
+        self.max_lock_retries = max_lock_retries
+
+    @staticmethod
+    def quote_identifier(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    def _shadow(self, column: str) -> str:
+        return self.quote_identifier(column + self.SHADOW_SUFFIX)
+
+    # --- 狀態 ---
+
+    def get_version(self) -> int:
+        self.db.exec(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "name TEXT PRIMARY KEY, version INTEGER NOT NULL, updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW())"
+        )
+        rows = self.db.query("SELECT version FROM schema_version WHERE name = %s", (self.TABLE,))
+        return rows[0][0] if rows else 1
+
+    def _set_version(self):
+        self.db.exec(
+            "INSERT INTO schema_version (name, version) VALUES (%s, %s) "
+            "ON CONFLICT (name) DO UPDATE SET version = EXCLUDED.version, updated_at = NOW()",
+            (self.TABLE, self.SCHEMA_VERSION),
+        )
+
+    def _column_types(self) -> dict:
+        rows = self.db.query(
+            "SELECT column_name, data_type FROM information_schema.columns WHERE table_schema = current_schema() AND table_name = %s",
+            (self.TABLE,),
+        )
+        return {name: data_type for name, data_type in rows}
+
+    # --- 遷移 ---
+
+    def run(self) -> bool:
+        """
+        :return: 是否執行了遷移
+        """
+        column_types = self._column_types()
+        text_columns = [c for c in self.TIMESTAMP_COLUMNS if column_types.get(c) == "text"]
+        if not text_columns:
+            if self.get_version() < self.SCHEMA_VERSION:
+                self._ensure_time_index()
+                self._set_version()
+            return False
+
+        print(f"Migrating {self.TABLE} to schema version {self.SCHEMA_VERSION}: {text_columns} -> timestamptz")
+        self.db.exec(f"ALTER DATABASE {self.quote_identifier(self.db.DB_NAME)} SET timezone TO 'UTC'", autocommit=True)
+        self._install_functions()
+        self._add_shadow_columns(text_columns)
+        self._install_sync_trigger(text_columns)
+        backfilled = self._backfill(text_columns)
+        self._swap_columns(text_columns)
+        self._ensure_time_index()
+        self._set_version()
+        print(f"{self.TABLE} migrated to schema version {self.SCHEMA_VERSION}, {backfilled} rows backfilled")
+        return True
+
+    def _install_functions(self):
+        self.db.exec(
+            f"CREATE OR REPLACE FUNCTION {self.TO_TIMESTAMPTZ_FUNCTION}(v TEXT) RETURNS TIMESTAMPTZ AS $$ "
+            "BEGIN "
+            "IF v IS NULL OR v = '' THEN RETURN NULL; END IF; "
+            "IF v ~ '(Z|[+-][0-9]{2}(:?[0-9]{2})?)$' THEN RETURN v::timestamptz; END IF; "
+            "RETURN v::timestamp AT TIME ZONE 'UTC'; "
+            "EXCEPTION WHEN others THEN RETURN NULL; "
+            "END; $$ LANGUAGE plpgsql STABLE"
+        )
+
+    def _add_shadow_columns(self, columns: Sequence[str]):
+        adds = ", ".join(f"ADD COLUMN IF NOT EXISTS {self._shadow(c)} TIMESTAMPTZ" for c in columns)
+        self._exec_with_lock_timeout([f"ALTER TABLE {self.TABLE} {adds}"])
+
+    def _install_sync_trigger(self, columns: Sequence[str]):
+        assignments = " ".join(
+            f"NEW.{self._shadow(c)} := {self.TO_TIMESTAMPTZ_FUNCTION}(NEW.{self.quote_identifier(c)});" for c in columns
+        )
+        self.db.exec(
+            f"CREATE OR REPLACE FUNCTION {self.SYNC_FUNCTION}() RETURNS TRIGGER AS $$ "
+            f"BEGIN {assignments} RETURN NEW; END; $$ LANGUAGE plpgsql"
+        )
+        self._exec_with_lock_timeout([
+            f"DROP TRIGGER IF EXISTS {self.SYNC_TRIGGER} ON {self.TABLE}",
+            f"CREATE TRIGGER {self.SYNC_TRIGGER} BEFORE INSERT OR UPDATE ON {self.TABLE} "
+            f"FOR EACH ROW EXECUTE FUNCTION {self.SYNC_FUNCTION}()",
+        ])
+
+    def build_backfill_sql(self, columns: Sequence[str]) -> str:
+        assignments = ", ".join(
+            f"{self._shadow(c)} = {self.TO_TIMESTAMPTZ_FUNCTION}(s.{self.quote_identifier(c)})" for c in columns
+        )
+        pending = " OR ".join(
+            f"(s.{self._shadow(c)} IS NULL AND s.{self.quote_identifier(c)} IS NOT NULL)" for c in columns
+        )
+        return (
+            f"WITH batch AS (SELECT id FROM {self.TABLE} WHERE id > %(last_id)s ORDER BY id LIMIT %(batch_size)s), "
+            f"updated AS (UPDATE {self.TABLE} AS s SET {assignments} FROM batch WHERE s.id = batch.id AND ({pending}) RETURNING s.id) "
+            f"SELECT (SELECT MAX(id) FROM batch), (SELECT COUNT(*) FROM updated)"
+        )
+
+    def _backfill(self, columns: Sequence[str]) -> int:
+        """
+        依 id 分批回填，每批各自 commit
+        :return: 回填的筆數
+        """
+        backfill_sql = self.build_backfill_sql(columns)
+        last_id, total = 0, 0
+        while True:
+            with self.db.get_connection() as conn, conn.cursor() as cur:
+                cur.execute("SET LOCAL sidecar.migrating = 'on'")
+                cur.execute(backfill_sql, {"last_id": last_id, "batch_size": self.batch_size})
+                max_id, updated = cur.fetchone()
+            if max_id is None:
+                return total
+            last_id, total = max_id, total + updated
+            if self.batch_sleep_sec:
+                time.sleep(self.batch_sleep_sec)
+
+    def _swap_columns(self, columns: Sequence[str]):
+        statements = [f"DROP TRIGGER IF EXISTS {self.SYNC_TRIGGER} ON {self.TABLE}"]
+        for c in columns:
+            statements += [
+                f"ALTER TABLE {self.TABLE} DROP COLUMN {self.quote_identifier(c)}",
+                f"ALTER TABLE {self.TABLE} RENAME COLUMN {self._shadow(c)} TO {self.quote_identifier(c)}",
+            ]
+        if "created_at" in columns:
+            statements.append(f"ALTER TABLE {self.TABLE} ALTER COLUMN created_at SET DEFAULT NOW()")
+        statements.append(f"DROP FUNCTION IF EXISTS {self.SYNC_FUNCTION}()")
+        self._exec_with_lock_timeout(statements)
+
+    def _ensure_time_index(self):
+        # CONCURRENTLY 不能在 transaction 內執行；中斷後留下的 INVALID 索引先移除再重建
+        rows = self.db.query(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = %s",
+            (self.TIME_INDEX,),
+        )
+        if rows and rows[0][0]:
+            return
+        if rows:
+            self.db.exec(f"DROP INDEX CONCURRENTLY IF EXISTS {self.TIME_INDEX}", autocommit=True)
+        self.db.exec(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {self.TIME_INDEX} ON {self.TABLE} USING BRIN (\"time\")",
+            autocommit=True,
+        )
+
+    def _exec_with_lock_timeout(self, statements: List[str]):
+        """
+        在同一個 transaction 執行 DDL；等不到 lock 時放棄並稍後重試，避免 DDL 排隊時擋住後面的讀取
+        """
+        for attempt in range(1, self.max_lock_retries + 1):
+            try:
+                with self.db.get_connection() as conn, conn.cursor() as cur:
+                    cur.execute(f"SET LOCAL lock_timeout = '{int(self.lock_timeout_ms)}ms'")
+                    for statement in statements:
+                        cur.execute(statement)
+                return
+            except psycopg2.errors.LockNotAvailable:
+                print(f"{self.TABLE} migration: lock not available, retry {attempt}/{self.max_lock_retries}")
+                time.sleep(min(1.0 * attempt, 5.0))
+        raise TimeoutError(f"{self.TABLE} migration: could not acquire lock after {self.max_lock_retries} retries")
@@ -0,0 +1,235 @@
+import os
+import json
+import mmap
+import sys
+from array import array
+from typing import Dict, List, Optional
+
+"""
+SensorHistoryStore 的二進位存檔，重新啟動時直接載入，只需要解析存檔之後才寫入 CSV 的資料。
+
+目錄結構:
+    header.json         schema、generation、各 CSV 檔案的讀取進度 (SensorCsvTailer cursor)、資料筆數、非數值欄位 (run-length)
+    time.<g>.f64        timestamp 欄位 (epoch 秒, little-endian float64)，<g> 為 header 記錄的 generation
+    col_<i>.<g>.f64     第 i 個數值 metric 的欄位 (NaN 為缺值)
+
+@note
+    (1) 欄位檔案只會附加 (append-only)，每次存檔只寫入上次存檔後新增的資料；
+        header 的 head 記錄最舊的有效資料位置 (ring buffer 移除的資料不會馬上從檔案刪掉)。
+    (2) 已寫入的資料被改寫 (store.epoch 改變) 或失效的資料超過一半時，整個重寫。
+        重寫時 generation 加 1，資料寫到新的欄位檔案，不會動到目前 header.json 指向的檔案。
+    (3) 欄位檔案與 header.json.tmp 先 fsync，再以 os.replace 原子性地更新 header.json (同時切換 generation)，
+        之後才刪除舊 generation 的檔案。存檔中斷時 header.json 仍指向完整的舊檔案，
+        欄位檔案中超過 header.row_count 的部份 (附加時中斷) 會被忽略。
+    (4) 載入時以 mmap 對應欄位檔案，整段複製到 array('d')，不需要逐行解析。
+"""
+
+class SensorHistoryPersistence:
+    FORMAT_VERSION = 2
+    HEADER_FILENAME = "header.json"
+    COLUMN_SUFFIX = ".f64"
+
+    def __init__(self, cache_dir: str):
+        """
+        :param cache_dir: 存檔目錄
+        """
+        self.cache_dir = cache_dir
+        self._epoch = None # 上次存檔時 store 的 epoch
+        self._base = 0 # 檔案中的列 = store 的序號 (head_sequence + i) + _base
+        self._row_count = 0 # 檔案中已寫入的筆數
+        self._generation = 0 # 目前欄位檔案的 generation
+        self._object_runs: Dict[str, List[list]] = {}
+
+    def _time_filename(self, generation: int) -> str:
+        return f"time.{generation}{self.COLUMN_SUFFIX}"
+
+    def _column_filename(self, index: int, generation: int) -> str:
+        return f"col_{index}.{generation}{self.COLUMN_SUFFIX}"
+
+    def _filenames(self, store, generation: int) -> List[str]:
+        return [self._time_filename(generation)] + [self._column_filename(i, generation) for i in range(len(store.numeric_names))]
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.cache_dir, filename)
+
+    def _schema(self, store) -> dict:
+        return {"numeric_names": list(store.numeric_names), "object_names": list(store.object_names)}
+
+    @staticmethod
+    def _to_little_endian(values: array) -> bytes:
+        if sys.byteorder != "little":
+            values = array("d", values)
+            values.byteswap()
+        return values.tobytes()
+
+    @staticmethod
+    def _append_runs(runs: List[list], values: list):
+        for value in values:
+            if runs and runs[-1][0] == value:
+                runs[-1][1] += 1
+            else:
+                runs.append([value, 1])
+
+    @staticmethod
+    def _expand_runs(runs: List[list], start: int, stop: int) -> list:
+        values, pos = [], 0
+        for value, count in runs:
+            lo, hi = max(start, pos), min(stop, pos + count)
+            if lo < hi:
+                values.extend([value] * (hi - lo))
+            pos += count
+        return values
+
+    # --- 存檔 ---
+
+    def save(self, store, cursors: List[dict]):
+        """
+        把 store 目前的內容與 CSV 讀取進度寫入存檔
+        @note 呼叫端需確保存檔期間 store 與 cursors 不會改變 (ex: 持有 tailer.lock)
+        """
+        with store.lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            head = store.head_sequence + self._base
+            full_rewrite = (
+                self._epoch != store.epoch
+                or not os.path.exists(self._path(self.HEADER_FILENAME))
+                or head > self._row_count # 存檔後的資料已經被 ring buffer 覆寫
+                or head * 2 > self._row_count + len(store) # 失效的資料太多
+            )
+            if full_rewrite:
+                self._rewrite(store)
+            else:
+                first_new = self._row_count - head # store 中第一筆還沒存檔的邏輯索引
+                self._append(store, first_new, len(store))
+            head = store.head_sequence + self._base
+            self._write_header(store, cursors, head)
+            self._remove_stale_columns(store)
+
+    def _rewrite(self, store):
+        """寫到新 generation 的欄位檔案；header.json 在 _write_header() 才切換過去"""
+        on_disk = (self._read_header() or {}).get("generation", 0) # 目前 header.json 指向的 generation (可能是其他 instance 寫的)
+        self._generation = max(self._generation, int(on_disk)) + 1
+        for filename in self._filenames(store, self._generation):
+            if os.path.exists(self._path(filename)):
+                os.remove(self._path(filename)) # 上次重寫中斷留下的檔案
+        self._base = -store.head_sequence
+        self._row_count = 0
+        self._object_runs = {name: [] for name in store.object_names}
+        self._epoch = store.epoch
+        self._append(store, 0, len(store))
+
+    def _write_column(self, filename: str, values: array):
+        """寫在第 _row_count 列之後 (先截掉上次存檔中斷留下的資料)"""
+        path = self._path(filename)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.truncate(self._row_count * values.itemsize)
+            f.seek(self._row_count * values.itemsize)
+            f.write(self._to_little_endian(values))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _append(self, store, lo: int, hi: int):
+        self._write_column(self._time_filename(self._generation), store.get_timestamps(lo, hi))
+        for i, name in enumerate(store.numeric_names):
+            self._write_column(self._column_filename(i, self._generation), store.get_column(name, lo, hi))
+        for name in store.object_names:
+            self._append_runs(self._object_runs.setdefault(name, []), store.get_column(name, lo, hi))
+        self._row_count += max(0, hi - lo)
+
+    def _write_header(self, store, cursors: List[dict], head: int):
+        header = {
+            "format_version": self.FORMAT_VERSION,
+            "schema": self._schema(store),
+            "generation": self._generation,
+            "row_count": self._row_count,
+            "head": head,
+            "object_runs": self._object_runs,
+            "cursors": cursors,
+        }
+        tmp_path = self._path(self.HEADER_FILENAME + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(header, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path(self.HEADER_FILENAME))
+        self._fsync_dir()
+
+    def _fsync_dir(self):
+        """讓 os.replace 的結果寫入磁碟 (不支援開啟目錄的平台略過)"""
+        try:
+            fd = os.open(self.cache_dir, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _remove_stale_columns(self, store):
+        """刪除 header.json 已不再指向的欄位檔案 (舊 generation 或舊版格式)"""
+        current = set(self._filenames(store, self._generation))
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(self.COLUMN_SUFFIX) and filename not in current:
+                try:
+                    os.remove(self._path(filename))
+                except OSError as e:
+                    print(f"Failed to remove stale telemetry history file {filename}: {e}")
+
+    # --- 載入 ---
+
+    def _read_header(self) -> Optional[dict]:
+        try:
+            with open(self._path(self.HEADER_FILENAME), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _read_column(self, filename: str, head: int, row_count: int) -> array:
+        values = array("d")
+        if row_count <= head:
+            return values
+        with open(self._path(filename), "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if len(mm) < row_count * values.itemsize:
+                    raise ValueError(f"{filename} is shorter than {row_count} rows")
+                values.frombytes(mm[head * values.itemsize:row_count * values.itemsize])
+        if sys.byteorder != "little":
+            values.byteswap()
+        return values
+
+    def load(self, store) -> Optional[List[dict]]:
+        """
+        載入存檔到 store
+        :return: 存檔時的 CSV 讀取進度 (給 SensorCsvTailer.restore_cursors())；沒有存檔或格式不符時回傳 None
+        """
+        header = self._read_header()
+        if not header or header.get("format_version") != self.FORMAT_VERSION:
+            return None
+        if header.get("schema") != self._schema(store):
+            print(f"Telemetry history cache schema mismatch, ignore {self.cache_dir}")
+            return None
+
+        row_count, head, generation = int(header["row_count"]), int(header["head"]), int(header["generation"])
+        try:
+            timestamps = self._read_column(self._time_filename(generation), head, row_count)
+            numeric = {
+                name: self._read_column(self._column_filename(i, generation), head, row_count)
+                for i, name in enumerate(store.numeric_names)
+            }
+        except (OSError, ValueError) as e:
+            print(f"Failed to load telemetry history cache {self.cache_dir}: {e}")
+            return None
+        object_runs = header.get("object_runs") or {}
+        objects = {name: self._expand_runs(object_runs.get(name, []), head, row_count) for name in store.object_names}
+        store.load_columns(timestamps, numeric, objects)
+
+        # 之後的存檔接著附加在檔案尾端
+        skipped = len(timestamps) - len(store) # 超過 store 容量而沒有載入的筆數
+        self._row_count = row_count
+        self._generation = generation
+        self._base = head + skipped - store.head_sequence
+        self._object_runs = {name: object_runs.get(name, []) for name in store.object_names}
+        self._epoch = store.epoch
+        return header.get("cursors") or []
@@ -0,0 +1,341 @@
+import math
+import operator
+import threading
+from itertools import islice
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+"""
+Sensor 歷史資料的欄式 (columnar) 儲存。
+一個 timestamp 欄位 (epoch 秒, array('d')) + 每個 metric 一個欄位，取代「每一行一個 dict」的 list，
+數值 metric 以 array('d') 儲存 (缺值為 NaN)，非數值 metric (ex: Mode Selection) 以 list 儲存。
+
+@note
+    (1) 固定容量的 ring buffer: 資料未滿前 array 依需要成長，滿了之後覆寫最舊的資料。
+    (2) timestamp 依時間遞增，時間區間以二分搜尋切出 [lo, hi) 的邏輯索引。
+    (3) CSV 的 time 沒有時區，視為 UTC (與 MetricReport 的 Timestamp 一致)。
+    (4) 寫入由 SensorCsvTailer 呼叫 (extend_records/drop_head/drop_tail/clear)，
+        讀取端以 time_range() 取得索引後用 get_timestamps()/get_column()/get_row() 讀取。
+
+Usage:
+    store = SensorCsvAdapter.get_sensor_history_store()
+    lo, hi = store.time_range(start_ts=time.time() - 300)
+    values = store.get_column("Coolant Flow Rate (F1)", lo, hi)
+"""
+
+NUMERIC_METRIC_DATA_TYPES = ("Decimal", "Integer")
+
+
+def to_epoch_seconds(ts: datetime) -> float:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+class SensorHistoryStore:
+    def __init__(self, numeric_names: List[str], object_names: List[str] = None, capacity: int = 7 * 86400):
+        """
+        :param numeric_names: 數值 metric 的名稱 (CSV 欄位名稱)
+        :param object_names: 非數值 metric 的名稱
+        :param capacity: 最多保留的資料筆數
+        """
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive: {capacity}")
+        self.capacity = capacity
+        self.numeric_names: Tuple[str, ...] = tuple(numeric_names)
+        self.object_names: Tuple[str, ...] = tuple(object_names or ())
+        self.metric_names: Tuple[str, ...] = self.numeric_names + self.object_names
+        self._ts = array("d")
+        self._numeric: Dict[str, array] = {name: array("d") for name in self.numeric_names}
+        self._objects: Dict[str, list] = {name: [] for name in self.object_names}
+        self._start = 0 # 最舊一筆的實體索引
+        self._size = 0
+        self.version = 0 # 每次內容改變 +1，讀取端可用來判斷快取是否過期
+        self.epoch = 0 # 已寫入的資料被改寫 (clear/drop_tail/時間倒退重建) 時 +1，只有附加或移除最舊資料時不變
+        self.head_sequence = 0 # 累計從頭端移除 (drop_head、ring buffer 覆寫) 的筆數，同一 epoch 內第 i 筆的序號為 head_sequence + i
+        self.lock = threading.RLock()
+
+    @classmethod
+    def from_metric_definitions(cls, metric_definitions: List[dict], capacity: int) -> "SensorHistoryStore":
+        """
+        :param metric_definitions: SensorLogModelFactory.get_model(proj_name).to_metric_definitions()
+        @note 欄位名稱使用 Alias (與 CSV header、SensorLogModel.to_dict() 的 key 相同)
+        """
+        numeric_names, object_names = [], []
+        for metric in metric_definitions:
+            name = metric.get("Alias") or metric["FieldName"]
+            if name == "time":
+                continue
+            if metric.get("MetricDataType") in NUMERIC_METRIC_DATA_TYPES:
+                numeric_names.append(name)
+            else:
+                object_names.append(name)
+        return cls(numeric_names, object_names, capacity=capacity)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _physical_index(self, i: int) -> int:
+        return (self._start + i) % self.capacity
+
+    # --- 寫入 ---
+
+    def _append_row(self, ts: float, values: Mapping):
+        if self._size < self.capacity:
+            p = self._physical_index(self._size)
+            self._size += 1
+        else:
+            p = self._start
+            self._start = (self._start + 1) % self.capacity
+            self.head_sequence += 1
+        grow = (p == len(self._ts))
+        if grow:
+            self._ts.append(ts)
+        else:
+            self._ts[p] = ts
+        for name, col in self._numeric.items():
+            value = values.get(name)
+            try:
+                value = math.nan if value is None else float(value)
+            except (TypeError, ValueError):
+                value = math.nan
+            if grow:
+                col.append(value)
+            else:
+                col[p] = value
+        for name, col in self._objects.items():
+            if grow:
+                col.append(values.get(name))
+            else:
+                col[p] = values.get(name)
+
+    def append(self, ts: float, values: Mapping):
+        """
+        :param ts: epoch 秒，需 >= 最後一筆的時間
+        :param values: {metric name: value}
+        """
+        with self.lock:
+            if self._size and ts < self.get_timestamp(self._size - 1):
+                raise ValueError(f"timestamp {ts} is older than the last one")
+            self._append_row(ts, values)
+            self.version += 1
+
+    def extend_records(self, records: Iterable[dict]) -> int:
+        """
+        :param records: SensorLogModel.to_dict() 的結果 ("time" 為 datetime)
+        :return: 寫入的筆數
+        """
+        rows = [(to_epoch_seconds(r["time"]), r) for r in records if r.get("time") is not None]
+        return self._extend_rows(rows)
+
+    def _extend_rows(self, rows: List[Tuple[float, Mapping]]) -> int:
+        if not rows:
+            return 0
+        if any(rows[i][0] > rows[i + 1][0] for i in range(len(rows) - 1)):
+            rows.sort(key=lambda x: x[0])
+        with self.lock:
+            if self._size and rows[0][0] < self.get_timestamp(self._size - 1):
+                # 時間倒退 (少見)，與既有資料合併後重建
+                rows = [(self.get_timestamp(i), self.get_row(i)) for i in range(self._size)] + rows
+                rows.sort(key=lambda x: x[0])
+                self._clear()
+                self.epoch += 1
+            for ts, values in rows:
+                self._append_row(ts, values)
+            self.version += 1
+        return len(rows)
+
+    def extend_columns(self, timestamps: array, numeric: Mapping[str, array], objects: Mapping[str, list]) -> int:
+        """
+        以整批欄位資料附加在尾端 (ex: SensorCsvParallelLoader 解析的結果)，資料依時間遞增時不需要逐行寫入
+        :param timestamps: epoch 秒
+        :param numeric: {數值 metric name: array('d')}，缺少的 metric 以 NaN 補齊
+        :param objects: {非數值 metric name: list}，缺少的 metric 以 None 補齊
+        :return: 寫入的筆數
+        """
+        size = len(timestamps)
+        if not size:
+            return 0
+        with self.lock:
+            is_sorted = all(map(operator.le, timestamps, islice(timestamps, 1, None)))
+            if not is_sorted or (self._size and timestamps[0] < self.get_timestamp(self._size - 1)):
+                # 時間倒退 (少見)，改為逐行合併
+                return self._extend_rows([(timestamps[i], self._column_row(numeric, objects, i)) for i in range(size)])
+
+            # array 尚未填滿且資料連續時，直接整段附加
+            bulk = 0
+            if self._start == 0 and self._size == len(self._ts):
+                bulk = min(size, self.capacity - self._size)
+            if bulk:
+                self._ts.extend(timestamps[:bulk])
+                for name, col in self._numeric.items():
+                    values = numeric.get(name)
+                    col.extend(values[:bulk] if values is not None else array("d", [math.nan]) * bulk)
+                for name, col in self._objects.items():
+                    values = objects.get(name)
+                    col.extend(values[:bulk] if values is not None else [None] * bulk)
+                self._size += bulk
+            for i in range(bulk, size):
+                self._append_row(timestamps[i], self._column_row(numeric, objects, i))
+            self.version += 1
+        return size
+
+    @staticmethod
+    def _column_row(numeric: Mapping[str, array], objects: Mapping[str, list], i: int) -> Dict[str, object]:
+        row = {name: col[i] for name, col in numeric.items()}
+        row.update((name, col[i]) for name, col in objects.items())
+        return row
+
+    def drop_head(self, n: int):
+        """移除最舊的 n 筆"""
+        with self.lock:
+            n = max(0, min(n, self._size))
+            self._start = self._physical_index(n)
+            self._size -= n
+            self.head_sequence += n
+            self.version += 1
+
+    def drop_tail(self, n: int):
+        """移除最新的 n 筆"""
+        with self.lock:
+            n = max(0, min(n, self._size))
+            self._size -= n
+            self.version += 1
+            self.epoch += 1
+
+    def _clear(self):
+        self._ts = array("d")
+        self._numeric = {name: array("d") for name in self.numeric_names}
+        self._objects = {name: [] for name in self.object_names}
+        self._start, self._size = 0, 0
+        self.head_sequence = 0
+
+    def clear(self):
+        with self.lock:
+            self._clear()
+            self.version += 1
+            self.epoch += 1
+
+    def load_columns(self, timestamps: array, numeric: Mapping[str, array], objects: Mapping[str, list]):
+        """
+        以整批欄位資料取代目前的內容 (ex: 由 SensorHistoryPersistence 載入)，超過容量時只保留最新的資料
+        :param timestamps: epoch 秒，需依時間遞增
+        :param numeric: {數值 metric name: array('d')}，缺少的 metric 以 NaN 補齊
+        :param objects: {非數值 metric name: list}，缺少的 metric 以 None 補齊
+        """
+        size = len(timestamps)
+        skip = max(0, size - self.capacity)
+        with self.lock:
+            self._clear()
+            self._ts = array("d", timestamps[skip:])
+            for name in self.numeric_names:
+                col = numeric.get(name)
+                self._numeric[name] = array("d", col[skip:]) if col is not None else array("d", [math.nan]) * (size - skip)
+            for name in self.object_names:
+                col = objects.get(name)
+                self._objects[name] = list(col[skip:]) if col is not None else [None] * (size - skip)
+            self._size = size - skip
+            self.version += 1
+            self.epoch += 1
+
+    # --- 讀取 ---
+
+    def get_timestamp(self, i: int) -> float:
+        return self._ts[self._physical_index(i)]
+
+    def first_timestamp(self) -> Optional[float]:
+        return self.get_timestamp(0) if self._size else None
+
+    def last_timestamp(self) -> Optional[float]:
+        return self.get_timestamp(self._size - 1) if self._size else None
+
+    def bisect_left(self, ts: float) -> int:
+        """第一筆 time >= ts 的邏輯索引"""
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.get_timestamp(mid) < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def time_range(self, start_ts: float = None, end_ts: float = None) -> Tuple[int, int]:
+        """
+        :return: [start_ts, end_ts) 的邏輯索引 (lo, hi)，None 表示不限制
+        """
+        with self.lock:
+            lo = 0 if start_ts is None else self.bisect_left(start_ts)
+            hi = self._size if end_ts is None else self.bisect_left(end_ts)
+            return lo, max(lo, hi)
+
+    def _slice(self, col: Union[array, list], lo: int, hi: int) -> Union[array, list]:
+        if lo >= hi:
+            return col[0:0]
+        p_lo, p_hi = self._physical_index(lo), self._physical_index(hi - 1) + 1
+        if p_lo < p_hi:
+            return col[p_lo:p_hi]
+        return col[p_lo:] + col[:p_hi] # 跨過 ring buffer 的尾端
+
+    def get_timestamps(self, lo: int = 0, hi: int = None) -> array:
+        with self.lock:
+            return self._slice(self._ts, lo, self._size if hi is None else hi)
+
+    def get_column(self, name: str, lo: int = 0, hi: int = None) -> Union[array, list]:
+        """
+        :return: 數值 metric 回傳 array('d') (缺值為 NaN)，非數值 metric 回傳 list
+        """
+        with self.lock:
+            hi = self._size if hi is None else hi
+            if name in self._numeric:
+                return self._slice(self._numeric[name], lo, hi)
+            if name in self._objects:
+                return self._slice(self._objects[name], lo, hi)
+            raise KeyError(name)
+
+    def get_row(self, i: int) -> Dict[str, object]:
+        """
+        :return: {metric name: value}，數值缺值為 None
+        """
+        with self.lock:
+            p = self._physical_index(i)
+            row = {}
+            for name in self.metric_names:
+                if name in self._numeric:
+                    value = self._numeric[name][p]
+                    row[name] = None if math.isnan(value) else value
+                else:
+                    row[name] = self._objects[name][p]
+            return row
+
+    def to_records(self, lo: int = 0, hi: int = None) -> List[dict]:
+        """
+        轉回 SensorLogModel.to_dict() 格式的 list (相容舊介面，資料量大時較耗記憶體)
+        """
+        with self.lock:
+            hi = self._size if hi is None else hi
+            records = []
+            for i in range(lo, hi):
+                record = {"time": datetime.fromtimestamp(self.get_timestamp(i), tz=timezone.utc).replace(tzinfo=None)}
+                record.update(self.get_row(i))
+                records.append(record)
+            return records
+
+    def aggregate(self, name: str, stat: str, lo: int, hi: int) -> Optional[float]:
+        """
+        :param stat: Average | Maximum | Minimum | Summation
+        :return: 忽略缺值後的統計值，沒有資料時回傳 None
+        """
+        values = [v for v in self.get_column(name, lo, hi) if not math.isnan(v)]
+        if not values:
+            return None
+        if stat == "Average":
+            return math.fsum(values) / len(values)
+        if stat == "Maximum":
+            return max(values)
+        if stat == "Minimum":
+            return min(values)
+        if stat == "Summation":
+            return math.fsum(values)
+        raise ValueError(f"Unsupported stat: {stat}")
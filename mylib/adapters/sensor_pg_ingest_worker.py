@@ -0,0 +1,405 @@
+import io
+import os
+import csv
+import glob
+import json
+import time
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple, Type
+import psycopg2
+from mylib.models.sensor_log_model import SensorLogBaseModel
+from mylib.models.sensor_log_model_factory import SensorLogModelFactory
+from mylib.adapters.PostgresAdapter import PostgresAdapter
+from mylib.adapters.sensor_csv_adapter import SensorCsvAdapter
+from mylib.adapters.sensor_csv_tailer import CsvFileCursor, SensorCsvTailer, iter_csv_rows
+from mylib.adapters.sensor_csv_decoder import SensorCsvRowDecoder
+from mylib.adapters.sensor_history_store import to_epoch_seconds
+from mylib.adapters.sensor_rollup import SensorRollup
+
+"""
+把 webUI 的 sensor CSV 新增的行以 COPY FROM STDIN 批次寫入 Postgres 的 sensor_data (給 get_sensor_statistics 使用)。
+
+@note
+    (1) 每個檔案的讀取進度 (watermark: inode、byte offset、header、tail_bytes) 存在 sensor_ingest_watermark，
+        與同一批資料的 COPY 在同一個 transaction 內 commit，重新啟動後從上次 commit 的位置繼續，不會重複或遺漏。
+    (2) 每批最多讀取 batch_bytes (切點對齊換行)；最新的檔案最後一行若沒有換行符號則留到下一次。
+    (3) 以時間去除重複: 只寫入時間大於目前已寫入最大時間 (high water) 的行。
+        檔案被截斷/置換後從頭讀取，或多個檔案時間重疊時，已寫入的時間不會再寫入一次。
+    (4) 一批寫入失敗時 (ex: 連線中斷) 該檔案本輪停止，下一輪從同一個 watermark 重試；其他檔案照常寫入。
+        無法解碼或解析的行、Postgres 拒絕的行 (ex: 數值超出欄位範圍) 逐行略過並計入 rows_skipped，
+        watermark 照常前進，不會卡在同一批資料 (Postgres 拒絕時改為逐行寫入，見 _commit_chunk)。
+    (5) 提供 rollup 時，同一個 transaction 內把該批資料合併到彙總表 (見 SensorRollup)。
+    (6) stats() 提供延遲指標: lag_sec (最新寫入的資料時間距今)、bytes_behind (檔案尚未讀取的大小)。
+    (7) 設定 (env):
+        TELEMETRY_PG_INGEST_ENABLED: 是否在 app 啟動時啟動背景寫入，預設 false (etc/env 的部署設定為 true)
+        TELEMETRY_PG_INGEST_INTERVAL_SEC: 兩次檢查的間隔，預設 5 秒
+        TELEMETRY_PG_INGEST_BATCH_BYTES: 每批讀取的大小，預設 4MB
+
+Usage:
+    worker = SensorPgIngestWorker.get_instance()
+    worker.start()
+    worker.stats()
+"""
+
+class SensorPgIngestWorker:
+    ENABLED = os.getenv("TELEMETRY_PG_INGEST_ENABLED", "false").lower() == "true"
+    INTERVAL_SEC = float(os.getenv("TELEMETRY_PG_INGEST_INTERVAL_SEC", 5))
+    BATCH_BYTES = int(os.getenv("TELEMETRY_PG_INGEST_BATCH_BYTES", str(4 * 1024 * 1024)))
+
+    TABLE = "sensor_data"
+    WATERMARK_TABLE = "sensor_ingest_watermark"
+    TIME_FIELD = "time"
+
+    _instance: Optional["SensorPgIngestWorker"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        db,
+        root_path: str,
+        model_class: Type[SensorLogBaseModel],
+        days_to_load: int = 7,
+        file_pattern: str = "sensor.log.*.csv",
+        batch_bytes: int = 4 * 1024 * 1024,
+        ensure_schema: bool = True,
+        rollup: Optional[SensorRollup] = None,
+    ):
+        """
+        :param db: PostgresAdapter
+        :param root_path: CSV 目錄
+        :param model_class: ex: SidecarSensorLogModel
+        :param days_to_load: 只處理最近 N 個檔案 (1 天 1 個檔案)
+        :param batch_bytes: 每批讀取的大小
+        :param ensure_schema: 第一次執行前建立資料庫與資料表 (PostgresAdapter.ensure_database/ensure_tables)
+        :param rollup: 增量維護的彙總表
+        """
+        if batch_bytes <= 0:
+            raise ValueError(f"batch_bytes must be positive: {batch_bytes}")
+        self.db = db
+        self.root_path = root_path
+        self.model_class = model_class
+        self.days_to_load = days_to_load
+        self.file_pattern = file_pattern
+        self.batch_bytes = batch_bytes
+        self.ensure_schema = ensure_schema
+        self.rollup = rollup
+        # (decoder 輸出的 key (alias), sensor_data 的欄位名稱 (field name))
+        self.columns: Tuple[Tuple[str, str], ...] = tuple(
+            (field_info.alias or name, name)
+            for name, field_info in model_class.model_fields.items()
+            if name != self.TIME_FIELD
+        )
+        self.copy_sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+            self.TABLE, ", ".join(self.quote_identifier(c) for c in (self.TIME_FIELD,) + tuple(c for _, c in self.columns))
+        )
+        self._watermarks: Dict[str, CsvFileCursor] = {}
+        self._high_water_ts: Optional[float] = None
+        self._loaded = False
+        self.lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {
+            "rows_ingested": 0, "rows_skipped": 0, "rows_rejected": 0, "batches": 0, "errors": 0, "last_error": None,
+            "last_batch_sec": 0.0, "last_run_at": None, "bytes_behind": 0,
+        }
+
+    @classmethod
+    def get_instance(cls) -> "SensorPgIngestWorker":
+        """依 env 建立共用的 worker (CSV 目錄與天數與 SensorCsvAdapter 相同)"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    proj_name = os.getenv("PROJ_NAME", "")
+                    model_class = SensorLogModelFactory.get_model(proj_name)
+                    cls._instance = cls(
+                        PostgresAdapter(dbname=proj_name.replace("-", "_")),
+                        SensorCsvAdapter.SENSOR_ROOT,
+                        model_class,
+                        days_to_load=SensorCsvAdapter.DAYS_TO_LOAD,
+                        batch_bytes=cls.BATCH_BYTES,
+                        rollup=SensorRollup.from_metric_definitions(model_class.to_metric_definitions()),
+                    )
+        return cls._instance
+
+    @staticmethod
+    def quote_identifier(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    @classmethod
+    def read_high_water(cls, cur) -> Optional[float]:
+        """
+        讀取已寫入 sensor_data 的最大時間 (所有檔案 watermark 的 last_time)
+        @note 彙總表與 watermark 在同一個 transaction 更新，此時間之前的彙總表 bucket 已完整 (見 SensorRollupQuery)
+        :param cur: psycopg2 cursor
+        :return: epoch 秒數，worker 尚未寫入過時為 None
+        """
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (cls.WATERMARK_TABLE,))
+        if not cur.fetchone()[0]:
+            return None
+        cur.execute(f"SELECT EXTRACT(EPOCH FROM MAX(last_time)) FROM {cls.WATERMARK_TABLE}")
+        row = cur.fetchone()
+        return float(row[0]) if row and row[0] is not None else None
+
+    # --- 背景執行 ---
+
+    def start(self) -> None:
+        """啟動背景寫入 (daemon thread)，重複呼叫無副作用"""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._instance_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="SensorPgIngestWorker", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        self._stop_event.set()
+        thread = self._thread
+        if thread and thread.is_alive():
+            thread.join(timeout)
+        self._thread = None
+
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self._record_error(e)
+            self._stop_event.wait(self.INTERVAL_SEC)
+
+    # --- 寫入 ---
+
+    def list_files(self) -> List[str]:
+        """:return: 最近 N 天的檔案，依檔名 (日期) 由舊到新"""
+        all_files = sorted(glob.glob(os.path.join(self.root_path, self.file_pattern)))
+        return all_files[-self.days_to_load:] if self.days_to_load > 0 else []
+
+    def run_once(self) -> int:
+        """
+        把所有檔案新增的行寫入 Postgres
+        :return: 寫入的筆數
+        """
+        with self.lock:
+            if not self._loaded:
+                if self.ensure_schema:
+                    self.db.ensure_database()
+                    self.db.ensure_tables()
+                self._load_watermarks()
+                self._loaded = True
+            files = self.list_files()
+            ingested = 0
+            for i, path in enumerate(files):
+                try:
+                    ingested += self._ingest_file(path, is_latest=(i == len(files) - 1))
+                except Exception as e:
+                    # 只停止這個檔案，下一輪從同一個 watermark 重試
+                    self._record_error(e, path)
+            self._stats["bytes_behind"] = self._bytes_behind(files)
+            self._stats["last_run_at"] = time.time()
+            return ingested
+
+    def _load_watermarks(self):
+        rows = self.db.query(
+            f"SELECT path, inode, byte_offset, header, tail_bytes, row_count, EXTRACT(EPOCH FROM last_time) "
+            f"FROM {self.WATERMARK_TABLE}"
+        )
+        self._watermarks = {}
+        for path, inode, offset, header, tail_bytes, row_count, last_ts in rows:
+            self._watermarks[path] = CsvFileCursor(
+                path=path, inode=inode, offset=offset,
+                header=json.loads(header) if header else None,
+                tail_bytes=bytes(tail_bytes or b""), row_count=row_count,
+            )
+            if last_ts is not None:
+                self._high_water_ts = max(self._high_water_ts or float(last_ts), float(last_ts))
+
+    def _ingest_file(self, path: str, is_latest: bool) -> int:
+        cursor = self._watermarks.get(path) or CsvFileCursor(path=path)
+        ingested = 0
+        while True:
+            cursor, chunk = self._read_chunk(cursor, is_latest)
+            if chunk is None:
+                return ingested
+            ingested += self._ingest_chunk(cursor, chunk)
+
+    def _read_chunk(self, cursor: CsvFileCursor, is_latest: bool) -> Tuple[CsvFileCursor, Optional[bytes]]:
+        """
+        讀取 watermark 之後最多 batch_bytes 的完整行
+        :return: (cursor (檔案被截斷/置換時為新的 cursor), 讀取的內容 (沒有新的完整行時為 None))
+        """
+        stat = os.stat(cursor.path)
+        with open(cursor.path, "rb") as f:
+            if cursor.inode:
+                reset = stat.st_ino != cursor.inode or stat.st_size < cursor.offset
+                if not reset and cursor.tail_bytes:
+                    f.seek(cursor.offset - len(cursor.tail_bytes))
+                    reset = f.read(len(cursor.tail_bytes)) != cursor.tail_bytes
+                if reset:
+                    # 從頭讀取，已寫入的時間由 high water 去除
+                    cursor = CsvFileCursor(path=cursor.path)
+            cursor.inode = stat.st_ino
+            if stat.st_size <= cursor.offset:
+                return cursor, None
+            f.seek(cursor.offset)
+            chunk = f.read(min(self.batch_bytes, stat.st_size - cursor.offset))
+            end = chunk.rfind(b"\n") + 1
+            if end == 0 and cursor.offset + len(chunk) < stat.st_size:
+                # 單一行超過 batch_bytes
+                chunk += f.read(stat.st_size - cursor.offset - len(chunk))
+                end = chunk.rfind(b"\n") + 1
+        if end < len(chunk) and (is_latest or cursor.offset + len(chunk) < stat.st_size):
+            chunk = chunk[:end] # 最後一行可能寫到一半
+        return cursor, (chunk or None)
+
+    def _ingest_chunk(self, cursor: CsvFileCursor, chunk: bytes) -> int:
+        started = time.monotonic()
+        bad_rows = []
+        rows = iter_csv_rows(chunk, bad_rows.append)
+        header = cursor.header
+        if header is None:
+            header = next(rows, None)
+        copy_rows, skipped, high_water = self._build_copy_rows(header, rows) if header else ([], 0, None)
+        skipped += len(bad_rows)
+
+        next_cursor = CsvFileCursor(
+            path=cursor.path, inode=cursor.inode, offset=cursor.offset + len(chunk), header=header,
+            tail_bytes=(cursor.tail_bytes + chunk)[-SensorCsvTailer.TAIL_BYTES_SIZE:], row_count=cursor.row_count,
+        )
+        try:
+            count = self._commit_chunk(next_cursor, copy_rows, high_water)
+        except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+            # Postgres 拒絕這一批 (ex: 數值超出欄位範圍)，改為逐行寫入並略過被拒絕的行
+            self._record_error(e, cursor.path)
+            next_cursor.row_count = cursor.row_count
+            count = self._commit_chunk(next_cursor, copy_rows, high_water, by_row=True)
+        rejected = len(copy_rows) - count
+
+        # commit 之後才更新記憶體中的進度
+        cursor.__dict__.update(next_cursor.__dict__)
+        self._watermarks[cursor.path] = cursor
+        if high_water is not None:
+            self._high_water_ts = high_water
+        self._stats["rows_ingested"] += count
+        self._stats["rows_skipped"] += skipped + rejected
+        self._stats["rows_rejected"] += rejected
+        self._stats["batches"] += 1
+        self._stats["last_batch_sec"] = round(time.monotonic() - started, 3)
+        return count
+
+    def _commit_chunk(self, cursor: CsvFileCursor, copy_rows: List[Tuple[float, str]], high_water: Optional[float], by_row: bool = False) -> int:
+        """
+        在同一個 transaction 內寫入 sensor_data、彙總表與 watermark (cursor.row_count 會加上寫入的筆數)
+        :param copy_rows: [(epoch 秒數, COPY 的一行)]
+        :param high_water: 這一批的最大時間 (包含被拒絕的行，之後不再重試)
+        :param by_row: 逐行以 savepoint 寫入，Postgres 拒絕的行直接略過
+        :return: 寫入的筆數
+        """
+        with self.db.get_connection() as conn, conn.cursor() as cur:
+            if by_row:
+                ingested = []
+                for epoch, line in copy_rows:
+                    cur.execute("SAVEPOINT ingest_row")
+                    try:
+                        cur.copy_expert(self.copy_sql, io.StringIO(line))
+                    except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT ingest_row")
+                        print(f"SensorPgIngestWorker reject row of {cursor.path}: {e}")
+                        continue
+                    cur.execute("RELEASE SAVEPOINT ingest_row")
+                    ingested.append(epoch)
+            else:
+                ingested = [epoch for epoch, _ in copy_rows]
+                if copy_rows:
+                    cur.copy_expert(self.copy_sql, io.StringIO("".join(line for _, line in copy_rows)))
+            if ingested and self.rollup is not None:
+                self.rollup.apply(cur, datetime.fromtimestamp(ingested[0], timezone.utc), datetime.fromtimestamp(ingested[-1], timezone.utc))
+            cursor.row_count += len(ingested)
+            self._save_watermark(cur, cursor, high_water)
+        return len(ingested)
+
+    def _build_copy_rows(self, header: List[str], rows) -> Tuple[List[Tuple[float, str]], int, Optional[float]]:
+        """
+        :return: ([(epoch 秒數, COPY 的一行 CSV)], 略過筆數 (無法解析、重複或時間倒退), 寫入的最大時間)
+        """
+        decode = SensorCsvRowDecoder.compile(self.model_class, tuple(header))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        high_water = self._high_water_ts
+        copy_rows = []
+        skipped = 0
+        for row in rows:
+            try:
+                record = decode(row)
+            except (TypeError, ValueError):
+                record = None
+            if record is None:
+                skipped += 1
+                continue
+            ts = record[self.TIME_FIELD]
+            if ts.tzinfo is None:
+                ts = ts.replace(tzinfo=timezone.utc)
+            epoch = to_epoch_seconds(ts)
+            if high_water is not None and epoch <= high_water:
+                skipped += 1
+                continue
+            high_water = epoch
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow([ts.isoformat()] + [self._format_value(record[key]) for key, _ in self.columns])
+            copy_rows.append((epoch, buffer.getvalue()))
+        return copy_rows, skipped, (high_water if copy_rows else None)
+
+    @staticmethod
+    def _format_value(value) -> str:
+        # COPY csv 格式: 沒有引號的空字串為 NULL
+        if value is None:
+            return ""
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return str(value)
+
+    def _save_watermark(self, cur, cursor: CsvFileCursor, high_water: Optional[float]):
+        cur.execute(
+            f"INSERT INTO {self.WATERMARK_TABLE} (path, inode, byte_offset, header, tail_bytes, row_count, last_time, updated_at) "
+            f"VALUES (%s, %s, %s, %s, %s, %s, to_timestamp(%s), NOW()) "
+            f"ON CONFLICT (path) DO UPDATE SET inode = EXCLUDED.inode, byte_offset = EXCLUDED.byte_offset, "
+            f"header = EXCLUDED.header, tail_bytes = EXCLUDED.tail_bytes, row_count = EXCLUDED.row_count, "
+            f"last_time = COALESCE(EXCLUDED.last_time, {self.WATERMARK_TABLE}.last_time), updated_at = NOW()",
+            (
+                cursor.path, cursor.inode, cursor.offset,
+                json.dumps(cursor.header) if cursor.header is not None else None,
+                cursor.tail_bytes, cursor.row_count, high_water,
+            ),
+        )
+
+    # --- 觀察 ---
+
+    def _bytes_behind(self, files: List[str]) -> int:
+        behind = 0
+        for path in files:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            cursor = self._watermarks.get(path)
+            behind += max(0, size - (cursor.offset if cursor else 0))
+        return behind
+
+    def _record_error(self, e: Exception, path: str = None):
+        self._stats["errors"] += 1
+        self._stats["last_error"] = f"{type(e).__name__}: {e}"
+        print(f"SensorPgIngestWorker ingest {path or ''} error: {e}")
+
+    def stats(self) -> dict:
+        high_water = self._high_water_ts
+        return {
+            **self._stats,
+            "files": len(self._watermarks),
+            "last_ingested_time": datetime.fromtimestamp(high_water, timezone.utc).isoformat() if high_water is not None else None,
+            "lag_sec": round(time.time() - high_water, 3) if high_water is not None else None,
+        }
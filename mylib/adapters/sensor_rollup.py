@@ -0,0 +1,185 @@
+import math
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Tuple
+from mylib.adapters.sensor_history_store import NUMERIC_METRIC_DATA_TYPES
+
+"""
+sensor_data 的彙總表 (rollup): 每分鐘、每小時、每天一筆，每個數值 metric 存 min/max/sum/count。
+
+@note
+    (1) 增量維護: 新資料寫入 sensor_data 時 (SensorPgIngestWorker 的同一個 transaction)，
+        只彙總該批的時間區間，再以 ON CONFLICT 合併到既有的 bucket (min 取小、max 取大、sum/count 相加)。
+    (2) bucket 以 date_bin 對齊 UTC epoch (1d 的 bucket 為 UTC 的一天)。
+    (3) 查詢規劃 (plan): 把 [start, end) 切成「最粗的完整 bucket」+ 兩端較細的 bucket，直到剩下不足 1 分鐘的部份查原始資料，
+        ex: 3 天的區間 = 2 個 1d bucket + 兩端各數個 1h bucket + 數個 1m bucket + 兩端數秒的原始資料。
+    (4) Average = sum / count，因此合併後的平均值與直接對原始資料計算相同。
+    (5) 資料表新建立時，以每天一個 transaction 從 sensor_data 回填。
+
+Usage:
+    rollup = SensorRollup.from_metric_definitions(SidecarSensorLogModel.to_metric_definitions())
+    rollup.ensure_tables(db)
+    rollup.apply(cur, start_time, end_time) # 寫入 sensor_data 之後
+    查詢見 SensorRollupQuery / SensorAlignedQuery (sensor_statistics_query.py)
+"""
+
+@dataclass(frozen=True)
+class RollupLevel:
+    """
+    :param name: ex: "1m"
+    :param width_sec: bucket 的秒數
+    :param table: 資料表名稱
+    """
+    name: str
+    width_sec: int
+    table: str
+
+
+class SensorRollup:
+    SOURCE_TABLE = "sensor_data"
+    LEVELS: Tuple[RollupLevel, ...] = (
+        RollupLevel("1m", 60, "sensor_data_rollup_1m"),
+        RollupLevel("1h", 3600, "sensor_data_rollup_1h"),
+        RollupLevel("1d", 86400, "sensor_data_rollup_1d"),
+    )
+    PARTS = ("min", "max", "sum", "count")
+
+    def __init__(self, fields: Sequence[str]):
+        """
+        :param fields: 數值 metric 的欄位名稱 (sensor_data 的欄位)
+        """
+        self.fields: Tuple[str, ...] = tuple(fields)
+
+    @classmethod
+    def from_metric_definitions(cls, metric_definitions: List[dict]) -> "SensorRollup":
+        return cls([
+            m["FieldName"] for m in metric_definitions
+            if m.get("FieldName") != "time" and m.get("MetricDataType") in NUMERIC_METRIC_DATA_TYPES
+        ])
+
+    @staticmethod
+    def quote_identifier(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    @classmethod
+    def column(cls, field: str, part: str) -> str:
+        """:return: 彙總欄位名稱 (已加引號)，ex: "coolant_flow_rate__max" """
+        return cls.quote_identifier(f"{field}__{part}")
+
+    # --- 資料表 ---
+
+    def build_create_table_sql(self, level: RollupLevel) -> str:
+        columns = ", ".join(
+            f"{self.column(f, part)} {'BIGINT NOT NULL DEFAULT 0' if part == 'count' else 'DOUBLE PRECISION'}"
+            for f in self.fields for part in self.PARTS
+        )
+        return f"CREATE TABLE IF NOT EXISTS {level.table} (bucket TIMESTAMPTZ PRIMARY KEY{', ' + columns if columns else ''})"
+
+    def ensure_tables(self, db):
+        """
+        建立彙總表 (已存在時補上新的 metric 欄位)，新建立時從 sensor_data 回填
+        :param db: PostgresAdapter
+        """
+        created = False
+        for level in self.LEVELS:
+            exists = db.query("SELECT to_regclass(%s) IS NOT NULL", (level.table,))[0][0]
+            db.exec(self.build_create_table_sql(level))
+            if exists:
+                for f in self.fields:
+                    for part in self.PARTS:
+                        column_type = "BIGINT NOT NULL DEFAULT 0" if part == "count" else "DOUBLE PRECISION"
+                        db.exec(f"ALTER TABLE {level.table} ADD COLUMN IF NOT EXISTS {self.column(f, part)} {column_type}")
+            created = created or not exists
+        if created:
+            self.backfill(db)
+
+    def backfill(self, db) -> int:
+        """
+        以每天一個 transaction 重新計算彙總表
+        :return: 處理的天數
+        """
+        start, end = db.query(f'SELECT MIN("time"), MAX("time") FROM {self.SOURCE_TABLE}')[0]
+        if start is None:
+            return 0
+        day = 86400
+        start_ts = math.floor(start.timestamp() / day) * day
+        days = 0
+        while start_ts <= end.timestamp():
+            with db.get_connection() as conn, conn.cursor() as cur:
+                for level in self.LEVELS:
+                    cur.execute(f"DELETE FROM {level.table} WHERE bucket >= to_timestamp(%s) AND bucket < to_timestamp(%s)", (start_ts, start_ts + day))
+                self.apply(cur, datetime.fromtimestamp(start_ts, timezone.utc), datetime.fromtimestamp(start_ts + day, timezone.utc), inclusive_end=False)
+            start_ts += day
+            days += 1
+        return days
+
+    # --- 增量維護 ---
+
+    def build_upsert_sql(self, level: RollupLevel, inclusive_end: bool = True) -> str:
+        """
+        彙總 sensor_data [start, end] 的資料並合併到 level 的彙總表
+        @note 參數: %(start)s, %(end)s
+        """
+        select_columns, merge = [], []
+        for f in self.fields:
+            source = self.quote_identifier(f)
+            c_min, c_max, c_sum, c_count = (self.column(f, part) for part in self.PARTS)
+            select_columns.append(
+                f"MIN({source})::double precision, MAX({source})::double precision, "
+                f"SUM({source})::double precision, COUNT({source})"
+            )
+            merge.append(
+                f"{c_min} = LEAST(r.{c_min}, EXCLUDED.{c_min}), "
+                f"{c_max} = GREATEST(r.{c_max}, EXCLUDED.{c_max}), "
+                f"{c_sum} = CASE WHEN r.{c_count} = 0 THEN EXCLUDED.{c_sum} WHEN EXCLUDED.{c_count} = 0 THEN r.{c_sum} "
+                f"ELSE r.{c_sum} + EXCLUDED.{c_sum} END, "
+                f"{c_count} = r.{c_count} + EXCLUDED.{c_count}"
+            )
+        insert_columns = ", ".join(["bucket"] + [self.column(f, part) for f in self.fields for part in self.PARTS])
+        end_op = "<=" if inclusive_end else "<"
+        return (
+            f"INSERT INTO {level.table} AS r ({insert_columns}) "
+            f"SELECT date_bin(make_interval(secs => {level.width_sec}), \"time\", TIMESTAMPTZ 'epoch') AS bucket"
+            f"{''.join(', ' + c for c in select_columns)} "
+            f"FROM {self.SOURCE_TABLE} WHERE \"time\" >= %(start)s AND \"time\" {end_op} %(end)s GROUP BY 1 "
+            + (f"ON CONFLICT (bucket) DO UPDATE SET {', '.join(merge)}" if merge else "ON CONFLICT (bucket) DO NOTHING")
+        )
+
+    def apply(self, cur, start: datetime, end: datetime, inclusive_end: bool = True):
+        """
+        把 sensor_data 新寫入的 [start, end] 合併到所有彙總表
+        @note 在寫入 sensor_data 的同一個 transaction 內呼叫；區間內只能有尚未彙總的資料
+        """
+        for level in self.LEVELS:
+            cur.execute(self.build_upsert_sql(level, inclusive_end), {"start": start, "end": end})
+
+    # --- 查詢規劃 ---
+
+    def plan(
+        self, start_ts: float, end_ts: float, levels: Optional[Sequence[RollupLevel]] = None
+    ) -> List[Tuple[Optional[RollupLevel], float, float]]:
+        """
+        把 [start_ts, end_ts) 切成各層的完整 bucket，粗的優先
+        :param levels: 可使用的彙總表，預設為全部
+        :return: [(level (None 表示原始資料), start_ts, end_ts)]，依時間排序
+        """
+        segments = []
+
+        def split(start: float, end: float, levels: Tuple[RollupLevel, ...]):
+            if start >= end:
+                return
+            if not levels:
+                segments.append((None, start, end))
+                return
+            level, finer = levels[0], levels[1:]
+            aligned_start = math.ceil(start / level.width_sec) * level.width_sec
+            aligned_end = math.floor(end / level.width_sec) * level.width_sec
+            if aligned_start >= aligned_end:
+                split(start, end, finer)
+                return
+            split(start, aligned_start, finer)
+            segments.append((level, aligned_start, aligned_end))
+            split(aligned_end, end, finer)
+
+        split(start_ts, end_ts, tuple(sorted(self.LEVELS if levels is None else levels, key=lambda l: -l.width_sec)))
+        return segments
@@ -0,0 +1,344 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+from mylib.adapters.sensor_api_adapter import SensorAPIAdapter
+from mylib.utils.CircuitBreaker import CircuitBreaker
+from mylib.utils.DataFreshnessUtil import DataFreshnessUtil
+from mylib.common.proj_error import ProjRedfishError, ProjRedfishErrorCode
+
+"""
+背景輪詢 RestAPI 的 sensor 資料，並發佈成不可變(immutable)且有版本號的 snapshot。
+handler 只讀取目前發佈中的 snapshot (不需上鎖)，不再因為 TTLCache 過期而在 request 中同步打 RestAPI。
+@note
+    (1) snapshot 發佈方式為整個物件參考替換 (atomic reference swap)，已發佈的 snapshot 不會再被修改。
+    (2) 資料來源在第一次被讀取時才註冊，背景只輪詢實際有被用到的 endpoint。
+    (3) 冷啟動(尚無 snapshot)時，改由 request 同步讀取一次並發佈。
+    (4) snapshot 過舊時 (RestAPI 慢或重啟中)，直接回應上一版資料 (stale-while-revalidate) 並標示為舊資料，
+        由背景輪詢負責更新；RestAPI 連續失敗時 circuit breaker 打開，期間不再送 request。
+    (5) 一次組出多個 resource 時 (ex: $expand)，可用 pinned() 固定在同一版 snapshot，讓所有 member 的讀值時間一致；
+        不在 SOURCES 中的上游資料 (ex: pump_speed) 改用 read_pinned() 讀取，區塊內同一份資料只讀取一次。
+    (6) 需要處理每一版 snapshot 的元件 (ex: TriggerEngine) 可用 subscribe() 註冊 listener，於發佈後在背景輪詢的 thread 中呼叫。
+"""
+
+@dataclass(frozen=True)
+class SensorSnapshot:
+    """
+    某一時間點的 sensor 資料
+    :param version: 單調遞增的版本號
+    :param timestamp: 發佈時間 (epoch seconds)
+    :param data: { source_name: payload }，payload 為唯讀 mapping
+    :param source_timestamps: { source_name: 該來源最後成功讀取的時間 (epoch seconds) }
+    """
+    version: int
+    timestamp: float
+    data: Mapping[str, Mapping] = field(default_factory=lambda: MappingProxyType({}))
+    source_timestamps: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({}))
+
+    def has_source(self, source_name: str) -> bool:
+        return source_name in self.data
+
+    def get(self, source_name: str) -> Optional[Mapping]:
+        return self.data.get(source_name)
+
+    def age_of(self, source_name: str) -> float:
+        """
+        :return: 該來源資料的秒數年齡，沒有資料時回傳 inf
+        """
+        ts = self.source_timestamps.get(source_name)
+        if ts is None:
+            return float("inf")
+        return time.time() - ts
+
+
+class SensorSnapshotPoller:
+    INTERVAL_SEC = float(os.getenv("SENSOR_SNAPSHOT_INTERVAL_SEC", 1))
+    MAX_AGE_SEC = float(os.getenv("SENSOR_SNAPSHOT_MAX_AGE_SEC", 5))
+
+    SOURCES: Dict[str, Callable[[], dict]] = {
+        "chassis_summary": SensorAPIAdapter.fetch_components_chassis_summary,
+        "thermal_equipment_summary": SensorAPIAdapter.fetch_components_thermal_equipment_summary,
+        "sensor_value": SensorAPIAdapter.fetch_status_sensor_value,
+    }
+
+    BREAKER_NAME = "RestAPI"
+
+    _snapshot: Optional[SensorSnapshot] = None
+    _active_sources: frozenset = frozenset()
+    _listeners: Tuple[Callable[[SensorSnapshot], None], ...] = ()
+    _notified_version: Optional[int] = None
+    _publish_lock = threading.Lock()
+    _refresh_lock = threading.Lock()
+    _start_lock = threading.Lock()
+    _stop_event = threading.Event()
+    _thread: Optional[threading.Thread] = None
+    _pinned = threading.local()
+
+    @classmethod
+    def get_snapshot(cls) -> Optional[SensorSnapshot]:
+        """
+        取得目前發佈中的 snapshot (lock-free)
+        """
+        return cls._snapshot
+
+    @classmethod
+    @contextmanager
+    def pinned(cls):
+        """
+        在 with 區塊內，同一個 thread 的 read() 都讀取進入時的那一版 snapshot
+        @note 進入時的 snapshot 沒有的來源會同步讀取一次，只補進固定的 snapshot，已讀過的來源不會換版本
+        Usage:
+            with SensorSnapshotPoller.pinned():
+                members = [ fetch_member(id) for id in member_ids ]
+        """
+        prev_active = getattr(cls._pinned, "active", False)
+        prev_snapshot = getattr(cls._pinned, "snapshot", None)
+        prev_reads = getattr(cls._pinned, "reads", None)
+        if not prev_active:
+            cls._pinned.active = True
+            cls._pinned.snapshot = cls._snapshot
+            cls._pinned.reads = {}
+        try:
+            yield cls._pinned.snapshot
+        finally:
+            cls._pinned.active = prev_active
+            cls._pinned.snapshot = prev_snapshot
+            cls._pinned.reads = prev_reads
+
+    @classmethod
+    def pinned_reads(cls) -> Optional[Dict[str, Any]]:
+        """
+        :return: pinned() 區塊內共用的上游讀值 { key: value }，不在 pinned() 區塊內時回傳 None
+        """
+        if not getattr(cls._pinned, "active", False):
+            return None
+        return cls._pinned.reads
+
+    @classmethod
+    def read_pinned(cls, key: str, fetch: Callable[[], Any]) -> Any:
+        """
+        讀取不在 SOURCES 中的上游資料 (不經過背景輪詢)
+        :param key: 上游資料的名稱，同一個 key 必須對應同一份資料 (ex: "pump_speed")
+        :param fetch: 實際讀取的 callable
+        @note pinned() 區塊內同一個 key 只讀取一次，所有 member 共用同一份讀值；區塊外每次都直接讀取
+        """
+        reads = cls.pinned_reads()
+        if reads is None:
+            return fetch()
+        if key not in reads:
+            reads[key] = fetch()
+        return reads[key]
+
+    @classmethod
+    def read(cls, source_name: str) -> Mapping:
+        """
+        讀取某個來源的最新資料
+        @note 
+            (1) snapshot 不存在時，會同步讀取一次 (失敗時將 exception 往上拋，行為同原本的直接讀取)
+            (2) snapshot 過舊時，回應上一版資料並以 DataFreshnessUtil 標示 (response 會加上 `Age` header)
+        """
+        if source_name not in cls.SOURCES:
+            raise KeyError(f"Unknown sensor snapshot source: {source_name}")
+        cls._register_source(source_name)
+        cls.start()
+
+        is_pinned = getattr(cls._pinned, "active", False)
+        snapshot = cls._pinned.snapshot if is_pinned else cls._snapshot
+        if snapshot and snapshot.has_source(source_name):
+            age = snapshot.age_of(source_name)
+            if age > cls.MAX_AGE_SEC:
+                DataFreshnessUtil.mark_stale(source_name, age)
+            return snapshot.get(source_name)
+        payload = cls._refresh_source(source_name)
+        if is_pinned:
+            # pinned() 的 snapshot 還沒有這個來源: 只補上這個來源，其他來源仍維持固定的版本
+            latest = cls._snapshot
+            cls._pinned.snapshot = cls._with_source(
+                snapshot, source_name, payload, latest.source_timestamps.get(source_name, time.time()) if latest else time.time()
+            )
+        return payload
+
+    @staticmethod
+    def _with_source(snapshot: Optional[SensorSnapshot], source_name: str, payload: Mapping, ts: float) -> SensorSnapshot:
+        """
+        由 snapshot 衍生出多一個來源的 snapshot (版本號不變，不發佈)，供 pinned() 使用
+        """
+        data = dict(snapshot.data) if snapshot else {}
+        source_timestamps = dict(snapshot.source_timestamps) if snapshot else {}
+        data[source_name] = payload
+        source_timestamps[source_name] = ts
+        return SensorSnapshot(
+            version=snapshot.version if snapshot else 0,
+            timestamp=snapshot.timestamp if snapshot else ts,
+            data=MappingProxyType(data),
+            source_timestamps=MappingProxyType(source_timestamps),
+        )
+
+    @classmethod
+    def subscribe(cls, source_name: str, listener: Callable[[SensorSnapshot], None]) -> None:
+        """
+        註冊 listener(snapshot)，發佈新 snapshot 後呼叫，並讓背景輪詢 source_name
+        @note
+            (1) listener 一律在背景輪詢的 thread 中執行 (冷啟動時 request 發佈的 snapshot 也是)，不佔用 request 的時間；
+                應該盡快返回，exception 只會被記錄
+            (2) 同一輪之間發佈多個版本時，只以最新的一版呼叫
+        """
+        if source_name not in cls.SOURCES:
+            raise KeyError(f"Unknown sensor snapshot source: {source_name}")
+        cls._register_source(source_name)
+        with cls._publish_lock:
+            if listener not in cls._listeners:
+                cls._listeners = cls._listeners + (listener,)
+        cls.start()
+
+    @classmethod
+    def unsubscribe(cls, listener: Callable[[SensorSnapshot], None]) -> None:
+        with cls._publish_lock:
+            cls._listeners = tuple(l for l in cls._listeners if l != listener)
+
+    @classmethod
+    def get_breaker(cls) -> CircuitBreaker:
+        return CircuitBreaker.get_instance(cls.BREAKER_NAME)
+
+    @classmethod
+    def start(cls) -> None:
+        """
+        啟動背景輪詢 (daemon thread)，重複呼叫無副作用
+        """
+        if cls._thread and cls._thread.is_alive():
+            return
+        with cls._start_lock:
+            if cls._thread and cls._thread.is_alive():
+                return
+            cls._stop_event.clear()
+            cls._thread = threading.Thread(target=cls._run, name="SensorSnapshotPoller", daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def stop(cls, timeout: float = None) -> None:
+        cls._stop_event.set()
+        thread = cls._thread
+        if thread and thread.is_alive():
+            thread.join(timeout)
+        cls._thread = None
+
+    @classmethod
+    def is_running(cls) -> bool:
+        return bool(cls._thread and cls._thread.is_alive())
+
+    @classmethod
+    def reset(cls) -> None:
+        """
+        停止輪詢並清除 snapshot (for testing)
+        """
+        cls.stop(timeout=cls.INTERVAL_SEC * 2)
+        with cls._publish_lock:
+            cls._snapshot = None
+            cls._active_sources = frozenset()
+            cls._notified_version = None
+        cls.get_breaker().reset()
+
+    @classmethod
+    def poll_once(cls) -> Optional[SensorSnapshot]:
+        """
+        輪詢所有已註冊的來源一次並發佈新 snapshot
+        @note 單一來源失敗時保留該來源上一版的資料
+        """
+        active_sources = cls._active_sources
+        if not active_sources:
+            return cls._snapshot
+        breaker = cls.get_breaker()
+        if not breaker.allow_request():
+            return cls._snapshot
+
+        fetched = {}
+        for source_name in active_sources:
+            try:
+                fetched[source_name] = cls.SOURCES[source_name]()
+            except Exception as e:
+                print(f"SensorSnapshotPoller poll {source_name} error: {e}")
+        if len(fetched) == len(active_sources):
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        if not fetched:
+            return cls._snapshot
+        return cls._publish(fetched)
+
+    @classmethod
+    def _register_source(cls, source_name: str) -> None:
+        if source_name in cls._active_sources:
+            return
+        with cls._publish_lock:
+            cls._active_sources = cls._active_sources | {source_name}
+
+    @classmethod
+    def _refresh_source(cls, source_name: str) -> Mapping:
+        """
+        同步讀取單一來源 (冷啟動時)
+        @note 以 lock 合併同時間的多個 request，只會有一個真的打到 RestAPI
+        """
+        with cls._refresh_lock:
+            snapshot = cls._snapshot
+            if snapshot and snapshot.has_source(source_name):
+                return snapshot.get(source_name)
+            breaker = cls.get_breaker()
+            if not breaker.allow_request():
+                raise ProjRedfishError(
+                    ProjRedfishErrorCode.SERVICE_TEMPORARILY_UNAVAILABLE,
+                    f"{cls.BREAKER_NAME} is unavailable (circuit open), no data for {source_name}"
+                )
+            try:
+                payload = cls.SOURCES[source_name]()
+            except Exception:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
+            return cls._publish({source_name: payload}).get(source_name)
+
+    @classmethod
+    def _publish(cls, fetched: Dict[str, dict]) -> SensorSnapshot:
+        now = time.time()
+        with cls._publish_lock:
+            prev = cls._snapshot
+            data = dict(prev.data) if prev else {}
+            source_timestamps = dict(prev.source_timestamps) if prev else {}
+            for source_name, payload in fetched.items():
+                data[source_name] = MappingProxyType(payload)
+                source_timestamps[source_name] = now
+            snapshot = SensorSnapshot(
+                version=(prev.version + 1) if prev else 1,
+                timestamp=now,
+                data=MappingProxyType(data),
+                source_timestamps=MappingProxyType(source_timestamps),
+            )
+            cls._snapshot = snapshot
+        return snapshot
+
+    @classmethod
+    def _notify_listeners(cls) -> None:
+        """以目前發佈中的 snapshot 呼叫 listener (只在背景輪詢的 thread 中執行)"""
+        snapshot = cls._snapshot
+        if snapshot is None or snapshot.version == cls._notified_version:
+            return
+        cls._notified_version = snapshot.version
+        for listener in cls._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"SensorSnapshotPoller listener error: {e}")
+
+    @classmethod
+    def _run(cls) -> None:
+        while not cls._stop_event.is_set():
+            started_at = time.monotonic()
+            try:
+                cls.poll_once()
+            except Exception as e:
+                print(f"SensorSnapshotPoller error: {e}")
+            cls._notify_listeners()
+            elapsed = time.monotonic() - started_at
+            cls._stop_event.wait(max(cls.INTERVAL_SEC - elapsed, 0.05))
@@ -0,0 +1,199 @@
+import math
+import threading
+from collections import deque
+from typing import Deque, Dict, Mapping, Optional, Tuple
+from mylib.adapters.sensor_history_store import SensorHistoryStore
+
+"""
+"recent" 統計值的串流計算引擎: 每個 (metric, duration) 一個滑動視窗，新資料到達時增量更新，查詢為 O(1)。
+
+@note
+    (1) Minimum/Maximum 以單調 deque 維護 (最前面就是視窗內的最小/最大值)，Average/Summation 以 running sum/count 維護。
+        每筆資料只會進出 deque 各一次，更新的攤銷成本為 O(1)。
+    (2) 要追蹤的視窗由 CalculationTimeInterval 設定 (TelemetryServiceModel) 決定，見 RfTelemetryService。
+    (3) 資料來源為 SensorHistoryStore 新附加的資料 (依 head_sequence 判斷哪些還沒讀過)，
+        與 sensor_data / 歷史資料的取樣相同，因此結果與 Postgres 查詢一致。
+        store 被改寫 (epoch 改變) 時清空視窗，再從 store 的最近資料重新填入。
+    (4) 視窗的時間範圍為 [end - duration, end)，只有在 store 的資料涵蓋整個視窗後才回答 (冷啟動時回傳 None，改查 Postgres)。
+    (5) 只回答 end 晚於最新一筆資料 (且不早於之前查詢的 end) 的查詢 (即 "recent")。
+
+Usage:
+    engine = SensorStatisticsEngine.get_instance()
+    engine.configure({("coolant_flow_rate", "PT30S"): ("Coolant Flow Rate (F1)", 30)})
+    engine.sync(store)
+    engine.get("coolant_flow_rate", "PT30S", "Average", time.time())
+"""
+
+class SlidingWindow:
+    """單一 metric 在 duration_sec 秒內的 min/max/sum/count"""
+    RESUM_EVERY = 100000 # 每更新 N 次重新加總一次，避免 running sum 累積浮點誤差
+
+    __slots__ = ("duration_sec", "_samples", "_min", "_max", "_sum", "_updates")
+
+    def __init__(self, duration_sec: float):
+        self.duration_sec = duration_sec
+        self._samples: Deque[Tuple[float, float]] = deque()
+        self._min: Deque[Tuple[float, float]] = deque() # value 遞增
+        self._max: Deque[Tuple[float, float]] = deque() # value 遞減
+        self._sum = 0.0
+        self._updates = 0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, ts: float, value: float):
+        """:param value: NaN 表示缺值，略過"""
+        if value != value:
+            return
+        self._samples.append((ts, value))
+        self._sum += value
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((ts, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((ts, value))
+        self._updates += 1
+        if self._updates >= self.RESUM_EVERY:
+            self._sum = math.fsum(v for _, v in self._samples)
+            self._updates = 0
+
+    def evict(self, start_ts: float):
+        """移除 start_ts 之前的資料"""
+        samples = self._samples
+        while samples and samples[0][0] < start_ts:
+            self._sum -= samples.popleft()[1]
+        while self._min and self._min[0][0] < start_ts:
+            self._min.popleft()
+        while self._max and self._max[0][0] < start_ts:
+            self._max.popleft()
+        if not samples:
+            self._sum = 0.0
+
+    def get(self, stat: str, end_ts: float) -> Optional[float]:
+        """
+        :param stat: Average, Maximum, Minimum, Summation
+        :return: [end_ts - duration_sec, end_ts) 的統計值，沒有資料時為 None
+        """
+        self.evict(end_ts - self.duration_sec)
+        if not self._samples:
+            return None
+        if stat == "Minimum":
+            return self._min[0][1]
+        if stat == "Maximum":
+            return self._max[0][1]
+        if stat == "Average":
+            return self._sum / len(self._samples)
+        if stat == "Summation":
+            return self._sum
+        raise ValueError(f"Unsupported stat: {stat}")
+
+
+class SensorStatisticsEngine:
+    _instance: Optional["SensorStatisticsEngine"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        # (field, duration) -> (store 欄位名稱, 秒數)
+        self._config: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._windows: Dict[Tuple[str, str], SlidingWindow] = {}
+        self._epoch: Optional[int] = None
+        self._next_sequence: Optional[int] = None # 下一筆要讀取的 store 序號
+        self._covered_from: Optional[float] = None # 視窗內的資料從這個時間開始是完整的
+        self._last_ts: Optional[float] = None
+        self._max_end_ts = -math.inf # 視窗已依此時間移除舊資料，更早的 end 無法回答
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "SensorStatisticsEngine":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def configure(self, config: Mapping[Tuple[str, str], Tuple[str, float]]):
+        """
+        設定要追蹤的視窗，設定改變時重新從 store 填入
+        :param config: {(field, duration): (store 欄位名稱, 秒數)}
+        """
+        config = dict(config)
+        with self.lock:
+            if config == self._config:
+                return
+            self._config = config
+            self._reset()
+
+    def _reset(self):
+        self._windows = {key: SlidingWindow(seconds) for key, (_, seconds) in self._config.items()}
+        self._epoch = None
+        self._next_sequence = None
+        self._covered_from = None
+        self._last_ts = None
+        self._max_end_ts = -math.inf
+
+    def is_tracked(self, field: str, duration: str) -> bool:
+        return (field, duration) in self._config
+
+    def sync(self, store: SensorHistoryStore):
+        """讀取 store 新附加的資料並更新所有視窗"""
+        with self.lock, store.lock:
+            if not self._config:
+                return
+            size = len(store)
+            if store.epoch != self._epoch or self._next_sequence is None or self._next_sequence < store.head_sequence:
+                # 第一次、store 被改寫或有資料還沒讀到就被移除: 從 store 最近的資料重新填入
+                self._reset()
+                self._epoch = store.epoch
+                last_ts = store.last_timestamp()
+                if last_ts is None:
+                    self._next_sequence = store.head_sequence
+                    return
+                max_duration = max(seconds for _, seconds in self._config.values())
+                lo, _ = store.time_range(start_ts=last_ts - max_duration)
+                # lo 之前還有資料時，視窗從 last_ts - max_duration 起是完整的；否則從 store 的第一筆開始
+                self._covered_from = last_ts - max_duration if lo > 0 else store.first_timestamp()
+                self._feed(store, lo, size)
+            else:
+                self._feed(store, self._next_sequence - store.head_sequence, size)
+            self._next_sequence = store.head_sequence + size
+
+    def _feed(self, store: SensorHistoryStore, lo: int, hi: int):
+        if lo >= hi:
+            return
+        timestamps = store.get_timestamps(lo, hi)
+        columns: Dict[str, object] = {}
+        for key, window in self._windows.items():
+            column_name = self._config[key][0]
+            if column_name not in columns:
+                columns[column_name] = store.get_column(column_name, lo, hi)
+            add = window.add
+            for ts, value in zip(timestamps, columns[column_name]):
+                add(ts, value)
+            window.evict(timestamps[-1] - window.duration_sec)
+        self._last_ts = timestamps[-1]
+        if self._covered_from is None:
+            self._covered_from = timestamps[0]
+
+    def get(self, field: str, duration: str, stat: str, end_ts: float) -> Optional[float]:
+        """
+        :return: 統計值；沒有資料時為 None
+        :raise KeyError: 沒有追蹤此視窗、資料尚未涵蓋整個視窗，或 end_ts 不晚於最新一筆資料
+        """
+        with self.lock:
+            window = self._windows[(field, duration)]
+            if (self._last_ts is not None and end_ts <= self._last_ts) or end_ts < self._max_end_ts:
+                raise KeyError(f"end time is earlier than the latest sample: {field} {duration}")
+            if self._covered_from is None or self._covered_from > end_ts - window.duration_sec:
+                raise KeyError(f"window is not covered yet: {field} {duration}")
+            self._max_end_ts = end_ts
+            return window.get(stat, end_ts)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "windows": len(self._windows),
+                "samples": sum(len(w) for w in self._windows.values()),
+                "covered_from": self._covered_from,
+                "last_timestamp": self._last_ts,
+            }
@@ -0,0 +1,313 @@
+import math
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from mylib.adapters.PostgresAdapter import PostgresAdapter
+from mylib.adapters.sensor_rollup import RollupLevel, SensorRollup
+
+"""
+get_sensor_statistics 的 SQL: 一次掃描時間區間內的資料，以 FILTER (WHERE ...) 同時計算所有 (field x stat x duration)。
+
+@note
+    (1) 取代每個 (field x stat x duration) 一個 scalar subquery 的寫法 (同一段資料被掃描數百次)。
+    (2) "time" 只在子查詢中轉換成 timestamptz，外層的條件都使用轉換後的 ts。
+        schema 版本 2 (見 SensorDataMigration) 的 time 已是 timestamptz，轉換不做任何事，條件可以使用 time 的索引。
+    (3) SQL 只依 (fields, stats, duration 數量) 改變，end_time 與各 duration 的秒數都是參數 ($1, $2, ...)，
+        可以 PREPARE 一次後重複使用 (見 PostgresAdapter.execute_prepared)。
+    (4) 相同的 (field, stat, duration) 只計算一次。
+
+Usage:
+    query = SensorStatisticsQuery(queries, {"PT30S": 30})
+    with db.get_connection() as conn:
+        row = db.execute_prepared(conn, query.statement_name, query.statement, query.param_types, query.build_params(end_time)).fetchone()
+    result = query.map_row(row)
+"""
+
+class SensorStatisticsQuery:
+    STATEMENT_PREFIX = "sensor_stats"
+    AGGREGATE_FUNCTIONS = {
+        "Average": "AVG",
+        "Maximum": "MAX",
+        "Minimum": "MIN",
+        "Summation": "SUM",
+    }
+
+    def __init__(self, queries: List[dict], duration_time_intervals: Dict[str, int], table: str = "sensor_data"):
+        """
+        :param queries: [{"duration": "PT30S", "fields": [...], "stats": [...]}]，已驗證過的查詢
+        :param duration_time_intervals: {duration: 秒數}
+        """
+        self.table = table
+        self.durations: List[str] = []
+        self.fields: List[str] = []
+        self.aggregates: List[Tuple[str, str, str]] = [] # 每個結果欄位的 (field, stat, duration)
+        self.result_mapping: List[int] = [] # 依查詢順序，每個輸出對應的結果欄位
+        aggregate_index: Dict[Tuple[str, str, str], int] = {}
+        for query in queries:
+            duration = query.get("duration", "PT10S")
+            if duration not in self.durations:
+                self.durations.append(duration)
+            for field in query["fields"]:
+                if field not in self.fields:
+                    self.fields.append(field)
+                for stat in query["stats"]:
+                    if stat not in self.AGGREGATE_FUNCTIONS:
+                        raise ValueError(f"Unsupported stat: {stat}")
+                    key = (field, stat, duration)
+                    if key not in aggregate_index:
+                        aggregate_index[key] = len(self.aggregates)
+                        self.aggregates.append(key)
+                    self.result_mapping.append(aggregate_index[key])
+        self.duration_seconds = [int(duration_time_intervals[duration]) for duration in self.durations]
+        self.statement = self._build_statement()
+        self.param_types = ["timestamptz"] + ["integer"] * len(self.durations)
+
+    @staticmethod
+    def quote_identifier(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    def _build_statement(self) -> str:
+        # $1: end_time, $2...: 各 duration 的秒數
+        duration_params = {duration: f"${i + 2}" for i, duration in enumerate(self.durations)}
+        max_duration_param = f"GREATEST({', '.join(duration_params.values())})"
+        columns = []
+        for field, stat, duration in self.aggregates:
+            columns.append(
+                f"ROUND(({self.AGGREGATE_FUNCTIONS[stat]}({self.quote_identifier(field)}) "
+                f"FILTER (WHERE ts >= $1 - make_interval(secs => {duration_params[duration]})))::numeric, 2)"
+            )
+        field_list = ", ".join(self.quote_identifier(field) for field in self.fields)
+        return (
+            f"SELECT {', '.join(columns)} "
+            f"FROM (SELECT \"time\"::timestamptz AS ts, {field_list} FROM {self.quote_identifier(self.table)}) AS data_source "
+            f"WHERE ts >= $1 - make_interval(secs => {max_duration_param}) AND ts < $1"
+        )
+
+    @property
+    def statement_name(self) -> str:
+        return PostgresAdapter.build_statement_name(self.STATEMENT_PREFIX, self.statement)
+
+    def build_params(self, end_time) -> list:
+        return [end_time] + self.duration_seconds
+
+    def map_row(self, row: Optional[Sequence]) -> list:
+        """
+        把查詢結果轉回 get_sensor_statistics 的輸出格式 (沒有資料的統計值不輸出)
+        """
+        result = []
+        if not row:
+            return result
+        for index in self.result_mapping:
+            stat_value = row[index]
+            if stat_value is None:
+                continue
+            field, stat, duration = self.aggregates[index]
+            result.append({
+                "resource": "SensorStatistics",
+                "metric_id": field,
+                "property": f"{stat}_{duration}",
+                "value": str(float(stat_value))
+            })
+        return result
+
+
+class SensorRollupQuery(SensorStatisticsQuery):
+    """
+    get_sensor_statistics 的長區間查詢: 每個 duration 依 SensorRollup.plan() 合併彙總表與原始資料
+    @note
+        (1) 每個 duration 一個 SQL (時間切點依 end_time 而定，不使用 prepared statement)
+        (2) 彙總表只由 SensorPgIngestWorker 維護，只涵蓋到 worker 寫入的最大時間 (rollup_until)，
+            之後的部份 (或彙總表不可用時整個區間) 讀原始資料。
+
+    Usage:
+        query = SensorRollupQuery(rollup, queries, {"P3D": 259200})
+        rollup_until = SensorPgIngestWorker.read_high_water(cur)
+        rows = [execute(sql, params) for sql, params in query.build_statements(end_time, rollup_until)]
+        result = query.map_rows(rows)
+    """
+
+    def __init__(self, rollup: SensorRollup, queries: List[dict], duration_time_intervals: Dict[str, int]):
+        self.rollup = rollup
+        super().__init__(queries, duration_time_intervals, table=rollup.SOURCE_TABLE)
+
+    def _build_statement(self) -> Optional[str]:
+        return None
+
+    def _outer_column(self, field: str, stat: str) -> str:
+        c_min, c_max, c_sum, c_count = (SensorRollup.column(field, part) for part in SensorRollup.PARTS)
+        expression = {
+            "Minimum": f"MIN({c_min})",
+            "Maximum": f"MAX({c_max})",
+            "Average": f"SUM({c_sum}) / NULLIF(SUM({c_count}), 0)",
+            "Summation": f"CASE WHEN SUM({c_count}) > 0 THEN SUM({c_sum}) END",
+        }[stat]
+        return f"ROUND(({expression})::numeric, 2)"
+
+    def _segment_sql(self, level: Optional[RollupLevel], fields: List[str]) -> str:
+        if level is None:
+            columns = ", ".join(
+                f"MIN({q})::double precision AS {SensorRollup.column(f, 'min')}, MAX({q})::double precision AS {SensorRollup.column(f, 'max')}, "
+                f"SUM({q})::double precision AS {SensorRollup.column(f, 'sum')}, COUNT({q}) AS {SensorRollup.column(f, 'count')}"
+                for f, q in ((f, self.quote_identifier(f)) for f in fields)
+            )
+            return f"SELECT {columns} FROM {self.quote_identifier(self.table)} WHERE \"time\" >= %s AND \"time\" < %s"
+        columns = ", ".join(
+            f"{agg}({SensorRollup.column(f, part)}) AS {SensorRollup.column(f, part)}"
+            for f in fields for part, agg in zip(SensorRollup.PARTS, ("MIN", "MAX", "SUM", "SUM"))
+        )
+        return f"SELECT {columns} FROM {level.table} WHERE bucket >= %s AND bucket < %s"
+
+    def plan(
+        self, start_ts: float, end_ts: float, rollup_until: Optional[float], levels: Optional[Sequence[RollupLevel]] = None
+    ) -> List[Tuple[Optional[RollupLevel], float, float]]:
+        """
+        SensorRollup.plan()，但彙總表只用在 rollup_until 之前的完整 bucket
+        :param rollup_until: 彙總表涵蓋到的時間 (epoch)，None 表示彙總表不可用
+        :return: [(level (None 表示原始資料), start_ts, end_ts)]，依時間排序
+        """
+        rollup_end = start_ts if rollup_until is None else max(start_ts, min(end_ts, rollup_until))
+        segments = self.rollup.plan(start_ts, rollup_end, levels)
+        if rollup_end < end_ts:
+            segments.append((None, rollup_end, end_ts))
+        return segments
+
+    def build_statements(self, end_time: datetime, rollup_until: Optional[float] = math.inf) -> List[Tuple[str, list]]:
+        """
+        :param rollup_until: 彙總表涵蓋到的時間 (epoch)，None 表示彙總表不可用 (全部讀原始資料)
+        :return: 每個 duration (依 self.durations 順序) 的 (SQL, 參數)
+        """
+        end_ts = end_time.timestamp()
+        statements = []
+        for duration, seconds in zip(self.durations, self.duration_seconds):
+            aggregates = [(f, stat) for f, stat, d in self.aggregates if d == duration]
+            fields = list(dict.fromkeys(f for f, _ in aggregates))
+            segments, params = [], []
+            for level, start, end in self.plan(end_ts - seconds, end_ts, rollup_until):
+                segments.append(self._segment_sql(level, fields))
+                params += [datetime.fromtimestamp(start, timezone.utc), datetime.fromtimestamp(end, timezone.utc)]
+            outer = ", ".join(self._outer_column(f, stat) for f, stat in aggregates)
+            statements.append((f"SELECT {outer} FROM ({' UNION ALL '.join(segments)}) AS segments", params))
+        return statements
+
+    def map_rows(self, rows: List[Optional[Sequence]]) -> list:
+        """
+        :param rows: build_statements() 各 SQL 的結果 (同順序)
+        """
+        values: Dict[Tuple[str, str, str], object] = {}
+        for duration, row in zip(self.durations, rows):
+            aggregates = [(f, stat) for f, stat, d in self.aggregates if d == duration]
+            for (field, stat), value in zip(aggregates, row or ()):
+                values[(field, stat, duration)] = value
+        return self.map_row([values.get(key) for key in self.aggregates])
+
+
+class SensorAlignedQuery(SensorRollupQuery):
+    """
+    get_sensor_statistics 的 "aligned" 模式: 把 [end - window, end) 切成對齊 UTC epoch 的 bucket (寬度為 duration)，
+    每個 duration 一個 SQL，以 date_bin 一次 GROUP BY 計算所有 bucket 的 (field x stat)
+    @note
+        (1) bucket 寬度是彙總表寬度的倍數時，完整的彙總表 bucket 直接取用，其餘部份 (兩端) 讀原始資料。
+        (2) 沒有資料的 bucket 仍會輸出 (values 為空)。
+
+    Usage:
+        query = SensorAlignedQuery(rollup, queries, {"PT1M": 60}, window_sec=3600)
+        rows = [execute(sql, params).fetchall() for sql, params in query.build_statements(end_time)]
+        result = query.map_series(rows, end_time)
+    """
+    MAX_BUCKETS = 2048
+
+    def __init__(self, rollup: SensorRollup, queries: List[dict], duration_time_intervals: Dict[str, int], window_sec: int):
+        super().__init__(rollup, queries, duration_time_intervals)
+        self.window_sec = int(window_sec)
+        for duration, seconds in zip(self.durations, self.duration_seconds):
+            if self.bucket_count(seconds) > self.MAX_BUCKETS:
+                raise ValueError(f"Too many buckets for duration {duration}: at most {self.MAX_BUCKETS} buckets are allowed")
+
+    def duration_aggregates(self, duration: str) -> List[Tuple[str, str]]:
+        """:return: duration 的 (field, stat)，依結果欄位順序"""
+        return [(f, stat) for f, stat, d in self.aggregates if d == duration]
+
+    def bucket_count(self, width_sec: int) -> int:
+        return max(1, -(-self.window_sec // width_sec))
+
+    def bucket_range(self, width_sec: int, end_ts: float) -> Tuple[float, float]:
+        """
+        :return: (第一個 bucket 的開始時間, 最後一個 bucket 的結束時間)，最後一個 bucket 包含 end_ts 之前的最新資料
+        """
+        last_end = math.ceil(end_ts / width_sec) * width_sec
+        return last_end - self.bucket_count(width_sec) * width_sec, last_end
+
+    def _bucket_segment_sql(self, level: Optional[RollupLevel], fields: List[str]) -> str:
+        if level is None:
+            columns = ", ".join(
+                f"{q}::double precision AS {SensorRollup.column(f, 'min')}, {q}::double precision AS {SensorRollup.column(f, 'max')}, "
+                f"{q}::double precision AS {SensorRollup.column(f, 'sum')}, ({q} IS NOT NULL)::int AS {SensorRollup.column(f, 'count')}"
+                for f, q in ((f, self.quote_identifier(f)) for f in fields)
+            )
+            return f"SELECT \"time\" AS t, {columns} FROM {self.quote_identifier(self.table)} WHERE \"time\" >= %s AND \"time\" < %s"
+        columns = ", ".join(SensorRollup.column(f, part) for f in fields for part in SensorRollup.PARTS)
+        return f"SELECT bucket AS t, {columns} FROM {level.table} WHERE bucket >= %s AND bucket < %s"
+
+    def build_statements(self, end_time: datetime, rollup_until: Optional[float] = math.inf) -> List[Tuple[str, list]]:
+        """
+        :param rollup_until: 彙總表涵蓋到的時間 (epoch)，None 表示彙總表不可用 (全部讀原始資料)
+        :return: 每個 duration (依 self.durations 順序) 的 (SQL, 參數)，結果為 (bucket, 統計值...) 依 bucket 排序
+        """
+        end_ts = end_time.timestamp()
+        statements = []
+        for duration, seconds in zip(self.durations, self.duration_seconds):
+            aggregates = self.duration_aggregates(duration)
+            fields = list(dict.fromkeys(f for f, _ in aggregates))
+            start_ts, _ = self.bucket_range(seconds, end_ts)
+            # 彙總表的 bucket 不能跨過 aligned bucket 的邊界
+            levels = [level for level in self.rollup.LEVELS if seconds % level.width_sec == 0]
+            segments, params = [], [seconds]
+            for level, start, end in self.plan(start_ts, end_ts, rollup_until, levels):
+                segments.append(self._bucket_segment_sql(level, fields))
+                params += [datetime.fromtimestamp(start, timezone.utc), datetime.fromtimestamp(end, timezone.utc)]
+            outer = ", ".join(self._outer_column(f, stat) for f, stat in aggregates)
+            statements.append((
+                f"SELECT date_bin(make_interval(secs => %s), t, TIMESTAMPTZ 'epoch') AS bucket, {outer} "
+                f"FROM ({' UNION ALL '.join(segments)}) AS segments GROUP BY 1 ORDER BY 1",
+                params,
+            ))
+        return statements
+
+    def map_series(self, rows_per_duration: List[Sequence[Sequence]], end_time: datetime) -> list:
+        """
+        :param rows_per_duration: build_statements() 各 SQL 的所有結果 (同順序)
+        :return: [{"duration", "buckets": [{"start_time", "end_time", "values": [...]}]}]
+        """
+        series = []
+        for duration, seconds, rows in zip(self.durations, self.duration_seconds, rows_per_duration):
+            aggregates = self.duration_aggregates(duration)
+            by_bucket = {row[0].timestamp(): row[1:] for row in rows}
+            start_ts, _ = self.bucket_range(seconds, end_time.timestamp())
+            buckets = []
+            for i in range(self.bucket_count(seconds)):
+                bucket_ts = start_ts + i * seconds
+                row = by_bucket.get(bucket_ts, ())
+                values = dict(zip(aggregates, row))
+                buckets.append(self.build_bucket(
+                    bucket_ts, seconds, duration, [(f, stat, values.get((f, stat))) for f, stat in aggregates]
+                ))
+            series.append({"duration": duration, "buckets": buckets})
+        return series
+
+    @staticmethod
+    def build_bucket(bucket_ts: float, width_sec: int, duration: str, values: Sequence[Tuple[str, str, object]]) -> dict:
+        """
+        :param values: [(field, stat, 統計值)]，統計值為 None (沒有資料) 的不輸出
+        """
+        return {
+            "start_time": datetime.fromtimestamp(bucket_ts, timezone.utc).isoformat(),
+            "end_time": datetime.fromtimestamp(bucket_ts + width_sec, timezone.utc).isoformat(),
+            "values": [
+                {
+                    "resource": "SensorStatistics",
+                    "metric_id": field,
+                    "property": f"{stat}_{duration}",
+                    "value": str(float(round(stat_value, 2)))
+                }
+                for field, stat, stat_value in values if stat_value is not None
+            ],
+        }
@@ -0,0 +1,387 @@
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Mapping, Optional, Tuple
+from mylib.utils.SensorCatalog import SensorCatalog, SensorPlan, SensorPlanType
+
+"""
+Telemetry Trigger 的評估: 每一版新的 chassis summary snapshot 都檢查所有 Trigger 的 NumericThresholds，
+超過門檻時由 server 端產生事件，client 不需要輪詢每個 sensor。
+
+@note
+    (1) 定義變更時才編譯評估計畫 (plan): 每個 sensor 一組讀值函式 + 該 sensor 所有門檻的檢查，
+        同一個 sensor 被多個 Trigger 引用時只讀值一次；評估時只做 dict 讀取與數值比較。
+    (2) 門檻狀態 (Activation 為 Increasing/Decreasing，即 level 的方向):
+            讀值超過門檻 (Upper*: >, Lower*: <) 並持續 DwellTime 後觸發 (asserted)
+            觸發後讀值回到門檻內超過 HysteresisReading 才解除 (deasserted)，避免讀值在門檻附近時反覆觸發
+        Activation 為 Either 時沒有觸發/解除的狀態，讀值往任一方向穿越門檻 (持續 DwellTime) 都產生事件 (Above/Below)，
+        第一筆讀值只決定目前在門檻的哪一側；穿越後要往回穿越需超過門檻 HysteresisReading。
+    (3) 事件格式同 Redfish EventRecord (MessageId 為 TelemetryService registry)，
+        保留在固定大小的 ring buffer，並通知 add_listener() 註冊的 callback。
+    (4) 定義由 RfTelemetryService 從 Redfish Trigger 內容轉換 (見 TriggerDefinition)，本模組不存取資料庫。
+
+Usage:
+    engine = TriggerEngine.get_instance()
+    engine.upsert(TriggerDefinition("HighSupply", "HighSupply",
+        (TriggerMetric("/redfish/v1/Chassis/1/Sensors/PrimarySupplyTemperatureCelsius/Reading", "PrimarySupplyTemperatureCelsius"),),
+        (TriggerThreshold("UpperCritical", 45.0, dwell_sec=10, hysteresis=1.0),)))
+    engine.start() # 訂閱 SensorSnapshotPoller
+    engine.events("HighSupply")
+"""
+
+@dataclass(frozen=True)
+class TriggerMetric:
+    """
+    :param metric_property: Trigger 的 MetricProperties 其中一項 (事件中用來標示讀值來源)
+    :param sensor_id: SensorCatalog 的 sensor id
+    """
+    metric_property: str
+    sensor_id: str
+
+
+@dataclass(frozen=True)
+class TriggerThreshold:
+    """
+    :param level: UpperCritical/UpperCaution/LowerCaution/LowerCritical
+    :param reading: 門檻值
+    :param dwell_sec: 超過門檻需持續的秒數 (DwellTime)
+    :param hysteresis: 解除時需回到門檻內的差值 (HysteresisReading)
+    :param activation: None 或 level 的方向 (Upper: Increasing，Lower: Decreasing)，"Either" 表示兩個方向穿越都觸發
+    """
+    level: str
+    reading: float
+    dwell_sec: float = 0
+    hysteresis: float = 0
+    activation: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class TriggerDefinition:
+    """
+    :param settings: 定義的 Redfish 內容 (GET Trigger 時輸出)
+    """
+    id: str
+    name: str
+    metrics: Tuple[TriggerMetric, ...]
+    thresholds: Tuple[TriggerThreshold, ...]
+    enabled: bool = True
+    settings: Dict[str, Any] = field(default_factory=dict, compare=False)
+
+
+class _ThresholdCheck:
+    """單一 (trigger, sensor, 門檻) 的檢查與狀態"""
+    __slots__ = (
+        "trigger_id", "metric_property", "threshold", "either", "direction", "set_value", "clear_value",
+        "active", "pending_since", "since",
+    )
+
+    def __init__(self, trigger_id: str, metric_property: str, threshold: TriggerThreshold):
+        self.trigger_id = trigger_id
+        self.metric_property = metric_property
+        self.threshold = threshold
+        self.either = threshold.activation == TriggerEngine.ACTIVATION_EITHER
+        # 偵測的穿越方向: 1 為往上，-1 為往下 (Either 在第一筆讀值之前為 0)
+        self.direction = 0 if self.either else TriggerEngine.LEVELS[threshold.level][0]
+        self.set_value = threshold.reading
+        self.clear_value = threshold.reading - self.direction * threshold.hysteresis
+        self.active = False
+        self.pending_since: Optional[float] = None
+        self.since: Optional[float] = None
+
+    @property
+    def key(self) -> tuple:
+        return (self.trigger_id, self.metric_property, self.threshold)
+
+    def step(self, value: float, ts: float) -> Optional[Tuple[bool, int]]:
+        """
+        以一筆讀值更新狀態
+        :return: 產生事件時回傳 (asserted, 穿越方向)，否則 None
+        """
+        if self.either:
+            return self._step_either(value, ts)
+        if self.active:
+            if (value - self.clear_value) * self.direction < 0:
+                self.active, self.pending_since, self.since = False, None, None
+                return (False, self.direction)
+        elif (value - self.set_value) * self.direction > 0:
+            if self.pending_since is None:
+                self.pending_since = ts
+            if ts - self.pending_since >= self.threshold.dwell_sec:
+                self.active, self.since = True, ts
+                return (True, self.direction)
+        else:
+            self.pending_since = None
+        return None
+
+    def _step_either(self, value: float, ts: float) -> Optional[Tuple[bool, int]]:
+        if self.direction == 0:
+            # 第一筆讀值: 在門檻之上時偵測往下穿越，否則偵測往上穿越
+            self.direction = -1 if value > self.threshold.reading else 1
+            return None
+        if (value - self.set_value) * self.direction > 0:
+            if self.pending_since is None:
+                self.pending_since = ts
+            if ts - self.pending_since >= self.threshold.dwell_sec:
+                crossed = self.direction
+                self.direction = -crossed
+                self.set_value = self.threshold.reading + self.direction * self.threshold.hysteresis
+                self.pending_since, self.since = None, ts
+                return (True, crossed)
+        else:
+            self.pending_since = None
+        return None
+
+
+class TriggerEngine:
+    SOURCE_NAME = "chassis_summary"
+    MAX_TRIGGERS = int(os.getenv("TELEMETRY_MAX_TRIGGERS", "64"))
+    MAX_EVENTS = int(os.getenv("TELEMETRY_TRIGGER_MAX_EVENTS", "1024"))
+
+    # level -> (方向: 1 為 Upper，-1 為 Lower, Severity)
+    LEVELS: Mapping[str, Tuple[int, str]] = {
+        "UpperCritical": (1, "Critical"),
+        "UpperCaution": (1, "Warning"),
+        "LowerCaution": (-1, "Warning"),
+        "LowerCritical": (-1, "Critical"),
+    }
+    # 方向 -> 預設的 Activation
+    DIRECTION_ACTIVATIONS: Mapping[int, str] = {1: "Increasing", -1: "Decreasing"}
+    ACTIVATION_EITHER = "Either"
+    # 觸發時的 MessageId，ex: TelemetryService.1.0.TriggerNumericAboveUpperCritical
+    MESSAGE_ID_FORMAT = "TelemetryService.1.0.TriggerNumeric{comparison}{level}"
+    NORMAL_MESSAGE_ID = "TelemetryService.1.0.TriggerNumericReadingNormal"
+
+    _instance: Optional["TriggerEngine"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, get_catalog: Callable[[], SensorCatalog]):
+        """
+        :param get_catalog: 回傳 SensorCatalog
+        """
+        self._get_catalog = get_catalog
+        self._definitions: Dict[str, TriggerDefinition] = {}
+        # 評估計畫: ((sensor id, 讀值函式, (檢查, ...)), ...)
+        self._plan: Tuple[Tuple[str, Callable[[Mapping], Optional[float]], Tuple[_ThresholdCheck, ...]], ...] = ()
+        self._events: Deque[dict] = deque(maxlen=self.MAX_EVENTS)
+        self._listeners: Tuple[Callable[[dict], None], ...] = ()
+        self._last_source_ts: Optional[float] = None
+        self._event_sequence = 0
+        self._subscribed = False
+        self.lock = threading.RLock()
+        self._stats = {"evaluations": 0, "checks": 0, "events": 0, "errors": 0, "last_error": None}
+
+    @classmethod
+    def get_instance(cls) -> "TriggerEngine":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(SensorCatalog.get_instance)
+        return cls._instance
+
+    # --- 定義 ---
+
+    def upsert(self, definition: TriggerDefinition):
+        """
+        新增或取代定義 (門檻未變的檢查保留目前的狀態)
+        :raise ValueError: 定義數量已達上限，或引用不存在的 sensor
+        """
+        catalog = self._get_catalog()
+        for metric in definition.metrics:
+            if not catalog.has_sensor(metric.sensor_id):
+                raise ValueError(f"Unknown sensor: {metric.sensor_id}")
+        for threshold in definition.thresholds:
+            if threshold.level not in self.LEVELS:
+                raise ValueError(f"Unknown threshold: {threshold.level}")
+            default_activation = self.DIRECTION_ACTIVATIONS[self.LEVELS[threshold.level][0]]
+            if threshold.activation not in (None, default_activation, self.ACTIVATION_EITHER):
+                raise ValueError(f"{threshold.level} Activation must be {default_activation} or {self.ACTIVATION_EITHER}")
+        with self.lock:
+            if definition.id not in self._definitions and len(self._definitions) >= self.MAX_TRIGGERS:
+                raise ValueError(f"At most {self.MAX_TRIGGERS} Triggers are allowed")
+            self._definitions[definition.id] = definition
+            self._compile()
+
+    def remove(self, trigger_id: str) -> bool:
+        with self.lock:
+            removed = self._definitions.pop(trigger_id, None) is not None
+            if removed:
+                self._compile()
+            return removed
+
+    def get_definition(self, trigger_id: str) -> Optional[TriggerDefinition]:
+        with self.lock:
+            return self._definitions.get(trigger_id)
+
+    def definitions(self) -> List[TriggerDefinition]:
+        with self.lock:
+            return list(self._definitions.values())
+
+    def _compile(self) -> None:
+        """依目前的定義重建評估計畫 (呼叫時需持有 lock)"""
+        previous = {check.key: check for _, _, checks in self._plan for check in checks}
+        catalog = self._get_catalog()
+        checks_by_sensor: Dict[str, List[_ThresholdCheck]] = {}
+        for definition in self._definitions.values():
+            if not definition.enabled:
+                continue
+            for metric in definition.metrics:
+                for threshold in definition.thresholds:
+                    check = _ThresholdCheck(definition.id, metric.metric_property, threshold)
+                    check = previous.get(check.key, check)
+                    checks_by_sensor.setdefault(metric.sensor_id, []).append(check)
+        self._plan = tuple(
+            (sensor_id, self._compile_reader(catalog.get_plan(sensor_id)), tuple(checks))
+            for sensor_id, checks in checks_by_sensor.items()
+        )
+
+    @staticmethod
+    def _compile_reader(plan: SensorPlan) -> Callable[[Mapping], Optional[float]]:
+        """將 SensorPlan 轉成只讀取讀值的函式 (不需要 status 與 SensorReading)"""
+        if plan.plan_type == SensorPlanType.Single:
+            (field_name,) = plan.fields
+            return lambda summary: summary[field_name]["reading"]
+        if plan.plan_type == SensorPlanType.Delta:
+            first, second = plan.fields
+            return lambda summary: summary[first]["reading"] - summary[second]["reading"]
+        return lambda summary: plan.evaluate(summary, ndigits=None).reading
+
+    # --- 評估 ---
+
+    def start(self) -> None:
+        """訂閱 SensorSnapshotPoller，每一版新的 chassis summary 都評估一次，重複呼叫無副作用"""
+        from mylib.adapters.sensor_snapshot_poller import SensorSnapshotPoller
+        SensorSnapshotPoller.subscribe(self.SOURCE_NAME, self.on_snapshot)
+        self._subscribed = True
+
+    def stop(self) -> None:
+        from mylib.adapters.sensor_snapshot_poller import SensorSnapshotPoller
+        SensorSnapshotPoller.unsubscribe(self.on_snapshot)
+        self._subscribed = False
+
+    def is_running(self) -> bool:
+        return self._subscribed
+
+    def on_snapshot(self, snapshot) -> None:
+        """SensorSnapshotPoller 的 listener: chassis summary 沒有更新時 (只更新其他來源) 不重複評估"""
+        summary = snapshot.get(self.SOURCE_NAME)
+        source_ts = snapshot.source_timestamps.get(self.SOURCE_NAME)
+        if summary is None or source_ts == self._last_source_ts:
+            return
+        self._last_source_ts = source_ts
+        self.evaluate(summary, source_ts)
+
+    def evaluate(self, summary: Mapping[str, Mapping], ts: float) -> List[dict]:
+        """
+        以一份 chassis summary 評估所有門檻
+        :param ts: 讀值時間 (epoch seconds)，用於 DwellTime
+        :return: 這次產生的事件
+        """
+        triggered = []
+        with self.lock:
+            checks_count = 0
+            for sensor_id, read, checks in self._plan:
+                try:
+                    value = read(summary)
+                except (KeyError, TypeError) as e:
+                    # summary 沒有此 sensor 或讀值為 None
+                    self._stats["errors"] += 1
+                    self._stats["last_error"] = f"{sensor_id}: {e!r}"
+                    continue
+                if value is None:
+                    continue
+                checks_count += len(checks)
+                for check in checks:
+                    result = check.step(value, ts)
+                    if result is not None:
+                        triggered.append((check, value, ts) + result)
+            self._stats["evaluations"] += 1
+            self._stats["checks"] += checks_count
+            events = [self._build_event(*args) for args in triggered]
+            self._events.extend(events)
+            self._stats["events"] += len(events)
+            listeners = self._listeners
+        for event in events:
+            print(f"Trigger {event['Oem']['Supermicro']['Trigger']}: {event['Message']}")
+            for listener in listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    print(f"TriggerEngine listener error: {e}")
+        return events
+
+    def _build_event(self, check: _ThresholdCheck, value: float, ts: float, asserted: bool, direction: int) -> dict:
+        """
+        Redfish EventRecord (呼叫時需持有 lock)
+        :param direction: 穿越門檻的方向 (1: 往上，-1: 往下)
+        """
+        self._event_sequence += 1
+        threshold = check.threshold
+        _, severity = self.LEVELS[threshold.level]
+        if asserted:
+            comparison = "above" if direction > 0 else "below"
+            message_id = self.MESSAGE_ID_FORMAT.format(comparison=comparison.capitalize(), level=threshold.level)
+            message = f"Metric '{check.metric_property}' value of {value} is {comparison} the {threshold.level} threshold of {threshold.reading}."
+            message_args = [check.metric_property, str(value), str(threshold.reading)]
+        else:
+            severity, message_id = "OK", self.NORMAL_MESSAGE_ID
+            message = f"Metric '{check.metric_property}' value of {value} crossed the {threshold.level} threshold of {threshold.reading} and is now normal."
+            message_args = [check.metric_property, str(value), threshold.level, str(threshold.reading)]
+        return {
+            "EventId": str(self._event_sequence),
+            "EventTimestamp": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(),
+            "EventType": "Alert",
+            "MessageId": message_id,
+            "Message": message,
+            "MessageArgs": message_args,
+            "MessageSeverity": severity,
+            "OriginOfCondition": {"@odata.id": f"/redfish/v1/TelemetryService/Triggers/{check.trigger_id}"},
+            "Oem": {"Supermicro": {"Trigger": check.trigger_id, "Threshold": threshold.level, "Asserted": asserted}},
+        }
+
+    # --- 事件 ---
+
+    def add_listener(self, listener: Callable[[dict], None]) -> None:
+        """註冊 listener(event)，每個事件產生後呼叫 (在評估的 thread 中執行)"""
+        with self.lock:
+            if listener not in self._listeners:
+                self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener: Callable[[dict], None]) -> None:
+        with self.lock:
+            self._listeners = tuple(l for l in self._listeners if l != listener)
+
+    def events(self, trigger_id: str = None, limit: int = None) -> List[dict]:
+        """
+        :param trigger_id: 只回傳此 Trigger 的事件，None 表示全部
+        :param limit: 只回傳最新的 limit 個
+        :return: 事件 (舊到新)
+        """
+        with self.lock:
+            events = [e for e in self._events if trigger_id is None or e["Oem"]["Supermicro"]["Trigger"] == trigger_id]
+        return events[-limit:] if limit else events
+
+    def active_thresholds(self, trigger_id: str) -> List[dict]:
+        """:return: 目前觸發中的門檻 [{"MetricProperty", "Threshold", "Since"}]"""
+        with self.lock:
+            return [
+                {
+                    "MetricProperty": check.metric_property,
+                    "Threshold": check.threshold.level,
+                    "Since": datetime.fromtimestamp(check.since, tz=timezone.utc).isoformat(),
+                }
+                for _, _, checks in self._plan for check in checks
+                if check.trigger_id == trigger_id and check.active
+            ]
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                **self._stats,
+                "triggers": len(self._definitions),
+                "sensors": len(self._plan),
+                "thresholds": sum(len(checks) for _, _, checks in self._plan),
+                "active": sum(check.active for _, _, checks in self._plan for check in checks),
+                "running": self.is_running(),
+            }
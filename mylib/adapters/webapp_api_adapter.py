@@ -6,6 +6,7 @@ from cachetools import cached, TTLCache
 from mylib.models.rf_resource_model import RfResetType
 from mylib.common.proj_error import ProjError
 from mylib.utils.SystemCommandUtil import SystemCommandUtil
+from mylib.utils.HttpClientUtil import HttpClientUtil
 
 
 """
@@ -54,7 +55,7 @@ class WebAppAPIAdapter:
 
     @cached(cache=TTLCache(maxsize=1, ttl=30))
     def create_login_session(self):
-        session = requests.Session()
+        session = HttpClientUtil.new_session(self.host) # 共用 webUI 的 connection pool，並有預設 timeout
         
         # For check_auth() in scc_app.py
         session.auth = (self.username, self.password)
@@ -86,7 +87,7 @@ class WebAppAPIAdapter:
         post_body = {
             "ResetType": reset_type
         }
-        response = self.session.post(url, data=post_body)
+        response = self.session.post(url, data=post_body, timeout=(HttpClientUtil.get_timeout()[0], 60)) # 回復原廠設定需要較久
         self._handle_response(response)
         return response
 
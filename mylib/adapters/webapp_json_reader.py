@@ -4,7 +4,7 @@ import json
 from typing import List, Optional
 from http import HTTPStatus
 from flask import abort
-from cachetools import cached, TTLCache
+from mylib.utils.SingleFlightCache import SingleFlightCache, single_flight_cached
 from mylib.common.proj_error import ProjError, ProjRedfishError, ProjRedfishErrorCode
 from mylib.utils.FileUtil import FileUtil
 from pydantic import BaseModel, Field
@@ -38,7 +38,7 @@ class WebAppJsonReader:
             raise ProjRedfishError(ProjRedfishErrorCode.RESOURCE_NOT_FOUND, f"{json_filepath} is not exist!")
 
     @classmethod
-    @cached(cache=TTLCache(maxsize=1, ttl=10))
+    @single_flight_cached(cache=SingleFlightCache(maxsize=1, ttl=10))
     def read_all_errorlog_entries(cls) -> List[WebAppSignalRecordModel]:
         """Read all error logs from signal_records.json
         @note: signal_records.json records max 500s records
@@ -21,6 +21,9 @@ class ProjRedfishErrorCode(Enum):
     PROPERTY_UNKNOWN = (400, "Base.1.19.0.PropertyUnknown")
     PROPERTY_VALUE_FORMAT_ERROR = (400, "Base.1.19.0.PropertyValueFormatError")
     PROPERTY_VALUE_TYPE_ERROR = (400, "Base.1.19.0.PropertyValueTypeError")
+    QUERY_PARAMETER_VALUE_FORMAT_ERROR = (400, "Base.1.19.0.QueryParameterValueFormatError")
+    QUERY_PARAMETER_OUT_OF_RANGE = (400, "Base.1.19.0.QueryParameterOutOfRange")
+    QUERY_NOT_SUPPORTED_ON_RESOURCE = (400, "Base.1.19.0.QueryNotSupportedOnResource")
     
     # HTTP Status: 401 Unauthorized
     ACCESS_DENIED = (401, "Base.1.19.0.AccessDenied")
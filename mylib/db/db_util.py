@@ -3,6 +3,8 @@ from mylib.models.account_model import RoleModel, AccountModel
 from mylib.models.setting_model import SettingModel
 from mylib.models.telemetry_service_model import TelemetryServiceModel
 from mylib.models.setting_subscriptions_model import SubscriptionModel
+from mylib.models.setting_metric_report_definition_model import MetricReportDefinitionSettingModel
+from mylib.models.setting_trigger_model import TriggerSettingModel
 import sqlalchemy as sa
 from load_env import redfish_info
 from mylib.db.extensions import ext_engine
@@ -1,15 +1,19 @@
 CREATE TABLE IF NOT EXISTS sensor_data(
     id   INT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
-    time TEXT,
-    created_at TEXT,
-    updated_at TEXT
+    time TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ
     {extra_cols}
 );
 
 CREATE OR REPLACE FUNCTION updated_time()
 RETURNS TRIGGER AS $$
 BEGIN
-    NEW.updated_at := to_char(NOW() AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.MS"Z"');
+    -- schema 遷移回填資料時不更新 updated_at (見 SensorDataMigration)
+    IF current_setting('sidecar.migrating', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
+    NEW.updated_at := NOW();
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
@@ -0,0 +1,10 @@
+CREATE TABLE IF NOT EXISTS sensor_ingest_watermark(
+    path        TEXT PRIMARY KEY,
+    inode       BIGINT NOT NULL DEFAULT 0,
+    byte_offset BIGINT NOT NULL DEFAULT 0,
+    header      TEXT,
+    tail_bytes  BYTEA,
+    row_count   BIGINT NOT NULL DEFAULT 0,
+    last_time   TIMESTAMPTZ,
+    updated_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -40,6 +40,7 @@ from mylib.models.rf_status_model import RfStatusModel
 from mylib.utils.system_info import get_system_uuid
 from load_env import hardware_info, redfish_info
 from mylib.utils.load_api import load_raw_from_api ,CDU_BASE
+from mylib.services.version_info_service import VersionInfoService
 
 
 
@@ -159,9 +160,9 @@ class RfManagerModel(RfResourceBaseModel):
         self.Manufacturer = hardware_info.get("CDU", {}).get("Manufacturer")
         self.PartNumber = hardware_info.get("CDU", {}).get("PartNumber")
         self.Model = hardware_info.get("CDU", {}).get("Model")
-        self.FirmwareVersion = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/display/version")["version"]["WebUI"]
-        self.SerialNumber = hardware_info.get("CDU", {}).get("SerialNumber", "") + load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/display/version")["fw_info"]["SN"]
-        self.UUID = get_system_uuid()
+        self.FirmwareVersion = VersionInfoService.get_versions()["WebUI"]
+        self.SerialNumber = hardware_info.get("CDU", {}).get("SerialNumber", "") + VersionInfoService.get_fw_info()["SN"]
+        self.UUID = VersionInfoService.get_uuid()
         
         # status
         heath = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/mc")["cdu_status"]
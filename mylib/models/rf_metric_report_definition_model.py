@@ -97,7 +97,7 @@ class RfMetricReportDefinitionModel(RfResourceBaseModel):
     Oem: Optional[dict[str, Any]] = Field(default=None)
     ReportActions: Optional[List[RfReportActionsEnum]] = Field(default=None)
     ReportTimespan: Optional[str] = Field(default=None)
-    ReportUpdates: Optional[List[RfReportUpdatesEnum]] = Field(default=None)
+    ReportUpdates: Optional[RfReportUpdatesEnum] = Field(default=None)
     Schedule: Optional[Dict[str, Any]] = Field(default=None)
     Status: Optional[RfStatusModel] = Field(default=None)
     SuppressRepeatedMetricValue: Optional[bool] = Field(default=None)
@@ -0,0 +1,70 @@
+from enum import Enum
+from typing import Optional, List, Dict, Any
+from pydantic import (
+    BaseModel,
+    Field,
+)
+from mylib.models.rf_base_model import RfResourceBaseModel, RfResourceCollectionBaseModel
+from mylib.models.rf_status_model import RfStatusModel
+
+class RfMetricTypeEnum(str, Enum):
+    Numeric = "Numeric"
+    Discrete = "Discrete"
+
+class RfTriggerActionEnum(str, Enum):
+    LogToLogService = "LogToLogService"
+    RedfishEvent = "RedfishEvent"
+    RedfishMetricReport = "RedfishMetricReport"
+
+class RfThresholdActivation(str, Enum):
+    Increasing = "Increasing"
+    Decreasing = "Decreasing"
+    Either = "Either"
+    Disabled = "Disabled"
+
+class RfThreshold(BaseModel):
+    """
+    @see https://redfish.dmtf.org/schemas/v1/Resource.json#/definitions/Threshold
+    """
+    Activation: Optional[RfThresholdActivation] = Field(default=None)
+    DwellTime: Optional[str] = Field(default=None)
+    HysteresisReading: Optional[float] = Field(default=None)
+    Reading: Optional[float] = Field(default=None)
+
+class RfThresholds(BaseModel):
+    LowerCaution: Optional[RfThreshold] = Field(default=None)
+    LowerCritical: Optional[RfThreshold] = Field(default=None)
+    UpperCaution: Optional[RfThreshold] = Field(default=None)
+    UpperCritical: Optional[RfThreshold] = Field(default=None)
+
+
+class RfTriggersModel(RfResourceBaseModel):
+    """
+    @see https://redfish.dmtf.org/schemas/v1/Triggers.json
+    @see https://redfish.dmtf.org/schemas/v1/Triggers.v1_4_0.json#/definitions/Triggers
+    @note 只列出 Numeric Trigger 使用的 properties
+    @note
+        required: [
+            "@odata.id",
+            "@odata.type",
+            "Id",
+            "Name"
+        ]
+    """
+    odata_context: Optional[str] = Field(default=None, alias="@odata.context")
+    odata_etag: Optional[str] = Field(default=None, alias="@odata.etag")
+    Description: Optional[str] = Field(default=None)
+    MetricProperties: Optional[List[Optional[str]]] = Field(default=None)
+    MetricType: Optional[RfMetricTypeEnum] = Field(default=None)
+    NumericThresholds: Optional[RfThresholds] = Field(default=None)
+    Oem: Optional[Dict[str, Any]] = Field(default=None)
+    Status: Optional[RfStatusModel] = Field(default=None)
+    TriggerActions: Optional[List[RfTriggerActionEnum]] = Field(default=None)
+    TriggerEnabled: Optional[bool] = Field(default=None)
+
+
+class RfTriggersCollectionModel(RfResourceCollectionBaseModel):
+    """
+    @see https://redfish.dmtf.org/schemas/v1/TriggersCollection.json
+    """
+    pass
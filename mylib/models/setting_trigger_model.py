@@ -0,0 +1,48 @@
+from dataclasses import dataclass
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, JSON, DateTime, func
+from sqlalchemy.ext.mutable import MutableDict
+from mylib.db.extensions import db
+from mylib.models.my_orm_base_model import MyOrmBaseModel
+
+
+@dataclass
+class TriggerSettingModel(MyOrmBaseModel):
+    """使用者建立 (POST) 或修改 (PATCH) 的 Telemetry Trigger，Settings 為正規化後的 Redfish 內容"""
+    __tablename__ = 'telemetry_triggers'
+
+    Id:         Mapped[str] = mapped_column(String(64), primary_key=True, nullable=False, unique=True)
+    Settings:   Mapped[dict] = mapped_column(MutableDict.as_mutable(JSON), default=dict)
+    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[str] = mapped_column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"TriggerSettingModel(Id={self.Id})"
+
+    @classmethod
+    def all(cls):
+        return db.session.query(cls).all()
+
+    @classmethod
+    def save(cls, trigger_id: str, settings: dict) -> bool:
+        try:
+            row = db.session.get(cls, trigger_id)
+            if row:
+                row.Settings = settings
+            else:
+                db.session.add(cls(Id=trigger_id, Settings=settings))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f" * Error saving Trigger {trigger_id}: {e}")
+            return False
+        return True
+
+    @classmethod
+    def delete(cls, trigger_id: str) -> bool:
+        row = db.session.get(cls, trigger_id)
+        if not row:
+            return False
+        db.session.delete(row)
+        db.session.commit()
+        return True
@@ -16,6 +16,8 @@ from mylib.common.proj_error import ProjRedfishError, ProjRedfishErrorCode
 from mylib.common.proj_constant import ProjNames
 from mylib.common.proj_error import ProjError
 from mylib.utils.JsonUtil import JsonUtil
+from mylib.utils.SensorCatalog import SensorCatalog
+from mylib.utils.ExpandQueryUtil import ExpandQueryUtil
 # from models.rf_chassis_model import RfChassisModel, RfStatusModel
 
 
@@ -98,7 +100,7 @@ class MyBaseChassis(MyResource):
             if not self._hardware_validator(control_id, "Controls"):   
                 abort(HTTPStatus.NOT_FOUND, description=f"control_id, {control_id}, not found") 
                 
-            if not self._sensor_validator(sensor_id, "id_readingInfo_map"):
+            if sensor_id and not SensorCatalog.get_instance().has_sensor(sensor_id): # 包含依風扇數量產生的 Fan{i}
                 abort(HTTPStatus.NOT_FOUND, description=f"sensor_id, {sensor_id}, not found")
         except Exception as e:
             abort(HTTPStatus.NOT_FOUND, description=f"[Unexpected Error] {e}")
@@ -258,7 +260,11 @@ class Sensors(MyBaseChassis):
     # @requires_auth
     def get(self, chassis_id):
         chassis_service = RfChassisService()
-        return chassis_service.fetch_sensors_collection(chassis_id)
+        resp_json = chassis_service.fetch_sensors_collection(chassis_id)
+        return ExpandQueryUtil.expand_members(
+            resp_json, 
+            lambda sensor_id: chassis_service.fetch_sensors_by_name(chassis_id, sensor_id)
+        )
 
 
 @Chassis_ns.route("/Chassis/<chassis_id>/Sensors/<sensor_id>")
@@ -313,7 +319,11 @@ class ThermalSubsystem_Fans(MyBaseChassis):
     def get(self, chassis_id):
         # super().get()
         ThermalSubsystem_Fans_data = RfChassistServiceFactory().get_service()
-        return ThermalSubsystem_Fans_data.get_thermal_subsystem_fans_count(chassis_id)
+        resp_json = ThermalSubsystem_Fans_data.get_thermal_subsystem_fans_count(chassis_id)
+        return ExpandQueryUtil.expand_members(
+            resp_json, 
+            lambda fan_id: ThermalSubsystem_Fans_data.get_thermal_subsystem_fans_data(chassis_id, fan_id)
+        )
 
 
 @Chassis_ThermalSubsystem_Fans_ns.route("/Chassis/<chassis_id>/ThermalSubsystem/Fans/<string:fan_id>")
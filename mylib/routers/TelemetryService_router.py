@@ -1,5 +1,5 @@
-from flask_restx import Namespace, Resource
-from flask import abort, jsonify
+from flask_restx import Namespace, Resource, fields
+from flask import abort, jsonify, request
 from mylib.services.rf_telemetry_service import RfTelemetryService
 from mylib.models.sensor_log_model import SensorLogModel
 
@@ -27,9 +27,9 @@ TelemetryService_data = {
     # },
 
     "MetricReports": {"@odata.id": "/redfish/v1/TelemetryService/MetricReports"},
-    # "Triggers": {
-    #     "@odata.id": "/redfish/v1/TelemetryService/Triggers"
-    # },
+    "Triggers": {
+        "@odata.id": "/redfish/v1/TelemetryService/Triggers"
+    },
     "Oem": {},
 }
 
@@ -93,14 +93,6 @@ REPORT_DEFS = [
         ],
     }
 ]
-# TRIGGERS = [
-#     {
-#       "Id": "HighTemp",
-#       "Name": "HighTemp",
-#       "Metric": {"@odata.id": "/redfish/v1/TelemetryService/MetricDefinitions/CPU_Temp"},
-#       "Condition": { "Comparison": "GreaterThan", "Value": 85 }
-#     }
-# ]
 
 
 # MetricDefinitions Collection
@@ -147,6 +139,58 @@ class MetricDefinition(Resource):
         )
 
 
+# MetricReportDefinition post/patch設置
+MetricReportDefinition_metric = TelemetryService_ns.model('MetricReportDefinitionMetric', {
+    "MetricId": fields.String(
+        required=True,
+        description='MetricDefinition Id',
+        example="coolant_flow_rate"
+    ),
+    "CollectionFunction": fields.String(
+        description='CollectionFunction',
+        example="Average",
+        enum=["Average", "Maximum", "Minimum", "Summation"]
+    ),
+    "CollectionDuration": fields.String(
+        description='ISO 8601 duration',
+        example="PT1M"
+    ),
+})
+MetricReportDefinition_patch = TelemetryService_ns.model('MetricReportDefinitionPatch', {
+    "Name": fields.String(
+        description='Name',
+        example="Coolant flow"
+    ),
+    "MetricReportDefinitionEnabled": fields.Boolean(
+        description='MetricReportDefinitionEnabled',
+        example=True
+    ),
+    "Schedule": fields.Raw(
+        description='Schedule',
+        example={"RecurrenceInterval": "PT1M"}
+    ),
+    "ReportUpdates": fields.String(
+        description='ReportUpdates',
+        example="AppendWrapsWhenFull",
+        enum=["Overwrite", "AppendWrapsWhenFull", "AppendStopsWhenFull", "NewReport"]
+    ),
+    "AppendLimit": fields.Integer(
+        description='AppendLimit',
+        example=256
+    ),
+    "Metrics": fields.List(
+        fields.Nested(MetricReportDefinition_metric),
+        description='Metrics'
+    ),
+})
+MetricReportDefinition_post = TelemetryService_ns.inherit('MetricReportDefinitionPost', MetricReportDefinition_patch, {
+    "Id": fields.String(
+        description='Id',
+        example="CoolantFlow"
+    ),
+})
+
+
 # MetricReportDefinitions Collection
 @TelemetryService_ns.route("/TelemetryService/MetricReportDefinitions")
 class MetricReportDefCollection(Resource):
@@ -154,22 +198,11 @@ class MetricReportDefCollection(Resource):
         return jsonify(
             telemetry_service.fetch_TelemetryService_MetricReportDefinitions()
         )
-        """
-        members = [
-            {
-                "@odata.id": f"/redfish/v1/TelemetryService/MetricReportDefinitions/{r['Id']}"
-            }
-            for r in REPORT_DEFS
-        ]
-        return {
-            "@odata.context": "/redfish/v1/$metadata#MetricReportDefinitionCollection.MetricReportDefinitionCollection",
-            "@odata.id": "/redfish/v1/TelemetryService/MetricReportDefinitions",
-            "@odata.type": "#MetricReportDefinitionCollection.MetricReportDefinitionCollection",
-            "Name": "Metric Report Definition Collection",
-            "Members@odata.count": len(members),
-            "Members": members,
-        }, 200
-        """
+
+    @TelemetryService_ns.expect(MetricReportDefinition_post, validate=True)
+    def post(self):
+        body = request.get_json(force=True)
+        return telemetry_service.post_TelemetryService_MetricReportDefinitions(body)
 
 
 # Individual MetricReportDefinition
@@ -179,47 +212,95 @@ class MetricReportDef(Resource):
         return jsonify(
             telemetry_service.fetch_TelemetryService_MetricReportDefinitions(metric_report_definition_id)
         )
-        '''
-        for r in REPORT_DEFS:
-            if r["Id"] == report_id:
-                r = r.copy()
-                r["@odata.context"] = (
-                    "/redfish/v1/$metadata#MetricReportDefinition.MetricReportDefinition"
-                )
-                r["@odata.id"] = (
-                    f"/redfish/v1/TelemetryService/MetricReportDefinitions/{report_id}"
-                )
-                r["@odata.type"] = (
-                    "#MetricReportDefinition.v1_0_0.MetricReportDefinition"
-                )
-                return r, 200
-        return {"error": "Not found"}, 404
-        '''
+
+    @TelemetryService_ns.expect(MetricReportDefinition_patch, validate=True)
+    def patch(self, metric_report_definition_id):
+        body = request.get_json(force=True)
+        return telemetry_service.patch_TelemetryService_MetricReportDefinitions(metric_report_definition_id, body)
+
+    def delete(self, metric_report_definition_id):
+        return telemetry_service.delete_TelemetryService_MetricReportDefinitions(metric_report_definition_id)
+
+
+# Triggers post/patch設置
+Trigger_threshold = TelemetryService_ns.model('TriggerThreshold', {
+    "Reading": fields.Float(
+        description='Threshold reading (新增門檻時必填，PATCH 既有門檻時可省略)',
+        example=45
+    ),
+    "Activation": fields.String(
+        description='Activation',
+        example="Increasing",
+        enum=["Increasing", "Decreasing", "Either", "Disabled"]
+    ),
+    "DwellTime": fields.String(
+        description='ISO 8601 duration',
+        example="PT10S"
+    ),
+    "HysteresisReading": fields.Float(
+        description='HysteresisReading',
+        example=1
+    ),
+})
+Trigger_thresholds = TelemetryService_ns.model('TriggerThresholds', {
+    "UpperCritical": fields.Nested(Trigger_threshold, skip_none=True),
+    "UpperCaution": fields.Nested(Trigger_threshold, skip_none=True),
+    "LowerCaution": fields.Nested(Trigger_threshold, skip_none=True),
+    "LowerCritical": fields.Nested(Trigger_threshold, skip_none=True),
+})
+Trigger_patch = TelemetryService_ns.model('TriggerPatch', {
+    "Name": fields.String(
+        description='Name',
+        example="High supply temperature"
+    ),
+    "TriggerEnabled": fields.Boolean(
+        description='TriggerEnabled',
+        example=True
+    ),
+    "MetricProperties": fields.List(
+        fields.String,
+        description='Sensor readings to evaluate',
+        example=["/redfish/v1/Chassis/1/Sensors/PrimarySupplyTemperatureCelsius/Reading"]
+    ),
+    "NumericThresholds": fields.Nested(
+        Trigger_thresholds,
+        description='NumericThresholds'
+    ),
+})
+Trigger_post = TelemetryService_ns.inherit('TriggerPost', Trigger_patch, {
+    "Id": fields.String(
+        description='Id',
+        example="HighSupplyTemp"
+    ),
+})
 
 
 # Triggers Collection
-# @TelemetryService_ns.route('/TelemetryService/Triggers')
-# class TriggerCollection(Resource):
-#     def get(self):
-#         members = [{"@odata.id": f"/redfish/v1/TelemetryService/Triggers/{t['Id']}"} for t in TRIGGERS]
-#         return {
-#             "@odata.context": "/redfish/v1/$metadata#TriggerCollection.TriggerCollection",
-#             "@odata.id": "/redfish/v1/TelemetryService/Triggers",
-#             "@odata.type": "#TriggerCollection.TriggerCollection",
-#             "Name": "Trigger Collection",
-#             "Members@odata.count": len(members),
-#             "Members": members
-#         }, 200
+@TelemetryService_ns.route("/TelemetryService/Triggers")
+class TriggerCollection(Resource):
+    def get(self):
+        return jsonify(
+            telemetry_service.fetch_TelemetryService_Triggers()
+        )
+
+    @TelemetryService_ns.expect(Trigger_post, validate=True)
+    def post(self):
+        body = request.get_json(force=True)
+        return telemetry_service.post_TelemetryService_Triggers(body)
+
 
 # Individual Trigger
-# @TelemetryService_ns.route('/TelemetryServiceTriggers/<string:trigger_id>')
-# class Trigger(Resource):
-#     def get(self, trigger_id):
-#         for t in TRIGGERS:
-#             if t['Id'] == trigger_id:
-#                 t = t.copy()
-#                 t["@odata.context"] = "/redfish/v1/$metadata#Trigger.Trigger"
-#                 t["@odata.id"] = f"/redfish/v1/TelemetryService/Triggers/{trigger_id}"
-#                 t["@odata.type"] = "#Trigger.v1_0_0.Trigger"
-#                 return t, 200
-#         return {"error": "Not found"}, 404
+@TelemetryService_ns.route("/TelemetryService/Triggers/<string:trigger_id>")
+class Trigger(Resource):
+    def get(self, trigger_id):
+        return jsonify(
+            telemetry_service.fetch_TelemetryService_Triggers(trigger_id)
+        )
+
+    @TelemetryService_ns.expect(Trigger_patch, validate=True)
+    def patch(self, trigger_id):
+        body = request.get_json(force=True)
+        return telemetry_service.patch_TelemetryService_Triggers(trigger_id, body)
+
+    def delete(self, trigger_id):
+        return telemetry_service.delete_TelemetryService_Triggers(trigger_id)
@@ -12,6 +12,7 @@ import requests
 from http import HTTPStatus
 from mylib.common.my_resource import MyResource
 from mylib.common.proj_error import ProjRedfishError, ProjRedfishErrorCode
+from mylib.utils.ExpandQueryUtil import ExpandQueryUtil
 from load_env import hardware_info
 
 ThermalEquipment_ns = Namespace('', description='ThermalEquipment Collection')
@@ -267,8 +268,9 @@ class ThermalEquipmentCdus1Pumps(MyBaseThermalEquipment):
     # # @requires_auth
     @ThermalEquipment_ns.doc("thermal_equipment_cdus_1_pumps")
     def get(self, cdu_id):    
-        rep = RfThermalEquipmentServiceFactory.get_service().fetch_CDUs_Pumps(cdu_id)
-        return rep
+        service = RfThermalEquipmentServiceFactory.get_service()
+        rep = service.fetch_CDUs_Pumps(cdu_id)
+        return ExpandQueryUtil.expand_members(rep, lambda pump_id: service.fetch_CDUs_Pumps_Pump_get(cdu_id, pump_id))
     
 @ThermalEquipment_ns.route("/ThermalEquipment/CDUs/<string:cdu_id>/Pumps/<string:pump_id>")
 class ThermalEquipmentCdus1PumpsPump(MyBaseThermalEquipment):
@@ -300,7 +302,9 @@ class ThermalEquipmentCdus1Filters(Resource):
     # # @requires_auth
     @ThermalEquipment_ns.doc("thermal_equipment_cdus_1_filters")
     def get(self, cdu_id):
-        return RfThermalEquipmentServiceFactory.get_service().fetch_CDUs_Filters(cdu_id)
+        service = RfThermalEquipmentServiceFactory.get_service()
+        rep = service.fetch_CDUs_Filters(cdu_id)
+        return ExpandQueryUtil.expand_members(rep, lambda filter_id: service.fetch_CDUs_Filters_id(cdu_id, filter_id))
     
 @ThermalEquipment_ns.route("/ThermalEquipment/CDUs/<cdu_id>/Filters/<filter_id>")
 class ThermalEquipmentCdus1Filters1(Resource):
@@ -365,7 +369,10 @@ class LeakDetectionLeakDetectors(MyBaseThermalEquipment):
     def get(self, cdu_id):
         rf_ThermalEquipment_service = RfThermalEquipmentServiceFactory.get_service()
         resp_json = rf_ThermalEquipment_service.fetch_CDUs_LeakDetection_LeakDetectors(cdu_id)
-        return resp_json
+        return ExpandQueryUtil.expand_members(
+            resp_json, 
+            lambda leak_detector_id: rf_ThermalEquipment_service.fetch_CDUs_LeakDetection_LeakDetectors_id(cdu_id, leak_detector_id)
+        )
 
 @ThermalEquipment_ns.route("/ThermalEquipment/CDUs/<cdu_id>/LeakDetection/LeakDetectors/<string:leak_detector_id>")
 class LeakDetectionLeakDetectors1(MyBaseThermalEquipment):
@@ -1,6 +1,7 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request
 from mylib.models.telemetry_service_model import TelemetryServiceModel
+from mylib.services.rf_telemetry_service import RfTelemetryService
 
 # Namespace
 calc_ns = Namespace("CalculationTimeInterval", description="APIs for Calculation Interval")
@@ -61,6 +62,7 @@ class CalculationInterval(Resource):
 
         if not ok:
             return {"error": "Failed to update value"}, 500
+        RfTelemetryService.invalidate_calculation_time_intervals()
 
         # Redfish design: only return set properties
         resp = {"CalculationTimeInterval": interval}
@@ -6,6 +6,7 @@ import os
 from mylib.utils.load_api import load_raw_from_api 
 from mylib.utils.load_api import CDU_BASE
 from mylib.common.proj_error import ProjRedfishError, ProjRedfishErrorCode
+from mylib.services.version_info_service import VersionInfoService
 
 
 
@@ -77,12 +78,13 @@ class FirmwareInventory(Resource):
 @update_ns.route("/UpdateService/FirmwareInventory/System_Software")
 class FirmwareInventoryWebInterface(Resource):
     def get(self):
-        release_date = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/display/version")["version"]["Release_Time"]
+        versions = VersionInfoService.get_versions()
+        release_date = versions["Release_Time"]
         # fmt = os.getenv("DATETIME_FORMAT") 
         # dt = datetime.strptime(release_date, "%Y-%m-%d %H:%M:%S")
         # release_date = dt.strftime(fmt)
         System_Software_data["ReleaseDate"] = release_date + "T" + "09:00:00Z"
-        System_Software_data["Version"] = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/display/version")["version"]["WebUI"]
+        System_Software_data["Version"] = versions["WebUI"]
         # WebInterface_data["Oem"]["Supermicro"]["Redfish"] = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/display/version")["version"]["Redfish_Server"]
         return System_Software_data  
 
@@ -100,7 +102,7 @@ class FirmwareInventoryControlUnit_1(Resource):
             # "ReleaseDate": "2025-02-21T06:02:08Z", # TBD
             # 是否可更新
             "Updateable": False,    
-            "Version": str(load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/display/version")["version"]["PLC"]),
+            "Version": str(VersionInfoService.get_versions()["PLC"]),
             "SoftwareId": "PLC-VERSION",
             "Oem": {}
         }
@@ -171,6 +173,7 @@ class ActionsUpdateCduSimpleUpdate(Resource):
                     # 下載成功後，準備檔案傳遞給內部 API
                     files = {"file": ("upload.gpg", file_download.content, "application/pgp-encrypted")}
                     r = requests.post(ORIGIN_UPLOAD_API, files=files, timeout=(10, None))
+                    VersionInfoService.expect_change()
                     return "upload success, it will reboot", 200
                 else:
                     # return {"error": "Missing ImageURI in JSON"}, 400
@@ -191,6 +194,7 @@ class ActionsUpdateCduSimpleUpdate(Resource):
                     raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_MISSING, "No file uploaded")
                 files = {"file": (file.filename, file.stream, file.mimetype)}
                 r = requests.post(ORIGIN_UPLOAD_API, files=files, timeout=(10, None))
+                VersionInfoService.expect_change()
                 return "upload success, it will reboot", 200
             except requests.HTTPError:
                 return r.json() if r.headers.get("Content-Type","").startswith("application/json") else {"error": r.text}, r.status_code
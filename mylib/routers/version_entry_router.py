@@ -3,7 +3,7 @@ from flask import current_app, request, jsonify, make_response, send_file, Respo
 from flask_restx import Namespace, Resource
 from mylib.common.proj_error import ProjRedfishError, ProjRedfishErrorCode
 from mylib.utils.load_api import load_raw_from_api, CDU_BASE
-from mylib.utils.system_info import get_system_uuid
+from mylib.services.version_info_service import VersionInfoService
 from mylib.models.setting_model import SettingModel
 
 version_entry_ns = Namespace('', description='Redfish V1')
@@ -25,11 +25,13 @@ root_data={
         "OnlyMemberQuery": False,
         "MultipleHTTPRequests": False,
         "ExpandQuery": {
+            # Sensors、Fans、Pumps、Filters、LeakDetectors collection 支援以 `.`、`*` 展開 Members (見 ExpandQueryUtil.EXPANDABLE_RULES)
+            # `~` 只展開 Links，這些 collection 沒有 Links，因此不支援
             "Links": False,
-            "NoLinks": False,
-            "ExpandAll": False,
-            "Levels": False,
-            "MaxLevels": 3
+            "NoLinks": True,
+            "ExpandAll": True,
+            "Levels": True,
+            "MaxLevels": 1
         }
     },
     # 支援的服務
@@ -83,11 +85,10 @@ class Root(Resource):
         odata_ver = request.headers.get('OData-Version')
         if odata_ver is not None and odata_ver != '4.0':
             return Response(status=412)
-        version = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/display/version")
         ServiceIdentification = SettingModel().get_by_key(f"Managers.ServiceIdentification").value
         root_data["ServiceIdentification"] = ServiceIdentification
-        root_data["Product"] = version["fw_info"]["Model"]
-        root_data["UUID"] = get_system_uuid()
+        root_data["Product"] = VersionInfoService.get_fw_info()["Model"]
+        root_data["UUID"] = VersionInfoService.get_uuid()
         resp = make_response(jsonify(root_data), 200)
         resp.headers['Allow'] = 'OPTIONS, GET, HEAD'
         resp.headers['Cache-Control'] = 'no-cache'
@@ -6,6 +6,8 @@ from werkzeug.exceptions import HTTPException, BadRequest
 from flask import abort
 from typing import Dict, List
 from mylib.adapters.sensor_api_adapter import SensorAPIAdapter
+from mylib.adapters.sensor_snapshot_poller import SensorSnapshotPoller
+from mylib.services.version_info_service import VersionInfoService
 from mylib.utils.system_info import get_system_uuid
 from mylib.utils.SystemCommandUtil import SystemCommandUtil
 
@@ -35,7 +37,6 @@ class BaseService:
         return HttpRequestUtil.send_post_as_json(url, req_body, opts)
 
     @classmethod
-    @cached(cache=TTLCache(maxsize=30, ttl=1))
     def _read_components_chassis_summary_from_cache(cls) -> dict:
         """
         @note api response from /api/v1/cdu/components/chassis/summary
@@ -64,10 +65,9 @@ class BaseService:
                 ...
             }
         """
-        return SensorAPIAdapter.fetch_components_chassis_summary()
+        return SensorSnapshotPoller.read("chassis_summary")
 
     @classmethod
-    @cached(cache=TTLCache(maxsize=30, ttl=1))
     def _read_components_thermal_equipment_summary_from_cache(cls) -> dict:
         """
         @note api response from /api/v1/cdu/components/thermal_equipment/summary
@@ -95,10 +95,9 @@ class BaseService:
                 ...
             }
         """
-        return SensorAPIAdapter.fetch_components_thermal_equipment_summary()
+        return SensorSnapshotPoller.read("thermal_equipment_summary")
 
     @classmethod
-    @cached(cache=TTLCache(maxsize=30, ttl=1))
     def _read_sensor_value_from_cache(cls) -> dict:
         """
         @note api response from /cdu/status/sensor_value is
@@ -133,14 +132,9 @@ class BaseService:
                 "fan8_speed": 0
             }
         """
-        # url = f"{os.environ['ITG_REST_HOST']}/api/v1/cdu/components/chassis/summary"
-        url = f"{os.environ['ITG_REST_HOST']}/api/v1/cdu/status/sensor_value"
-        response = cls.send_get(url)
-        sensor_value_json = response.json()
-        return sensor_value_json
+        return SensorSnapshotPoller.read("sensor_value")
     
     @classmethod
-    @cached(cache=TTLCache(maxsize=30, ttl=1))
     def _read_version_from_cache(cls) -> dict:
         """
         @note api response from /api/v1/cdu/components/display/version
@@ -159,16 +153,13 @@ class BaseService:
             "Version": "1",
             "PartNumber": "LCS-SCDU-1K3LR001"
         }
-        
+        @note 統一由 VersionInfoService 讀取 (長時間 cache，更新韌體/重開機時清除)
         """
-        url = f"{os.environ['ITG_REST_HOST']}/api/v1/cdu/components/display/version"
-        response = cls.send_get(url)
-        version_json = response.json()
-        return version_json
+        return VersionInfoService.get_version_info()
     
     @classmethod
     def get_uuid(cls) -> str:
-        return get_system_uuid()
+        return VersionInfoService.get_uuid()
     
     # @classmethod
     # @cached(cache=TTLCache(maxsize=3, ttl=1))
@@ -4,7 +4,7 @@
 import os, re, time
 import requests
 from enum import Enum
-from typing import Optional, Literal
+from typing import Optional, Literal, Dict, Any, Callable
 from datetime import datetime
 from http import HTTPStatus
 from load_env import hardware_info, sensor_info, redfish_info
@@ -14,6 +14,7 @@ from mylib.models.rf_sensor_model import (
     RfSensorModel, 
 )
 from mylib.services.base_service import BaseService
+from mylib.adapters.sensor_snapshot_poller import SensorSnapshotPoller
 from mylib.models.rf_environment_metrics_model import RfEnvironmentMetricsModel
 from mylib.models.rf_leak_detector import RfLeakDetectorModel
 from mylib.models.rf_status_model import RfStatusModel
@@ -25,6 +26,9 @@ from mylib.models.rf_pump_collection_model import RfPumpCollectionModel
 from mylib.models.rf_pump_model import RfPumpModel
 from mylib.utils.JsonUtil import JsonUtil
 from mylib.utils.load_api import load_raw_from_api, CDU_BASE
+from mylib.utils.HttpClientUtil import HttpClientUtil
+from mylib.utils.ConcurrentFetchUtil import ConcurrentFetchUtil
+from mylib.utils.SensorCatalog import SensorCatalog, SensorReading
 from mylib.models.rf_sensor_model import RfSensorPumpExcerpt
 from mylib.models.rf_control_model import RfControlSingleLoopExcerptModel
 from mylib.models.rf_filter_model import RfFilterModel
@@ -156,9 +160,10 @@ class RfThermalEquipmentService(BaseService):
                 "Health": "OK"
             }
             m.Status = RfStatusModel.from_dict(status)
-            m.FirmwareVersion = self._read_version_from_cache()["version"]["WebUI"]
-            m.Version = self._read_version_from_cache()["fw_info"]["Version"]
-            m.SerialNumber = self._read_version_from_cache()["fw_info"]["SN"]
+            version = self._read_version_from_cache()
+            m.FirmwareVersion = version["version"]["WebUI"]
+            m.Version = version["fw_info"]["Version"]
+            m.SerialNumber = version["fw_info"]["SN"]
             m.CoolingCapacityWatts = hardware_info.get("CDU", {}).get("CoolingCapacityWatts", -1)
             m.Oem = {}
             m = self._config_cdu_model(m)
@@ -172,7 +177,7 @@ class RfThermalEquipmentService(BaseService):
         else:
             ControlMode = "stop"    
         try:
-            r = requests.patch(
+            r = HttpClientUtil.patch(
                 f"{CDU_BASE}/api/v1/cdu/status/op_mode",
                 json={"mode": ControlMode},  
                 timeout=3
@@ -359,18 +364,15 @@ class RfThermalEquipmentService(BaseService):
         #         "fieldNameToFetchSensorValue": "power_total"
         #     },
         # }
-        id_readingInfo_map = sensor_info["id_readingInfo_map"]
-        reading_info = id_readingInfo_map.get(sensor_id, {})
-        if reading_info:
-            sensor_value_json = self._read_components_chassis_summary_from_cache()
-            reading_info["Reading"] = self._calc_delta_value(sensor_value_json, reading_info["fieldNameToFetchSensorValue"])
-        else:
-            reading_info["Reading"] = 0.0
-        return reading_info["Reading"]
+        catalog = SensorCatalog.get_instance()
+        if not catalog.has_sensor(sensor_id):
+            return 0.0
+        sensor_value_json = self._read_components_chassis_summary_from_cache()
+        return catalog.evaluate(sensor_id, sensor_value_json, ndigits=None).reading
     
-    def _load_reading_info_by_sensor_id(self, sensor_id: str) -> dict:
+    def _load_reading_info_by_sensor_id(self, sensor_id: str) -> Optional[SensorReading]:
         """
-        @return Reading & ReadingUnits
+        @return SensorReading (Reading, ReadingUnits, Status), sensor_id 不存在時回傳 None
         @note api response from /cdu/status/sensor_value is
             {
                 "temp_coolant_supply": 0,
@@ -403,30 +405,11 @@ class RfThermalEquipmentService(BaseService):
                 "fan8_speed": 0
             }
         """
-        id_readingInfo_map = sensor_info["id_readingInfo_map"]
-
-        # 動態調整風扇數量
-        fan_cnt = len(hardware_info.get("Fans", "")) 
-        for i in range(fan_cnt):
-            id_readingInfo_map[f"Fan{i+1}"] = {
-                "ReadingUnits": "%", 
-                "fieldNameToFetchSensorValue": f"fan{i+1}"
-            }
-            
-        reading_info = id_readingInfo_map.get(sensor_id)
-        if reading_info:
-            sensor_value_json = self._read_components_chassis_summary_from_cache()
-            if reading_info['fieldNameToFetchSensorValue'] == "EnergykWh":
-                boot_time_h = get_uptime()[0]
-                EnergykWh_data = self._calc_delta_value_status(sensor_value_json, "power_total")
-                reading_info["Reading"] = round(EnergykWh_data[0] * boot_time_h / 1000, 2)
-                reading_info["Status"] = EnergykWh_data[1]
-            else:
-                reading_info["Reading"], reading_info["Status"] = self._calc_delta_value_status(sensor_value_json, reading_info["fieldNameToFetchSensorValue"])
-        else:
-            reading_info = {}
-            reading_info["Reading"] = -1  
-        return reading_info    
+        catalog = SensorCatalog.get_instance()
+        if not catalog.has_sensor(sensor_id):
+            return None
+        sensor_value_json = self._read_components_chassis_summary_from_cache()
+        return catalog.evaluate(sensor_id, sensor_value_json)
     
     def _read_leak_detector_status(self, leak_detector_id: str) -> RfStatusModel:
         """
@@ -509,11 +492,11 @@ class RfThermalEquipmentService(BaseService):
             field_name = hardware_info_by_id.get("Sensors").get(sensor_name)
             tmp = {
                 "DataSourceUri": f"/redfish/v1/Chassis/1/Sensors/{sensor_name}",
-                "Reading": sensor_data.get("Reading"),
+                "Reading": sensor_data.reading if sensor_data else -1,
             }
                 
             setattr(m, field_name, tmp)  
-            status_data = sensor_data.get("Status")
+            status_data = dict(sensor_data.status) if sensor_data else None
             all_status_list.append(status_data)  
             
         # m.Oem = self._build_oem_for_PrimaryCoolantConnectorModel(m)
@@ -621,7 +604,7 @@ class RfThermalEquipmentService(BaseService):
         controlmode = ControlMode_change(controlmode)
         # 轉發到內部控制 API
         try:
-            r = requests.patch(
+            r = HttpClientUtil.patch(
                 f"{CDU_BASE}/api/v1/cdu/status/op_mode",
                 json={"mode": controlmode, "temp_set": temp_setpoint, "pressure_set": pressure_setpoint, "pump_swap_time": pump_swap_time},
                 timeout=3
@@ -735,7 +718,7 @@ class RfThermalEquipmentService(BaseService):
         controlmode = ControlMode_change(controlmode)
         # 轉發到內部控制 API
         try:
-            r = requests.patch(
+            r = HttpClientUtil.patch(
                 f"{CDU_BASE}/api/v1/cdu/status/op_mode",
                 json={"mode": controlmode, "temp_set": temp_setpoint, "pressure_set": pressure_setpoint},
                 timeout=3
@@ -786,22 +769,23 @@ class RfThermalEquipmentService(BaseService):
         """
         pump_max_speed = 16000  # 最大速度為16000 RPM
         m = RfPumpModel(cdu_id=cdu_id, pump_id=pump_id)
+        data = ConcurrentFetchUtil.fetch_all(self._pump_data_sources())
         # speed
-        pump_speed = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/status/pump_speed")[f"pump{pump_id}_speed"]
+        pump_speed = data["pump_speed"][f"pump{pump_id}_speed"]
         m.PumpSpeedPercent = RfSensorPumpExcerpt(**{
             "Reading": pump_speed,
             "SpeedRPM": pump_speed * pump_max_speed / 100            
         })
         # control
         m.SpeedControlPercent = RfControlSingleLoopExcerptModel(**{
-            "SetPoint": load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/control/pump_speed")[f"pump{pump_id}_speed"],  
+            "SetPoint": data["pump_speed_setpoint"][f"pump{pump_id}_speed"],  
             "AllowableMin": hardware_info["Pumps"][pump_id]["AllowableMin"],
             "AllowableMax": hardware_info["Pumps"][pump_id]["AllowableMax"],
-            "ControlMode": GetControlMode()  
+            "ControlMode": data["control_mode"]  
         })
         # status
-        state = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/status/pump_state")[f"pump{pump_id}_state"]
-        health = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/status/pump_health")[f"pump{pump_id}_health"]
+        state = data["pump_state"][f"pump{pump_id}_state"]
+        health = data["pump_health"][f"pump{pump_id}_health"]
         # print(f"state: {state}, health: {health}")
         if state == "Disable": state = "Disabled"
         if state == "Enable": state = "Enabled"
@@ -812,7 +796,7 @@ class RfThermalEquipmentService(BaseService):
         }
         m.Status = RfStatusModel.from_dict(status)
         # service time
-        service_hours = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/status/pump_service_hours")[f"pump{pump_id}_service_hours"]
+        service_hours = data["pump_service_hours"][f"pump{pump_id}_service_hours"]
         m.ServiceHours = service_hours
         # location
         # m.Location = hardware_info["Pumps"][pump_id]["Location"]
@@ -828,6 +812,19 @@ class RfThermalEquipmentService(BaseService):
 
         return m.to_dict()
     
+    def _pump_data_sources(self) -> Dict[str, Callable[[], Any]]:
+        """
+        /ThermalEquipment/CDUs/<cdu_id>/Pumps/<pump_id> 需要的上游資料 (由 ConcurrentFetchUtil 平行取得)
+        """
+        return {
+            "pump_speed": lambda: load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/status/pump_speed"),
+            "pump_speed_setpoint": lambda: load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/control/pump_speed"),
+            "control_mode": GetControlMode,
+            "pump_state": lambda: load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/status/pump_state"),
+            "pump_health": lambda: load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/status/pump_health"),
+            "pump_service_hours": lambda: load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/status/pump_service_hours"),
+        }
+
     def fetch_CDUs_Pumps_Pump_patch(self, cdu_id: str, pump_id: str, body: dict) -> dict:
         """
         對應 "/ThermalEquipment/CDUs/<cdu_id>/Pumps/<pump_id>"
@@ -856,7 +853,7 @@ class RfThermalEquipmentService(BaseService):
         payload = self._build_pumps_patch_payload(cdu_id, pump_id, body)
         # 轉發到內部控制 API
         try:
-            r = requests.patch(
+            r = HttpClientUtil.patch(
                 f"{CDU_BASE}/api/v1/cdu/status/op_mode",
                 json= payload, #{"mode": pump_controlmode, "pump_speed": pump_setpoint},
                 timeout=5
@@ -956,7 +953,7 @@ class RfThermalEquipmentService(BaseService):
         payload = self._build_pumps_post_payload(cdu_id, pump_id, mode)
         # 轉發到內部控制 API
         try:
-            r = requests.patch(
+            r = HttpClientUtil.patch(
                 f"{CDU_BASE}/api/v1/cdu/status/op_mode",
                 json=payload, #{"mode": "manual", f"pump{pump_id}_switch": mode},
                 timeout=5
@@ -1058,8 +1055,8 @@ class RfSidecarThermalEquipmentService(RfThermalEquipmentService):
         return payload
     
     def _build_filter(self, cdu_id: str, filter_id: str) -> dict:
-        all_data = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/chassis/summary")
-        thermal_equipment = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/thermal_equipment/summary")
+        all_data = self._read_components_chassis_summary_from_cache()
+        thermal_equipment = self._read_components_thermal_equipment_summary_from_cache()
         health_data = (all_data["pressure_filter_in"]["status"], all_data["pressure_filter_out"]["status"])
         ServiceHours = thermal_equipment.get("Filter_run_time", -1)
         return health_data, ServiceHours
@@ -1126,14 +1123,16 @@ class RfInrowcduThermalEquipmentService(RfThermalEquipmentService):
         return payload
 
     def _build_filter(self, cdu_id: str, filter_id: str) -> dict:
-        all_data = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/chassis/summary")
-        thermal_equipment = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/thermal_equipment/summary")
+        all_data = self._read_components_chassis_summary_from_cache()
+        thermal_equipment = self._read_components_thermal_equipment_summary_from_cache()
         health_data = (all_data["pressure_filter_in"]["status"], all_data[f"pressure_filter_{filter_id}_out"]["status"])
         ServiceHours = thermal_equipment.get(f"Filter_{filter_id}_run_time", -1)
         return health_data, ServiceHours
     
     def _build_leakdetectors_id(self, cdu_id: str, leak_detector_id: str) -> dict:
-        leak_switch = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/setting")
+        leak_switch = SensorSnapshotPoller.read_pinned(
+            "components_setting", lambda: load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/setting")
+        )
         test = sensor_info.get("leak_detectors").get(leak_detector_id).get("fieldNameToFetchSensorValue")
         leak_switch_id = leak_switch.get(test, -1) # -1 讓他報錯
         return leak_switch_id
@@ -20,9 +20,12 @@ from mylib.models.rf_fan_model import RfFanModel
 from mylib.models.rf_resource_model import RfLocationModel, RfOemModel
 from mylib.models.rf_thermal_subsystem_model import RfThermalSubsystemModel
 from cachetools import LRUCache, cached
-from typing import Dict, Any
+from typing import Dict, Any, Callable
 from load_env import hardware_info, sensor_info
 from mylib.utils.load_api import load_raw_from_api, CDU_BASE
+from mylib.utils.HttpClientUtil import HttpClientUtil
+from mylib.utils.ConcurrentFetchUtil import ConcurrentFetchUtil
+from mylib.utils.SensorCatalog import SensorCatalog, SensorReading
 from mylib.utils.controlUtil import ControlMode_change
 from mylib.common.proj_error import ProjRedfishError, ProjRedfishErrorCode
 from mylib.utils.system_info import get_uptime
@@ -67,14 +70,14 @@ class RfChassisService(BaseService):
             **hardware_info["CDU"]
         )
         
-        version = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/display/version")
+        version = self._read_version_from_cache()
         version_data = version.get("fw_info", {})
         m.Model = version_data.get("Model")
         m.SerialNumber = version_data.get("SN")
         m.PartNumber = version_data.get("PartNumber")
         m.Version = version.get("version", {}).get("Redfish_Server")
         m.AssetTag = version_data.get("SN")
-        m.UUID = get_system_uuid()
+        m.UUID = self.get_uuid()
         m.SKU = "130-D0150000A0-T01"
         # 子資源連結
         m.PowerSubsystem = {
@@ -131,17 +134,10 @@ class RfChassisService(BaseService):
         對應 "/redfish/v1/Chassis/{CHASSIS_ID}/Sensors"
         ex: "/redfish/v1/Chassis/1/Sensors
         """
-        sensor_ids = list(sensor_info.get("id_readingInfo_map").keys())
-        SENSOR_IDS = {*sensor_ids}
-        # 動態調整風扇數量
-        fan_cnt = hardware_info.get("FanCount") #self.get_fans_cnt() 
-        for i in range(fan_cnt):
-            SENSOR_IDS.add(f"Fan{i+1}")
-            
         sensor_collection_model = RfSensorCollectionModel()
         sensor_collection_model.odata_id = sensor_collection_model.build_odata_id(chassis_id)
 
-        for sensor_id in SENSOR_IDS:
+        for sensor_id in SensorCatalog.get_instance().sensor_ids(): # 已包含 Fan{i}
             sensor_collection_model.Members.append({"@odata.id": f"/redfish/v1/Chassis/{chassis_id}/Sensors/{sensor_id}"})
         sensor_collection_model.Members = sorted(sensor_collection_model.Members, key=lambda x: x["@odata.id"])
         sensor_collection_model.Members_odata_count = len(sensor_collection_model.Members)
@@ -156,29 +152,24 @@ class RfChassisService(BaseService):
         :param sensor_name: str, ex: PrimaryFlowLitersPerMinute|PrimaryHeatRemovedkW|...
         :return: dict
         """
-        id_readingInfo_spare = sensor_info.get("id_readingInfo_spare", {})
-        
         reading_info = self._load_reading_info_by_sensor_id(sensor_name)
         m = RfSensorModel(
             chassis_id=chassis_id,
             Id = sensor_name,
             Name = self._camel_to_words(sensor_name),
-            Reading=reading_info["Reading"],
-            ReadingUnits = reading_info["ReadingUnits"],
-            Status = RfStatusModel(Health=reading_info["Status"].get("Health") or reading_info["Status"].get("health"), State=reading_info["Status"].get("State") or reading_info["Status"].get("state"))
+            Reading=reading_info.reading,
+            ReadingUnits = reading_info.reading_units,
+            Status = RfStatusModel(Health=reading_info.health(), State=reading_info.state())
         )
 
         if m.Status.Health == "Critical":
-            if sensor_name in id_readingInfo_spare:
-                all_sensor_reading = self._read_components_chassis_summary_from_cache()
-                spare_field = id_readingInfo_spare[sensor_name]["fieldNameToFetchSensorValue"]
-
+            if reading_info.has_spare:
                 m.Reading = 0
                 m.Oem = {
                     "Supermicro": {
                         "@odata.type": "#Supermicro.Sensor.v1_0_0.Sensor",
-                        "ReadingSpare": all_sensor_reading[spare_field + "_spare"]["reading"],
-                        "StatusSpare": all_sensor_reading[spare_field + "_spare"]["status"],
+                        "ReadingSpare": reading_info.spare_reading,
+                        "StatusSpare": dict(reading_info.spare_status),
                     }
                 }
         
@@ -228,9 +219,9 @@ class RfChassisService(BaseService):
         # PowerSupplyId_Name_dict = json.loads(json_formatted_str)
         return json_formatted_str
 
-    def _load_reading_info_by_sensor_id(self, sensor_id: str) -> str:
+    def _load_reading_info_by_sensor_id(self, sensor_id: str) -> Optional[SensorReading]:
         """
-        @return Reading & ReadingUnits
+        @return SensorReading (Reading, ReadingUnits, Status), sensor_id 不存在時回傳 None
         @note api response from /cdu/status/sensor_value is
             {
                 "temp_coolant_supply": 0,
@@ -263,30 +254,11 @@ class RfChassisService(BaseService):
                 "fan8_speed": 0
             }
         """
-        id_readingInfo_map = sensor_info["id_readingInfo_map"]
-
-        # 動態調整風扇數量
-        fan_cnt = hardware_info.get("FanCount") 
-        for i in range(fan_cnt):
-            id_readingInfo_map[f"Fan{i+1}"] = {
-                "ReadingUnits": "%", 
-                "fieldNameToFetchSensorValue": f"fan{i+1}"
-            }
-            
-        
-        reading_info = id_readingInfo_map.get(sensor_id)
-        if reading_info:
-            sensor_value_json = self._read_components_chassis_summary_from_cache()
-            if reading_info['fieldNameToFetchSensorValue'] == "EnergykWh":
-                boot_time_h = get_uptime()[0]
-                EnergykWh_data = self._calc_delta_value_status(sensor_value_json, "power_total")
-                reading_info["Reading"] = round(EnergykWh_data[0] * boot_time_h / 1000, 2)
-                reading_info["Status"] = EnergykWh_data[1]
-            else:
-                reading_info["Reading"], reading_info["Status"] = self._calc_delta_value_status(sensor_value_json, reading_info["fieldNameToFetchSensorValue"])
-        else:
-            reading_info["Reading"] = 0.0  
-        return reading_info
+        catalog = SensorCatalog.get_instance()
+        if not catalog.has_sensor(sensor_id):
+            return None
+        sensor_value_json = self._read_components_chassis_summary_from_cache()
+        return catalog.evaluate(sensor_id, sensor_value_json)
     
     # 取得 thermal_subsystem 風扇數量
     def get_thermal_subsystem_fans_count(self, chassis_id: str):
@@ -315,18 +287,19 @@ class RfChassisService(BaseService):
         # m.Status.State = sensor_value_json["fan" + str(fan_id)]["status"]["state"]
         # m.Status.Health = sensor_value_json["fan" + str(fan_id)]["status"]["health"]
         fan_mc_id = 1 if int(fan_id) <= 3 else 2
+        data = ConcurrentFetchUtil.fetch_all(self._fan_data_sources())
         m.Oem = {
             "Supermicro": {
                 "@odata.type": "#Supermicro.FanMC",
                 f"Fan Gorup{fan_mc_id} MC": {
-                    "fan MC":load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/mc")[f"fan_mc{fan_mc_id}"]
+                    "fan MC": data["mc"][f"fan_mc{fan_mc_id}"]
                 }
             }
         }
 
-        opmode_data = load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/status/op_mode")
+        opmode_data = data["op_mode"]
         m.SpeedControlPercent = {
-            "SetPoint": load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/Oem")["FanSetPoint"],
+            "SetPoint": data["oem"]["FanSetPoint"],
             "ControlMode": ControlMode_change(opmode_data["mode"]),
             "AllowableMax": hardware_info.get("Fans").get(fan_id).get("AllowableMax"),
             "AllowableMin": hardware_info.get("Fans").get(fan_id).get("AllowableMin")
@@ -344,6 +317,17 @@ class RfChassisService(BaseService):
         
         return resp
     
+    def _fan_data_sources(self) -> Dict[str, Callable[[], Any]]:
+        """
+        /redfish/v1/Chassis/{chassis_id}/ThermalSubsystem/Fans/{fan_id} 需要的上游資料 (由 ConcurrentFetchUtil 平行取得)
+        @note 讀值與 status 來自 chassis summary snapshot，不在此列
+        """
+        return {
+            "mc": lambda: load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/mc"),
+            "op_mode": lambda: load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/status/op_mode"),
+            "oem": lambda: load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/components/Oem"),
+        }
+
     def patch_thermal_subsystem_fans_data(self, chassis_id: str, fan_id: str, body: dict):
         
         # 這裡是 patch 的內容
@@ -353,7 +337,7 @@ class RfChassisService(BaseService):
 
         # 轉發到內部控制 API
         try:
-            r = requests.patch(
+            r = HttpClientUtil.patch(
                 f"{CDU_BASE}/api/v1/cdu/status/op_mode",
                 json={
                     "mode": ControlMode, 
@@ -425,7 +409,7 @@ class RfChassisService(BaseService):
 
         # 轉發到內部控制 API
         try:
-            r = requests.patch(
+            r = HttpClientUtil.patch(
                 f"{CDU_BASE}/api/v1/cdu/status/op_mode",
                 json=payload,
                 timeout=3
@@ -484,7 +468,7 @@ class RfChassisService(BaseService):
         mode = ControlMode_change(ControlMode)
         # 轉發到內部控制 API
         try:
-            r = requests.patch(
+            r = HttpClientUtil.patch(
                 f"{CDU_BASE}/api/v1/cdu/status/op_mode",
                 json={
                     "mode": mode,
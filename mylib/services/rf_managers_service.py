@@ -16,6 +16,7 @@ from mylib.models.rf_resource_model import RfResetType
 from mylib.common.proj_response_message import ProjResponseMessage
 from mylib.models.setting_model import SettingModel
 from mylib.utils.load_api import load_raw_from_api, CDU_BASE
+from mylib.services.version_info_service import VersionInfoService
 from mylib.utils.system_info import get_physical_nics
 from mylib.models.rf_ethernetinterfaces_model import RfEthernetInterfacesModel, RfEthernetInterfacesIdModel
 from mylib.models.rf_status_model import RfStatusModel
@@ -356,6 +357,7 @@ class RfManagersService(BaseService):
             API will return jsonify(message="Reset all to factory settings Successfully")
         """
         resp = WebAppAPIAdapter().reset_to_defaults(reset_type)
+        VersionInfoService.expect_change()
         if resp.status_code == HTTPStatus.OK.value:
             reset_to_defaults()
         return jsonify(ProjResponseMessage(code=resp.status_code, message=resp.text).to_dict())
@@ -366,8 +368,10 @@ class RfManagersService(BaseService):
             e.g., "ForceRestart" or "GracefulRestart"
         """
         resp = WebAppAPIAdapter().reset(reset_type)
+        VersionInfoService.expect_change()
         return jsonify(ProjResponseMessage(code=resp.status_code, message=resp.text).to_dict())
 
     def shutdown(self, reset_type: str):
         resp = WebAppAPIAdapter().shutdown(reset_type)
+        VersionInfoService.expect_change()
         return jsonify(ProjResponseMessage(code=resp.status_code, message=resp.text).to_dict())
\ No newline at end of file
@@ -1,20 +1,24 @@
 # mylib/services/rf_telemetry_service.py
 import os
+import math
 import time
 import threading
 import re
 from typing import List, Dict, Any, Optional
 from collections import deque, defaultdict
 from datetime import datetime, timezone, timedelta
-from cachetools import cached, TTLCache
+from cachetools import cached, TTLCache, LRUCache
 from http import HTTPStatus
 from mylib.common.proj_error import ProjRedfishError, ProjRedfishErrorCode
 from mylib.services.base_service import BaseService
 from mylib.adapters.sensor_csv_adapter import SensorCsvAdapter
+from mylib.adapters.sensor_history_store import to_epoch_seconds
+from mylib.utils.HistoryResampleUtil import HistoryResampleUtil
 from mylib.models.sensor_log_model import SensorLogModel
 from mylib.models.rf_metric_definition_model import (
     RfMetricDefinitionCollectionModel,
     RfMetricDefinitionModel,
+    RfCalculationAlgorithmEnum,
 )
 from mylib.models.sensor_log_model_factory import SensorLogModelFactory
 from mylib.models.rf_metric_report_definition_model import (
@@ -26,6 +30,26 @@ from mylib.models.rf_metric_report_definition_model import (
     RfReportUpdatesEnum,
 )
 from mylib.adapters.PostgresAdapter import PostgresAdapter
+from mylib.adapters.sensor_statistics_query import SensorStatisticsQuery, SensorRollupQuery, SensorAlignedQuery
+from mylib.adapters.sensor_rollup import SensorRollup
+from mylib.adapters.sensor_statistics_engine import SensorStatisticsEngine
+from mylib.models.telemetry_service_model import TelemetryServiceModel
+from mylib.adapters.sensor_pg_ingest_worker import SensorPgIngestWorker
+from mylib.adapters.metric_report_engine import MetricReportEngine, ReportDefinition, ReportMetric
+from mylib.models.setting_metric_report_definition_model import MetricReportDefinitionSettingModel
+from mylib.models.rf_status_model import RfStatusModel
+from mylib.adapters.trigger_engine import TriggerEngine, TriggerDefinition, TriggerMetric, TriggerThreshold
+from mylib.utils.SensorCatalog import SensorCatalog
+from mylib.models.setting_trigger_model import TriggerSettingModel
+from mylib.models.rf_triggers_model import (
+    RfTriggersCollectionModel,
+    RfTriggersModel,
+    RfMetricTypeEnum,
+    RfTriggerActionEnum,
+    RfThresholds,
+    RfThreshold,
+    RfThresholdActivation,
+)
 
 
 
@@ -42,23 +66,70 @@ class RfTelemetryService(BaseService):
 
     MAX_REPORTS = 2048
     REPORT_ID_PREFIX = "CDU_Report_"
+    # 報告的彙總版本: <report id>_<function>，內容為該報告所在 SAMPLING_INTERVAL 區段的彙總值
+    REPORT_VARIANT_FUNCTIONS = HistoryResampleUtil.FUNCTIONS
+
+    # get_sensor_statistics: 超過 STATISTICS_RAW_MAX_DURATION_SEC 的區間改由彙總表 (SensorRollup) 計算
+    STATISTICS_RAW_MAX_DURATION_SEC = 300
+    STATISTICS_MAX_DURATION_SEC = int(os.getenv("TELEMETRY_STATISTICS_MAX_DURATION_SEC", str(31 * 86400)))
+    # CalculationTimeInterval 設定 (resource=SensorStatistics) 的 (metric, duration) 由 SensorStatisticsEngine 串流計算
+    STATISTICS_RESOURCE = "SensorStatistics"
+    _calculation_time_intervals_cache = TTLCache(maxsize=1, ttl=30)
+
+    # MetricReportDefinition: 內建的定義 "1" 之外由使用者建立，排程見 MetricReportEngine
+    BUILTIN_REPORT_DEFINITION_ID = "1"
+    REPORT_DEFINITION_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+    REPORT_DEFINITION_PROPERTIES = (
+        "Id", "Name", "Description", "MetricReportDefinitionType", "MetricReportDefinitionEnabled",
+        "Schedule", "ReportActions", "ReportUpdates", "AppendLimit", "Metrics",
+    )
+    DEFAULT_APPEND_LIMIT = 256
+    MAX_REPORT_DURATION_SEC = 86400
+    _report_definitions_loaded = False
+    _report_definitions_lock = threading.Lock()
+
+    # Triggers: Numeric 門檻由 TriggerEngine 在每一版 chassis summary snapshot 上評估
+    TRIGGER_PROPERTIES = (
+        "Id", "Name", "Description", "MetricType", "TriggerActions", "TriggerEnabled",
+        "MetricProperties", "NumericThresholds",
+    )
+    TRIGGER_METRIC_PROPERTY_PATTERN = re.compile(r"^/redfish/v1/Chassis/[^/]+/Sensors/([^/#]+)(?:/Reading|#/Reading)?$")
+    TRIGGER_EVENTS_IN_RESOURCE = 20
+    _triggers_loaded = False
+    _triggers_lock = threading.Lock()
 
     # --- 快取與過期管理 ---
-    _reports_cache = deque(maxlen=MAX_REPORTS)
+    # 報告索引: 只記錄每份報告的 (Id, 取樣時間)，報告內容在被請求時才由 SensorHistoryStore 產生
+    _report_ids: List[str] = []
+    _report_index: Dict[str, float] = {} # report id -> epoch 秒
+    _report_index_epoch = None # 建立索引時 store 的 epoch
     _cache_lock = threading.Lock()  # 仍然需要鎖，以防極端情況下的並發請求
 
+    # 已產生的報告內容 (LRU)
+    RENDERED_REPORTS_CACHE_SIZE = 128
+    _rendered_reports = LRUCache(maxsize=RENDERED_REPORTS_CACHE_SIZE)
+
     # 新增：快取過期時間配置（秒）
     CACHE_EXPIRATION_SECONDS = 5  # 5s
 
     # 新增：記錄上次快取更新的時間戳
     _last_update_timestamp = 0
 
+    @classmethod
+    def build_report_id(cls, ts: float) -> str:
+        """
+        由取樣時間產生固定的報告 Id，時間窗移動時 Id 不會改變
+        ex: CDU_Report_20250701T000010Z
+        """
+        return f"{cls.REPORT_ID_PREFIX}{datetime.fromtimestamp(ts, tz=timezone.utc).strftime('%Y%m%dT%H%M%SZ')}"
+
     @classmethod
     def _update_cache_if_expired(cls):
         """
         檢查快取是否過期，如果過期則執行一次更新。
         這是一個線程安全的操作。
-        讀取所有CSV數據，將其分組，並創建包含原始採樣數據的報告。
+        依 SAMPLING_INTERVAL 對歷史資料取樣並更新報告索引 (只處理上次取樣之後的新資料)。
+        報告的 Id 由取樣時間產生，之後以 Id 直接查詢 (見 get_report_by_id)。
         """
         # 第一次檢查（無鎖），快速判斷大多數情況
         if (time.time() - cls._last_update_timestamp) < cls.CACHE_EXPIRATION_SECONDS:
@@ -66,123 +137,176 @@ class RfTelemetryService(BaseService):
 
         # 快取可能已過期，現在獲取鎖來進行同步和第二次檢查
         with cls._cache_lock:
-            current_time = time.time()
             # 雙重檢查：確認在等待鎖的期間，沒有其他線程已經完成了更新
             if (
                 time.time() - cls._last_update_timestamp
             ) < cls.CACHE_EXPIRATION_SECONDS:
                 return
 
-        # --- 快取已過期，執行更新邏輯 ---
-        print(f"[{datetime.now()}] Cache expired. Updating telemetry data...")
+            store = SensorCsvAdapter.get_sensor_history_store()
+            with store.lock:
+                if cls._report_index_epoch != store.epoch:
+                    # 已寫入的資料被改寫，重新建立索引
+                    cls._report_ids, cls._report_index = [], {}
+                    cls._rendered_reports.clear()
+                    cls._report_index_epoch = store.epoch
+
+                first_ts = store.first_timestamp()
+                if first_ts is None:
+                    cls._report_ids, cls._report_index = [], {}
+                else:
+                    # 移除已經不在歷史資料內的報告
+                    expired_cnt = 0
+                    while expired_cnt < len(cls._report_ids) and cls._report_index[cls._report_ids[expired_cnt]] < first_ts:
+                        expired_cnt += 1
 
-        all_records = SensorCsvAdapter.get_all_sensor_data_as_list_of_dicts()
+                    # 以 SAMPLING_INTERVAL 對齊的時間區段取樣，每個區段取第一筆資料，
+                    # 區段的樣本不會因為新資料附加而改變。由最新的資料往回找，只處理上次取樣之後的區段
+                    sampling_interval_sec = cls.SAMPLING_INTERVAL.total_seconds()
+                    last_sample_ts = cls._report_index[cls._report_ids[-1]] if cls._report_ids else None
+                    new_samples = []
+                    i = len(store)
+                    while i > 0 and len(new_samples) < cls.MAX_REPORTS:
+                        bucket_start = (store.get_timestamp(i - 1) // sampling_interval_sec) * sampling_interval_sec
+                        if last_sample_ts is not None and bucket_start <= last_sample_ts:
+                            break
+                        i = store.bisect_left(bucket_start)
+                        new_samples.append(store.get_timestamp(i))
+                    new_samples.reverse()
 
-        if not all_records:
-            print("No sensor data found during update.")
-            # 更新時間戳，即使沒有數據，也避免在下一個週期內立即重試
+                    report_ids = cls._report_ids[expired_cnt:] + [cls.build_report_id(ts) for ts in new_samples]
+                    report_index = {report_id: cls._report_index[report_id] for report_id in cls._report_ids[expired_cnt:]}
+                    report_index.update(zip(report_ids[len(report_ids) - len(new_samples):], new_samples))
+                    for report_id in report_ids[:-cls.MAX_REPORTS]:
+                        del report_index[report_id]
+                    cls._report_ids, cls._report_index = report_ids[-cls.MAX_REPORTS:], report_index
+
+            # 更新完成後，記錄新的更新時間
             cls._last_update_timestamp = time.time()
-            return
 
-        sampled_data = []
-        if all_records:
-            last_sample_time = all_records[0]["time"] - cls.SAMPLING_INTERVAL
-            for record in all_records:
-                if record["time"] - last_sample_time >= cls.SAMPLING_INTERVAL:
-                    sampled_data.append(record)
-                    last_sample_time = record["time"]
-
-        # reports_in_groups = defaultdict(list)
-        # for sample in sampled_data:
-        #     ts = sample["time"]
-        #     bucket_minute = (
-        #         ts.minute // cls.REPORTING_INTERVAL_MINUTES
-        #     ) * cls.REPORTING_INTERVAL_MINUTES
-        #     bucket_timestamp = ts.replace(minute=bucket_minute, second=0, microsecond=0)
-        #     reports_in_groups[bucket_timestamp].append(sample)
-
-        # generated_reports = []
-        # sorted_buckets = sorted(reports_in_groups.items())
-
-        # for i, (period_timestamp, group_of_samples) in enumerate(sorted_buckets):
-        #     report_id = f"{cls.REPORT_ID_PREFIX}{i + 1}"
-        #     report_timestamp_iso = period_timestamp.replace(
-        #         tzinfo=timezone.utc
-        #     ).isoformat()
-        #     metric_values = []
-        #     for sample_row in group_of_samples:
-        #         entry_timestamp_iso = (
-        #             sample_row["time"].replace(tzinfo=timezone.utc).isoformat()
-        #         )
-        #         for key, value in sample_row.items():
-        #             if key == "time":
-        #                 continue
-        #             metric_values.append(
-        #                 {
-        #                     "MetricId": key,
-        #                     "MetricValue": str(value),
-        #                     "Timestamp": entry_timestamp_iso,
-        #                 }
-        #             )
-        #     report = {
-        #         "@odata.id": f"/redfish/v1/TelemetryService/MetricReports/{report_id}",
-        #         "@odata.type": "#MetricReport.v1_5_2.MetricReport",
-        #         "Id": report_id,
-        #         "Name": f"CDU 3-Minute Data Collection Report - {report_timestamp_iso}",
-        #         "Timestamp": report_timestamp_iso,
-        #         "MetricValues": metric_values,
-        #     }
-        #     generated_reports.append(report)
-        generated_reports = []
-        for i, sample_row in enumerate(sampled_data):
-            report_id = f"{cls.REPORT_ID_PREFIX}{i + 1}"
-            entry_timestamp_iso = (
-                sample_row["time"].replace(tzinfo=timezone.utc).isoformat()
-            )
+    @classmethod
+    def split_report_id(cls, report_id: str) -> tuple:
+        """
+        ex: CDU_Report_20250701T000010Z_Maximum -> ("CDU_Report_20250701T000010Z", "Maximum")
+        :return: (報告 Id, 彙總方式)，不是彙總版本時彙總方式為 None
+        """
+        base_id, _, suffix = report_id.rpartition("_")
+        if base_id.startswith(cls.REPORT_ID_PREFIX) and suffix in cls.REPORT_VARIANT_FUNCTIONS:
+            return base_id, suffix
+        return report_id, None
 
-            metric_values = []
-            for key, value in sample_row.items():
-                if key == "time":
-                    continue
-                metric_values.append(
-                    {
-                        "MetricId": key,
-                        "MetricValue": str(value),
-                        "Timestamp": entry_timestamp_iso,
-                    }
-                )
+    @classmethod
+    def _render_report(cls, report_id: str, ts: float) -> dict | None:
+        """
+        由 SensorHistoryStore 產生單一報告的內容
+        :return: 報告內容，取樣的資料已不在歷史資料內時回傳 None
+        """
+        store = SensorCsvAdapter.get_sensor_history_store()
+        with store.lock:
+            i = store.bisect_left(ts)
+            if i >= len(store) or store.get_timestamp(i) != ts:
+                return None
+            sample_row = store.get_row(i)
 
-            report = {
-                "@odata.id": f"/redfish/v1/TelemetryService/MetricReports/{report_id}",
-                "@odata.type": "#MetricReport.v1_5_2.MetricReport",
-                "Id": report_id,
-                "Name": f"CDU Telemetry Sample at {entry_timestamp_iso}",
-                "Timestamp": entry_timestamp_iso,
-                "MetricValues": metric_values,
-            }
-            generated_reports.append(report)
+        entry_timestamp_iso = datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+        metric_values = []
+        for key, value in sample_row.items():
+            metric_values.append(
+                {
+                    "MetricId": key,
+                    "MetricValue": str(value),
+                    "Timestamp": entry_timestamp_iso,
+                }
+            )
 
-        cls._reports_cache.clear()
-        cls._reports_cache.extend(generated_reports)
+        return {
+            "@odata.id": f"/redfish/v1/TelemetryService/MetricReports/{report_id}",
+            "@odata.type": "#MetricReport.v1_5_2.MetricReport",
+            "Id": report_id,
+            "Name": f"CDU Telemetry Sample at {entry_timestamp_iso}",
+            "Timestamp": entry_timestamp_iso,
+            "MetricValues": metric_values,
+            "Oem": {
+                "Supermicro": {
+                    "AggregatedReports": [
+                        {"@odata.id": f"/redfish/v1/TelemetryService/MetricReports/{report_id}_{function}"}
+                        for function in cls.REPORT_VARIANT_FUNCTIONS
+                    ],
+                },
+            },
+        }
 
-        # 更新完成後，記錄新的更新時間
-        cls._last_update_timestamp = time.time()
-        print(
-            f"[{datetime.now()}] Telemetry cache update complete. {len(cls._reports_cache)} reports are cached."
+    @classmethod
+    def _render_report_variant(cls, report_id: str, ts: float, function: str) -> dict | None:
+        """
+        產生報告的彙總版本: 取樣時間所在的 SAMPLING_INTERVAL 區段內，每個 metric 的 Minimum/Maximum/Average/Last
+        :return: 報告內容，區段已不在歷史資料內時回傳 None
+        """
+        sampling_interval_sec = cls.SAMPLING_INTERVAL.total_seconds()
+        bucket_start = (ts // sampling_interval_sec) * sampling_interval_sec
+        store = SensorCsvAdapter.get_sensor_history_store()
+        window = HistoryResampleUtil.resample(
+            store, sampling_interval_sec, bucket_start, bucket_start + sampling_interval_sec, functions=(function,)
         )
+        if not len(window) or window.bucket_starts[0] != bucket_start:
+            return None
+
+        entry_timestamp_iso = datetime.fromtimestamp(bucket_start, tz=timezone.utc).isoformat()
+        metric_values = []
+        for key, values in window.values[function].items():
+            value = values[0]
+            if isinstance(value, float) and math.isnan(value):
+                value = None
+            metric_values.append(
+                {
+                    "MetricId": key,
+                    "MetricValue": str(value),
+                    "Timestamp": entry_timestamp_iso,
+                }
+            )
+
+        return {
+            "@odata.id": f"/redfish/v1/TelemetryService/MetricReports/{report_id}",
+            "@odata.type": "#MetricReport.v1_5_2.MetricReport",
+            "Id": report_id,
+            "Name": f"CDU Telemetry {function} of {int(sampling_interval_sec)}s at {entry_timestamp_iso}",
+            "Timestamp": entry_timestamp_iso,
+            "MetricValues": metric_values,
+            "Oem": {
+                "Supermicro": {
+                    "CollectionFunction": function,
+                    "CollectionDuration": f"PT{int(sampling_interval_sec)}S",
+                    "SampleCount": window.counts[0],
+                },
+            },
+        }
+
+    @staticmethod
+    def _render_definition_report(report: dict) -> dict:
+        """MetricReportEngine 產生的報告 -> Redfish MetricReport"""
+        definition_id = report.pop("MetricReportDefinition")
+        return {
+            "@odata.id": f"/redfish/v1/TelemetryService/MetricReports/{report['Id']}",
+            "@odata.type": "#MetricReport.v1_5_2.MetricReport",
+            **report,
+            "MetricReportDefinition": {
+                "@odata.id": f"/redfish/v1/TelemetryService/MetricReportDefinitions/{definition_id}"
+            },
+        }
 
     def get_all_reports(self) -> dict:
         """
-        獲取 MetricReports 集合，直接從緩存中讀取。
+        獲取 MetricReports 集合，只讀取報告索引，不產生報告內容。
         """
         # 每次被調用時，都先檢查快取是否需要更新
         self._update_cache_if_expired()
 
         # 直接從快取中讀取數據（此時快取可能是新更新的，也可能是未過期的舊數據）
-        with self._cache_lock:
-            members_list = [
-                {"@odata.id": report["@odata.id"]} for report in self._reports_cache
-            ]
+        # MetricReportDefinition 產生的報告在前，其次為歷史資料的取樣報告
+        report_ids = self._get_metric_report_engine().report_ids() + self._report_ids
+        members_list = [
+            {"@odata.id": f"/redfish/v1/TelemetryService/MetricReports/{report_id}"} for report_id in report_ids
+        ]
 
         return {
             "@odata.id": "/redfish/v1/TelemetryService/MetricReports",
@@ -194,16 +318,32 @@ class RfTelemetryService(BaseService):
 
     def get_report_by_id(self, report_id: str) -> dict | None:
         """
-        獲取單個 MetricReport 的詳細資訊，直接從緩存中查找。
+        獲取單個 MetricReport 的詳細資訊，由報告索引查到取樣時間後產生內容 (LRU 快取)。
+        彙總版本 (<report id>_<function>) 不列在集合中，但可以直接查詢。
         """
+        definition_report = self._get_metric_report_engine().get_report(report_id)
+        if definition_report is not None:
+            return self._render_definition_report(definition_report)
+
         # 直接從快取中讀取數據（此時快取可能是新更新的，也可能是未過期的舊數據）
         self._update_cache_if_expired()
 
+        base_id, function = self.split_report_id(report_id)
         with self._cache_lock:
-            for report in self._reports_cache:
-                if report["Id"] == report_id:
-                    return report.copy()
-        return None
+            ts = self._report_index.get(base_id)
+            if ts is None:
+                return None
+            report = self._rendered_reports.get(report_id)
+        if report is None:
+            if function is None:
+                report = self._render_report(report_id, ts)
+            else:
+                report = self._render_report_variant(report_id, ts, function)
+            if report is None:
+                return None
+            with self._cache_lock:
+                self._rendered_reports[report_id] = report
+        return report.copy()
 
     @cached(cache=TTLCache(maxsize=1, ttl=30))
     def load_metric_definitions(self) -> tuple:
@@ -258,19 +398,185 @@ class RfTelemetryService(BaseService):
 
             return m.to_dict()
 
+    # --- MetricReportDefinitions ---
+
+    def start_metric_report_engine(self):
+        """
+        app 啟動時呼叫: 載入定義並啟動排程，報告從啟動時就開始產生 (不必等到第一次存取)
+        @note 需要 app context (讀取資料庫中的定義)
+        """
+        self._get_metric_report_engine()
+
+    def _get_metric_report_engine(self) -> MetricReportEngine:
+        """
+        載入定義 (內建的 "1" + 資料庫中使用者建立/修改的) 並啟動排程，只在第一次呼叫時載入
+        """
+        cls = self.__class__
+        engine = MetricReportEngine.get_instance()
+        if not cls._report_definitions_loaded:
+            with cls._report_definitions_lock:
+                if not cls._report_definitions_loaded:
+                    settings_list = {self.BUILTIN_REPORT_DEFINITION_ID: self._build_builtin_report_definition_settings()}
+                    try:
+                        for row in MetricReportDefinitionSettingModel.all():
+                            settings_list[row.Id] = dict(row.Settings)
+                    except Exception as e:
+                        print(f"Failed to load MetricReportDefinitions: {e}")
+                    for settings in settings_list.values():
+                        try:
+                            engine.upsert(self._build_report_definition(settings))
+                        except (ValueError, ProjRedfishError) as e:
+                            print(f"Skip MetricReportDefinition {settings.get('Id')}: {e}")
+                    cls._report_definitions_loaded = True
+        engine.start()
+        return engine
+
+    def _build_builtin_report_definition_settings(self) -> dict:
+        """內建的定義 "1": 所有 metric 每 3 分鐘一次，預設停用 (PATCH MetricReportDefinitionEnabled 後才產生報告)"""
+        metrics, _ = self.load_metric_definitions()
+        return {
+            "Id": self.BUILTIN_REPORT_DEFINITION_ID,
+            "Name": "Periodic Report",
+            "MetricReportDefinitionType": RfMetricReportDefinitionType.Periodic.value,
+            "MetricReportDefinitionEnabled": False,
+            "Schedule": {"RecurrenceInterval": "PT3M"},
+            "ReportActions": [RfReportActionsEnum.LogToMetricReportsCollection.value],
+            "ReportUpdates": RfReportUpdatesEnum.AppendWrapsWhenFull.value,
+            "AppendLimit": self.DEFAULT_APPEND_LIMIT,
+            "Metrics": [{"MetricId": m["FieldName"]} for m in metrics if m["FieldName"] != "time"],
+        }
+
+    def _parse_report_duration(self, name: str, duration: Any) -> int:
+        try:
+            seconds = self.parse_iso_duration_to_seconds(duration)
+        except (TypeError, ValueError):
+            seconds = 0
+        if not 0 < seconds <= self.MAX_REPORT_DURATION_SEC:
+            raise ProjRedfishError(
+                ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR,
+                f"{name} must be an ISO 8601 duration between PT1S and P1D, got {duration}",
+            )
+        return seconds
+
+    def _normalize_report_definition(self, body: dict, current: dict = None) -> dict:
+        """
+        驗證 POST/PATCH 的內容，與目前的定義合併後回傳正規化的 Redfish 內容
+        :raise ProjRedfishError:
+        """
+        body = {key: value for key, value in body.items() if not key.startswith("@odata")}
+        unknown = sorted(set(body) - set(self.REPORT_DEFINITION_PROPERTIES))
+        if unknown:
+            raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_UNKNOWN, f"Unsupported properties: {unknown}")
+        settings = {**(current or {}), **body}
+
+        definition_id = settings.get("Id")
+        if not isinstance(definition_id, str) or not self.REPORT_DEFINITION_ID_PATTERN.match(definition_id) \
+                or f"{definition_id}_".startswith(self.REPORT_ID_PREFIX):
+            # NewReport 的報告 Id 為 "<Id>_<timestamp>"，不可與取樣報告的 CDU_Report_<timestamp> 重疊
+            raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR, f"Invalid Id: {definition_id}")
+        settings.setdefault("Name", definition_id)
+        settings.setdefault("MetricReportDefinitionType", RfMetricReportDefinitionType.Periodic.value)
+        settings.setdefault("MetricReportDefinitionEnabled", True)
+        settings.setdefault("ReportActions", [RfReportActionsEnum.LogToMetricReportsCollection.value])
+        settings.setdefault("ReportUpdates", RfReportUpdatesEnum.AppendWrapsWhenFull.value)
+        settings.setdefault("AppendLimit", self.DEFAULT_APPEND_LIMIT)
+
+        if settings["MetricReportDefinitionType"] != RfMetricReportDefinitionType.Periodic.value:
+            raise ProjRedfishError(
+                ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR, "Only Periodic MetricReportDefinitionType is supported"
+            )
+        if not isinstance(settings["MetricReportDefinitionEnabled"], bool):
+            raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_VALUE_TYPE_ERROR, "MetricReportDefinitionEnabled must be a boolean")
+        if settings["ReportActions"] != [RfReportActionsEnum.LogToMetricReportsCollection.value]:
+            raise ProjRedfishError(
+                ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR, "Only LogToMetricReportsCollection ReportActions is supported"
+            )
+        if settings["ReportUpdates"] not in [e.value for e in RfReportUpdatesEnum]:
+            raise ProjRedfishError(
+                ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR,
+                f"ReportUpdates must be one of {[e.value for e in RfReportUpdatesEnum]}",
+            )
+        append_limit = settings["AppendLimit"]
+        if isinstance(append_limit, bool) or not isinstance(append_limit, int) \
+                or not 0 < append_limit <= MetricReportEngine.MAX_APPEND_LIMIT:
+            raise ProjRedfishError(
+                ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR,
+                f"AppendLimit must be an integer between 1 and {MetricReportEngine.MAX_APPEND_LIMIT}",
+            )
+        schedule = settings.get("Schedule")
+        if not isinstance(schedule, dict) or "RecurrenceInterval" not in schedule:
+            raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_MISSING, "Schedule.RecurrenceInterval is required")
+        self._parse_report_duration("RecurrenceInterval", schedule["RecurrenceInterval"])
+        settings["Schedule"] = {"RecurrenceInterval": schedule["RecurrenceInterval"]}
+
+        _, metric_dicts = self.load_metric_definitions()
+        numeric_fields = set(self.get_all_numeric_fields())
+        metrics = settings.get("Metrics")
+        if not isinstance(metrics, list) or not metrics:
+            raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_MISSING, "Metrics must be a non-empty list")
+        normalized_metrics = []
+        for metric in metrics:
+            metric_id = metric.get("MetricId") if isinstance(metric, dict) else None
+            if metric_id not in metric_dicts or metric_id == "time":
+                raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR, f"Unknown MetricId: {metric_id}")
+            normalized = {"MetricId": metric_id}
+            function = metric.get("CollectionFunction")
+            if function is not None:
+                if function not in [e.value for e in RfCalculationAlgorithmEnum]:
+                    raise ProjRedfishError(
+                        ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR,
+                        f"CollectionFunction must be one of {[e.value for e in RfCalculationAlgorithmEnum]}",
+                    )
+                if metric_id not in numeric_fields:
+                    raise ProjRedfishError(
+                        ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR, f"CollectionFunction is not supported for {metric_id}"
+                    )
+                normalized["CollectionFunction"] = function
+            if metric.get("CollectionDuration") is not None:
+                self._parse_report_duration("CollectionDuration", metric["CollectionDuration"])
+                normalized["CollectionDuration"] = metric["CollectionDuration"]
+            normalized_metrics.append(normalized)
+        settings["Metrics"] = normalized_metrics
+        return settings
+
+    def _build_report_definition(self, settings: dict) -> ReportDefinition:
+        """由正規化的 Redfish 內容建立排程用的定義"""
+        _, metric_dicts = self.load_metric_definitions()
+        metrics = []
+        for metric in settings["Metrics"]:
+            metric_id = metric["MetricId"]
+            if metric_id not in metric_dicts:
+                continue
+            metrics.append(ReportMetric(
+                metric_id=metric_id,
+                column=metric_dicts[metric_id].get("Alias") or metric_id,
+                function=metric.get("CollectionFunction"),
+                duration_sec=self.parse_iso_duration_to_seconds(metric["CollectionDuration"]) if metric.get("CollectionDuration") else None,
+            ))
+        return ReportDefinition(
+            id=settings["Id"],
+            name=settings["Name"],
+            metrics=tuple(metrics),
+            recurrence_sec=self.parse_iso_duration_to_seconds(settings["Schedule"]["RecurrenceInterval"]),
+            report_updates=settings["ReportUpdates"],
+            append_limit=settings["AppendLimit"],
+            enabled=settings["MetricReportDefinitionEnabled"],
+            settings=settings,
+        )
+
     def fetch_TelemetryService_MetricReportDefinitions(
         self, metric_report_definition_id=None
     ) -> dict:
         """ """
-
-        metrics, metric_dicts = self.load_metric_definitions()
+        engine = self._get_metric_report_engine()
 
         if metric_report_definition_id == None:
             m = RfMetricReportDefinitionCollectionModel()
 
-            m.Members.append(
-                {"@odata.id": "/redfish/v1/TelemetryService/MetricReportDefinitions/1"}
-            )
+            for definition in engine.definitions():
+                m.Members.append(
+                    {"@odata.id": f"/redfish/v1/TelemetryService/MetricReportDefinitions/{definition.id}"}
+                )
 
             m.odata_context = "/redfish/v1/$metadata#MetricReportDefinitionCollection.MetricReportDefinitionCollection"
             m.odata_id = "/redfish/v1/TelemetryService/MetricReportDefinitions"
@@ -281,47 +587,353 @@ class RfTelemetryService(BaseService):
             m.Members_odata_count = len(m.Members)
             return m.to_dict()
         else:
-            if metric_report_definition_id != "1":
+            definition = engine.get_definition(metric_report_definition_id)
+            if definition is None:
                 raise ProjRedfishError(
                     ProjRedfishErrorCode.RESOURCE_NOT_FOUND,
                     f"MetricReportDefinition, {metric_report_definition_id}, not found",
                 )
+            settings = definition.settings
 
             m = RfMetricReportDefinitionModel()
             m.Metrics = []
-
-            for metric in metrics:
-                ## Warning: PydanticSerializationUnexpectedValue(Expected `RfMetric` - serialized value may not be as expected [input_value={'@odata.id': '/redfish/v...MetricDefinitions/time'}, input_type=dict])
-                # m.Metrics.append(
-                #     {
-                #         "@odata.id": f"/redfish/v1/TelemetryService/MetricDefinitions/{metric['FieldName']}"
-                #     }
-                # )
-
-                metric_model = RfMetric()
-                metric_model.MetricId = metric["FieldName"]
+            for metric in settings["Metrics"]:
+                metric_model = RfMetric(
+                    MetricId=metric["MetricId"],
+                    CollectionFunction=metric.get("CollectionFunction"),
+                    CollectionDuration=metric.get("CollectionDuration"),
+                )
                 metric_model.Oem = {
-                    "@odata.id": f"/redfish/v1/TelemetryService/MetricDefinitions/{metric['FieldName']}",
-                    # "Units": metric['Units']
+                    "@odata.id": f"/redfish/v1/TelemetryService/MetricDefinitions/{metric['MetricId']}",
                 }
                 m.Metrics.append(metric_model)
 
             m.odata_context = (
                 "/redfish/v1/$metadata#MetricReportDefinition.MetricReportDefinition"
             )
-            m.odata_id = "/redfish/v1/TelemetryService/MetricReportDefinitions/1"
+            m.odata_id = f"/redfish/v1/TelemetryService/MetricReportDefinitions/{definition.id}"
             m.odata_type = "#MetricReportDefinition.v1_0_0.MetricReportDefinition"
-            m.Id = "1"  # metric_report_definition_id
-            m.Name = "Periodic Reort"
-            m.MetricReportDefinitionType = RfMetricReportDefinitionType.Periodic
-            m.Schedule = {
-                "RecurrenceInterval": "PT3M"  # ISO 8601 duration format for 3 minutes
-            }
-            m.ReportActions = [RfReportActionsEnum.LogToMetricReportsCollection]
-            m.ReportUpdates = RfReportUpdatesEnum.AppendWrapsWhenFull
+            m.Id = definition.id
+            m.Name = definition.name
+            m.Description = settings.get("Description")
+            m.MetricReportDefinitionType = RfMetricReportDefinitionType(settings["MetricReportDefinitionType"])
+            m.MetricReportDefinitionEnabled = settings["MetricReportDefinitionEnabled"]
+            m.Schedule = settings["Schedule"]
+            m.ReportActions = [RfReportActionsEnum(action) for action in settings["ReportActions"]]
+            m.ReportUpdates = RfReportUpdatesEnum(settings["ReportUpdates"])
+            m.AppendLimit = settings["AppendLimit"]
+            m.Status = RfStatusModel(State="Enabled" if definition.enabled else "Disabled", Health="OK")
 
             return m.to_dict()
 
+    def post_TelemetryService_MetricReportDefinitions(self, body: dict) -> tuple:
+        """
+        新增 MetricReportDefinition，Id 未指定時自動產生
+        :return: (定義內容, 201, {"Location": ...})
+        """
+        engine = self._get_metric_report_engine()
+        body = dict(body)
+        if "Id" not in body:
+            existing_ids = {definition.id for definition in engine.definitions()}
+            body["Id"] = next(str(i) for i in range(1, len(existing_ids) + 2) if str(i) not in existing_ids)
+        if engine.get_definition(body["Id"]) is not None:
+            raise ProjRedfishError(
+                ProjRedfishErrorCode.RESOURCE_ALREADY_EXISTS, f"MetricReportDefinition, {body['Id']}, already exists"
+            )
+        settings = self._normalize_report_definition(body)
+        try:
+            engine.upsert(self._build_report_definition(settings))
+        except ValueError as e:
+            raise ProjRedfishError(ProjRedfishErrorCode.CREATE_LIMIT_REACHED_FOR_RESOURCE, str(e))
+        if not MetricReportDefinitionSettingModel.save(settings["Id"], settings):
+            engine.remove(settings["Id"])
+            raise ProjRedfishError(ProjRedfishErrorCode.INTERNAL_ERROR, "Failed to save MetricReportDefinition")
+        output = self.fetch_TelemetryService_MetricReportDefinitions(settings["Id"])
+        return output, HTTPStatus.CREATED, {"Location": output["@odata.id"]}
+
+    def patch_TelemetryService_MetricReportDefinitions(self, metric_report_definition_id: str, body: dict) -> dict:
+        """修改 MetricReportDefinition (已產生的報告會清除)"""
+        engine = self._get_metric_report_engine()
+        definition = engine.get_definition(metric_report_definition_id)
+        if definition is None:
+            raise ProjRedfishError(
+                ProjRedfishErrorCode.RESOURCE_NOT_FOUND,
+                f"MetricReportDefinition, {metric_report_definition_id}, not found",
+            )
+        if body.get("Id", metric_report_definition_id) != metric_report_definition_id:
+            raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR, "Id cannot be changed")
+        settings = self._normalize_report_definition(body, current=definition.settings)
+        if not MetricReportDefinitionSettingModel.save(metric_report_definition_id, settings):
+            raise ProjRedfishError(ProjRedfishErrorCode.INTERNAL_ERROR, "Failed to save MetricReportDefinition")
+        engine.upsert(self._build_report_definition(settings))
+        return self.fetch_TelemetryService_MetricReportDefinitions(metric_report_definition_id)
+
+    def delete_TelemetryService_MetricReportDefinitions(self, metric_report_definition_id: str) -> tuple:
+        """刪除 MetricReportDefinition 與其報告 (內建的定義 "1" 不能刪除)"""
+        engine = self._get_metric_report_engine()
+        if engine.get_definition(metric_report_definition_id) is None:
+            raise ProjRedfishError(
+                ProjRedfishErrorCode.RESOURCE_NOT_FOUND,
+                f"MetricReportDefinition, {metric_report_definition_id}, not found",
+            )
+        if metric_report_definition_id == self.BUILTIN_REPORT_DEFINITION_ID:
+            raise ProjRedfishError(
+                ProjRedfishErrorCode.ACTION_NOT_SUPPORTED,
+                f"MetricReportDefinition, {metric_report_definition_id}, is built-in and cannot be deleted",
+            )
+        MetricReportDefinitionSettingModel.delete(metric_report_definition_id)
+        engine.remove(metric_report_definition_id)
+        return "", HTTPStatus.NO_CONTENT
+
+    # --- Triggers ---
+
+    def start_trigger_engine(self):
+        """
+        app 啟動時呼叫: 載入資料庫中的 Trigger，有定義時開始評估 (不必等到第一次存取 Triggers)
+        @note 需要 app context (讀取資料庫中的定義)
+        """
+        self._get_trigger_engine()
+
+    def _get_trigger_engine(self) -> TriggerEngine:
+        """
+        載入資料庫中的 Trigger (只在第一次呼叫時載入)，有定義時訂閱 sensor snapshot
+        """
+        cls = self.__class__
+        engine = TriggerEngine.get_instance()
+        if not cls._triggers_loaded:
+            with cls._triggers_lock:
+                if not cls._triggers_loaded:
+                    try:
+                        rows = TriggerSettingModel.all()
+                    except Exception as e:
+                        print(f"Failed to load Triggers: {e}")
+                        rows = []
+                    for row in rows:
+                        try:
+                            engine.upsert(self._build_trigger_definition(dict(row.Settings)))
+                        except (ValueError, ProjRedfishError) as e:
+                            print(f"Skip Trigger {row.Id}: {e}")
+                    cls._triggers_loaded = True
+        if engine.definitions():
+            engine.start()
+        return engine
+
+    def _normalize_trigger(self, body: dict, current: dict = None) -> dict:
+        """
+        驗證 POST/PATCH 的內容，與目前的定義合併後回傳正規化的 Redfish 內容
+        :raise ProjRedfishError:
+        """
+        body = {key: value for key, value in body.items() if not key.startswith("@odata")}
+        unknown = sorted(set(body) - set(self.TRIGGER_PROPERTIES))
+        if unknown:
+            raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_UNKNOWN, f"Unsupported properties: {unknown}")
+        settings = {**(current or {}), **body}
+        if current and isinstance(body.get("NumericThresholds"), dict):
+            # PATCH 只修改有指定的門檻與其中的屬性，其他門檻保留 (停用門檻請設定 Activation: Disabled)
+            thresholds = {level: dict(threshold) for level, threshold in (current.get("NumericThresholds") or {}).items()}
+            for level, threshold in body["NumericThresholds"].items():
+                if isinstance(threshold, dict) and level in thresholds:
+                    thresholds[level].update(threshold)
+                else:
+                    thresholds[level] = threshold
+            settings["NumericThresholds"] = thresholds
+
+        trigger_id = settings.get("Id")
+        if not isinstance(trigger_id, str) or not self.REPORT_DEFINITION_ID_PATTERN.match(trigger_id):
+            raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR, f"Invalid Id: {trigger_id}")
+        settings.setdefault("Name", trigger_id)
+        settings.setdefault("MetricType", RfMetricTypeEnum.Numeric.value)
+        settings.setdefault("TriggerActions", [RfTriggerActionEnum.RedfishEvent.value])
+        settings.setdefault("TriggerEnabled", True)
+
+        if settings["MetricType"] != RfMetricTypeEnum.Numeric.value:
+            raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR, "Only Numeric MetricType is supported")
+        if settings["TriggerActions"] != [RfTriggerActionEnum.RedfishEvent.value]:
+            raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR, "Only RedfishEvent TriggerActions is supported")
+        if not isinstance(settings["TriggerEnabled"], bool):
+            raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_VALUE_TYPE_ERROR, "TriggerEnabled must be a boolean")
+
+        metric_properties = settings.get("MetricProperties")
+        if not isinstance(metric_properties, list) or not metric_properties:
+            raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_MISSING, "MetricProperties must be a non-empty list")
+        catalog = SensorCatalog.get_instance()
+        for metric_property in metric_properties:
+            match = self.TRIGGER_METRIC_PROPERTY_PATTERN.match(metric_property) if isinstance(metric_property, str) else None
+            if match is None or not catalog.has_sensor(match.group(1)):
+                raise ProjRedfishError(
+                    ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR,
+                    f"MetricProperties must reference a sensor reading (/redfish/v1/Chassis/<id>/Sensors/<id>/Reading), got {metric_property}",
+                )
+
+        thresholds = settings.get("NumericThresholds")
+        if not isinstance(thresholds, dict) or not thresholds:
+            raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_MISSING, "NumericThresholds is required")
+        normalized_thresholds = {}
+        for level, threshold in thresholds.items():
+            if level not in TriggerEngine.LEVELS:
+                raise ProjRedfishError(
+                    ProjRedfishErrorCode.PROPERTY_UNKNOWN,
+                    f"NumericThresholds must be one of {list(TriggerEngine.LEVELS)}, got {level}",
+                )
+            reading = threshold.get("Reading") if isinstance(threshold, dict) else None
+            if isinstance(reading, bool) or not isinstance(reading, (int, float)):
+                raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_VALUE_TYPE_ERROR, f"{level}.Reading must be a number")
+            direction = TriggerEngine.LEVELS[level][0]
+            default_activation = RfThresholdActivation.Increasing if direction > 0 else RfThresholdActivation.Decreasing
+            activation = threshold.get("Activation", default_activation.value)
+            if activation not in (default_activation.value, RfThresholdActivation.Either.value, RfThresholdActivation.Disabled.value):
+                raise ProjRedfishError(
+                    ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR,
+                    f"{level}.Activation must be {default_activation.value}, Either or Disabled",
+                )
+            normalized = {"Reading": reading, "Activation": activation}
+            if threshold.get("DwellTime") is not None:
+                try:
+                    dwell_sec = self.parse_iso_duration_to_seconds(threshold["DwellTime"])
+                except (TypeError, ValueError):
+                    dwell_sec = -1
+                if not 0 <= dwell_sec <= self.MAX_REPORT_DURATION_SEC:
+                    raise ProjRedfishError(
+                        ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR,
+                        f"{level}.DwellTime must be an ISO 8601 duration up to P1D, got {threshold['DwellTime']}",
+                    )
+                normalized["DwellTime"] = threshold["DwellTime"]
+            hysteresis = threshold.get("HysteresisReading")
+            if hysteresis is not None:
+                if isinstance(hysteresis, bool) or not isinstance(hysteresis, (int, float)) or hysteresis < 0:
+                    raise ProjRedfishError(
+                        ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR, f"{level}.HysteresisReading must be a non-negative number"
+                    )
+                normalized["HysteresisReading"] = hysteresis
+            normalized_thresholds[level] = normalized
+        settings["NumericThresholds"] = normalized_thresholds
+        return settings
+
+    def _build_trigger_definition(self, settings: dict) -> TriggerDefinition:
+        """由正規化的 Redfish 內容建立評估用的定義 (Activation 為 Disabled 的門檻不評估)"""
+        metrics = tuple(
+            TriggerMetric(metric_property, self.TRIGGER_METRIC_PROPERTY_PATTERN.match(metric_property).group(1))
+            for metric_property in settings["MetricProperties"]
+        )
+        thresholds = tuple(
+            TriggerThreshold(
+                level=level,
+                reading=float(threshold["Reading"]),
+                dwell_sec=self.parse_iso_duration_to_seconds(threshold["DwellTime"]) if threshold.get("DwellTime") else 0,
+                hysteresis=float(threshold.get("HysteresisReading") or 0),
+                activation=threshold["Activation"],
+            )
+            for level, threshold in settings["NumericThresholds"].items()
+            if threshold["Activation"] != RfThresholdActivation.Disabled.value
+        )
+        return TriggerDefinition(
+            id=settings["Id"],
+            name=settings["Name"],
+            metrics=metrics,
+            thresholds=thresholds,
+            enabled=settings["TriggerEnabled"],
+            settings=settings,
+        )
+
+    def fetch_TelemetryService_Triggers(self, trigger_id=None) -> dict:
+        """
+        @note Oem.Supermicro 列出目前觸發中的門檻與最近的事件
+        """
+        engine = self._get_trigger_engine()
+
+        if trigger_id == None:
+            m = RfTriggersCollectionModel()
+            for definition in engine.definitions():
+                m.Members.append({"@odata.id": f"/redfish/v1/TelemetryService/Triggers/{definition.id}"})
+            m.odata_context = "/redfish/v1/$metadata#TriggersCollection.TriggersCollection"
+            m.odata_id = "/redfish/v1/TelemetryService/Triggers"
+            m.odata_type = "#TriggersCollection.TriggersCollection"
+            m.Name = "Triggers Collection"
+            m.Members_odata_count = len(m.Members)
+            return m.to_dict()
+
+        definition = engine.get_definition(trigger_id)
+        if definition is None:
+            raise ProjRedfishError(ProjRedfishErrorCode.RESOURCE_NOT_FOUND, f"Trigger, {trigger_id}, not found")
+        settings = definition.settings
+
+        m = RfTriggersModel()
+        m.odata_context = "/redfish/v1/$metadata#Triggers.Triggers"
+        m.odata_id = f"/redfish/v1/TelemetryService/Triggers/{definition.id}"
+        m.odata_type = "#Triggers.v1_4_0.Triggers"
+        m.Id = definition.id
+        m.Name = definition.name
+        m.Description = settings.get("Description")
+        m.MetricType = RfMetricTypeEnum(settings["MetricType"])
+        m.TriggerActions = [RfTriggerActionEnum(action) for action in settings["TriggerActions"]]
+        m.TriggerEnabled = settings["TriggerEnabled"]
+        m.MetricProperties = list(settings["MetricProperties"])
+        m.NumericThresholds = RfThresholds(**{
+            level: RfThreshold(**threshold) for level, threshold in settings["NumericThresholds"].items()
+        })
+        active_thresholds = engine.active_thresholds(definition.id)
+        m.Status = RfStatusModel(
+            State="Enabled" if definition.enabled else "Disabled",
+            Health=max(
+                (TriggerEngine.LEVELS[t["Threshold"]][1] for t in active_thresholds),
+                key=["OK", "Warning", "Critical"].index,
+                default="OK",
+            ),
+        )
+        m.Oem = {
+            "Supermicro": {
+                "ActiveThresholds": active_thresholds,
+                "Events": engine.events(definition.id, limit=self.TRIGGER_EVENTS_IN_RESOURCE),
+            }
+        }
+        return m.to_dict()
+
+    def post_TelemetryService_Triggers(self, body: dict) -> tuple:
+        """
+        新增 Trigger，Id 未指定時自動產生
+        :return: (Trigger 內容, 201, {"Location": ...})
+        """
+        engine = self._get_trigger_engine()
+        body = dict(body)
+        if "Id" not in body:
+            existing_ids = {definition.id for definition in engine.definitions()}
+            body["Id"] = next(str(i) for i in range(1, len(existing_ids) + 2) if str(i) not in existing_ids)
+        if engine.get_definition(body["Id"]) is not None:
+            raise ProjRedfishError(ProjRedfishErrorCode.RESOURCE_ALREADY_EXISTS, f"Trigger, {body['Id']}, already exists")
+        settings = self._normalize_trigger(body)
+        try:
+            engine.upsert(self._build_trigger_definition(settings))
+        except ValueError as e:
+            raise ProjRedfishError(ProjRedfishErrorCode.CREATE_LIMIT_REACHED_FOR_RESOURCE, str(e))
+        if not TriggerSettingModel.save(settings["Id"], settings):
+            engine.remove(settings["Id"])
+            raise ProjRedfishError(ProjRedfishErrorCode.INTERNAL_ERROR, "Failed to save Trigger")
+        engine.start()
+        output = self.fetch_TelemetryService_Triggers(settings["Id"])
+        return output, HTTPStatus.CREATED, {"Location": output["@odata.id"]}
+
+    def patch_TelemetryService_Triggers(self, trigger_id: str, body: dict) -> dict:
+        """修改 Trigger (門檻未變的部分保留目前的觸發狀態)"""
+        engine = self._get_trigger_engine()
+        definition = engine.get_definition(trigger_id)
+        if definition is None:
+            raise ProjRedfishError(ProjRedfishErrorCode.RESOURCE_NOT_FOUND, f"Trigger, {trigger_id}, not found")
+        if body.get("Id", trigger_id) != trigger_id:
+            raise ProjRedfishError(ProjRedfishErrorCode.PROPERTY_VALUE_FORMAT_ERROR, "Id cannot be changed")
+        settings = self._normalize_trigger(body, current=definition.settings)
+        if not TriggerSettingModel.save(trigger_id, settings):
+            raise ProjRedfishError(ProjRedfishErrorCode.INTERNAL_ERROR, "Failed to save Trigger")
+        engine.upsert(self._build_trigger_definition(settings))
+        return self.fetch_TelemetryService_Triggers(trigger_id)
+
+    def delete_TelemetryService_Triggers(self, trigger_id: str) -> tuple:
+        engine = self._get_trigger_engine()
+        if engine.get_definition(trigger_id) is None:
+            raise ProjRedfishError(ProjRedfishErrorCode.RESOURCE_NOT_FOUND, f"Trigger, {trigger_id}, not found")
+        TriggerSettingModel.delete(trigger_id)
+        engine.remove(trigger_id)
+        return "", HTTPStatus.NO_CONTENT
+
     def parse_iso_duration_to_seconds(self, duration: str) -> int:
         """
         Args:
@@ -366,23 +978,190 @@ class RfTelemetryService(BaseService):
             print("field_name: ", field_name)
             metric_data_type = metric.get("MetricDataType", "").lower()
             
-            if (field_name and field_name not in excluded_fields and metric_data_type in ['Integer','Decimal']):
+            if (field_name and field_name not in excluded_fields and metric_data_type in ['integer', 'decimal']):
                 numeric_field_names.append(field_name)
         
         return numeric_field_names
 
-    def get_sensor_statistics(self, queries: list[dict], mode: str = "recent", end_time: Optional[datetime] = None) -> dict:
-        
+    @classmethod
+    def invalidate_calculation_time_intervals(cls):
+        """CalculationTimeInterval 設定改變後呼叫，下一次查詢重新讀取設定"""
+        cls._calculation_time_intervals_cache.clear()
+
+    def _get_statistics_engine_config(self) -> dict:
+        """
+        :return: {(field, duration): (歷史資料的欄位名稱, 秒數)}，來自 CalculationTimeInterval 設定
+        """
+        config = self._calculation_time_intervals_cache.get("config")
+        if config is not None:
+            return config
+        try:
+            settings = [
+                s for s in TelemetryServiceModel.all()
+                if s.resource == self.STATISTICS_RESOURCE and s.property == "CalculationTimeInterval"
+            ]
+        except Exception as e:
+            print(f"Failed to load CalculationTimeInterval settings: {e}")
+            settings = []
+        numeric_fields = set(self.get_all_numeric_fields())
+        _, metric_dicts = self.load_metric_definitions()
+        config = {}
+        for setting in settings:
+            try:
+                seconds = self.parse_iso_duration_to_seconds(setting.value)
+            except ValueError:
+                continue
+            if setting.metric_id in numeric_fields and 0 < seconds <= self.STATISTICS_RAW_MAX_DURATION_SEC:
+                column_name = metric_dicts[setting.metric_id].get("Alias") or setting.metric_id
+                config[(setting.metric_id, setting.value)] = (column_name, seconds)
+        self._calculation_time_intervals_cache["config"] = config
+        return config
+
+    def _get_sensor_statistics_from_engine(self, queries: list[dict], end_time: datetime) -> Optional[list]:
+        """
+        以 SensorStatisticsEngine 的滑動視窗回答 "recent" 統計值 (O(1)，不查資料庫)
+        :return: 統計結果；有未追蹤的 (field, duration) 或資料尚未涵蓋視窗時回傳 None
+        """
+        engine = SensorStatisticsEngine.get_instance()
+        engine.configure(self._get_statistics_engine_config())
+        if not all(engine.is_tracked(field, query.get("duration", "PT10S")) for query in queries for field in query["fields"]):
+            return None
+        engine.sync(SensorCsvAdapter.get_sensor_history_store())
+        end_ts = to_epoch_seconds(end_time)
+        result = []
+        try:
+            for query in queries:
+                duration = query.get("duration", "PT10S")
+                for field in query["fields"]:
+                    for stat in query["stats"]:
+                        stat_value = engine.get(field, duration, stat, end_ts)
+                        if stat_value is not None:
+                            result.append({
+                                "resource": self.STATISTICS_RESOURCE,
+                                "metric_id": field,
+                                "property": f"{stat}_{duration}",
+                                "value": str(float(round(stat_value, 2)))
+                            })
+        except KeyError:
+            return None
+        return result
+
+    def _get_sensor_statistics_from_history(
+        self, queries: list[dict], duration_time_intervals: dict, max_time_interval: int, end_time: datetime
+    ) -> Optional[list]:
+        """
+        以 SensorHistoryStore 計算 "recent" 統計值，輸出格式與 Postgres 查詢相同
+        :return: 統計結果；歷史資料未涵蓋整個時間區間時回傳 None (改查 Postgres)
+        """
+        store = SensorCsvAdapter.get_sensor_history_store()
+        end_ts = to_epoch_seconds(end_time)
+        first_ts = store.first_timestamp()
+        if first_ts is None or first_ts > end_ts - max_time_interval:
+            return None
+
+        _, metric_dicts = self.load_metric_definitions()
+        result = []
+        with store.lock:
+            for query in queries:
+                duration = query.get("duration", "PT10S")
+                lo, hi = store.time_range(end_ts - duration_time_intervals[duration], end_ts)
+                for field in query["fields"]:
+                    column_name = metric_dicts[field].get("Alias") or field
+                    for stat in query["stats"]:
+                        stat_value = store.aggregate(column_name, stat, lo, hi)
+                        if stat_value is not None:
+                            result.append({
+                                "resource": "SensorStatistics",
+                                "metric_id": field,
+                                "property": f"{stat}_{duration}",
+                                "value": str(float(round(stat_value, 2)))
+                            })
+        return result
+
+    def _get_aligned_statistics_from_history(self, aligned_query: SensorAlignedQuery, end_time: datetime) -> Optional[list]:
+        """
+        以 SensorHistoryStore 計算 "aligned" 模式的各 bucket，輸出格式與 Postgres 查詢相同
+        :return: series；歷史資料未涵蓋第一個 bucket 時回傳 None (改查 Postgres)
+        """
+        store = SensorCsvAdapter.get_sensor_history_store()
+        end_ts = to_epoch_seconds(end_time)
+        start_ts_list = [aligned_query.bucket_range(seconds, end_ts)[0] for seconds in aligned_query.duration_seconds]
+        first_ts = store.first_timestamp()
+        if first_ts is None or first_ts > min(start_ts_list):
+            return None
+
+        _, metric_dicts = self.load_metric_definitions()
+        series = []
+        with store.lock:
+            for duration, seconds, start_ts in zip(aligned_query.durations, aligned_query.duration_seconds, start_ts_list):
+                aggregates = aligned_query.duration_aggregates(duration)
+                buckets = []
+                for i in range(aligned_query.bucket_count(seconds)):
+                    bucket_ts = start_ts + i * seconds
+                    lo, hi = store.time_range(bucket_ts, min(bucket_ts + seconds, end_ts))
+                    values = [
+                        (field, stat, store.aggregate(metric_dicts[field].get("Alias") or field, stat, lo, hi))
+                        for field, stat in aggregates
+                    ]
+                    buckets.append(aligned_query.build_bucket(bucket_ts, seconds, duration, values))
+                series.append({"duration": duration, "buckets": buckets})
+        return series
+
+    def _get_aligned_sensor_statistics(
+        self, queries: list[dict], duration_time_intervals: dict, window: str, end_time: datetime
+    ) -> dict:
+        """
+        "aligned" 模式: 優先由 SensorHistoryStore 計算，否則每個 duration 一個 date_bin SQL (合併彙總表與原始資料)
+        """
+        window_sec = self.parse_iso_duration_to_seconds(window)
+        if window_sec <= 0:
+            raise ValueError(f"Window {window} must be positive")
+        if window_sec > self.STATISTICS_MAX_DURATION_SEC:
+            raise ValueError(f"Window {window} must not exceed {self.STATISTICS_MAX_DURATION_SEC} seconds")
+        aligned_query = SensorAlignedQuery(
+            SensorRollup.from_metric_definitions(self.load_metric_definitions()[0]), queries, duration_time_intervals, window_sec
+        )
+
+        series = self._get_aligned_statistics_from_history(aligned_query, end_time)
+        if series is None:
+            try:
+                with self.db.get_connection() as conn, conn.cursor() as cur:
+                    # 彙總表落後時 (ingest worker 未啟動或尚未追上)，之後的部份讀原始資料
+                    rollup_until = SensorPgIngestWorker.read_high_water(cur)
+                    rows_per_duration = []
+                    for statement, params in aligned_query.build_statements(end_time, rollup_until):
+                        cur.execute(statement, params)
+                        rows_per_duration.append(cur.fetchall())
+            except Exception as e:
+                raise ValueError(f"Database query failed: {str(e)}")
+            series = aligned_query.map_series(rows_per_duration, end_time)
+        return {"window": window, "end_time": end_time.isoformat(), "series": series}
+
+    def get_sensor_statistics(
+        self, queries: list[dict], mode: str = "recent", end_time: Optional[datetime] = None, window: str = "PT1H"
+    ) -> dict:
+        """
+        :param queries: [{"duration": "PT30S", "fields": [...], "stats": [...]}]
+        :param mode: "recent": 每個 duration 計算 end_time 之前 duration 內的統計值
+                     "aligned": 把 end_time 之前 window 內的資料切成對齊 UTC 的 bucket (寬度為 duration)，每個 bucket 各自計算
+        :param window: aligned 模式的總時間範圍
+        :return: recent: [{"resource", "metric_id", "property", "value"}]
+                 aligned: {"window", "end_time", "series": [{"duration", "buckets": [{"start_time", "end_time", "values": [...]}]}]}
+        """
         if not queries:
             raise ValueError("At least one query configuration is required")
             
+        is_now = end_time is None
         if end_time is None:
             end_time = datetime.now(timezone.utc)
         
         self.db = PostgresAdapter(dbname=os.getenv("PROJ_NAME", "").replace("-", "_"))
+        if SensorPgIngestWorker.ENABLED:
+            # app 啟動時已啟動 (見 app.start_background_services)，這裡確保未經 app.py 啟動時也會寫入
+            SensorPgIngestWorker.get_instance().start()
         
-        if mode != "recent":
-            raise ValueError("Currently only 'recent' mode is supported")
+        if mode not in ("recent", "aligned"):
+            raise ValueError("mode must be one of ['recent', 'aligned']")
         
         all_numeric_fields = self.get_all_numeric_fields()
         if not all_numeric_fields:
@@ -404,8 +1183,8 @@ class RfTelemetryService(BaseService):
                 time_interval = self.parse_iso_duration_to_seconds(duration)
                 if time_interval <= 0:
                     raise ValueError(f"Duration {duration} must be positive")
-                if time_interval > 300:
-                    raise ValueError(f"Duration {duration} must not exceed 300 seconds (PT5M)")
+                if time_interval > self.STATISTICS_MAX_DURATION_SEC:
+                    raise ValueError(f"Duration {duration} must not exceed {self.STATISTICS_MAX_DURATION_SEC} seconds")
                 duration_time_intervals[duration] = time_interval
                 max_time_interval = max(max_time_interval, time_interval)
             
@@ -422,181 +1201,49 @@ class RfTelemetryService(BaseService):
                 except ValueError:
                     valid_algorithms = [e.value for e in RfCalculationAlgorithmEnum]
                     raise ValueError(f"stat_type must be one of {valid_algorithms}")
-                
-        params = {"end_time": end_time, "max_time_interval": max_time_interval}
-                
-        subquery_columns = []
-        result_mapping = []
-        
-        for query in queries:
-            duration = query.get("duration", "PT10S")
-            fields = query.get("fields", [])
-            stats = query["stats"]
-            time_interval = duration_time_intervals[duration]
-            
-            for field in fields:
-                for stat in stats:
-                    if stat == "Average":
-                        subquery = f"""
-                        (SELECT ROUND(AVG({field})::numeric, 2) 
-                        FROM data_source 
-                        WHERE "time"::timestamptz >= (%(end_time)s::timestamptz - INTERVAL '{time_interval} seconds')) 
-                        as {field}_{stat.lower()}_{duration}"""
-                        
-                    elif stat == "Maximum":
-                        subquery = f"""
-                        (SELECT ROUND(MAX({field})::numeric, 2) 
-                        FROM data_source 
-                        WHERE "time"::timestamptz >= (%(end_time)s::timestamptz - INTERVAL '{time_interval} seconds')) 
-                        as {field}_{stat.lower()}_{duration}"""
-                        
-                    elif stat == "Minimum":
-                        subquery = f"""
-                        (SELECT ROUND(MIN({field})::numeric, 2) 
-                        FROM data_source 
-                        WHERE "time"::timestamptz >= (%(end_time)s::timestamptz - INTERVAL '{time_interval} seconds')) 
-                        as {field}_{stat.lower()}_{duration}"""
-                        
-                    elif stat == "Summation":
-                        subquery = f"""
-                        (SELECT ROUND(SUM({field})::numeric, 2) 
-                        FROM data_source 
-                        WHERE "time"::timestamptz >= (%(end_time)s::timestamptz - INTERVAL '{time_interval} seconds')) 
-                        as {field}_{stat.lower()}_{duration}"""
-                    
-                    subquery_columns.append(subquery)
-                    result_mapping.append({
-                        "field": field,
-                        "stat": stat,
-                        "duration": duration,
-                        "column_name": f"{field}_{stat.lower()}_{duration}"
-                    })
-        
-        sql = f"""
-        WITH data_source AS (
-            SELECT * 
-            FROM sensor_data 
-            WHERE "time"::timestamptz >= (%(end_time)s::timestamptz - INTERVAL '{max_time_interval} seconds')
-            AND "time"::timestamptz < %(end_time)s::timestamptz
-            ORDER BY "time" DESC 
-        )
-        SELECT 
-            {','.join(subquery_columns)}
-        """
-        
-        try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(sql, params)
-                    row = cur.fetchone()
-        except Exception as e:
-            raise ValueError(f"Database query failed: {str(e)}")
-        
-        result = []
-        
-        if row:
-            for i, mapping in enumerate(result_mapping):
-                stat_value = row[i]
-                if stat_value is not None:
-                    result.append({
-                        "resource": "SensorStatistics",
-                        "metric_id": mapping["field"],
-                        "property": f"{mapping['stat']}_{mapping['duration']}",
-                        "value": str(float(stat_value))
-                    })
+
+        if mode == "aligned":
+            return self._get_aligned_sensor_statistics(queries, duration_time_intervals, window, end_time)
+
+        # 最近的資料優先由串流計算的滑動視窗回答，其次由記憶體中的歷史資料計算
+        if is_now and max_time_interval <= self.STATISTICS_RAW_MAX_DURATION_SEC:
+            result = self._get_sensor_statistics_from_engine(queries, end_time)
+            if result is not None:
+                return result
+        result = self._get_sensor_statistics_from_history(queries, duration_time_intervals, max_time_interval, end_time)
+        if result is not None:
             return result
-        
-        """
-        else:  # aligned mode
-            query = queries[0]
-            duration = query["duration"]
-            fields = query["fields"]
-            stats = query["stats"]
-            time_interval = duration_time_intervals[duration]
-            
-            stat_columns = []
-            for field in fields:
-                for stat in stats:
-                    if stat == "Average":
-                        stat_columns.append(f"COALESCE(ROUND(AVG({field})::numeric, 2), 0) as avg_{field}")
-                    elif stat == "Maximum":
-                        stat_columns.append(f"COALESCE(ROUND(MAX({field})::numeric, 2), 0) as max_{field}")
-                    elif stat == "Minimum":
-                        stat_columns.append(f"COALESCE(ROUND(MIN({field})::numeric, 2), 0) as min_{field}")
-                    elif stat == "Summation":
-                        stat_columns.append(f"COALESCE(ROUND(SUM({field})::numeric, 2), 0) as sum_{field}")
-            
-            sql = f'''
-            WITH data_source AS (
-                SELECT * 
-                FROM sensor_data 
-                WHERE "time" < %(end_time)s::timestamptz
-            ),
-            data_time_range AS (
-                SELECT 
-                    MIN("time") as min_time,
-                    MAX("time") as max_time
-                FROM data_source
-            ),
-            time_buckets AS (
-                SELECT 
-                    generate_series(
-                        (SELECT min_time FROM data_time_range),
-                        (SELECT max_time FROM data_time_range),
-                        make_interval(secs => %(time_interval)s)
-                    ) AS bucket_start
-                LIMIT 2048
-            ),
-            bucket_ranges AS (
-                SELECT 
-                    bucket_start AS start_time,
-                    bucket_start + make_interval(secs => %(time_interval)s) AS end_time
-                FROM time_buckets
-            ),
-            filtered AS (
-                SELECT 
-                    bucket_ranges.start_time,
-                    bucket_ranges.end_time,
-                    data_source.*
-                FROM bucket_ranges
-                LEFT JOIN data_source ON data_source."time" >= bucket_ranges.start_time 
-                AND data_source."time" < bucket_ranges.end_time
+
+        if max_time_interval > self.STATISTICS_RAW_MAX_DURATION_SEC:
+            # 長區間: 合併彙總表 (1m/1h/1d) 與兩端的原始資料
+            rollup_query = SensorRollupQuery(
+                SensorRollup.from_metric_definitions(self.load_metric_definitions()[0]), queries, duration_time_intervals
             )
-            SELECT  
-                start_time, 
-                end_time, 
-                {", ".join(stat_columns)}
-            FROM filtered 
-            GROUP BY start_time, end_time 
-            ORDER BY start_time
-            LIMIT 2048;
-            '''
-
-            params["time_interval"] = int(time_interval)
             try:
-                with self.db.get_connection() as conn:
-                    with conn.cursor() as cur:
-                        cur.execute(sql, params)
-                        rows = cur.fetchall()
+                with self.db.get_connection() as conn, conn.cursor() as cur:
+                    # 彙總表落後時 (ingest worker 未啟動或尚未追上)，之後的部份讀原始資料
+                    rollup_until = SensorPgIngestWorker.read_high_water(cur)
+                    rows = []
+                    for statement, params in rollup_query.build_statements(end_time, rollup_until):
+                        cur.execute(statement, params)
+                        rows.append(cur.fetchone())
             except Exception as e:
                 raise ValueError(f"Database query failed: {str(e)}")
-            
-            buckets = []
-            for row in rows:
-                bucket = {
-                    "time": f"{row[0].strftime('%H:%M:%S')}-{row[1].strftime('%H:%M:%S')}"
-                }
-                data_index = 2
-                for field in fields:
-                    if len(stats) == 1:
-                        bucket[field] = float(row[data_index]) if row[data_index] is not None else 0.0
-                        data_index += 1
-                    else:
-                        bucket[field] = {}
-                        for stat in stats:
-                            bucket[field][stat] = float(row[data_index]) if row[data_index] is not None else 0.0
-                            data_index += 1
-                buckets.append(bucket)
-                
-            return {"buckets": buckets}
-        """
\ No newline at end of file
+            return rollup_query.map_rows(rows)
+
+        # 所有 (field x stat x duration) 在同一次掃描中以 FILTER 計算，SQL 以 prepared statement 重複使用
+        statistics_query = SensorStatisticsQuery(queries, duration_time_intervals)
+        try:
+            with self.db.get_connection() as conn:
+                with self.db.execute_prepared(
+                    conn,
+                    statistics_query.statement_name,
+                    statistics_query.statement,
+                    statistics_query.param_types,
+                    statistics_query.build_params(end_time),
+                ) as cur:
+                    row = cur.fetchone()
+        except Exception as e:
+            raise ValueError(f"Database query failed: {str(e)}")
+
+        return statistics_query.map_row(row)
@@ -0,0 +1,144 @@
+import os
+import time
+from typing import Any, Dict
+from mylib.utils.HttpRequestUtil import HttpRequestUtil
+from mylib.utils.SingleFlightCache import SingleFlightCache, single_flight_cached
+from mylib.utils.CircuitBreaker import CircuitBreaker, LastKnownGoodStore
+from mylib.utils.DataFreshnessUtil import DataFreshnessUtil
+from mylib.utils.system_info import get_system_uuid
+from mylib.common.proj_error import ProjRedfishError, ProjRedfishErrorCode
+
+"""
+韌體版本 / 身分資訊 (RestAPI /api/v1/cdu/components/display/version、系統 UUID) 的唯一讀取入口。
+版本資訊只有在更新韌體或重開機後才會改變，因此長時間 cache。
+UpdateService.SimpleUpdate、Managers reset 等動作只是送出 request，版本要等更新/重開機完成後才會改變，
+因此這些動作後呼叫 expect_change()，之後一段時間內改用短的 cache 時間，而不是只清除一次 cache
+(立即清除的話，下一次讀取會把舊版本再 cache 一小時)。
+
+@note 設定 (env)
+    VERSION_INFO_CACHE_TTL_SEC: cache 時間, 預設 3600 秒
+    VERSION_INFO_CHANGE_WINDOW_SEC: expect_change() 後使用短 cache 時間的期間, 預設 900 秒
+    VERSION_INFO_CHANGE_TTL_SEC: 上述期間內的 cache 時間, 預設 10 秒
+"""
+
+class VersionInfoService:
+    BREAKER_NAME = "RestAPI"
+
+    CHANGE_WINDOW_SEC = float(os.getenv("VERSION_INFO_CHANGE_WINDOW_SEC", 900))
+    CHANGE_TTL_SEC = float(os.getenv("VERSION_INFO_CHANGE_TTL_SEC", 10))
+
+    _cache = SingleFlightCache(maxsize=4, ttl=float(os.getenv("VERSION_INFO_CACHE_TTL_SEC", 3600)))
+    _uuid_cache = SingleFlightCache(maxsize=1, ttl=float(os.getenv("VERSION_INFO_CACHE_TTL_SEC", 3600)))
+    _last_known_good = LastKnownGoodStore()
+    _change_until = 0.0 # time.monotonic()
+    _change_refreshed_at = 0.0
+
+    @classmethod
+    def get_version_info(cls) -> Dict[str, Any]:
+        """
+        @note api response from /api/v1/cdu/components/display/version
+        "version": {
+            "WebUI": "0112",
+            "SCC_API": "0104",
+            "SNMP": "0103",
+            "Redfish_API": "0101",
+            "Redfish_Server": "0101",
+            "Modbus_Server": "0101",
+            "PLC": "0107D",
+            "Release_Time": "2025-02-21"
+        },
+        "fw_info": {
+            "SN": "130001",
+            "Model": "...",
+            "Version": "1",
+            "PartNumber": "LCS-SCDU-1K3LR001"
+        }
+        @note RestAPI 失敗或 circuit breaker 打開時，回應上一次成功的資料並標示為舊資料
+        """
+        cls._expire_if_changing()
+        try:
+            version_json = cls._fetch_version_info()
+            cls._last_known_good.put("version", version_json)
+            return version_json
+        except Exception as e:
+            last_known_good = cls._last_known_good.get("version")
+            if last_known_good is None:
+                raise e
+            version_json, age_sec = last_known_good
+            print(f"VersionInfoService get_version_info error, use last known good ({int(age_sec)}s ago): {e}")
+            DataFreshnessUtil.mark_stale("version", age_sec)
+            return version_json
+
+    @classmethod
+    def get_versions(cls) -> Dict[str, Any]:
+        """
+        :return: ex: {"WebUI": "0112", "PLC": "0107D", "Redfish_Server": "0101", ...}
+        """
+        return cls.get_version_info().get("version", {})
+
+    @classmethod
+    def get_fw_info(cls) -> Dict[str, Any]:
+        """
+        :return: ex: {"SN": "130001", "Model": "...", "Version": "1", "PartNumber": "..."}
+        """
+        return cls.get_version_info().get("fw_info", {})
+
+    @classmethod
+    def get_uuid(cls) -> str:
+        cls._expire_if_changing()
+        return cls._read_uuid()
+
+    @classmethod
+    @single_flight_cached(cache=_uuid_cache)
+    def _read_uuid(cls) -> str:
+        return get_system_uuid()
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """
+        清除 cache，下一次讀取會重新向 RestAPI 取得 (進行中的讀取結果不會寫入 cache)
+        """
+        cls._cache.invalidate()
+        cls._uuid_cache.invalidate()
+
+    @classmethod
+    def expect_change(cls) -> None:
+        """
+        版本資訊即將改變 (已送出韌體更新 / 重開機 / ResetToDefaults)
+        @note 清除 cache，並在之後 CHANGE_WINDOW_SEC 內每 CHANGE_TTL_SEC 重新讀取，直到更新/重開機完成
+        """
+        now = time.monotonic()
+        cls._change_until = now + cls.CHANGE_WINDOW_SEC
+        cls._change_refreshed_at = now
+        cls.invalidate()
+
+    @classmethod
+    def _expire_if_changing(cls) -> None:
+        now = time.monotonic()
+        if now < cls._change_until and now - cls._change_refreshed_at >= cls.CHANGE_TTL_SEC:
+            cls._change_refreshed_at = now
+            cls.invalidate()
+
+    @classmethod
+    def stats(cls) -> dict:
+        return cls._cache.stats()
+
+    @classmethod
+    @single_flight_cached(cache=_cache)
+    def _fetch_version_info(cls) -> Dict[str, Any]:
+        breaker = CircuitBreaker.get_instance(cls.BREAKER_NAME)
+        if not breaker.allow_request():
+            raise ProjRedfishError(
+                ProjRedfishErrorCode.SERVICE_TEMPORARILY_UNAVAILABLE,
+                f"{cls.BREAKER_NAME} is unavailable (circuit open)"
+            )
+        try:
+            url = f"{os.environ['ITG_REST_HOST']}/api/v1/cdu/components/display/version"
+            response = HttpRequestUtil.send_get(url)
+            response.raise_for_status()
+            version_json = response.json()
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return version_json
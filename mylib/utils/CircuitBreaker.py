@@ -0,0 +1,153 @@
+import os
+import time
+import threading
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple
+
+"""
+Circuit breaker：上游 (ex: RestAPI) 連續失敗達門檻後打開 (OPEN)，期間不再送 request，
+經過 reset timeout 後進入 HALF_OPEN 只放行一次試探，成功即關閉 (CLOSED)。
+
+@note 設定 (env)
+    RESTAPI_BREAKER_FAILURE_THRESHOLD: 連續失敗幾次打開, 預設 3
+    RESTAPI_BREAKER_RESET_TIMEOUT_SEC: 打開後多久允許試探, 預設 10 秒
+"""
+
+class CircuitBreakerState(str, Enum):
+    CLOSED = "Closed"
+    OPEN = "Open"
+    HALF_OPEN = "HalfOpen"
+
+
+class CircuitBreaker:
+    _instances: Dict[str, "CircuitBreaker"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout_sec: float = 10):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_sec = reset_timeout_sec
+        self._lock = threading.Lock()
+        self._state = CircuitBreakerState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_trial_running = False
+        self._stats = {"success": 0, "failure": 0, "rejected": 0, "opened": 0}
+
+    @classmethod
+    def get_instance(cls, name: str) -> "CircuitBreaker":
+        """
+        依名稱取得共用的 breaker，同一個上游共用一個 (ex: "RestAPI")
+        """
+        breaker = cls._instances.get(name)
+        if breaker is None:
+            with cls._instances_lock:
+                breaker = cls._instances.get(name)
+                if breaker is None:
+                    env_prefix = name.upper()
+                    breaker = cls(
+                        name=name,
+                        failure_threshold=int(os.getenv(f"{env_prefix}_BREAKER_FAILURE_THRESHOLD", 3)),
+                        reset_timeout_sec=float(os.getenv(f"{env_prefix}_BREAKER_RESET_TIMEOUT_SEC", 10)),
+                    )
+                    cls._instances[name] = breaker
+        return breaker
+
+    @property
+    def state(self) -> CircuitBreakerState:
+        return self._state
+
+    def is_open(self) -> bool:
+        """
+        :return: True 表示目前不應送 request (OPEN 且尚未到試探時間，或試探中)
+        """
+        with self._lock:
+            if self._state == CircuitBreakerState.CLOSED:
+                return False
+            if self._state == CircuitBreakerState.OPEN:
+                return time.monotonic() - self._opened_at < self.reset_timeout_sec
+            return self._half_open_trial_running
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == CircuitBreakerState.CLOSED:
+                return True
+            if self._state == CircuitBreakerState.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout_sec:
+                    self._stats["rejected"] += 1
+                    return False
+                self._state = CircuitBreakerState.HALF_OPEN
+                self._half_open_trial_running = False
+            # HALF_OPEN: 只放行一個試探
+            if self._half_open_trial_running:
+                self._stats["rejected"] += 1
+                return False
+            self._half_open_trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._stats["success"] += 1
+            self._consecutive_failures = 0
+            self._half_open_trial_running = False
+            if self._state != CircuitBreakerState.CLOSED:
+                print(f"CircuitBreaker[{self.name}] closed")
+            self._state = CircuitBreakerState.CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._stats["failure"] += 1
+            self._consecutive_failures += 1
+            self._half_open_trial_running = False
+            if self._state == CircuitBreakerState.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != CircuitBreakerState.OPEN:
+                    self._stats["opened"] += 1
+                    print(f"CircuitBreaker[{self.name}] opened after {self._consecutive_failures} failures")
+                self._state = CircuitBreakerState.OPEN
+                self._opened_at = time.monotonic()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CircuitBreakerState.CLOSED
+            self._consecutive_failures = 0
+            self._half_open_trial_running = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self._state.value,
+                "consecutive_failures": self._consecutive_failures,
+                **self._stats,
+            }
+
+
+class LastKnownGoodStore:
+    """
+    保存每個 key 最後一次成功取得的資料與時間，上游失敗時用來回應舊資料
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Any, float]] = {}
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time())
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        :return: (value, age_sec) 或 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, ts = entry
+        return value, time.time() - ts
+
+    def clear(self, key: str = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,131 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from typing import Any, Callable, Dict, Iterable, Optional
+from mylib.adapters.sensor_snapshot_poller import SensorSnapshotPoller
+from mylib.utils.DataFreshnessUtil import DataFreshnessUtil
+from mylib.common.proj_error import ProjRedfishError, ProjRedfishErrorCode
+
+"""
+組合型 resource (ex: Pump、Fan) 每次 request 都要讀取的多個上游資料，同時平行取得，並套用單一 request 的 deadline。
+一次 GET 的時間約等於最慢的那個來源，而不是所有來源的加總。
+
+Usage:
+    data = ConcurrentFetchUtil.fetch_all({
+        "pump_speed": lambda: load_raw_from_api(f"{CDU_BASE}/api/v1/cdu/status/pump_speed"),
+        "control_mode": GetControlMode,
+    }, optional=["control_mode"])
+    data["pump_speed"], data["control_mode"]
+
+@note 設定 (env)
+    RESOURCE_FETCH_DEADLINE_SEC: 每個 request 的 deadline, 預設 8 秒
+    RESOURCE_FETCH_MAX_WORKERS: thread pool 大小, 預設 8
+    已經長時間 cache 的資料 (ex: VersionInfoService) 直接讀取即可，不需要經過 thread pool。
+    在 SensorSnapshotPoller.pinned() 區塊內 (ex: $expand)，同名的來源只讀取一次，所有 member 共用同一份讀值，
+    因此來源名稱要能代表上游資料 (ex: "pump_speed")。
+"""
+
+class ConcurrentFetchUtil:
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=int(os.getenv("RESOURCE_FETCH_MAX_WORKERS", 8)),
+                        thread_name_prefix="ConcurrentFetch",
+                    )
+        return cls._executor
+
+    @classmethod
+    def fetch_all(
+        cls,
+        sources: Dict[str, Callable[[], Any]],
+        deadline_sec: float = None,
+        optional: Iterable[str] = (),
+    ) -> Dict[str, Any]:
+        """
+        :param sources: { name: 無參數的 callable }
+        :param deadline_sec: 全部來源的總時限，預設讀取 RESOURCE_FETCH_DEADLINE_SEC
+        :param optional: 失敗或逾時可以回傳 None 的來源名稱，其他來源失敗時將 exception 往上拋
+        :return: { name: result }
+        """
+        if deadline_sec is None:
+            deadline_sec = float(os.getenv("RESOURCE_FETCH_DEADLINE_SEC", 8))
+        optional = set(optional)
+        pinned_reads = SensorSnapshotPoller.pinned_reads()
+        if pinned_reads is not None:
+            shared = { name: pinned_reads[name] for name in sources if name in pinned_reads }
+            results = cls._fetch_all({ name: func for name, func in sources.items() if name not in shared }, deadline_sec, optional)
+            pinned_reads.update(results)
+            return { name: shared[name] if name in shared else results[name] for name in sources }
+        return cls._fetch_all(sources, deadline_sec, optional)
+
+    @classmethod
+    def _fetch_all(cls, sources: Dict[str, Callable[[], Any]], deadline_sec: float, optional: set) -> Dict[str, Any]:
+        if len(sources) <= 1:
+            # 只有一個來源時不需要切換 thread
+            return { name: cls._call_inline(name, func, name in optional) for name, func in sources.items() }
+
+        executor = cls.get_executor()
+        futures = { name: executor.submit(cls._run_in_worker, func) for name, func in sources.items() }
+        deadline_at = time.monotonic() + deadline_sec
+        pending = set(futures.values())
+        while pending:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_EXCEPTION)
+            if any(f.exception() is not None and cls._name_of(futures, f) not in optional for f in done):
+                break
+
+        results = {}
+        for name, future in futures.items():
+            if not future.done():
+                future.cancel()
+                if name in optional:
+                    print(f"ConcurrentFetchUtil source `{name}` exceeded deadline {deadline_sec}s")
+                    results[name] = None
+                    continue
+                raise ProjRedfishError(
+                    ProjRedfishErrorCode.OPERATION_TIMEOUT,
+                    f"Fetching `{name}` exceeded deadline {deadline_sec}s"
+                )
+            error = future.exception()
+            if error is not None:
+                if name in optional:
+                    print(f"ConcurrentFetchUtil source `{name}` error: {error}")
+                    results[name] = None
+                    continue
+                raise error
+            value, stale_sources = future.result()
+            DataFreshnessUtil.merge(stale_sources)
+            results[name] = value
+        return results
+
+    @classmethod
+    def _run_in_worker(cls, func: Callable[[], Any]):
+        with DataFreshnessUtil.collect() as stale_sources:
+            value = func()
+        return value, stale_sources
+
+    @classmethod
+    def _call_inline(cls, name: str, func: Callable[[], Any], is_optional: bool) -> Any:
+        try:
+            return func()
+        except Exception as e:
+            if not is_optional:
+                raise e
+            print(f"ConcurrentFetchUtil source `{name}` error: {e}")
+            return None
+
+    @classmethod
+    def _name_of(cls, futures: dict, future) -> str:
+        for name, f in futures.items():
+            if f is future:
+                return name
+        return ""
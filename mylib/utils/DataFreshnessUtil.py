@@ -0,0 +1,90 @@
+import json
+import threading
+from contextlib import contextmanager
+from typing import Dict
+from flask import g, has_request_context, current_app
+from mylib.models.rf_status_model import RfStatusHealth
+
+"""
+記錄本次 request 是否使用了舊資料 (last-known-good)，並在回應時標示：
+    (1) header `Age`: 使用到的資料中最舊的秒數 (RFC 9111)
+    (2) body 裡 Health 為 OK 的 `Status` 改為 Warning (Critical 不變)
+"""
+
+class DataFreshnessUtil:
+    _G_KEY = "_stale_data_sources"
+    _thread_local = threading.local()
+
+    @classmethod
+    def mark_stale(cls, source_name: str, age_sec: float) -> None:
+        """
+        :param source_name: ex: "chassis_summary", "version"
+        :param age_sec: 資料的年齡 (秒)
+        """
+        collector = getattr(cls._thread_local, "collector", None)
+        if collector is not None:
+            # 在 worker thread 中 (ex: ConcurrentFetchUtil)，先記錄下來，由 request thread 合併
+            collector[source_name] = max(age_sec, collector.get(source_name, 0))
+            return
+        if not has_request_context():
+            return
+        stale_sources = g.get(cls._G_KEY)
+        if stale_sources is None:
+            stale_sources = {}
+            setattr(g, cls._G_KEY, stale_sources)
+        stale_sources[source_name] = max(age_sec, stale_sources.get(source_name, 0))
+
+    @classmethod
+    @contextmanager
+    def collect(cls):
+        """
+        在沒有 request context 的 thread 中收集 mark_stale() 的結果
+        Usage:
+            with DataFreshnessUtil.collect() as stale_sources:
+                ...
+        """
+        prev = getattr(cls._thread_local, "collector", None)
+        collector = {}
+        cls._thread_local.collector = collector
+        try:
+            yield collector
+        finally:
+            cls._thread_local.collector = prev
+
+    @classmethod
+    def merge(cls, stale_sources: Dict[str, float]) -> None:
+        for source_name, age_sec in stale_sources.items():
+            cls.mark_stale(source_name, age_sec)
+
+    @classmethod
+    def get_stale_sources(cls) -> Dict[str, float]:
+        if not has_request_context():
+            return {}
+        return g.get(cls._G_KEY) or {}
+
+    @classmethod
+    def apply_to_response(cls, response):
+        stale_sources = cls.get_stale_sources()
+        if not stale_sources:
+            return response
+        response.headers["Age"] = str(int(max(stale_sources.values())))
+        try:
+            if response.content_type == "application/json" and response.status_code == 200:
+                resp_body = json.loads(response.get_data(as_text=True))
+                cls._degrade_status(resp_body)
+                response.set_data(current_app.json.dumps(resp_body))
+        except Exception as e:
+            print(f"DataFreshnessUtil apply_to_response error: {e}")
+        return response
+
+    @classmethod
+    def _degrade_status(cls, node) -> None:
+        if isinstance(node, dict):
+            status = node.get("Status")
+            if isinstance(status, dict) and status.get("Health") == RfStatusHealth.OK.value:
+                status["Health"] = RfStatusHealth.Warning.value
+            for value in node.values():
+                cls._degrade_status(value)
+        elif isinstance(node, list):
+            for value in node:
+                cls._degrade_status(value)
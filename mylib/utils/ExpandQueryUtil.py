@@ -0,0 +1,118 @@
+import re
+from dataclasses import dataclass
+from typing import Callable, Optional
+from flask import request, has_request_context
+from mylib.adapters.sensor_snapshot_poller import SensorSnapshotPoller
+from mylib.common.proj_error import ProjRedfishError, ProjRedfishErrorCode
+
+"""
+Redfish `$expand` query 的處理 (DSP0266 7.3)
+目前只支援展開 collection 的 Members 一層: `$expand=.`、`$expand=*`，可加上 `($levels=1)`
+展開時所有 member 會固定讀取同一版 sensor snapshot，其他上游資料 (ex: pump_speed) 也只讀取一次由全部 member 共用，
+一次 request 取得時間一致的全部讀值 (見 SensorSnapshotPoller.pinned())。
+只有 EXPANDABLE_RULES 中的 collection 支援，其他 resource 帶 $expand 會回 400 QueryNotSupportedOnResource。
+@note `$expand=~` 只展開 `Links` 底下的連結，collection 的 Members 不是 Links，因此不支援。
+
+Usage:
+    resp_json = service.fetch_sensors_collection(chassis_id)
+    return ExpandQueryUtil.expand_members(resp_json, lambda sensor_id: service.fetch_sensors_by_name(chassis_id, sensor_id))
+"""
+
+@dataclass(frozen=True)
+class ExpandQuery:
+    """
+    :param expand_type: "." (subordinate), "*" (all)
+    :param levels: 展開的層數
+    """
+    expand_type: str
+    levels: int = 1
+
+
+class ExpandQueryUtil:
+    MAX_LEVELS = 1
+    # member 讀值在 pinned() 區塊內可以固定為同一份資料的 collection
+    EXPANDABLE_RULES = frozenset({
+        "/redfish/v1/Chassis/<chassis_id>/Sensors",
+        "/redfish/v1/Chassis/<chassis_id>/ThermalSubsystem/Fans",
+        "/redfish/v1/ThermalEquipment/CDUs/<string:cdu_id>/Pumps",
+        "/redfish/v1/ThermalEquipment/CDUs/<cdu_id>/Filters",
+        "/redfish/v1/ThermalEquipment/CDUs/<cdu_id>/LeakDetection/LeakDetectors",
+    })
+    _EXPAND_PATTERN = re.compile(r"^(?P<type>[.*~])(\(\$levels=(?P<levels>\d+)\))?$")
+
+    @classmethod
+    def parse(cls, expand_value: Optional[str]) -> Optional[ExpandQuery]:
+        """
+        :param expand_value: ex: ".", "*($levels=1)"
+        :return: ExpandQuery，沒有 $expand 時回傳 None
+        """
+        if expand_value is None:
+            return None
+        match = cls._EXPAND_PATTERN.match(expand_value.strip())
+        if not match:
+            raise ProjRedfishError(
+                ProjRedfishErrorCode.QUERY_PARAMETER_VALUE_FORMAT_ERROR,
+                f"The value {expand_value} for the query parameter $expand has an invalid format."
+            )
+        if match.group("type") == "~":
+            raise ProjRedfishError(
+                ProjRedfishErrorCode.QUERY_NOT_SUPPORTED_ON_RESOURCE,
+                "The value ~ for the query parameter $expand is not supported: collection Members are not Links."
+            )
+        levels = int(match.group("levels") or 1)
+        if not (1 <= levels <= cls.MAX_LEVELS):
+            raise ProjRedfishError(
+                ProjRedfishErrorCode.QUERY_PARAMETER_OUT_OF_RANGE,
+                f"The value {levels} for the query parameter $levels is out of range 1-{cls.MAX_LEVELS}."
+            )
+        return ExpandQuery(expand_type=match.group("type"), levels=levels)
+
+    @classmethod
+    def check_request_supported(cls) -> None:
+        """
+        目前 request 帶 $expand 但 resource 不支援時 raise QueryNotSupportedOnResource
+        @note 由 app.before_request 呼叫，route 還沒匹配到 (404) 時不檢查
+        """
+        if not has_request_context() or "$expand" not in request.args:
+            return
+        if request.url_rule is None or request.url_rule.rule.rstrip("/") in cls.EXPANDABLE_RULES:
+            return
+        raise ProjRedfishError(
+            ProjRedfishErrorCode.QUERY_NOT_SUPPORTED_ON_RESOURCE,
+            f"Querying is not supported on the requested resource: {request.path}"
+        )
+
+    @classmethod
+    def get_request_expand(cls) -> Optional[ExpandQuery]:
+        if not has_request_context():
+            return None
+        return cls.parse(request.args.get("$expand"))
+
+    @classmethod
+    def expand_members(cls, collection_json: dict, fetch_member: Callable[[str], dict], expand: ExpandQuery = None) -> dict:
+        """
+        依 $expand 把 collection 的 Members 由 {"@odata.id": ...} 換成完整的 member 內容
+        :param collection_json: collection 的回應
+        :param fetch_member: 傳入 member id (odata.id 的最後一段)，回傳 member 內容
+        :param expand: 預設讀取目前 request 的 $expand
+        :return: collection_json (沒有 $expand 時原樣回傳)
+        @note member 回傳的不是 resource 時 (ex: 未啟用的 LeakDetector)，保留原本的 {"@odata.id": ...}
+        """
+        expand = expand or cls.get_request_expand()
+        if expand is None:
+            return collection_json
+        with SensorSnapshotPoller.pinned():
+            collection_json["Members"] = [
+                cls._fetch_member(member, fetch_member) for member in collection_json.get("Members", [])
+            ]
+        return collection_json
+
+    @classmethod
+    def _fetch_member(cls, member: dict, fetch_member: Callable[[str], dict]) -> dict:
+        member_id = member["@odata.id"].rstrip("/").rsplit("/", 1)[-1]
+        member_json = fetch_member(member_id)
+        if isinstance(member_json, tuple):
+            member_json = member_json[0] # (body, http status)
+        if not isinstance(member_json, dict):
+            return member
+        return member_json
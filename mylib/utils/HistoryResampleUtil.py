@@ -0,0 +1,145 @@
+import math
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from itertools import accumulate, filterfalse
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+"""
+SensorHistoryStore 的時間區段 (window) 彙總: 每個區段、每個 metric 計算 Minimum / Maximum / Average / Last。
+
+@note
+    (1) 區段以 interval_sec 對齊 (bucket_start = floor(ts / interval_sec) * interval_sec)，只輸出有資料的區段。
+    (2) 不逐行處理資料: 區段邊界以 bisect 找出，Average 使用 prefix sum，
+        Minimum/Maximum 以 min()/max() 作用在 memoryview 切片上 (C 迴圈)，迴圈次數 = 區段數 x metric 數。
+    (3) 缺值 (NaN) 不列入計算；整個區段都是缺值時結果為 NaN。
+    (4) 非數值 metric (ex: Mode Selection) 只支援 Last。
+
+Usage:
+    window = HistoryResampleUtil.resample(store, 10, start_ts, end_ts)
+    window.bucket_starts[0], window.get("Average", "Coolant Flow Rate (F1)")[0]
+"""
+
+@dataclass(frozen=True)
+class ResampledWindow:
+    """
+    :param interval_sec: 區段長度 (秒)
+    :param bucket_starts: 各區段的開始時間 (epoch 秒)
+    :param counts: 各區段的資料筆數
+    :param values: {function: {metric: 各區段的結果}}
+    """
+    interval_sec: float
+    bucket_starts: array = field(default_factory=lambda: array("d"))
+    counts: array = field(default_factory=lambda: array("l"))
+    values: Dict[str, Dict[str, Sequence]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.bucket_starts)
+
+    def get(self, function: str, metric: str) -> Sequence:
+        return self.values[function][metric]
+
+
+class HistoryResampleUtil:
+    MINIMUM = "Minimum"
+    MAXIMUM = "Maximum"
+    AVERAGE = "Average"
+    LAST = "Last"
+    FUNCTIONS = (MINIMUM, MAXIMUM, AVERAGE, LAST)
+
+    @classmethod
+    def bucket_edges(cls, timestamps: Sequence[float], interval_sec: float) -> Tuple[array, array]:
+        """
+        :param timestamps: 依時間遞增的 timestamp
+        :return: (各區段的開始時間, 區段邊界的索引)，第 k 個區段為 timestamps[edges[k]:edges[k+1]]
+        """
+        if interval_sec <= 0:
+            raise ValueError(f"interval_sec must be positive: {interval_sec}")
+        starts, edges = array("d"), array("l", [0])
+        i, n = 0, len(timestamps)
+        while i < n:
+            bucket_start = (timestamps[i] // interval_sec) * interval_sec
+            i = bisect_left(timestamps, bucket_start + interval_sec, i)
+            starts.append(bucket_start)
+            edges.append(i)
+        return starts, edges
+
+    @classmethod
+    def resample(
+        cls,
+        store,
+        interval_sec: float,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None,
+        metrics: Optional[Iterable[str]] = None,
+        functions: Iterable[str] = FUNCTIONS,
+    ) -> ResampledWindow:
+        """
+        :param store: SensorHistoryStore
+        :param interval_sec: 區段長度 (秒)
+        :param start_ts: 開始時間 (包含)，None 表示從最舊的資料開始
+        :param end_ts: 結束時間 (不包含)，None 表示到最新的資料
+        :param metrics: 要計算的 metric，預設為全部
+        :param functions: Minimum | Maximum | Average | Last
+        """
+        functions = tuple(functions)
+        invalid = [f for f in functions if f not in cls.FUNCTIONS]
+        if invalid:
+            raise ValueError(f"Unsupported functions: {invalid}. Available functions: {list(cls.FUNCTIONS)}")
+        metrics = tuple(store.metric_names if metrics is None else metrics)
+
+        with store.lock:
+            lo, hi = store.time_range(start_ts, end_ts)
+            timestamps = store.get_timestamps(lo, hi)
+            columns = {metric: store.get_column(metric, lo, hi) for metric in metrics}
+
+        starts, edges = cls.bucket_edges(timestamps, interval_sec)
+        counts = array("l", (edges[k + 1] - edges[k] for k in range(len(starts))))
+        values: Dict[str, Dict[str, Sequence]] = {function: {} for function in functions}
+        for metric, column in columns.items():
+            if isinstance(column, array):
+                results = cls._resample_numeric(column, edges, functions)
+            elif cls.LAST in functions:
+                results = {cls.LAST: cls._last_objects(column, edges)}
+            else:
+                continue
+            for function, result in results.items():
+                values[function][metric] = result
+        return ResampledWindow(interval_sec=interval_sec, bucket_starts=starts, counts=counts, values=values)
+
+    @classmethod
+    def _resample_numeric(cls, column: array, edges: array, functions: Tuple[str, ...]) -> Dict[str, array]:
+        bounds = list(zip(edges[:-1], edges[1:]))
+        mv = memoryview(column)
+        results = {}
+        if not any(map(math.isnan, column)):
+            if cls.MINIMUM in functions:
+                results[cls.MINIMUM] = array("d", [min(mv[a:b]) for a, b in bounds])
+            if cls.MAXIMUM in functions:
+                results[cls.MAXIMUM] = array("d", [max(mv[a:b]) for a, b in bounds])
+            if cls.AVERAGE in functions:
+                prefix = array("d", accumulate(column, initial=0.0))
+                results[cls.AVERAGE] = array("d", [(prefix[b] - prefix[a]) / (b - a) for a, b in bounds])
+            if cls.LAST in functions:
+                results[cls.LAST] = array("d", [column[b - 1] for a, b in bounds])
+            return results
+
+        # 有缺值: 每個區段先濾掉 NaN
+        valid_values = [list(filterfalse(math.isnan, mv[a:b])) for a, b in bounds]
+        if cls.MINIMUM in functions:
+            results[cls.MINIMUM] = array("d", [min(v) if v else math.nan for v in valid_values])
+        if cls.MAXIMUM in functions:
+            results[cls.MAXIMUM] = array("d", [max(v) if v else math.nan for v in valid_values])
+        if cls.AVERAGE in functions:
+            results[cls.AVERAGE] = array("d", [math.fsum(v) / len(v) if v else math.nan for v in valid_values])
+        if cls.LAST in functions:
+            results[cls.LAST] = array("d", [v[-1] if v else math.nan for v in valid_values])
+        return results
+
+    @classmethod
+    def _last_objects(cls, column: list, edges: array) -> list:
+        results = []
+        for k in range(len(edges) - 1):
+            values = [v for v in column[edges[k]:edges[k + 1]] if v is not None]
+            results.append(values[-1] if values else None)
+        return results
@@ -0,0 +1,162 @@
+import os
+import threading
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+"""
+共用的 HTTP client：每個 host 一組 connection pool (keep-alive)，並套用預設的 connect/read timeout 與有限次數的 retry。
+RestAPI、webUI 的呼叫都應該透過這裡，避免每次 request 都重新建立 TCP 連線，或因為沒有 timeout 而卡死 worker thread。
+
+@note 設定 (env)
+    HTTP_CONNECT_TIMEOUT_SEC: connect timeout, 預設 2 秒
+    HTTP_READ_TIMEOUT_SEC: read timeout, 預設 5 秒
+    HTTP_POOL_MAXSIZE: 每個 host 的 pool 大小, 預設 10
+    HTTP_REST_POOL_MAXSIZE: RestAPI (ITG_REST_HOST) 的 pool 大小, 預設 HTTP_POOL_MAXSIZE
+    HTTP_WEBAPP_POOL_MAXSIZE: webUI (ITG_WEBAPP_HOST) 的 pool 大小, 預設 HTTP_POOL_MAXSIZE
+    HTTP_MAX_RETRIES: 最多重試次數, 預設 2
+    HTTP_RETRY_BACKOFF_SEC: 重試的 backoff factor, 預設 0.1 秒
+    HTTP_RETRY_JITTER_SEC: 重試等待時間加上的隨機 jitter 上限, 預設 0.1 秒
+@note
+    連線失敗 (request 尚未送出) 所有 method 都會重試；
+    read error 與 502/503/504 只對 idempotent method (GET/HEAD/OPTIONS) 重試，PATCH/POST 不會重送。
+"""
+
+class _TimeoutSession(requests.Session):
+    """
+    requests.Session 沒有預設 timeout，這裡補上
+    """
+    def __init__(self, default_timeout: Tuple[float, float]):
+        super().__init__()
+        self.default_timeout = default_timeout
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.default_timeout
+        return super().request(method, url, **kwargs)
+
+
+class HttpClientUtil:
+    _adapters: Dict[str, HTTPAdapter] = {}
+    _sessions: Dict[str, requests.Session] = {}
+    _lock = threading.RLock()
+
+    @classmethod
+    def get_timeout(cls) -> Tuple[float, float]:
+        """
+        :return: (connect_timeout, read_timeout)
+        """
+        return (
+            float(os.getenv("HTTP_CONNECT_TIMEOUT_SEC", 2)),
+            float(os.getenv("HTTP_READ_TIMEOUT_SEC", 5)),
+        )
+
+    @classmethod
+    def get_pool_maxsize(cls, base_url: str) -> int:
+        default_size = int(os.getenv("HTTP_POOL_MAXSIZE", 10))
+        host_pool_env = {
+            cls._base_url(os.getenv("ITG_REST_HOST", "")): "HTTP_REST_POOL_MAXSIZE",
+            cls._base_url(os.getenv("ITG_WEBAPP_HOST", "")): "HTTP_WEBAPP_POOL_MAXSIZE",
+        }
+        env_name = host_pool_env.get(base_url)
+        if env_name:
+            return int(os.getenv(env_name, default_size))
+        return default_size
+
+    @classmethod
+    def build_retry(cls) -> Retry:
+        max_retries = int(os.getenv("HTTP_MAX_RETRIES", 2))
+        return Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"]),
+            backoff_factor=float(os.getenv("HTTP_RETRY_BACKOFF_SEC", 0.1)),
+            backoff_jitter=float(os.getenv("HTTP_RETRY_JITTER_SEC", 0.1)),
+            raise_on_status=False, # 重試用完仍回傳最後的 response，由呼叫端判斷 status code
+            respect_retry_after_header=False,
+        )
+
+    @classmethod
+    def get_adapter(cls, url: str) -> HTTPAdapter:
+        """
+        取得 url 所屬 host 的 HTTPAdapter (即 connection pool)，同一 host 共用
+        """
+        base_url = cls._base_url(url)
+        adapter = cls._adapters.get(base_url)
+        if adapter is None:
+            with cls._lock:
+                adapter = cls._adapters.get(base_url)
+                if adapter is None:
+                    pool_maxsize = cls.get_pool_maxsize(base_url)
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=pool_maxsize,
+                        max_retries=cls.build_retry(),
+                        pool_block=False,
+                    )
+                    cls._adapters[base_url] = adapter
+        return adapter
+
+    @classmethod
+    def new_session(cls, url: str) -> requests.Session:
+        """
+        建立一個獨立的 session (有自己的 cookie / auth)，但共用該 host 的 connection pool
+        @note 給需要登入狀態的 webUI 使用 (ex: WebAppAPIAdapter)
+        """
+        session = _TimeoutSession(cls.get_timeout())
+        session.mount(cls._base_url(url), cls.get_adapter(url))
+        return session
+
+    @classmethod
+    def get_session(cls, url: str) -> requests.Session:
+        """
+        取得 url 所屬 host 的共用 session (無狀態的呼叫使用)
+        """
+        base_url = cls._base_url(url)
+        session = cls._sessions.get(base_url)
+        if session is None:
+            with cls._lock:
+                session = cls._sessions.get(base_url)
+                if session is None:
+                    session = cls.new_session(url)
+                    cls._sessions[base_url] = session
+        return session
+
+    @classmethod
+    def request(cls, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        :param kwargs: 同 requests.request()，未指定 timeout 時使用預設 timeout
+        """
+        return cls.get_session(url).request(method, url, **kwargs)
+
+    @classmethod
+    def get(cls, url: str, **kwargs) -> requests.Response:
+        return cls.request("GET", url, **kwargs)
+
+    @classmethod
+    def post(cls, url: str, **kwargs) -> requests.Response:
+        return cls.request("POST", url, **kwargs)
+
+    @classmethod
+    def patch(cls, url: str, **kwargs) -> requests.Response:
+        return cls.request("PATCH", url, **kwargs)
+
+    @classmethod
+    def close_all(cls) -> None:
+        with cls._lock:
+            for session in cls._sessions.values():
+                session.close()
+            for adapter in cls._adapters.values():
+                adapter.close()
+            cls._sessions = {}
+            cls._adapters = {}
+
+    @classmethod
+    def _base_url(cls, url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}/" if parts.netloc else url
@@ -1,5 +1,6 @@
 import requests
 from typing import Optional
+from mylib.utils.HttpClientUtil import HttpClientUtil
 
 class HttpRequestUtil:
     @classmethod
@@ -8,11 +9,12 @@ class HttpRequestUtil:
         :param url: str
         :param opts: dict
             opts['header']: dict
+            opts['timeout']: float or (connect, read), 未指定時使用 HttpClientUtil 的預設 timeout
         :return: str
         """
         try:
             headers = opts.get('headers', {})
-            response = requests.get(url, headers=headers)
+            response = HttpClientUtil.get(url, headers=headers, timeout=opts.get('timeout'))
             # return response.text
             return response
         except Exception as e:
@@ -29,11 +31,12 @@ class HttpRequestUtil:
         :param url: str
         :param opts: dict
             opts['header']: dict
+            opts['timeout']: float or (connect, read), 未指定時使用 HttpClientUtil 的預設 timeout
         :return: str
         """
         try:
             headers = opts.get('header', {})
-            response = requests.post(url, headers=headers, data=req_body)
+            response = HttpClientUtil.post(url, headers=headers, data=req_body, timeout=opts.get('timeout'))
             return response
         except Exception as e:
             print(f"HttpRequestUtil post error: {e}")
@@ -0,0 +1,176 @@
+import threading
+from dataclasses import dataclass
+from enum import Enum
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+from mylib.utils.StatusUtil import StatusUtil
+
+"""
+Sensor id 的索引 (catalog)，啟動時由 sensor_info.yaml / hardware_info.yaml 編譯一次。
+每個 sensor id 對應一個讀值計畫 (SensorPlan)，讀取時只需要把 summary snapshot 套進去，
+不會改寫共用的 sensor_info，也不需要每次解析 `fieldNameToFetchSensorValue` 字串。
+
+Usage:
+    summary = self._read_components_chassis_summary_from_cache()
+    reading = SensorCatalog.get_instance().evaluate("PrimaryDeltaPressurekPa", summary)
+    reading.reading, reading.reading_units, reading.status
+
+@note 讀值計畫的種類
+    Single: 單一欄位, ex: "coolant_flow_rate"
+    Delta:  兩欄位的差值, ex: "temp_coolant_supply,temp_coolant_return"
+    Energy: 以 power_total 乘上開機時數換算 kWh, ex: "EnergykWh"
+    另外 sensor_info.yaml 的 `id_readingInfo_spare` 會編譯成 spare_field，讀值異常(Critical)時可以改看備援 sensor
+"""
+
+class SensorPlanType(str, Enum):
+    Single = "Single"
+    Delta = "Delta"
+    Energy = "Energy"
+
+
+@dataclass(frozen=True)
+class SensorReading:
+    sensor_id: str
+    reading: Optional[float]
+    reading_units: Optional[str]
+    status: Mapping[str, str]
+    spare_reading: Optional[float] = None
+    spare_status: Optional[Mapping[str, str]] = None
+
+    @property
+    def has_spare(self) -> bool:
+        return self.spare_status is not None
+
+    def health(self) -> Optional[str]:
+        return self.status.get("Health") or self.status.get("health")
+
+    def state(self) -> Optional[str]:
+        return self.status.get("State") or self.status.get("state")
+
+
+@dataclass(frozen=True)
+class SensorPlan:
+    sensor_id: str
+    plan_type: SensorPlanType
+    fields: Tuple[str, ...]
+    reading_units: Optional[str] = None
+    spare_field: Optional[str] = None
+
+    ENERGY_SOURCE_FIELD = "power_total"
+
+    def evaluate(self, summary: Mapping[str, Mapping], ndigits: Optional[int] = 2, uptime_h: float = None) -> SensorReading:
+        """
+        :param summary: /api/v1/cdu/components/chassis/summary 的資料
+        :param ndigits: 讀值的小數位數，None 表示不取整
+        :param uptime_h: 開機時數，Energy 計畫使用，None 時讀取系統 uptime
+        """
+        if self.plan_type == SensorPlanType.Delta:
+            first, second = summary[self.fields[0]], summary[self.fields[1]]
+            value = first["reading"] - second["reading"]
+            status = StatusUtil.get_worst_health_dict([first["status"], second["status"]])
+        elif self.plan_type == SensorPlanType.Energy:
+            if uptime_h is None:
+                from mylib.utils.system_info import get_uptime
+                uptime_h = get_uptime()[0]
+            source = summary[self.fields[0]]
+            value = round(source["reading"], 2) * uptime_h / 1000
+            status = source["status"]
+        else:
+            source = summary[self.fields[0]]
+            value = source["reading"]
+            status = source["status"]
+
+        if ndigits is not None and value is not None:
+            value = round(value, ndigits)
+
+        spare_reading, spare_status = None, None
+        if self.spare_field and self.spare_field in summary:
+            spare_reading = summary[self.spare_field]["reading"]
+            spare_status = MappingProxyType(dict(summary[self.spare_field]["status"]))
+
+        return SensorReading(
+            sensor_id=self.sensor_id,
+            reading=value,
+            reading_units=self.reading_units,
+            status=MappingProxyType(dict(status)),
+            spare_reading=spare_reading,
+            spare_status=spare_status,
+        )
+
+
+class SensorCatalog:
+    _instance: Optional["SensorCatalog"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, plans: Dict[str, SensorPlan]):
+        self._plans: Mapping[str, SensorPlan] = MappingProxyType(dict(plans))
+        self._sensor_ids: Tuple[str, ...] = tuple(sorted(plans.keys()))
+
+    @classmethod
+    def get_instance(cls) -> "SensorCatalog":
+        """
+        取得依目前專案設定 (load_env) 編譯的 catalog
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    from load_env import sensor_info, hardware_info
+                    cls._instance = cls.compile(sensor_info, hardware_info)
+        return cls._instance
+
+    @classmethod
+    def compile(cls, sensor_info: dict, hardware_info: dict) -> "SensorCatalog":
+        """
+        :param sensor_info: sensor_info.yaml 的內容
+        :param hardware_info: hardware_info.yaml 的內容 (用來產生 Fan{i} 的 sensor)
+        """
+        reading_info_map = dict(sensor_info.get("id_readingInfo_map") or {})
+        for i in range(len(hardware_info.get("Fans") or {})):
+            reading_info_map[f"Fan{i+1}"] = {
+                "ReadingUnits": "%",
+                "fieldNameToFetchSensorValue": f"fan{i+1}"
+            }
+        spare_map = sensor_info.get("id_readingInfo_spare") or {}
+
+        plans = {}
+        for sensor_id, reading_info in reading_info_map.items():
+            fields = tuple(f.strip() for f in str(reading_info["fieldNameToFetchSensorValue"]).split(",") if f.strip())
+            if fields == ("EnergykWh",):
+                plan_type, fields = SensorPlanType.Energy, (SensorPlan.ENERGY_SOURCE_FIELD,)
+            elif len(fields) == 2:
+                plan_type = SensorPlanType.Delta
+            elif len(fields) == 1:
+                plan_type = SensorPlanType.Single
+            else:
+                raise ValueError(f"Invalid fieldNameToFetchSensorValue for sensor {sensor_id}: {reading_info['fieldNameToFetchSensorValue']}")
+
+            spare_field = None
+            if sensor_id in spare_map:
+                spare_field = str(spare_map[sensor_id]["fieldNameToFetchSensorValue"]).strip() + "_spare"
+
+            plans[sensor_id] = SensorPlan(
+                sensor_id=sensor_id,
+                plan_type=plan_type,
+                fields=fields,
+                reading_units=reading_info.get("ReadingUnits"),
+                spare_field=spare_field,
+            )
+        return cls(plans)
+
+    def sensor_ids(self) -> Tuple[str, ...]:
+        return self._sensor_ids
+
+    def has_sensor(self, sensor_id: str) -> bool:
+        return sensor_id in self._plans
+
+    def get_plan(self, sensor_id: str) -> Optional[SensorPlan]:
+        return self._plans.get(sensor_id)
+
+    def evaluate(self, sensor_id: str, summary: Mapping[str, Mapping], ndigits: Optional[int] = 2) -> Optional[SensorReading]:
+        """
+        :return: SensorReading, sensor_id 不存在時回傳 None
+        """
+        plan = self._plans.get(sensor_id)
+        if plan is None:
+            return None
+        return plan.evaluate(summary, ndigits=ndigits)
@@ -0,0 +1,142 @@
+import time
+import threading
+import functools
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Hashable, Optional
+from cachetools import TTLCache
+from cachetools.keys import hashkey
+
+"""
+Single-flight TTL cache：cache 過期時，同一個 key 只會有一個 caller 真的去計算 (打 API / 讀檔)，
+其他同時間的 caller 等待同一個結果，而不是各自再打一次。
+
+Usage (取代 `@cached(cache=TTLCache(maxsize=30, ttl=1))`):
+    @classmethod
+    @single_flight_cached(cache=SingleFlightCache(maxsize=30, ttl=1))
+    def _read_xxx(cls) -> dict:
+        ...
+@note
+    (1) 計算失敗時不寫入 cache，等待中的 caller 會收到同一個 exception。
+    (2) stats() 提供每個 key 的 hits/misses/coalesced/errors 統計。
+    (3) invalidate() 會遞增 generation: 在 invalidate 之前開始的計算，結果只回給當時等待的 caller，不寫入 cache；
+        invalidate 之後的 caller 會重新計算，不會等待舊的計算。
+"""
+
+@dataclass
+class SingleFlightKeyStats:
+    hits: int = 0        # cache 命中
+    misses: int = 0      # 未命中，由此 caller 計算
+    coalesced: int = 0   # 未命中，但等待其他 caller 的計算結果
+    errors: int = 0      # 計算失敗次數
+    last_load_ms: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class _InFlightCall:
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlightCache:
+    def __init__(self, maxsize: int, ttl: float, timer: Callable[[], float] = time.monotonic):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, timer=timer)
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _InFlightCall] = {}
+        self._stats: Dict[Hashable, SingleFlightKeyStats] = {}
+        self._generation = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            stats = self._stats.setdefault(key, SingleFlightKeyStats())
+            try:
+                value = self._cache[key]
+                stats.hits += 1
+                return value
+            except KeyError:
+                pass
+            call = self._inflight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _InFlightCall(self._generation)
+                self._inflight[key] = call
+                stats.misses += 1
+            else:
+                stats.coalesced += 1
+
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        started_at = time.perf_counter()
+        try:
+            value = compute()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                stats.errors += 1
+                self._pop_inflight(key, call)
+            call.event.set()
+            raise
+
+        with self._lock:
+            if call.generation == self._generation:
+                try:
+                    self._cache[key] = value
+                except ValueError:
+                    pass # value too large
+            stats.last_load_ms = (time.perf_counter() - started_at) * 1000
+            self._pop_inflight(key, call)
+        call.value = value
+        call.event.set()
+        return value
+
+    def _pop_inflight(self, key: Hashable, call: _InFlightCall) -> None:
+        """呼叫時需持有 lock; invalidate 之後同一個 key 可能已經有新的計算，不能移除"""
+        if self._inflight.get(key) is call:
+            del self._inflight[key]
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """
+        :param key: None 表示清除全部
+        @note 進行中的計算結果不會寫入 cache (見 generation)
+        """
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._cache.clear()
+                self._inflight.clear()
+            else:
+                self._cache.pop(key, None)
+                self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._stats.clear()
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return { str(key): stats.to_dict() for key, stats in self._stats.items() }
+
+
+def single_flight_cached(cache: SingleFlightCache, key: Callable[..., Hashable] = hashkey):
+    """
+    Decorator，用法同 cachetools.cached
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs)
+            return cache.get_or_compute(k, lambda: func(*args, **kwargs))
+        wrapper.cache = cache
+        wrapper.cache_key = key
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
@@ -0,0 +1,73 @@
+import math
+from typing import Dict, Hashable, List, Optional, Tuple
+
+"""
+Hashed timer wheel: 大量定時工作共用一個 tick，新增/取消/到期檢查都是 O(1) (每個 tick 只看一個格子)。
+
+@note
+    (1) 時間切成 tick_sec 秒的 tick，到期時間放在 tick % slots 的格子；超過一圈的工作留在格子裡等下一圈。
+    (2) 同一個 key 只會有一個到期時間，重新 schedule 會取代舊的。
+    (3) advance() 跳過的 tick 數超過一圈時改為檢查所有格子。
+
+Usage:
+    wheel = TimerWheel(tick_sec=1, slots=512)
+    wheel.schedule("report-1", time.time() + 180)
+    for key, due_ts in wheel.advance(time.time()):
+        ...
+"""
+
+class TimerWheel:
+    def __init__(self, tick_sec: float = 1.0, slots: int = 512):
+        if tick_sec <= 0 or slots <= 0:
+            raise ValueError("tick_sec and slots must be positive")
+        self.tick_sec = tick_sec
+        self._slots: List[Dict[Hashable, float]] = [{} for _ in range(slots)]
+        self._slot_of: Dict[Hashable, int] = {}
+        self._current_tick: Optional[int] = None # 已處理到的 tick
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slot_of
+
+    def schedule(self, key: Hashable, due_ts: float):
+        """:param due_ts: 到期時間 (epoch 秒)，已過期的工作在下一次 advance() 時到期"""
+        self.cancel(key)
+        tick = math.ceil(due_ts / self.tick_sec)
+        if self._current_tick is not None and tick <= self._current_tick:
+            tick = self._current_tick + 1
+        index = tick % len(self._slots)
+        self._slots[index][key] = due_ts
+        self._slot_of[key] = index
+
+    def cancel(self, key: Hashable) -> bool:
+        index = self._slot_of.pop(key, None)
+        if index is None:
+            return False
+        del self._slots[index][key]
+        return True
+
+    def advance(self, now: float) -> List[Tuple[Hashable, float]]:
+        """
+        :return: 到期的 [(key, due_ts)]，依到期時間排序；到期的工作會被移除
+        """
+        now_tick = math.floor(now / self.tick_sec)
+        if self._current_tick is not None and now_tick <= self._current_tick:
+            return []
+        if self._current_tick is None or now_tick - self._current_tick >= len(self._slots):
+            indexes = range(len(self._slots))
+        else:
+            indexes = (tick % len(self._slots) for tick in range(self._current_tick + 1, now_tick + 1))
+        self._current_tick = now_tick
+
+        due = []
+        for index in indexes:
+            slot = self._slots[index]
+            expired = [(key, due_ts) for key, due_ts in slot.items() if due_ts <= now]
+            for key, _ in expired:
+                del slot[key]
+                del self._slot_of[key]
+            due += expired
+        due.sort(key=lambda item: item[1])
+        return due
@@ -2,16 +2,18 @@ from typing import Any, Dict
 from dotenv import load_dotenv
 import requests
 import os
+from mylib.utils.HttpClientUtil import HttpClientUtil
 # -------------- 取得資料 --------------
 def load_raw_from_api(
     url: str,
     params: Dict[str, Any] = None,
-    timeout: float = 5.0
+    timeout: float = None
 ) -> Dict:
     """
     從本機 API 拿回整張 JSON 並轉成 dict
+    :param timeout: 未指定時使用 HttpClientUtil 的預設 connect/read timeout
     """
-    resp = requests.get(url, params=params, timeout=timeout)
+    resp = HttpClientUtil.get(url, params=params, timeout=timeout)
     resp.raise_for_status()
     return resp.json()
 
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+說明:
+    CSV row decoder benchmark。
+    產生 N 天 (預設 7 天, 1Hz) 的合成 sensor CSV，比較 pydantic model (strict 模式) 與
+    依 header 編譯的 SensorCsvRowDecoder 每秒可解析的行數，sidecar-redfish 與 inrow-cdu 兩種 model 都會量測。
+
+    輸出格式:
+    {
+        "meta": { "days": 7, "rows": 604800, ... },
+        "results": {
+            "sidecar-redfish": {"pydantic_rows_per_sec": 41234.5, "compiled_rows_per_sec": 412345.6, "speedup": 10.0},
+            "inrow-cdu": {...}
+        }
+    }
+
+使用方法:
+    python test/benchmark/bench_csv_decoder.py
+    python test/benchmark/bench_csv_decoder.py --days=1 --na-rate=0.05 --output=/tmp/bench-csv-decoder.json
+"""
+import os
+import sys
+import csv
+import json
+import time
+import random
+import tempfile
+from argparse import ArgumentParser
+from datetime import datetime, timedelta
+
+PROJ_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJ_ROOT)
+from mylib.common.proj_constant import ProjNames
+from mylib.models.sensor_log_model_factory import SensorLogModelFactory
+from mylib.adapters.sensor_csv_decoder import SensorCsvRowDecoder
+
+
+def build_header(model_class) -> list:
+    return [info.alias or name for name, info in model_class.model_fields.items()]
+
+
+def write_synthetic_csv(path: str, header: list, days: int, na_rate: float, seed: int = 0) -> int:
+    """
+    產生 1Hz 的合成資料，數值欄位以 na_rate 的機率寫入 "N/A"
+    :return: 資料行數
+    """
+    rand = random.Random(seed)
+    start = datetime(2025, 7, 1)
+    rows = days * 86400
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for i in range(rows):
+            ts = (start + timedelta(seconds=i)).isoformat()
+            cells = [ts]
+            for column in header[1:]:
+                if column == "Mode Selection":
+                    cells.append("Auto")
+                elif column == "Self Role in Group Control":
+                    cells.append("Master")
+                elif column == "Operation in Group Control":
+                    cells.append("true")
+                elif rand.random() < na_rate:
+                    cells.append("N/A")
+                else:
+                    cells.append(f"{rand.uniform(0, 100):.2f}")
+            writer.writerow(cells)
+    return rows
+
+
+def read_rows(path: str):
+    with open(path, newline="") as f:
+        rows = csv.reader(f)
+        header = next(rows)
+        return header, list(rows)
+
+
+def bench_pydantic(model_class, header: list, rows: list) -> float:
+    start = time.perf_counter()
+    for row in rows:
+        record = dict(zip(header, row))
+        try:
+            record["time"] = datetime.fromisoformat(record["time"])
+        except (ValueError, KeyError, TypeError):
+            continue
+        model_class(**record).to_dict()
+    return len(rows) / (time.perf_counter() - start)
+
+
+def bench_compiled(model_class, header: list, rows: list) -> float:
+    start = time.perf_counter()
+    decoder = SensorCsvRowDecoder.compile(model_class, tuple(header))
+    for row in rows:
+        decoder(row)
+    return len(rows) / (time.perf_counter() - start)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--na-rate", type=float, default=0.01)
+    parser.add_argument("--proj-name", action="append", default=None, help="預設量測 sidecar-redfish 與 inrow-cdu")
+    parser.add_argument("--output", default="")
+    args = parser.parse_args()
+
+    proj_names = args.proj_name or [ProjNames.SIDECAR.value, ProjNames.INROW_CDU.value]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for proj_name in proj_names:
+            model_class = SensorLogModelFactory.get_model(proj_name)
+            path = os.path.join(tmp_dir, f"sensor.log.{proj_name}.csv")
+            row_count = write_synthetic_csv(path, build_header(model_class), args.days, args.na_rate)
+            header, rows = read_rows(path)
+            pydantic_rps = bench_pydantic(model_class, header, rows)
+            compiled_rps = bench_compiled(model_class, header, rows)
+            results[proj_name] = {
+                "rows": row_count,
+                "pydantic_rows_per_sec": round(pydantic_rps, 1),
+                "compiled_rows_per_sec": round(compiled_rps, 1),
+                "speedup": round(compiled_rps / pydantic_rps, 2),
+            }
+            print(f"{proj_name}: pydantic {pydantic_rps:,.0f} rows/s, compiled {compiled_rps:,.0f} rows/s")
+
+    report = {"meta": {"days": args.days, "na_rate": args.na_rate}, "results": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
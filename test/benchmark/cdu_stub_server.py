@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+說明:
+    本機的 RestAPI (ITG_REST_HOST) / webUI (ITG_WEBAPP_HOST) 替身，讓沒有 CDU 控制器的環境也能跑 benchmark。
+    回應內容依 etc/hardware、etc/sensor 的設定產生，並可設定延遲、抖動與失敗率。
+
+    支援的 endpoint:
+        GET  /api/v1/cdu/components/chassis/summary
+        GET  /api/v1/cdu/components/thermal_equipment/summary
+        GET  /api/v1/cdu/status/sensor_value
+        GET  /api/v1/cdu/status/op_mode
+        GET  /api/v1/cdu/components/display/version
+        GET  /read_version
+        POST /login
+        (另外有 components/mc、components/Oem、status/pump_* 等，讓更多 Redfish route 可以跑完)
+
+使用方法:
+    python test/benchmark/cdu_stub_server.py --proj-name=sidecar-redfish --port=5001 --latency-ms=20 --jitter-ms=5 --failure-rate=0.01
+
+    # 在程式中使用
+    server = CduStubServer(proj_name="sidecar-redfish", latency_ms=20)
+    server.start()
+    os.environ["ITG_REST_HOST"] = server.base_url
+    ...
+    server.get_call_counts()  # { "/api/v1/cdu/components/chassis/summary": 3, ... }
+    server.stop()
+"""
+import os
+import sys
+import json
+import time
+import random
+import threading
+from argparse import ArgumentParser
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+import yaml
+
+PROJ_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class CduStubFault:
+    """
+    延遲/失敗注入設定
+    :param latency_ms: 每個 request 的基本延遲
+    :param jitter_ms: 延遲的隨機抖動 (+-)
+    :param failure_rate: 0~1, 回應 failure_status 的機率
+    :param failure_status: ex: 500, 503
+    """
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, failure_rate: float = 0, failure_status: int = 503):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+
+    def delay_sec(self, rand: random.Random) -> float:
+        jitter = rand.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def should_fail(self, rand: random.Random) -> bool:
+        return self.failure_rate > 0 and rand.random() < self.failure_rate
+
+
+class CduStubPayloads:
+    """
+    依專案設定檔 (hardware_info.yaml、sensor_info.yaml) 產生 RestAPI / webUI 的回應內容
+    """
+    def __init__(self, proj_name: str):
+        with open(os.path.join(PROJ_ROOT, "etc", "hardware", proj_name, "hardware_info.yaml"), encoding="utf-8") as f:
+            self.hardware_info = yaml.safe_load(f) or {}
+        with open(os.path.join(PROJ_ROOT, "etc", "sensor", proj_name, "sensor_info.yaml"), encoding="utf-8") as f:
+            self.sensor_info = yaml.safe_load(f) or {}
+
+    @classmethod
+    def _component(cls, reading: Any, state: str = "Enabled", health: str = "OK") -> dict:
+        return {
+            "status": {"state": state, "health": health},
+            "reading": reading,
+            "ServiceHours": 100,
+            "ServiceDate": 100,
+            "HardWareInfo": {},
+        }
+
+    def sensor_field_names(self) -> list:
+        field_names = ["pressure_filter_in", "pressure_filter_out"]
+        for section in ["id_readingInfo_map", "id_readingInfo_spare", "leak_detectors"]:
+            for reading_info in (self.sensor_info.get(section) or {}).values():
+                for field_name in str(reading_info.get("fieldNameToFetchSensorValue", "")).split(","):
+                    if field_name and field_name not in field_names:
+                        field_names.append(field_name)
+        return field_names
+
+    def sensor_value(self) -> dict:
+        ret = {}
+        for field_name in self.sensor_field_names():
+            ret[field_name] = 25.0
+            ret[f"{field_name}_spare"] = 25.0
+        for i in range(len(self.hardware_info.get("Fans", {}))):
+            ret[f"fan{i+1}_speed"] = 50
+        return ret
+
+    def chassis_summary(self) -> dict:
+        ret = { field_name: self._component(value) for field_name, value in self.sensor_value().items() }
+        for i in range(len(self.hardware_info.get("Fans", {}))):
+            ret[f"fan{i+1}"] = self._component(50)
+        for i in range(len(self.hardware_info.get("Pumps", {}))):
+            ret[f"pump{i+1}"] = self._component(50)
+        for power_supply in (self.hardware_info.get("PowerSupplies") or {}).values():
+            ret[power_supply["RestName"]] = self._component(None)
+        return ret
+
+    def thermal_equipment_summary(self) -> dict:
+        ret = self.chassis_summary()
+        leak_detectors = self.hardware_info.get("LeakDetectors", self.hardware_info.get("leak_detectors", {})) or {}
+        for leak_detector in leak_detectors.values():
+            ret[leak_detector.get("RestName", "leak_detector")] = self._component(None)
+        return ret
+
+    def op_mode(self) -> dict:
+        return {"mode": "auto", "temp_set": 35, "pressure_set": 100, "pump_swap_time": 24}
+
+    def version(self) -> dict:
+        return {
+            "version": {
+                "WebUI": "0112", "SCC_API": "0104", "SNMP": "0103", "Redfish_API": "0101",
+                "Redfish_Server": "0101", "Modbus_Server": "0101", "PLC": "0107D", "Release_Time": "2025-02-21",
+            },
+            "fw_info": {"SN": "130001", "Model": "CDU", "Version": "1", "PartNumber": "LCS-SCDU-1K3LR001"},
+        }
+
+    def read_version(self) -> dict:
+        return {"FW_Info": self.version()["fw_info"]}
+
+    def components_mc(self) -> dict:
+        ret = {"cdu_status": "OK", "fan_mc1": True, "fan_mc2": True}
+        for i in range(len(self.hardware_info.get("Pumps", {}))):
+            ret[f"mc{i+1}_sw"] = True
+        return ret
+
+    def components_oem(self) -> dict:
+        ret = {
+            "ControlMode": "auto", "TargetTemperature": 35, "TargetPressure": 100,
+            "FanSetPoint": 50, "PumpSetPoint": 50, "PumpSwapTime": 24, "PV1": 0,
+        }
+        for i in range(4):
+            ret[f"EV{i+1}"] = 0
+        for i in range(len(self.hardware_info.get("Pumps", {}))):
+            ret[f"Pump{i+1}Speed"] = 50
+            ret[f"Pump{i+1}Switch"] = True
+        return ret
+
+    def pump_status(self, suffix: str, value: Any) -> dict:
+        return { f"pump{i+1}_{suffix}": value for i in range(len(self.hardware_info.get("Pumps", {}))) }
+
+    def build_routes(self) -> Dict[str, Callable[[], Any]]:
+        """
+        :return: { path: 產生回應內容的 callable }
+        """
+        return {
+            "/api/v1/cdu/components/chassis/summary": self.chassis_summary,
+            "/api/v1/cdu/components/thermal_equipment/summary": self.thermal_equipment_summary,
+            "/api/v1/cdu/status/sensor_value": self.sensor_value,
+            "/api/v1/cdu/status/op_mode": self.op_mode,
+            "/api/v1/cdu/components/display/version": self.version,
+            "/api/v1/cdu/components/mc": self.components_mc,
+            "/api/v1/cdu/components/Oem": self.components_oem,
+            "/api/v1/cdu/status/pump_speed": lambda: self.pump_status("speed", 50),
+            "/api/v1/cdu/control/pump_speed": lambda: self.pump_status("speed", 50),
+            "/api/v1/cdu/status/pump_state": lambda: self.pump_status("state", "Enabled"),
+            "/api/v1/cdu/status/pump_health": lambda: self.pump_status("health", "OK"),
+            "/api/v1/cdu/status/pump_service_hours": lambda: self.pump_status("service_hours", 100),
+            "/read_version": self.read_version,
+            "/login": lambda: {"message": "ok"},
+        }
+
+
+class CduStubServer:
+    """
+    RestAPI / webUI 替身 (同一個 port 同時提供兩邊的 endpoint)
+    @note 每個 path 的呼叫次數會記錄在 get_call_counts()，用來觀察 Redfish 每個 endpoint 打了幾次上游
+    """
+    def __init__(
+        self,
+        proj_name: str = "sidecar-redfish",
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        failure_rate: float = 0,
+        failure_status: int = 503,
+        seed: Optional[int] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.default_fault = CduStubFault(latency_ms, jitter_ms, failure_rate, failure_status)
+        self.path_faults: Dict[str, CduStubFault] = {}
+        self.routes = CduStubPayloads(proj_name).build_routes()
+        self._rand = random.Random(seed)
+        self._call_counts = Counter()
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def set_fault(self, path: str = None, **kwargs) -> None:
+        """
+        :param path: None 表示修改預設值，否則只套用到指定 path
+        :param kwargs: latency_ms, jitter_ms, failure_rate, failure_status
+        """
+        if path is None:
+            for key, value in kwargs.items():
+                setattr(self.default_fault, key, value)
+            return
+        fault = self.path_faults.setdefault(path, CduStubFault(**vars(self.default_fault)))
+        for key, value in kwargs.items():
+            setattr(fault, key, value)
+
+    def set_payload(self, path: str, payload: Any) -> None:
+        """覆寫指定 path 的回應內容"""
+        self.routes[path] = payload if callable(payload) else (lambda: payload)
+
+    def get_call_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._call_counts)
+
+    def reset_call_counts(self) -> None:
+        with self._lock:
+            self._call_counts.clear()
+
+    def start(self) -> "CduStubServer":
+        self._httpd = ThreadingHTTPServer((self.host, self.port), self._build_handler())
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="CduStubServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handle(self, method: str, raw_path: str):
+        """
+        :return: (http status, response body)
+        """
+        path = urlsplit(raw_path).path
+        with self._lock:
+            self._call_counts[path] += 1
+            fault = self.path_faults.get(path, self.default_fault)
+            delay_sec = fault.delay_sec(self._rand)
+            should_fail = fault.should_fail(self._rand)
+        if delay_sec:
+            time.sleep(delay_sec)
+        if should_fail:
+            return fault.failure_status, {"error": f"Injected failure on {path}"}
+        if path not in self.routes:
+            return 404, {"error": f"{method} {path} is not supported by stub"}
+        return 200, self.routes[path]()
+
+    def _build_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # keep-alive
+
+            def _reply(self, method: str):
+                content_length = int(self.headers.get("Content-Length") or 0)
+                if content_length:
+                    self.rfile.read(content_length)
+                status, body = server._handle(method, self.path)
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._reply("GET")
+
+            def do_POST(self):
+                self._reply("POST")
+
+            def do_PATCH(self):
+                self._reply("PATCH")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="RestAPI / webUI stand-in server")
+    parser.add_argument("--proj-name", default="sidecar-redfish", choices=["sidecar-redfish", "inrow-cdu"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument("--failure-status", type=int, default=503)
+    args = parser.parse_args()
+
+    stub = CduStubServer(
+        proj_name=args.proj_name, host=args.host, port=args.port,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate, failure_status=args.failure_status,
+    ).start()
+    print(f"CDU stub server is running on {stub.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stub.stop()
+        sys.exit(0)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+說明:
+    端對端 latency benchmark。
+    啟動 RestAPI / webUI 替身 (cdu_stub_server.py)，把 ITG_REST_HOST、ITG_WEBAPP_HOST 指向它，
+    透過 Flask test client 對每一個已註冊的 Redfish GET route 發送 request，
+    統計每個 endpoint 的 throughput、p50/p95/p99 latency 與打到上游的次數，並輸出成 JSON。
+
+    輸出格式 (baseline file):
+    {
+        "meta": { "proj_name": ..., "iterations": ..., "latency_ms": ..., ... },
+        "endpoints": {
+            "/redfish/v1/Chassis/<chassis_id>": {
+                "path": "/redfish/v1/Chassis/1",
+                "status_codes": {"200": 50},
+                "requests": 50,
+                "throughput_rps": 812.3,
+                "mean_ms": 1.2, "p50_ms": 1.1, "p95_ms": 1.9, "p99_ms": 2.4,
+                "upstream_calls": {"/api/v1/cdu/components/chassis/summary": 1}
+            },
+            ...
+        }
+    }
+    @note upstream_calls 是整段量測期間上游被呼叫的次數，包含背景輪詢 (SensorSnapshotPoller) 的呼叫
+
+使用方法:
+    # 產生 baseline
+    python test/benchmark/run_benchmark.py --proj-name=sidecar-redfish --iterations=50 --output=/tmp/benchmark-baseline.json
+
+    # 與 baseline 比較，p95 變慢超過 20% 時 exit code 為 1 (給 CI 用)
+    python test/benchmark/run_benchmark.py --proj-name=sidecar-redfish --baseline=/tmp/benchmark-baseline.json --max-regression=0.2
+
+    # 模擬較慢、偶爾失敗的 CDU
+    python test/benchmark/run_benchmark.py --proj-name=sidecar-redfish --latency-ms=30 --jitter-ms=10 --failure-rate=0.02
+"""
+import os
+import sys
+import json
+import math
+import time
+import base64
+import datetime
+from argparse import ArgumentParser
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJ_ROOT = os.path.dirname(os.path.dirname(BENCHMARK_DIR))
+sys.path.append(PROJ_ROOT)
+sys.path.append(BENCHMARK_DIR)
+from cdu_stub_server import CduStubServer
+
+# route 參數的預設值, 可用 --param name=value 覆寫
+DEFAULT_ROUTE_PARAMS = {
+    "chassis_id": "1",
+    "cdu_id": "1",
+    "power_supply_id": "1",
+    "fan_id": "1",
+    "pump_id": "1",
+    "filter_id": "1",
+    "connector_id": "1",
+    "leak_detector_id": "1",
+    "sensor_id": "PrimaryFlowLitersPerMinute",
+    "control_id": "FansSpeedControl",
+    "log_service_id": "1",
+    "entry_id": "1",
+    "ethernet_interfaces_id": "eth0",
+    "hi_id": "1",
+    "cert_id": "1",
+    "report_id": "1",
+    "metric_definition_id": "1",
+    "metric_report_definition_id": "1",
+    "trigger_id": "BenchmarkTrigger",
+    "role_id": "Administrator",
+    "account_id": "1",
+    "session_id": "1",
+    "Subscriptions_id": "1",
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """nearest-rank percentile"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def collect_routes(app, params: Dict[str, str]) -> Dict[str, str]:
+    """
+    :return: { rule: 實際 request 的 path }
+    @note 只取 /redfish 底下的 GET route, 參數無法代入的 route 會略過
+    """
+    routes = {}
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        if "GET" not in rule.methods or not rule.rule.startswith("/redfish"):
+            continue
+        if any(arg not in params for arg in rule.arguments):
+            print(f"skip {rule.rule}: missing route params {rule.arguments - params.keys()}")
+            continue
+        routes[rule.rule] = rule.build({ arg: params[arg] for arg in rule.arguments }, append_unknown=False)[1]
+    return routes
+
+
+def setup_resources(app, headers: dict, params: Dict[str, str]) -> None:
+    """
+    建立預設不存在的 resource，讓帶 id 的 route 量測到正常的回應而不是 404 (結束時由 teardown_resources 刪除)
+    @note 已存在 (409) 也沒關係
+    """
+    with app.test_client() as client:
+        response = client.post("/redfish/v1/TelemetryService/Triggers", headers=headers, json={
+            "Id": params["trigger_id"],
+            "MetricProperties": [f"/redfish/v1/Chassis/{params['chassis_id']}/Sensors/{params['sensor_id']}/Reading"],
+            "NumericThresholds": {"UpperCritical": {"Reading": 1000000}},
+        })
+        if response.status_code not in (201, 409):
+            print(f"setup Trigger {params['trigger_id']} failed: {response.status_code} {response.get_data(as_text=True)}")
+
+
+def teardown_resources(app, headers: dict, params: Dict[str, str]) -> None:
+    with app.test_client() as client:
+        client.delete(f"/redfish/v1/TelemetryService/Triggers/{params['trigger_id']}", headers=headers)
+
+
+def run_endpoint(app, path: str, headers: dict, iterations: int, concurrency: int) -> dict:
+    def worker(count: int):
+        latencies, status_codes = [], Counter()
+        with app.test_client() as client:
+            for _ in range(count):
+                start = time.perf_counter()
+                response = client.get(path, headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                status_codes[str(response.status_code)] += 1
+        return latencies, status_codes
+
+    counts = [ iterations // concurrency + (1 if i < iterations % concurrency else 0) for i in range(concurrency) ]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(worker, [ c for c in counts if c > 0 ]))
+    elapsed_sec = time.perf_counter() - start
+
+    latencies = sorted(l for result in results for l in result[0])
+    status_codes = Counter()
+    for result in results:
+        status_codes.update(result[1])
+    return {
+        "path": path,
+        "status_codes": dict(status_codes),
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed_sec, 2) if elapsed_sec > 0 else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def compare_with_baseline(result: dict, baseline: dict, max_regression: float) -> List[str]:
+    """
+    :return: p95 變慢超過 max_regression 的 endpoint 說明
+    """
+    regressions = []
+    for rule, stats in result["endpoints"].items():
+        base_stats = baseline.get("endpoints", {}).get(rule)
+        if not base_stats or base_stats.get("p95_ms", 0) <= 0:
+            continue
+        ratio = stats["p95_ms"] / base_stats["p95_ms"] - 1
+        if ratio > max_regression:
+            regressions.append(f"{rule}: p95 {base_stats['p95_ms']}ms -> {stats['p95_ms']}ms (+{ratio:.0%})")
+    return regressions
+
+
+def main():
+    parser = ArgumentParser(description="Redfish end-to-end latency benchmark")
+    parser.add_argument("--proj-name", required=True, choices=["sidecar-redfish", "inrow-cdu"])
+    parser.add_argument("--iterations", type=int, default=50, help="每個 endpoint 的 request 數")
+    parser.add_argument("--warmup", type=int, default=2, help="每個 endpoint 量測前的暖機 request 數")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--filter", default="", help="只跑 rule 包含此字串的 endpoint")
+    parser.add_argument("--param", action="append", default=[], help="route 參數, ex: --param chassis_id=1")
+    parser.add_argument("--output", default=os.path.join(BENCHMARK_DIR, "benchmark-result.json"))
+    parser.add_argument("--baseline", default="", help="baseline json, 比較 p95 latency")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    stub = CduStubServer(
+        proj_name=args.proj_name, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate, seed=args.seed,
+    ).start()
+
+    # load_env 會用 .env 覆蓋環境變數，所以要在它之後、app 之前把上游指向替身
+    os.environ["IS_TESTING_MODE"] = "True"
+    sys.argv = [sys.argv[0], f"--proj-name={args.proj_name}"]
+    import load_env
+    os.environ["ITG_REST_HOST"] = stub.base_url
+    os.environ["ITG_WEBAPP_HOST"] = stub.base_url
+    from app import app
+    app.config["TESTING"] = True
+
+    token = base64.b64encode(f"{os.getenv('ADMIN_USERNAME', 'admin')}:{os.getenv('ADMIN_PASSWORD', 'Supermicro')}".encode()).decode()
+    headers = {"Authorization": f"Basic {token}"}
+    params = dict(DEFAULT_ROUTE_PARAMS)
+    for param in args.param:
+        name, value = param.split("=", 1)
+        params[name] = value
+
+    result = {
+        "meta": {
+            "proj_name": args.proj_name,
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "failure_rate": args.failure_rate,
+        },
+        "endpoints": {},
+    }
+    try:
+        setup_resources(app, headers, params)
+        for rule, path in collect_routes(app, params).items():
+            if args.filter and args.filter not in rule:
+                continue
+            with app.test_client() as client:
+                for _ in range(args.warmup):
+                    client.get(path, headers=headers)
+            stub.reset_call_counts()
+            stats = run_endpoint(app, path, headers, args.iterations, max(1, args.concurrency))
+            stats["upstream_calls"] = stub.get_call_counts()
+            result["endpoints"][rule] = stats
+            print(f"{rule}: p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms "
+                  f"rps={stats['throughput_rps']} status={stats['status_codes']} upstream={sum(stats['upstream_calls'].values())}")
+    finally:
+        teardown_resources(app, headers, params)
+        stub.stop()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"Benchmark result: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(result, baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from mylib.models.rf_status_model import RfStatusModel, RfStatusHealth
 from mylib.utils.StatusUtil import StatusUtil
 from mylib.utils import system_info
+from mylib.utils.HttpClientUtil import HttpClientUtil
+from mylib.utils.SingleFlightCache import SingleFlightCache, single_flight_cached
+from mylib.utils.ConcurrentFetchUtil import ConcurrentFetchUtil
+from mylib.utils.SensorCatalog import SensorCatalog, SensorPlanType
+from mylib.common.proj_error import ProjRedfishError
 
 def test_get_worst_health_model(client):
     """[TestCase] 取得健康度最差的"""
@@ -61,4 +66,210 @@ def test_get_system_uuid(client):
     logging.info(f"Testcase basic: uuid: {uuid}")
     assert uuid is not None
     assert len(uuid) == 36
-    assert uuid.count("-") == 4
\ No newline at end of file
+    assert uuid.count("-") == 4
+
+def test_http_client_util_keep_alive(client):
+    """[TestCase] 同一 host 共用 connection pool (keep-alive)，並有預設 timeout"""
+    import threading
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    connections = []
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        def setup(self):
+            super().setup()
+            connections.append(self.client_address)
+        def do_GET(self):
+            body = b'{"ok": true}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/api/v1/test"
+        assert HttpClientUtil.get_session(url) is HttpClientUtil.get_session(url)
+        for _ in range(5):
+            assert HttpClientUtil.get(url).json() == {"ok": True}
+        logging.info(f"connections: {connections}")
+        assert len(connections) == 1
+        print("PASS: 5 requests reuse 1 connection")
+
+        assert HttpClientUtil.get_session(url).default_timeout == HttpClientUtil.get_timeout()
+        print("PASS: default timeout is applied")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_single_flight_cache_coalesce(client):
+    """[TestCase] cache 過期時，同時間的多個 caller 只會計算一次"""
+    import time
+    import threading
+
+    call_cnt = {"value": 0}
+    cache = SingleFlightCache(maxsize=1, ttl=60)
+
+    @single_flight_cached(cache=cache)
+    def slow_read():
+        call_cnt["value"] += 1
+        time.sleep(0.2)
+        return {"reading": 1}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(slow_read())) for _ in range(50)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert call_cnt["value"] == 1
+    assert len(results) == 50 and all(r == {"reading": 1} for r in results)
+    print("PASS: 50 concurrent callers cost 1 upstream call")
+
+    key_stats = list(cache.stats().values())[0]
+    logging.info(f"stats: {key_stats}")
+    assert key_stats["misses"] == 1
+    assert key_stats["hits"] + key_stats["coalesced"] == 49
+    print("PASS: per-key stats")
+
+def test_single_flight_cache_error_not_cached(client):
+    """[TestCase] 計算失敗時不寫入 cache"""
+    cache = SingleFlightCache(maxsize=1, ttl=60)
+    call_cnt = {"value": 0}
+
+    @single_flight_cached(cache=cache)
+    def flaky_read():
+        call_cnt["value"] += 1
+        if call_cnt["value"] == 1:
+            raise ConnectionError("upstream down")
+        return "ok"
+
+    try:
+        flaky_read()
+        assert False, "should raise"
+    except ConnectionError:
+        pass
+    assert flaky_read() == "ok"
+    assert list(cache.stats().values())[0]["errors"] == 1
+    print("PASS: error is not cached")
+
+def test_single_flight_cache_invalidate_inflight(client):
+    """[TestCase] invalidate() 之前開始的計算結果不寫入 cache"""
+    import threading
+
+    cache = SingleFlightCache(maxsize=1, ttl=60)
+    started, release = threading.Event(), threading.Event()
+    call_cnt = {"value": 0}
+
+    @single_flight_cached(cache=cache)
+    def read_version():
+        call_cnt["value"] += 1
+        if call_cnt["value"] == 1:
+            started.set()
+            release.wait(5)
+            return "old"
+        return "new"
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(read_version()))
+    thread.start()
+    started.wait(5)
+    cache.invalidate()
+    assert read_version() == "new" # 不等待 invalidate 之前的計算
+    release.set()
+    thread.join()
+    assert results == ["old"] and read_version() == "new"
+    print("PASS: stale in-flight result is not cached")
+
+def test_concurrent_fetch_util_fetch_all(client):
+    """[TestCase] 多個上游來源平行取得，總時間約等於最慢的來源"""
+    import time
+
+    def slow(value, sec):
+        def _fetch():
+            time.sleep(sec)
+            return value
+        return _fetch
+
+    started_at = time.monotonic()
+    data = ConcurrentFetchUtil.fetch_all({
+        "version": slow({"WebUI": "0112"}, 0.3),
+        "uuid": slow("uuid-1", 0.3),
+        "summary": slow({"fan1": {}}, 0.3),
+    })
+    elapsed = time.monotonic() - started_at
+    logging.info(f"elapsed: {elapsed}")
+    assert data == {"version": {"WebUI": "0112"}, "uuid": "uuid-1", "summary": {"fan1": {}}}
+    assert elapsed < 0.8
+    print("PASS: sources are fetched concurrently")
+
+    data = ConcurrentFetchUtil.fetch_all({
+        "version": slow("v", 0.05),
+        "uuid": slow("late", 2),
+    }, deadline_sec=0.3, optional=["uuid"])
+    assert data == {"version": "v", "uuid": None}
+    print("PASS: optional source exceeding deadline is None")
+
+    try:
+        ConcurrentFetchUtil.fetch_all({
+            "version": slow("late", 2),
+            "uuid": slow("u", 0.05),
+        }, deadline_sec=0.3)
+        assert False, "should raise"
+    except ProjRedfishError as e:
+        assert "deadline" in e.message
+    print("PASS: required source exceeding deadline raises")
+
+
+def test_sensor_catalog_evaluate(client):
+    """[TestCase] sensor catalog 依預先編譯的計畫計算讀值，不改寫 sensor_info"""
+    import copy
+    from types import MappingProxyType
+    sensor_info = {
+        "id_readingInfo_map": {
+            "PrimaryFlowLitersPerMinute": {"ReadingUnits": "L/min", "fieldNameToFetchSensorValue": "coolant_flow_rate"},
+            "PrimaryDeltaPressurekPa": {"ReadingUnits": "kPa", "fieldNameToFetchSensorValue": "pressure_coolant_supply,pressure_coolant_return"},
+            "EnergykWh": {"ReadingUnits": "kWh", "fieldNameToFetchSensorValue": "EnergykWh"},
+        },
+        "id_readingInfo_spare": {
+            "PrimaryFlowLitersPerMinute": {"ReadingUnits": "L/min", "fieldNameToFetchSensorValue": "coolant_flow_rate"},
+        },
+    }
+    sensor_info_before = copy.deepcopy(sensor_info)
+    catalog = SensorCatalog.compile(sensor_info, {"Fans": {"1": {}, "2": {}}})
+    assert catalog.sensor_ids() == ("EnergykWh", "Fan1", "Fan2", "PrimaryDeltaPressurekPa", "PrimaryFlowLitersPerMinute")
+    assert catalog.get_plan("PrimaryDeltaPressurekPa").plan_type == SensorPlanType.Delta
+    assert catalog.get_plan("EnergykWh").plan_type == SensorPlanType.Energy
+    print("PASS: catalog is compiled with Fan sensors")
+
+    ok = {"state": "Enabled", "health": "OK"}
+    summary = MappingProxyType({
+        "coolant_flow_rate": {"reading": 12.345, "status": {"state": "Enabled", "health": "Critical"}},
+        "coolant_flow_rate_spare": {"reading": 11.0, "status": ok},
+        "pressure_coolant_supply": {"reading": 300.0, "status": ok},
+        "pressure_coolant_return": {"reading": 120.5, "status": {"state": "Enabled", "health": "Warning"}},
+        "power_total": {"reading": 2000.0, "status": ok},
+        "fan1": {"reading": 50, "status": ok},
+    })
+    flow = catalog.evaluate("PrimaryFlowLitersPerMinute", summary)
+    assert flow.reading == 12.35 and flow.health() == "Critical"
+    assert flow.has_spare and flow.spare_reading == 11.0
+    delta = catalog.evaluate("PrimaryDeltaPressurekPa", summary)
+    assert delta.reading == 179.5 and delta.health() == "Warning"
+    assert catalog.get_plan("EnergykWh").evaluate(summary, uptime_h=10).reading == 20.0
+    assert catalog.evaluate("Fan1", summary).reading_units == "%"
+    assert catalog.evaluate("NotExist", summary) is None
+    print("PASS: single/delta/energy/spare plans")
+
+    try:
+        delta.status["Health"] = "OK"
+        assert False, "should raise"
+    except TypeError:
+        pass
+    assert sensor_info == sensor_info_before
+    print("PASS: reading is immutable and sensor_info is not mutated")
@@ -0,0 +1,61 @@
+import os
+import time
+import pytest
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark"))
+import requests
+from cdu_stub_server import CduStubServer
+from run_benchmark import percentile, compare_with_baseline
+
+
+@pytest.fixture
+def stub_server():
+    with CduStubServer(proj_name="sidecar-redfish", seed=0) as server:
+        yield server
+
+
+def test_cdu_stub_server_payloads(stub_server):
+    """[TestCase] 替身回應 RestAPI / webUI 的資料並記錄呼叫次數"""
+    summary = requests.get(f"{stub_server.base_url}/api/v1/cdu/components/chassis/summary", timeout=5).json()
+    assert summary["fan1"]["status"]["health"] == "OK"
+    assert "power24v1" in summary
+    version = requests.get(f"{stub_server.base_url}/api/v1/cdu/components/display/version", timeout=5).json()
+    assert version["fw_info"]["SN"]
+    assert requests.get(f"{stub_server.base_url}/read_version", timeout=5).json()["FW_Info"]["SN"]
+    assert requests.post(f"{stub_server.base_url}/login", data={"username": "u"}, timeout=5).status_code == 200
+    assert requests.get(f"{stub_server.base_url}/not_exist", timeout=5).status_code == 404
+
+    call_counts = stub_server.get_call_counts()
+    assert call_counts["/api/v1/cdu/components/chassis/summary"] == 1
+    assert call_counts["/login"] == 1
+    print("PASS: stub payloads and call counts")
+
+
+def test_cdu_stub_server_fault_injection(stub_server):
+    """[TestCase] 延遲與失敗注入"""
+    path = "/api/v1/cdu/status/sensor_value"
+    stub_server.set_fault(path, latency_ms=100)
+    start = time.monotonic()
+    assert requests.get(f"{stub_server.base_url}{path}", timeout=5).status_code == 200
+    assert time.monotonic() - start >= 0.1
+    print("PASS: latency is injected")
+
+    stub_server.set_fault(path, latency_ms=0, failure_rate=1, failure_status=500)
+    assert requests.get(f"{stub_server.base_url}{path}", timeout=5).status_code == 500
+    assert requests.get(f"{stub_server.base_url}/api/v1/cdu/status/op_mode", timeout=5).status_code == 200
+    print("PASS: failure is injected only on the given path")
+
+
+def test_benchmark_percentile_and_regression():
+    """[TestCase] benchmark 的 percentile 計算與 baseline 比較"""
+    values = sorted(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([], 99) == 0.0
+
+    baseline = {"endpoints": {"/redfish/v1": {"p95_ms": 10.0}}}
+    assert compare_with_baseline({"endpoints": {"/redfish/v1": {"p95_ms": 11.0}}}, baseline, 0.2) == []
+    assert len(compare_with_baseline({"endpoints": {"/redfish/v1": {"p95_ms": 13.0}}}, baseline, 0.2)) == 1
+    print("PASS: percentile and regression check")
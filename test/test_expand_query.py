@@ -0,0 +1,103 @@
+import os
+import pytest
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark"))
+from mylib.adapters.sensor_snapshot_poller import SensorSnapshotPoller
+from mylib.utils.ExpandQueryUtil import ExpandQueryUtil, ExpandQuery
+from mylib.common.proj_error import ProjRedfishError
+from cdu_stub_server import CduStubPayloads
+
+
+@pytest.fixture
+def fake_summary(monkeypatch):
+    payloads = CduStubPayloads(os.environ["PROJ_NAME"])
+    counter = {"chassis_summary": 0}
+
+    def fetch_chassis_summary():
+        counter["chassis_summary"] += 1
+        summary = payloads.chassis_summary()
+        summary["coolant_flow_rate"]["reading"] = counter["chassis_summary"]
+        return summary
+
+    SensorSnapshotPoller.reset()
+    monkeypatch.setattr(SensorSnapshotPoller, "SOURCES", {"chassis_summary": fetch_chassis_summary})
+    monkeypatch.setattr(SensorSnapshotPoller, "start", classmethod(lambda cls: None))
+    yield counter
+    SensorSnapshotPoller.reset()
+
+
+def test_expand_query_parse():
+    """[TestCase] 解析 $expand"""
+    assert ExpandQueryUtil.parse(None) is None
+    assert ExpandQueryUtil.parse(".") == ExpandQuery(".", 1)
+    assert ExpandQueryUtil.parse("*($levels=1)") == ExpandQuery("*", 1)
+    for invalid in ["abc", ".($levels=x)", ".($levels=2)"]:
+        with pytest.raises(ProjRedfishError) as e:
+            ExpandQueryUtil.parse(invalid)
+        assert e.value.http_status == 400
+    print("PASS: $expand is parsed")
+
+
+def test_sensors_collection_expand(client, basic_auth_header, fake_summary):
+    """[TestCase] /Sensors?$expand=.($levels=1) 一次回應全部 sensor，且讀值來自同一版 snapshot"""
+    response = client.get("/redfish/v1/Chassis/1/Sensors", headers=basic_auth_header)
+    assert response.status_code == 200
+    member_cnt = response.json["Members@odata.count"]
+    assert all(set(m.keys()) == {"@odata.id"} for m in response.json["Members"])
+    print("PASS: collection without $expand has links only")
+
+    response = client.get("/redfish/v1/Chassis/1/Sensors?$expand=.($levels=1)", headers=basic_auth_header)
+    assert response.status_code == 200
+    members = response.json["Members"]
+    assert len(members) == member_cnt
+    assert all("Reading" in m and "Status" in m for m in members)
+    flow = [m for m in members if m["Id"] == "PrimaryFlowLitersPerMinute"]
+    assert flow and flow[0]["Reading"] == 1
+    assert fake_summary["chassis_summary"] == 1
+    print("PASS: members are expanded from one snapshot")
+
+    response = client.get("/redfish/v1/Chassis/1/Sensors?$expand=.($levels=3)", headers=basic_auth_header)
+    assert response.status_code == 400
+    print("PASS: unsupported $levels is rejected")
+
+
+def test_pumps_collection_expand(client, basic_auth_header, monkeypatch):
+    """[TestCase] /Pumps?$expand=. 全部 pump 共用同一次讀取的上游資料"""
+    import mylib.services.rf_ThermalEquipment_service as thermal_equipment_service
+    routes = CduStubPayloads(os.environ["PROJ_NAME"]).build_routes()
+    call_counts = {}
+
+    def fake_load_raw_from_api(url, *args, **kwargs):
+        path = url[url.index("/api/"):]
+        call_counts[path] = call_counts.get(path, 0) + 1
+        return routes[path]()
+
+    monkeypatch.setattr(thermal_equipment_service, "load_raw_from_api", fake_load_raw_from_api)
+    monkeypatch.setattr(thermal_equipment_service, "GetControlMode", lambda: "Automatic")
+    response = client.get("/redfish/v1/ThermalEquipment/CDUs/1/Pumps?$expand=.", headers=basic_auth_header)
+    assert response.status_code == 200
+    members = response.json["Members"]
+    assert members and all("PumpSpeedPercent" in m and "Status" in m for m in members)
+    assert call_counts and all(cnt == 1 for cnt in call_counts.values())
+    print("PASS: pump members are expanded from one read of each upstream source")
+
+    client.get("/redfish/v1/ThermalEquipment/CDUs/1/Pumps/1", headers=basic_auth_header) # 第一次 request 會先解析 resource type
+    call_counts.clear()
+    client.get("/redfish/v1/ThermalEquipment/CDUs/1/Pumps/1", headers=basic_auth_header)
+    client.get("/redfish/v1/ThermalEquipment/CDUs/1/Pumps/1", headers=basic_auth_header)
+    assert all(cnt == 2 for cnt in call_counts.values())
+    print("PASS: single pump GETs are not shared outside $expand")
+
+
+def test_expand_not_supported(client, basic_auth_header):
+    """[TestCase] 不支援展開的 resource 及 `$expand=~` 回 400"""
+    response = client.get("/redfish/v1/Chassis/1?$expand=.", headers=basic_auth_header)
+    assert response.status_code == 400
+    assert response.json["error"]["code"] == "Base.1.19.0.QueryNotSupportedOnResource"
+    print("PASS: $expand is rejected outside the expandable collections")
+
+    response = client.get("/redfish/v1/Chassis/1/Sensors?$expand=~", headers=basic_auth_header)
+    assert response.status_code == 400
+    assert response.json["error"]["code"] == "Base.1.19.0.QueryNotSupportedOnResource"
+    print("PASS: $expand=~ is rejected because collection Members are not Links")
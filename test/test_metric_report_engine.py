@@ -0,0 +1,85 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mylib.adapters.sensor_history_store import SensorHistoryStore
+from mylib.adapters.metric_report_engine import MetricReportEngine, ReportDefinition, ReportMetric
+from mylib.utils.TimerWheelUtil import TimerWheel
+
+
+def _engine(seconds=180) -> MetricReportEngine:
+    store = SensorHistoryStore(["v"], capacity=1000)
+    for i in range(seconds):
+        store.append(float(i), {"v": i})
+    return MetricReportEngine(lambda: store)
+
+
+def test_timer_wheel_schedule_and_advance():
+    """[TestCase] TimerWheel 依到期時間回傳工作，超過一圈的工作等到下一圈"""
+    wheel = TimerWheel(tick_sec=1, slots=8)
+    wheel.schedule("a", 3)
+    wheel.schedule("b", 12) # 與 a 在同一格，下一圈才到期
+    wheel.schedule("c", 5)
+    wheel.cancel("c")
+    assert wheel.advance(2) == []
+    assert wheel.advance(4) == [("a", 3)]
+    assert wheel.advance(11.5) == []
+    assert wheel.advance(100) == [("b", 12)]
+    assert len(wheel) == 0
+    print("PASS: due keys are returned once and later laps wait")
+
+    wheel.schedule("late", 50)
+    assert "late" in wheel and wheel.advance(101) == [("late", 50)]
+    print("PASS: keys scheduled in the past fire on the next tick")
+
+
+def test_metric_report_engine_report_updates():
+    """[TestCase] 每個定義依 RecurrenceInterval 產生報告，MetricValues 數量不超過 AppendLimit"""
+    engine = _engine()
+    metrics = (ReportMetric("v_avg", "v", "Average"), ReportMetric("v_last", "v"))
+    engine.upsert(ReportDefinition("wrap", "Wrap", metrics, recurrence_sec=60, append_limit=4), now=0.5)
+    engine.upsert(ReportDefinition("stop", "Stop", metrics, recurrence_sec=60, report_updates="AppendStopsWhenFull", append_limit=3), now=0.5)
+    engine.upsert(ReportDefinition("new", "New", metrics[:1], recurrence_sec=60, report_updates="NewReport", append_limit=2), now=0.5)
+    engine.upsert(ReportDefinition("over", "Over", metrics, recurrence_sec=60, report_updates="Overwrite"), now=0.5)
+    assert engine.run_due(59) == 0 and engine.report_ids() == []
+    assert engine.run_due(60) == 4
+
+    report = engine.get_report("wrap")
+    assert report["Timestamp"] == "1970-01-01T00:01:00+00:00" and report["ReportSequence"] == "1"
+    assert [(v["MetricId"], v["MetricValue"], v["Timestamp"]) for v in report["MetricValues"]] == [
+        ("v_avg", "29.5", "1970-01-01T00:01:00+00:00"),
+        ("v_last", "59.0", "1970-01-01T00:00:59+00:00"),
+    ]
+    print("PASS: functions are computed over the recurrence interval")
+
+    engine.run_due(120)
+    engine.run_due(180)
+    assert [v["MetricValue"] for v in engine.get_report("wrap")["MetricValues"]] == ["89.5", "119.0", "149.5", "179.0"]
+    assert [v["MetricValue"] for v in engine.get_report("stop")["MetricValues"]] == ["29.5", "59.0", "89.5"]
+    assert [v["MetricValue"] for v in engine.get_report("over")["MetricValues"]] == ["149.5", "179.0"]
+    assert engine.report_ids() == ["wrap", "stop", "new_19700101T000200Z", "new_19700101T000300Z", "over"]
+    assert engine.get_report("new_19700101T000100Z") is None
+    assert engine.get_report("new_19700101T000300Z")["ReportSequence"] == "3"
+    assert engine.stats()["metric_values"] == 4 + 3 + 2 + 2
+    print("PASS: ReportUpdates policies keep at most AppendLimit values")
+
+    engine.upsert(ReportDefinition("wrap", "Wrap", metrics, recurrence_sec=60, enabled=False), now=180)
+    assert engine.get_report("wrap") is None and engine.run_due(240) == 2
+    assert engine.remove("new") and engine.get_report("new_19700101T000300Z") is None
+    print("PASS: updated definitions restart and disabled ones are not scheduled")
+
+
+def test_metric_report_engine_reads_store_outside_lock():
+    """[TestCase] 到期時才取得 store，且取得時不持有 engine.lock (讀取 CSV 時不阻擋 GET 報告)"""
+    store = SensorHistoryStore(["v"], capacity=100)
+    store.append(1.0, {"v": 1})
+    lock_owned = []
+
+    def get_store():
+        lock_owned.append(engine.lock._is_owned())
+        return store
+
+    engine = MetricReportEngine(get_store)
+    engine.upsert(ReportDefinition("r", "R", (ReportMetric("v_last", "v"),), recurrence_sec=60), now=0.5)
+    assert engine.run_due(30) == 0 and lock_owned == []
+    assert engine.run_due(60) == 1 and lock_owned == [False]
+    print("PASS: the store is fetched only for due reports and outside the engine lock")
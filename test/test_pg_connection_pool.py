@@ -0,0 +1,82 @@
+import os
+import sys
+import threading
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from psycopg2 import extensions
+from mylib.adapters.pg_connection_pool import PgConnectionPool, PgPoolTimeoutError
+
+
+class FakeConnectionInfo:
+    def __init__(self):
+        self.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeConnection:
+    """只實作連線池會用到的部份 (不需要 PostgreSQL server)"""
+    def __init__(self):
+        self.closed = 0
+        self.autocommit = False
+        self.info = FakeConnectionInfo()
+        self.rollback_cnt = 0
+
+    def rollback(self):
+        self.rollback_cnt += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def pool():
+    connections = []
+    def connect():
+        connections.append(FakeConnection())
+        return connections[-1]
+    closed = []
+    pool = PgConnectionPool("test_db", connect, min_size=1, max_size=2, wait_timeout_sec=0.2, health_check_idle_sec=60, on_close=closed.append)
+    pool.connections, pool.closed_connections = connections, closed
+    yield pool
+    pool.close()
+
+
+def test_pg_connection_pool_reuses_connections(pool):
+    """[TestCase] 連線歸還後重複使用，未結束的 transaction 在歸還時 rollback"""
+    with pool.connection() as conn:
+        conn.autocommit = True
+        conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+    with pool.connection() as conn2:
+        assert conn2 is conn
+        assert conn2.autocommit is False
+        assert conn2.rollback_cnt == 1
+    stats = pool.stats()
+    assert (stats["created"], stats["checkouts"], stats["idle"], stats["in_use"]) == (1, 2, 1, 0)
+    print("PASS: connection is reused and reset on release")
+
+    conn = pool.acquire()
+    conn.closed = 1 # server 端斷線
+    pool.release(conn)
+    with pool.connection() as conn3:
+        assert conn3 is not conn
+    assert pool.closed_connections == [conn]
+    print("PASS: broken connection is replaced")
+
+
+def test_pg_connection_pool_waits_for_release(pool):
+    """[TestCase] 連線用完時等待歸還，逾時拋出 PgPoolTimeoutError"""
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(PgPoolTimeoutError):
+        pool.acquire()
+    assert pool.stats()["wait_timeouts"] == 1
+    print("PASS: overflow wait times out")
+
+    threading.Timer(0.05, pool.release, args=(first,)).start()
+    assert pool.acquire(timeout=2) is first
+    assert pool.stats()["waits"] == 2
+    print("PASS: waiting checkout gets the released connection")
+
+    pool.max_lifetime_sec = 0
+    pool.release(second)
+    assert second.closed and pool.stats()["idle"] == 0
+    print("PASS: connection over max lifetime is closed")
@@ -0,0 +1,478 @@
+import os
+import signal
+import time
+import pytest
+from datetime import datetime
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mylib.adapters.sensor_csv_adapter import SensorCsvAdapter
+from mylib.adapters.sensor_csv_tailer import SensorCsvTailer
+from mylib.adapters.sensor_history_store import SensorHistoryStore
+
+CSV_HEADER = "time,Coolant Supply Temperature (T1),Coolant Flow Rate (F1)\n"
+
+
+def _csv_row(ts: str, t1: float) -> str:
+    return f"{ts},{t1},{t1 * 2}\n"
+
+
+@pytest.fixture
+def sensor_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(SensorCsvAdapter, "SENSOR_ROOT", str(tmp_path))
+    monkeypatch.setattr(SensorCsvAdapter, "DAYS_TO_LOAD", 2)
+    monkeypatch.setattr(SensorCsvAdapter, "POLL_INTERVAL_SEC", 0)
+    monkeypatch.setattr(SensorCsvAdapter, "HISTORY_CACHE_DIR", "")
+    SensorCsvAdapter.reset()
+    yield tmp_path
+    SensorCsvAdapter.reset()
+
+
+def test_sensor_csv_tailer_reads_appended_rows(sensor_root):
+    """[TestCase] 只解析新附加的行，寫到一半的行留到下一次"""
+    path = sensor_root / "sensor.log.2025-07-01.csv"
+    path.write_text(CSV_HEADER + _csv_row("2025-07-01T00:00:00", 1.0) + _csv_row("2025-07-01T00:00:10", 2.0))
+    records = SensorCsvAdapter.get_all_sensor_data_as_list_of_dicts()
+    assert [r["Coolant Supply Temperature (T1)"] for r in records] == [1.0, 2.0]
+    tailer = SensorCsvAdapter._tailer
+    assert tailer.parsed_row_count == 2
+
+    with open(path, "a") as f:
+        f.write(_csv_row("2025-07-01T00:00:20", 3.0) + "2025-07-01T00:00:30,4.")
+    new_records = SensorCsvAdapter.get_all_sensor_data_as_list_of_dicts()
+    assert [r["Coolant Supply Temperature (T1)"] for r in new_records] == [1.0, 2.0, 3.0]
+    assert tailer.parsed_row_count == 3
+    assert len(records) == 2 # 之前回傳的結果不會被修改
+    print("PASS: only appended rows are parsed")
+
+    with open(path, "a") as f:
+        f.write("0,8.0\n")
+    assert SensorCsvAdapter.get_all_sensor_data_as_list_of_dicts()[-1]["Coolant Flow Rate (F1)"] == 8.0
+    assert tailer.parsed_row_count == 4
+    print("PASS: partial line is parsed after it is completed")
+
+
+def test_sensor_csv_missing_root_path(sensor_root, monkeypatch, capsys):
+    """[TestCase] 日誌目錄不存在時只警告一次，POLL_INTERVAL_SEC 內不再檢查"""
+    missing = sensor_root / "missing"
+    monkeypatch.setattr(SensorCsvAdapter, "SENSOR_ROOT", str(missing))
+    monkeypatch.setattr(SensorCsvAdapter, "POLL_INTERVAL_SEC", 60)
+    for _ in range(3):
+        assert len(SensorCsvAdapter.get_sensor_history_store()) == 0
+    assert capsys.readouterr().out.count("directory not found") == 1
+    missing.mkdir()
+    assert SensorCsvAdapter._get_root_path() is None
+    print("PASS: missing directory is cached and warned once")
+
+    SensorCsvAdapter._missing_root = (str(missing), time.monotonic()) # 經過 POLL_INTERVAL_SEC
+    assert SensorCsvAdapter._get_root_path() == str(missing)
+    print("PASS: directory is found again after the poll interval")
+
+
+def test_sensor_csv_tailer_rotation_and_truncation(sensor_root):
+    """[TestCase] 每日輪替、超出保留天數與檔案截斷"""
+    day1 = sensor_root / "sensor.log.2025-07-01.csv"
+    day2 = sensor_root / "sensor.log.2025-07-02.csv"
+    day3 = sensor_root / "sensor.log.2025-07-03.csv"
+    day1.write_text(CSV_HEADER + _csv_row("2025-07-01T23:59:50", 1.0))
+    day2.write_text(CSV_HEADER + _csv_row("2025-07-02T00:00:00", 2.0))
+    records = SensorCsvAdapter.get_all_sensor_data_as_list_of_dicts()
+    assert [r["Coolant Supply Temperature (T1)"] for r in records] == [1.0, 2.0]
+
+    day3.write_text(CSV_HEADER + _csv_row("2025-07-03T00:00:00", 3.0))
+    records = SensorCsvAdapter.get_all_sensor_data_as_list_of_dicts()
+    assert [r["Coolant Supply Temperature (T1)"] for r in records] == [2.0, 3.0]
+    print("PASS: rotated file is loaded and expired file is dropped")
+
+    day3.write_text(CSV_HEADER + _csv_row("2025-07-03T00:00:10", 5.0))
+    records = SensorCsvAdapter.get_all_sensor_data_as_list_of_dicts()
+    assert [r["Coolant Supply Temperature (T1)"] for r in records] == [2.0, 5.0]
+    print("PASS: truncated file is re-read")
+
+
+def test_sensor_csv_tailer_out_of_order_rows(tmp_path):
+    """[TestCase] 時間倒退的資料仍維持排序"""
+    path = tmp_path / "sensor.log.2025-07-01.csv"
+    path.write_text("time,v\n2025-07-01T00:00:10,1\n")
+    store = SensorHistoryStore(["v"], capacity=10)
+    tailer = SensorCsvTailer(str(tmp_path), lambda row: {"time": datetime.fromisoformat(row["time"]), "v": row["v"]}, store)
+    tailer.poll()
+    with open(path, "a") as f:
+        f.write("2025-07-01T00:00:05,2\n")
+    assert tailer.poll()
+    assert list(store.get_column("v")) == [2.0, 1.0]
+    print("PASS: records are kept sorted")
+
+
+def test_sensor_csv_tailer_skips_malformed_rows(tmp_path):
+    """[TestCase] 無法解碼或解析的行逐行略過；解析失敗時 cursor 不前進，被截斷的檔案下一次仍會移除舊資料"""
+    path = tmp_path / "sensor.log.2025-07-01.csv"
+    path.write_bytes(b"time,v\n2025-07-01T00:00:00,1\n2025-07-01T00:00:10,\xff\xfe\n2025-07-01T00:00:20,3\n")
+
+    def decode_row(row):
+        if row["v"] == "bad":
+            raise ValueError("invalid value")
+        return {"time": datetime.fromisoformat(row["time"]), "v": row["v"]}
+
+    store = SensorHistoryStore(["v"], capacity=10)
+    tailer = SensorCsvTailer(str(tmp_path), decode_row, store)
+    assert tailer.poll()
+    assert list(store.get_column("v")) == [1.0, 3.0]
+    with open(path, "ab") as f:
+        f.write(b"2025-07-01T00:00:30,bad\n2025-07-01T00:00:40,5\n")
+    assert tailer.poll()
+    assert list(store.get_column("v")) == [1.0, 3.0, 5.0]
+    assert tailer.skipped_row_count == 2
+    print("PASS: malformed rows are skipped one at a time")
+
+    path.write_bytes(b"time,v\n2025-07-01T00:00:50,6\n")
+    failing = {"count": 1}
+    parse_chunk = tailer._parse_chunk
+
+    def flaky_parse_chunk(chunk, header):
+        if failing["count"]:
+            failing["count"] -= 1
+            raise RuntimeError("parse error")
+        return parse_chunk(chunk, header)
+
+    tailer._parse_chunk = flaky_parse_chunk
+    assert not tailer.poll()
+    assert list(store.get_column("v")) == [1.0, 3.0, 5.0]
+    assert tailer.poll()
+    assert list(store.get_column("v")) == [6.0]
+    print("PASS: the cursor moves only after a successful parse, and stale rows are dropped on retry")
+
+
+def test_sensor_history_store_ring_buffer():
+    """[TestCase] ring buffer 覆寫最舊資料，時間區間以二分搜尋切片"""
+    store = SensorHistoryStore(["v"], ["mode"], capacity=4)
+    for i in range(6):
+        store.append(100.0 + i, {"v": i, "mode": "Auto" if i % 2 else None})
+    assert len(store) == 4
+    assert list(store.get_timestamps()) == [102.0, 103.0, 104.0, 105.0]
+    assert list(store.get_column("v")) == [2.0, 3.0, 4.0, 5.0]
+    assert store.get_column("mode") == [None, "Auto", None, "Auto"]
+    print("PASS: oldest rows are overwritten")
+
+    lo, hi = store.time_range(103.0, 105.0)
+    assert (lo, hi) == (1, 3)
+    assert list(store.get_column("v", lo, hi)) == [3.0, 4.0]
+    assert store.aggregate("v", "Average", lo, hi) == 3.5
+    assert store.aggregate("v", "Maximum", 0, 4) == 5.0
+    assert store.aggregate("v", "Minimum", 4, 4) is None
+    print("PASS: time range slicing and aggregation")
+
+    store.append(106.0, {"v": None})
+    assert store.get_row(3) == {"v": None, "mode": None}
+    assert store.aggregate("v", "Summation", 0, 4) == 3.0 + 4.0 + 5.0
+    store.drop_tail(1)
+    store.drop_head(1)
+    assert list(store.get_timestamps()) == [104.0, 105.0]
+    assert store.to_records()[0]["time"] == datetime(1970, 1, 1, 0, 1, 44)
+    with pytest.raises(ValueError):
+        store.append(100.0, {"v": 1})
+    print("PASS: missing values, drop and to_records")
+
+
+def test_sensor_statistics_from_history(sensor_root):
+    """[TestCase] "recent" 統計值由歷史資料計算，不需要連線 Postgres"""
+    from mylib.services.rf_telemetry_service import RfTelemetryService
+    path = sensor_root / "sensor.log.2025-07-01.csv"
+    path.write_text(CSV_HEADER + "".join(_csv_row(f"2025-07-01T00:00:{s:02d}", float(s)) for s in range(0, 60, 10)))
+    end_time = datetime.fromisoformat("2025-07-01T00:01:00+00:00")
+    result = RfTelemetryService().get_sensor_statistics(
+        [{"duration": "PT30S", "fields": ["coolant_supply_temperature"], "stats": ["Average", "Maximum"]}],
+        end_time=end_time,
+    )
+    assert {r["property"]: r["value"] for r in result} == {"Average_PT30S": "40.0", "Maximum_PT30S": "50.0"}
+    print("PASS: statistics are computed from history")
+
+
+def test_sensor_history_persisted_for_warm_start(sensor_root, tmp_path_factory, monkeypatch):
+    """[TestCase] 重新啟動時載入存檔，只解析存檔之後寫入 CSV 的資料"""
+    cache_dir = str(tmp_path_factory.mktemp("history_cache"))
+    monkeypatch.setattr(SensorCsvAdapter, "HISTORY_CACHE_DIR", cache_dir)
+    monkeypatch.setattr(SensorCsvAdapter, "HISTORY_PERSIST_INTERVAL_SEC", 0)
+    monkeypatch.setattr(SensorCsvAdapter, "_atexit_registered", True)
+    path = sensor_root / "sensor.log.2025-07-01.csv"
+    path.write_text(CSV_HEADER + "".join(_csv_row(f"2025-07-01T00:00:{s:02d}", float(s)) for s in range(3)))
+    assert len(SensorCsvAdapter.get_sensor_history_store()) == 3
+    assert sorted(os.listdir(cache_dir))[:2] == ["col_0.1.f64", "col_1.1.f64"]
+    print("PASS: history is persisted after the cold load")
+
+    with open(path, "a") as f:
+        f.write(_csv_row("2025-07-01T00:00:03", 3.0))
+    SensorCsvAdapter.get_sensor_history_store()
+    with open(path, "a") as f:
+        f.write(_csv_row("2025-07-01T00:00:04", 4.0))
+
+    # 模擬重新啟動
+    SensorCsvAdapter.reset()
+    store = SensorCsvAdapter.get_sensor_history_store()
+    assert SensorCsvAdapter._tailer.parsed_row_count == 1
+    assert list(store.get_column("Coolant Supply Temperature (T1)")) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert store.get_column("Mode Selection") == [None] * 5
+    print("PASS: only rows written after the cache are parsed on warm start")
+
+    path.write_text(CSV_HEADER + _csv_row("2025-07-01T00:00:09", 9.0))
+    SensorCsvAdapter.reset()
+    store = SensorCsvAdapter.get_sensor_history_store()
+    assert list(store.get_column("Coolant Supply Temperature (T1)")) == [9.0]
+    print("PASS: file rewritten while stopped is re-read")
+
+
+def _wait_until(predicate, timeout=5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return predicate()
+
+
+def test_sensor_history_background_refresh(sensor_root, tmp_path_factory, monkeypatch):
+    """[TestCase] app 啟動時在背景載入歷史資料，收到 SIGTERM 時存檔"""
+    cache_dir = str(tmp_path_factory.mktemp("history_cache"))
+    monkeypatch.setattr(SensorCsvAdapter, "HISTORY_CACHE_DIR", cache_dir)
+    monkeypatch.setattr(SensorCsvAdapter, "HISTORY_PERSIST_INTERVAL_SEC", 3600)
+    monkeypatch.setattr(SensorCsvAdapter, "_atexit_registered", True)
+    monkeypatch.setattr(SensorCsvAdapter, "_sigterm_handler_installed", False)
+    path = sensor_root / "sensor.log.2025-07-01.csv"
+    path.write_text(CSV_HEADER + "".join(_csv_row(f"2025-07-01T00:00:{s:02d}", float(s)) for s in range(3)))
+
+    received = []
+    original_handler = signal.signal(signal.SIGTERM, lambda signum, frame: received.append(signum))
+    try:
+        SensorCsvAdapter.start_background_refresh()
+        assert _wait_until(lambda: SensorCsvAdapter._tailer is not None and len(SensorCsvAdapter._tailer.sink) == 3)
+        print("PASS: history is loaded without a request")
+
+        with open(path, "a") as f:
+            f.write(_csv_row("2025-07-01T00:00:03", 3.0))
+        assert _wait_until(lambda: len(SensorCsvAdapter._tailer.sink) == 4)
+        print("PASS: new rows are read in the background")
+
+        signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+        assert received == [signal.SIGTERM]
+    finally:
+        signal.signal(signal.SIGTERM, original_handler)
+
+    # 模擬重新啟動
+    SensorCsvAdapter.reset()
+    store = SensorCsvAdapter.get_sensor_history_store()
+    assert SensorCsvAdapter._tailer.parsed_row_count == 0
+    assert list(store.get_column("Coolant Supply Temperature (T1)")) == [0.0, 1.0, 2.0, 3.0]
+    print("PASS: SIGTERM persists the history before chaining to the previous handler")
+
+
+def test_sensor_history_persistence_ring_buffer(tmp_path):
+    """[TestCase] ring buffer 覆寫後的存檔只附加新資料，載入結果與存檔時相同"""
+    from mylib.adapters.sensor_history_persistence import SensorHistoryPersistence
+    store = SensorHistoryStore(["v"], ["mode"], capacity=4)
+    persistence = SensorHistoryPersistence(str(tmp_path))
+    for i in range(3):
+        store.append(float(i), {"v": i, "mode": "Auto"})
+    persistence.save(store, [])
+    for i in range(3, 6):
+        store.append(float(i), {"v": i, "mode": "Manual"})
+    persistence.save(store, [{"path": "sensor.log.x.csv", "offset": 1}])
+    assert os.path.getsize(tmp_path / "time.1.f64") == 6 * 8
+    print("PASS: only new rows are appended")
+
+    loaded = SensorHistoryStore(["v"], ["mode"], capacity=4)
+    assert SensorHistoryPersistence(str(tmp_path)).load(loaded) == [{"path": "sensor.log.x.csv", "offset": 1}]
+    assert list(loaded.get_timestamps()) == [2.0, 3.0, 4.0, 5.0]
+    assert loaded.get_column("mode") == ["Auto", "Manual", "Manual", "Manual"]
+    assert SensorHistoryPersistence(str(tmp_path)).load(SensorHistoryStore(["other"], capacity=4)) is None
+    print("PASS: persisted columns are loaded")
+
+    store.drop_tail(1)
+    persistence.save(store, [])
+    loaded = SensorHistoryStore(["v"], ["mode"], capacity=4)
+    SensorHistoryPersistence(str(tmp_path)).load(loaded)
+    assert list(loaded.get_column("v")) == [2.0, 3.0, 4.0]
+    assert os.path.getsize(tmp_path / "time.2.f64") == 3 * 8
+    assert not os.path.exists(tmp_path / "time.1.f64")
+    print("PASS: rewritten rows trigger a full rewrite")
+
+
+def test_sensor_history_persistence_interrupted_rewrite(tmp_path, monkeypatch):
+    """[TestCase] 重寫在切換 header 前中斷時，載入的仍是上次完整的存檔"""
+    from mylib.adapters.sensor_history_persistence import SensorHistoryPersistence
+    store = SensorHistoryStore(["v"], capacity=8)
+    persistence = SensorHistoryPersistence(str(tmp_path))
+    for i in range(4):
+        store.append(float(i), {"v": i})
+    persistence.save(store, [{"path": "sensor.log.x.csv", "offset": 4}])
+
+    store.drop_tail(2)
+    store.append(9.0, {"v": 9})
+    def crash(*args, **kwargs):
+        raise OSError("power lost")
+    monkeypatch.setattr(persistence, "_write_header", crash)
+    with pytest.raises(OSError):
+        persistence.save(store, [{"path": "sensor.log.x.csv", "offset": 5}])
+    assert os.path.getsize(tmp_path / "time.1.f64") == 4 * 8
+    assert os.path.getsize(tmp_path / "time.2.f64") == 3 * 8
+
+    loaded = SensorHistoryStore(["v"], capacity=8)
+    assert SensorHistoryPersistence(str(tmp_path)).load(loaded) == [{"path": "sensor.log.x.csv", "offset": 4}]
+    assert list(loaded.get_column("v")) == [0.0, 1.0, 2.0, 3.0]
+    print("PASS: the old header and columns stay consistent after an interrupted rewrite")
+
+    monkeypatch.undo()
+    restarted = SensorHistoryPersistence(str(tmp_path))
+    restarted.load(SensorHistoryStore(["v"], capacity=8))
+    restarted.save(store, [])
+    assert sorted(f for f in os.listdir(tmp_path) if f.endswith(".f64")) == ["col_0.1.f64", "time.1.f64"]
+    print("PASS: files left by the interrupted rewrite are removed on the next save")
+
+
+def test_history_resample_window():
+    """[TestCase] 依時間區段一次計算所有 metric 的 Minimum/Maximum/Average/Last"""
+    import math
+    from mylib.utils.HistoryResampleUtil import HistoryResampleUtil
+    store = SensorHistoryStore(["v", "w"], ["mode"], capacity=100)
+    for ts, v, w, mode in [(0.0, 1, 5, "Auto"), (3.0, 3, None, None), (9.0, 2, None, "Manual"), (25.0, 4, None, None)]:
+        store.append(ts, {"v": v, "w": w, "mode": mode})
+    window = HistoryResampleUtil.resample(store, 10)
+    assert list(window.bucket_starts) == [0.0, 20.0]
+    assert list(window.counts) == [3, 1]
+    assert list(window.get("Minimum", "v")) == [1.0, 4.0]
+    assert list(window.get("Maximum", "v")) == [3.0, 4.0]
+    assert list(window.get("Average", "v")) == [2.0, 4.0]
+    assert list(window.get("Last", "v")) == [2.0, 4.0]
+    print("PASS: empty buckets are skipped and each bucket is aggregated")
+
+    assert window.get("Average", "w")[0] == 5.0
+    assert math.isnan(window.get("Maximum", "w")[1])
+    assert window.get("Last", "mode") == ["Manual", None]
+    assert "mode" not in window.values["Average"]
+    print("PASS: missing values are ignored")
+
+    window = HistoryResampleUtil.resample(store, 5, start_ts=3.0, end_ts=25.0, metrics=["v"], functions=["Average"])
+    assert list(window.bucket_starts) == [0.0, 5.0]
+    assert list(window.get("Average", "v")) == [3.0, 2.0]
+    with pytest.raises(ValueError):
+        HistoryResampleUtil.resample(store, 5, functions=["Median"])
+    print("PASS: time range, metrics and functions are selectable")
+
+
+@pytest.mark.parametrize("model_name", ["SidecarSensorLogModel", "InrowcduSensorLogModel"])
+def test_compiled_row_decoder_matches_pydantic(model_name):
+    """[TestCase] 編譯後的 row decoder 與 pydantic model 的結果相同 ("N/A"、空值、缺少的欄位)"""
+    from mylib.models import sensor_log_model
+    from mylib.adapters.sensor_csv_decoder import SensorCsvRowDecoder
+    model_class = getattr(sensor_log_model, model_name)
+    columns = [info.alias or name for name, info in model_class.model_fields.items()]
+    header = columns[:-1] + ["Unknown Column"] # 少一個 model 欄位、多一個未知欄位
+    cells = ["2025-07-01T00:00:10"] + [["1.5", "N/A", "", "abc", "Auto", "3"][i % 6] for i in range(len(header) - 1)]
+    for i, column in enumerate(header):
+        if column == "Operation in Group Control":
+            cells[i] = "true" # pydantic 無法轉換的 bool 會讓整行失敗
+
+    decoder = SensorCsvRowDecoder.compile(model_class, tuple(header))
+    assert SensorCsvRowDecoder.compile(model_class, tuple(header)) is decoder
+    row = dict(zip(header, cells))
+    row["time"] = datetime.fromisoformat(row["time"])
+    assert decoder(cells) == model_class(**row).to_dict()
+    print("PASS: decoded record equals the pydantic model")
+
+    assert decoder(["not a time"] + cells[1:]) is None
+    assert decoder(cells[:3])[columns[3]] is None
+    print("PASS: invalid time is skipped and short rows are padded with None")
+
+
+def test_sensor_csv_strict_row_validation(sensor_root, monkeypatch):
+    """[TestCase] strict 模式以 pydantic model 驗證，結果與編譯後的 decoder 相同"""
+    path = sensor_root / "sensor.log.2025-07-01.csv"
+    path.write_text(CSV_HEADER + "2025-07-01T00:00:00,N/A,2.5\n" + "bad time,1,1\n")
+    fast_records = SensorCsvAdapter.get_all_sensor_data_as_list_of_dicts()
+    assert SensorCsvAdapter._tailer.compile_row_decoder is not None
+
+    monkeypatch.setattr(SensorCsvAdapter, "STRICT_ROW_VALIDATION", True)
+    strict_records = SensorCsvAdapter.get_all_sensor_data_as_list_of_dicts()
+    assert SensorCsvAdapter._tailer.compile_row_decoder is None
+    assert strict_records == fast_records
+    assert fast_records[0]["Coolant Supply Temperature (T1)"] is None
+    assert fast_records[0]["Coolant Flow Rate (F1)"] == 2.5
+    print("PASS: strict mode and compiled decoder produce the same records")
+
+
+def test_sensor_csv_parallel_cold_load(sensor_root, monkeypatch):
+    """[TestCase] 冷啟動以 process pool 分段解析多天的 CSV，結果與逐檔讀取相同，之後的新資料照常附加"""
+    from mylib.adapters.sensor_csv_parallel_loader import SensorCsvParallelLoader
+    day1 = sensor_root / "sensor.log.2025-07-01.csv"
+    day2 = sensor_root / "sensor.log.2025-07-02.csv"
+    day1.write_text(CSV_HEADER + "".join(_csv_row(f"2025-07-01T00:{m:02d}:00", float(m)) for m in range(60)))
+    day2.write_text(CSV_HEADER + "".join(_csv_row(f"2025-07-02T00:{m:02d}:00", float(m)) for m in range(30)) + "2025-07-02T00:30:00,1")
+
+    monkeypatch.setattr(SensorCsvAdapter, "STRICT_ROW_VALIDATION", True)
+    expected = SensorCsvAdapter.get_all_sensor_data_as_list_of_dicts()
+    SensorCsvAdapter.reset()
+    monkeypatch.setattr(SensorCsvAdapter, "STRICT_ROW_VALIDATION", False)
+    monkeypatch.setattr(SensorCsvAdapter, "INGEST_WORKERS", 2)
+    monkeypatch.setattr(SensorCsvAdapter, "INGEST_CHUNK_BYTES", 512)
+    monkeypatch.setattr(SensorCsvAdapter, "INGEST_PARALLEL_MIN_BYTES", 0)
+    calls = {"count": 0}
+    load = SensorCsvParallelLoader.__call__
+    def counting_load(self, paths):
+        calls["count"] += 1
+        return load(self, paths)
+    monkeypatch.setattr(SensorCsvParallelLoader, "__call__", counting_load)
+
+    records = SensorCsvAdapter.get_all_sensor_data_as_list_of_dicts()
+    assert calls["count"] == 1
+    assert len(records) == 90
+    assert records == expected
+    assert SensorCsvAdapter._tailer.parsed_row_count == 90
+    print("PASS: parallel cold load equals sequential parsing")
+
+    with open(day2, "a") as f:
+        f.write("0,5.0\n")
+    records = SensorCsvAdapter.get_all_sensor_data_as_list_of_dicts()
+    assert calls["count"] == 1
+    assert records[-1]["Coolant Flow Rate (F1)"] == 5.0
+    assert SensorCsvAdapter._tailer.parsed_row_count == 91
+    print("PASS: partial last line is read incrementally after the cold load")
+
+
+def test_sensor_csv_parallel_worker_reimport_has_no_side_effects():
+    """[TestCase] spawn 的 worker 以 __mp_main__ 重新 import app.py 時，不會建立 Flask app 或初始化 DB"""
+    import runpy
+    app_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+    module_globals = runpy.run_path(app_path, run_name="__mp_main__")
+    assert "create_app" in module_globals
+    assert module_globals["_app"] is None
+    assert "app" not in module_globals
+    print("PASS: re-importing app.py as __mp_main__ does not build the app")
+
+
+def test_sensor_statistics_engine_sliding_windows():
+    """[TestCase] 滑動視窗隨新資料增量更新，資料未涵蓋視窗或查詢較舊的時間時不回答"""
+    from mylib.adapters.sensor_statistics_engine import SensorStatisticsEngine, SlidingWindow
+    store = SensorHistoryStore(["v"], capacity=100)
+    for i in range(20):
+        store.append(100.0 + i, {"v": i})
+    engine = SensorStatisticsEngine()
+    engine.configure({("v", "PT5S"): ("v", 5), ("v", "PT30S"): ("v", 30)})
+    engine.sync(store)
+    assert [engine.get("v", "PT5S", stat, 120.0) for stat in ("Minimum", "Maximum", "Average")] == [15.0, 19.0, 17.0]
+    with pytest.raises(KeyError):
+        engine.get("v", "PT30S", "Average", 120.0)
+    with pytest.raises(KeyError):
+        engine.get("v", "PT5S", "Average", 119.0)
+    print("PASS: windows answer only when covered and recent")
+
+    store.append(120.0, {"v": -1})
+    store.append(121.0, {"v": 50})
+    engine.sync(store)
+    assert engine.get("v", "PT5S", "Minimum", 122.0) == -1.0
+    assert engine.get("v", "PT5S", "Maximum", 122.0) == 50.0
+    assert engine.get("v", "PT5S", "Average", 130.0) is None
+    print("PASS: new rows update the windows and old rows are evicted")
+
+    window = SlidingWindow(10)
+    window.add(1.0, float("nan"))
+    window.add(2.0, 3.0)
+    assert len(window) == 1 and window.get("Summation", 5.0) == 3.0
+    print("PASS: missing values are skipped")
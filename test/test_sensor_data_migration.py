@@ -0,0 +1,100 @@
+import os
+import sys
+from contextlib import contextmanager
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mylib.adapters.sensor_data_migration import SensorDataMigration
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.result = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        self.db.statements.append(statement)
+        if statement.startswith("WITH batch AS"):
+            # 模擬依 id 分批回填: rows 為資料表內的 id
+            batch = [i for i in self.db.row_ids if i > params["last_id"]][:params["batch_size"]]
+            self.result = (max(batch) if batch else None, len(batch))
+
+    def fetchone(self):
+        return self.result
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self):
+        return FakeCursor(self.db)
+
+
+class FakeDb:
+    """只記錄執行的 SQL (不需要 PostgreSQL server)"""
+    DB_NAME = "test_db"
+
+    def __init__(self, column_types, row_ids, version=None):
+        self.column_types = column_types
+        self.row_ids = row_ids
+        self.version = version
+        self.statements = []
+
+    @contextmanager
+    def get_connection(self, dbname=None, autocommit=False):
+        yield FakeConnection(self)
+
+    def exec(self, statement, params=None, *, autocommit=False):
+        self.statements.append(statement)
+        if statement.startswith("INSERT INTO schema_version"):
+            self.version = params[1]
+        return {}
+
+    def query(self, statement, params=None):
+        self.statements.append(statement)
+        if "information_schema.columns" in statement:
+            return list(self.column_types.items())
+        if "FROM schema_version" in statement:
+            return [(self.version,)] if self.version else []
+        return []
+
+
+def test_sensor_data_migration_text_to_timestamptz():
+    """[TestCase] TEXT 欄位的舊資料表: 分批回填後交換欄位，建立 BRIN 索引並記錄版本"""
+    db = FakeDb({"id": "integer", "time": "text", "created_at": "text", "updated_at": "text"}, row_ids=list(range(1, 12)))
+    migration = SensorDataMigration(db, batch_size=5, batch_sleep_sec=0)
+    assert migration.run() is True
+
+    backfills = [s for s in db.statements if s.startswith("WITH batch AS")]
+    assert len(backfills) == 4 # 5 + 5 + 1 筆，最後一次沒有資料
+    assert db.statements[db.statements.index(backfills[0]) - 1] == "SET LOCAL sidecar.migrating = 'on'"
+    print("PASS: backfill runs in batches")
+
+    order = [
+        next(i for i, s in enumerate(db.statements) if s.startswith(prefix))
+        for prefix in ("ALTER TABLE sensor_data ADD COLUMN", "CREATE TRIGGER", "WITH batch AS", 'ALTER TABLE sensor_data RENAME COLUMN "time_tz"', "CREATE INDEX CONCURRENTLY")
+    ]
+    assert order == sorted(order)
+    assert any("USING BRIN (\"time\")" in s for s in db.statements)
+    assert any(s.startswith("SET LOCAL lock_timeout") for s in db.statements)
+    assert db.version == SensorDataMigration.SCHEMA_VERSION
+    print("PASS: columns are swapped after backfill and the time index is created")
+
+
+def test_sensor_data_migration_skips_new_schema():
+    """[TestCase] 已經是 timestamptz 的資料表不回填，只在沒有版本紀錄時補上索引與版本"""
+    db = FakeDb({"id": "integer", "time": "timestamp with time zone"}, row_ids=[1, 2], version=2)
+    assert SensorDataMigration(db).run() is False
+    assert not any(s.startswith(("WITH batch AS", "ALTER TABLE", "CREATE INDEX")) for s in db.statements)
+    print("PASS: up-to-date schema is left untouched")
+
+    db = FakeDb({"id": "integer", "time": "timestamp with time zone"}, row_ids=[])
+    assert SensorDataMigration(db).run() is False
+    assert any(s.startswith("CREATE INDEX CONCURRENTLY") for s in db.statements)
+    assert db.version == SensorDataMigration.SCHEMA_VERSION
+    print("PASS: fresh table gets the time index and schema version")
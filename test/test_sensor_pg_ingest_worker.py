@@ -0,0 +1,178 @@
+import os
+import sys
+from contextlib import contextmanager
+import psycopg2
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mylib.models.sensor_log_model import SidecarSensorLogModel
+from mylib.adapters.sensor_pg_ingest_worker import SensorPgIngestWorker
+
+CSV_HEADER = "time,Coolant Supply Temperature (T1),Coolant Flow Rate (F1)\n"
+
+
+def _csv_row(ts: str, t1: float) -> str:
+    return f"{ts},{t1},{t1 * 2}\n"
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def copy_expert(self, statement, buffer):
+        rows = buffer.read().splitlines()
+        if any(value in row.split(",") for row in rows for value in self.db.reject_values):
+            raise psycopg2.DataError("numeric field overflow")
+        self.db.pending_rows.extend(rows)
+
+    def execute(self, statement, params=None):
+        if statement.startswith("SAVEPOINT"):
+            self.db.savepoint = len(self.db.pending_rows)
+            return
+        if statement.startswith("ROLLBACK TO SAVEPOINT"):
+            del self.db.pending_rows[self.db.savepoint:]
+            return
+        if statement.startswith("RELEASE SAVEPOINT"):
+            return
+        path, inode, offset, header, tail_bytes, row_count, last_ts = params
+        self.db.pending_watermarks[path] = (path, inode, offset, header, bytes(tail_bytes), row_count, last_ts)
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self):
+        return FakeCursor(self.db)
+
+
+class FakeDb:
+    """sensor_data 與 sensor_ingest_watermark 只存在記憶體 (不需要 PostgreSQL server)，transaction 結束時才 commit"""
+    def __init__(self):
+        self.rows, self.watermarks = [], {}
+        self.pending_rows, self.pending_watermarks = [], {}
+        self.fail_next_commit = False
+        self.reject_values = set() # COPY 時被 Postgres 拒絕的值 (ex: 超出 NUMERIC 範圍)
+        self.savepoint = 0
+
+    @contextmanager
+    def get_connection(self, dbname=None, autocommit=False):
+        self.pending_rows, self.pending_watermarks = [], {}
+        yield FakeConnection(self)
+        if self.fail_next_commit:
+            self.fail_next_commit = False
+            raise OSError("connection lost")
+        self.rows += self.pending_rows
+        for path, (*state, last_ts) in self.pending_watermarks.items():
+            prev_ts = self.watermarks.get(path, (None,) * 7)[6]
+            self.watermarks[path] = (*state, last_ts if last_ts is not None else prev_ts)
+
+    def query(self, statement, params=None):
+        return list(self.watermarks.values())
+
+
+def _copied(db, worker, column="coolant_supply_temperature") -> list:
+    """:return: 已 commit 的 (time, column) (依 COPY 的欄位順序解析)"""
+    index = 1 + [c for _, c in worker.columns].index(column)
+    return [(row.split(",")[0], row.split(",")[index]) for row in db.rows]
+
+
+def _worker(db, root, batch_bytes=1024):
+    return SensorPgIngestWorker(db, str(root), SidecarSensorLogModel, days_to_load=2, batch_bytes=batch_bytes, ensure_schema=False)
+
+
+def test_sensor_pg_ingest_resumes_from_watermark(tmp_path):
+    """[TestCase] 以 COPY 分批寫入，重新啟動後從 watermark 繼續，寫到一半的行留到下一次"""
+    path = tmp_path / "sensor.log.2025-07-01.csv"
+    path.write_text(CSV_HEADER + "".join(_csv_row(f"2025-07-01T00:00:{s:02d}", s) for s in range(10)) + "2025-07-01T00:00:10,1")
+    db = FakeDb()
+    worker = _worker(db, tmp_path, batch_bytes=100)
+    assert worker.run_once() == 10
+    assert _copied(db, worker)[:2] == [("2025-07-01T00:00:00+00:00", "0.0"), ("2025-07-01T00:00:01+00:00", "1.0")]
+    assert len(db.rows) == 10
+    assert worker.stats()["batches"] > 1
+    assert worker.stats()["bytes_behind"] == len("2025-07-01T00:00:10,1")
+    print("PASS: rows are copied in batches")
+
+    with open(path, "a") as f:
+        f.write("0.0,20.0\n")
+    db.fail_next_commit = True
+    assert worker.run_once() == 0
+    assert len(db.rows) == 10 and worker.stats()["errors"] == 1
+    print("PASS: failed batch is not committed")
+
+    restarted = _worker(db, tmp_path)
+    assert restarted.run_once() == 1
+    assert len(db.rows) == 11
+    assert _copied(db, restarted, "coolant_flow_rate")[-1] == ("2025-07-01T00:00:10+00:00", "20.0")
+    stats = restarted.stats()
+    assert stats["last_ingested_time"] == "2025-07-01T00:00:10+00:00"
+    assert stats["bytes_behind"] == 0 and stats["lag_sec"] > 0
+    print("PASS: restart resumes from the committed watermark")
+
+
+def test_sensor_pg_ingest_deduplicates_on_timestamp(tmp_path):
+    """[TestCase] 檔案被改寫後從頭讀取，已寫入的時間不會重複寫入"""
+    path = tmp_path / "sensor.log.2025-07-01.csv"
+    path.write_text(CSV_HEADER + _csv_row("2025-07-01T00:00:00", 1.0) + _csv_row("2025-07-01T00:00:10", 2.0))
+    db = FakeDb()
+    worker = _worker(db, tmp_path)
+    assert worker.run_once() == 2
+
+    path.write_text(CSV_HEADER + _csv_row("2025-07-01T00:00:00", 9.0) + _csv_row("2025-07-01T00:00:10", 9.0) + _csv_row("2025-07-01T00:00:20", 3.0))
+    assert worker.run_once() == 1
+    assert [v for _, v in _copied(db, worker)] == ["1.0", "2.0", "3.0"]
+    assert worker.stats()["rows_skipped"] == 2
+    print("PASS: rewritten rows are deduplicated by timestamp")
+
+    (tmp_path / "sensor.log.2025-07-02.csv").write_text(CSV_HEADER + _csv_row("2025-07-01T00:00:20", 4.0) + _csv_row("2025-07-02T00:00:00", 5.0))
+    assert worker.run_once() == 1
+    assert _copied(db, worker)[-1] == ("2025-07-02T00:00:00+00:00", "5.0")
+    print("PASS: overlapping files are deduplicated by timestamp")
+
+
+def test_sensor_pg_ingest_skips_bad_rows(tmp_path):
+    """[TestCase] 無法解碼/解析的行與 Postgres 拒絕的行逐行略過，watermark 照常前進；單一檔案失敗不影響其他檔案"""
+    day1 = tmp_path / "sensor.log.2025-07-01.csv"
+    day1.write_bytes(
+        CSV_HEADER.encode() + _csv_row("2025-07-01T00:00:00", 1.0).encode()
+        + b"2025-07-01T00:00:10,\xff\xfe,2\n" + b"not a time,1,2\n" + _csv_row("2025-07-01T00:00:20", 3.0).encode()
+    )
+    db = FakeDb()
+    worker = _worker(db, tmp_path)
+    assert worker.run_once() == 2
+    assert [v for _, v in _copied(db, worker)] == ["1.0", "3.0"]
+    assert worker.stats()["rows_skipped"] == 2 and worker.stats()["errors"] == 0
+    print("PASS: undecodable and unparsable rows are skipped one at a time")
+
+    db.reject_values = {"999.0"}
+    with open(day1, "a") as f:
+        f.write(_csv_row("2025-07-01T00:00:30", 999.0) + _csv_row("2025-07-01T00:00:40", 4.0))
+    assert worker.run_once() == 1
+    assert [v for _, v in _copied(db, worker)] == ["1.0", "3.0", "4.0"]
+    stats = worker.stats()
+    assert stats["rows_rejected"] == 1 and stats["errors"] == 1
+    assert stats["bytes_behind"] == 0 and stats["last_ingested_time"] == "2025-07-01T00:00:40+00:00"
+    assert worker.run_once() == 0 and worker.stats()["errors"] == 1
+    print("PASS: rows rejected by Postgres are skipped and the watermark moves past them")
+
+    day2 = tmp_path / "sensor.log.2025-07-02.csv"
+    day2.write_text(CSV_HEADER + _csv_row("2025-07-02T00:00:00", 5.0))
+    with open(day1, "a") as f:
+        f.write(_csv_row("2025-07-01T00:00:50", 6.0))
+    read_chunk = worker._read_chunk
+
+    def failing_read_chunk(cursor, is_latest):
+        if cursor.path == str(day1):
+            raise ValueError("unexpected error")
+        return read_chunk(cursor, is_latest)
+
+    worker._read_chunk = failing_read_chunk
+    assert worker.run_once() == 1
+    assert _copied(db, worker)[-1] == ("2025-07-02T00:00:00+00:00", "5.0")
+    assert worker.stats()["errors"] == 2
+    print("PASS: an error in one file does not stop the other files")
@@ -0,0 +1,145 @@
+import os
+import time
+import pytest
+import sys
+import logging
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mylib.adapters.sensor_snapshot_poller import SensorSnapshotPoller
+
+
+@pytest.fixture
+def fake_sources(monkeypatch):
+    counter = {"chassis_summary": 0}
+
+    def fetch_chassis_summary():
+        counter["chassis_summary"] += 1
+        return {"fan1": {"status": {"state": "Enabled", "health": "OK"}, "reading": counter["chassis_summary"]}}
+
+    SensorSnapshotPoller.reset()
+    monkeypatch.setattr(SensorSnapshotPoller, "SOURCES", {"chassis_summary": fetch_chassis_summary})
+    monkeypatch.setattr(SensorSnapshotPoller, "INTERVAL_SEC", 0.05)
+    yield counter
+    SensorSnapshotPoller.reset()
+
+
+def test_sensor_snapshot_poller_cold_start(client, fake_sources):
+    """[TestCase] 冷啟動時同步讀取並發佈 snapshot"""
+    data = SensorSnapshotPoller.read("chassis_summary")
+    assert data["fan1"]["reading"] >= 1
+    snapshot = SensorSnapshotPoller.get_snapshot()
+    assert snapshot is not None and snapshot.version >= 1
+    print("PASS: cold start published snapshot")
+
+    with pytest.raises(TypeError):
+        data["fan1"] = {}
+    print("PASS: published payload is read-only")
+
+
+def test_sensor_snapshot_poller_background_refresh(client, fake_sources):
+    """[TestCase] 背景輪詢會持續發佈新版本，讀取端不觸發 RestAPI"""
+    SensorSnapshotPoller.read("chassis_summary")
+    first = SensorSnapshotPoller.get_snapshot()
+    time.sleep(0.3)
+    latest = SensorSnapshotPoller.get_snapshot()
+    logging.info(f"snapshot version: {first.version} -> {latest.version}")
+    assert latest.version > first.version
+    assert latest is not first
+    print("PASS: poller publishes newer versions")
+
+    calls_before = fake_sources["chassis_summary"]
+    SensorSnapshotPoller.stop()
+    for _ in range(10):
+        SensorSnapshotPoller._snapshot.get("chassis_summary")
+    assert fake_sources["chassis_summary"] == calls_before
+    print("PASS: reading snapshot does not hit upstream")
+
+
+def test_sensor_snapshot_poller_serve_stale(client, fake_sources, monkeypatch):
+    """[TestCase] snapshot 過舊時回應上一版資料並標示為舊資料"""
+    from app import app
+    from mylib.utils.DataFreshnessUtil import DataFreshnessUtil
+
+    SensorSnapshotPoller.read("chassis_summary")
+    SensorSnapshotPoller.stop()
+    monkeypatch.setattr(SensorSnapshotPoller, "MAX_AGE_SEC", 0)
+    monkeypatch.setattr(SensorSnapshotPoller, "start", classmethod(lambda cls: None))
+    time.sleep(0.05)
+    with app.test_request_context("/redfish/v1/Chassis/1/Sensors"):
+        data = SensorSnapshotPoller.read("chassis_summary")
+        assert data["fan1"]["reading"] >= 1
+        stale_sources = DataFreshnessUtil.get_stale_sources()
+        assert "chassis_summary" in stale_sources
+        print("PASS: stale snapshot is served and marked")
+
+        response = app.response_class(
+            '{"Status": {"State": "Enabled", "Health": "OK"}}', 
+            status=200, 
+            mimetype="application/json"
+        )
+        response = DataFreshnessUtil.apply_to_response(response)
+        assert "Age" in response.headers
+        assert response.get_json()["Status"]["Health"] == "Warning"
+        print("PASS: Age header and degraded Health")
+
+
+def test_sensor_snapshot_poller_circuit_open(client, monkeypatch):
+    """[TestCase] RestAPI 連續失敗時 circuit breaker 打開，冷啟動直接回 503"""
+    from mylib.common.proj_error import ProjRedfishError
+
+    call_cnt = {"value": 0}
+    def fetch_fail():
+        call_cnt["value"] += 1
+        raise ConnectionError("RestAPI down")
+
+    SensorSnapshotPoller.reset()
+    monkeypatch.setattr(SensorSnapshotPoller, "SOURCES", {"chassis_summary": fetch_fail})
+    monkeypatch.setattr(SensorSnapshotPoller, "start", classmethod(lambda cls: None))
+    breaker = SensorSnapshotPoller.get_breaker()
+    try:
+        for _ in range(breaker.failure_threshold):
+            with pytest.raises(ConnectionError):
+                SensorSnapshotPoller.read("chassis_summary")
+        assert breaker.is_open()
+
+        with pytest.raises(ProjRedfishError) as e:
+            SensorSnapshotPoller.read("chassis_summary")
+        assert e.value.http_status == 503
+        assert call_cnt["value"] == breaker.failure_threshold
+        print("PASS: circuit open rejects without calling upstream")
+    finally:
+        SensorSnapshotPoller.reset()
+
+
+def test_sensor_snapshot_poller_pinned_adds_missing_source(client, monkeypatch):
+    """[TestCase] pinned() 中讀取新的來源時，已讀過的來源維持固定的版本；listener 在背景 thread 中呼叫"""
+    import threading
+    counter = {"chassis_summary": 0, "sensor_value": 0}
+
+    def make_fetch(name):
+        def fetch():
+            counter[name] += 1
+            return {"reading": counter[name]}
+        return fetch
+
+    SensorSnapshotPoller.reset()
+    monkeypatch.setattr(SensorSnapshotPoller, "SOURCES", {name: make_fetch(name) for name in counter})
+    monkeypatch.setattr(SensorSnapshotPoller, "INTERVAL_SEC", 0.05)
+    listener_threads = []
+    listener = lambda snapshot: listener_threads.append(threading.current_thread().name)
+    try:
+        SensorSnapshotPoller.read("chassis_summary")
+        with SensorSnapshotPoller.pinned():
+            first = SensorSnapshotPoller.read("chassis_summary")["reading"]
+            time.sleep(0.2) # 背景輪詢發佈新版本
+            SensorSnapshotPoller.read("sensor_value")
+            assert SensorSnapshotPoller.read("chassis_summary")["reading"] == first
+        assert SensorSnapshotPoller.read("chassis_summary")["reading"] > first
+        print("PASS: pinned snapshot keeps the version of sources already read")
+
+        SensorSnapshotPoller.subscribe("chassis_summary", listener)
+        time.sleep(0.2)
+        assert listener_threads and set(listener_threads) == {"SensorSnapshotPoller"}
+        print("PASS: listeners run on the poller thread")
+    finally:
+        SensorSnapshotPoller.unsubscribe(listener)
+        SensorSnapshotPoller.reset()
@@ -1,5 +1,6 @@
 import os
 import json
+import re
 import pytest
 import sys
 import time
@@ -96,12 +97,15 @@ metric_reports_testcases = [
     }
 ]
 
+# MetricReport Id 格式: CDU_Report_<YYYYmmddTHHMMSSZ> (第一筆取樣的 UTC 時間)
+METRIC_REPORT_ID_PATTERN = re.compile(r"^CDU_Report_\d{8}T\d{6}Z$")
+
 metric_report_instance_testcases =[
     {
-        "endpoint": '/redfish/v1/TelemetryService/MetricReports/CDU_Report_1',
+        "endpoint": '/redfish/v1/TelemetryService/MetricReports/CDU_Report_20250701T000003Z',
         "assert_cases": {
-            "Id": "CDU_Report_1",
-            "@odata.id": "/redfish/v1/TelemetryService/MetricReports/CDU_Report_1",
+            "Id": "CDU_Report_20250701T000003Z",
+            "@odata.id": "/redfish/v1/TelemetryService/MetricReports/CDU_Report_20250701T000003Z",
             "MetricValues": [
                     "MetricId",
                     "MetricValue",
@@ -216,7 +220,7 @@ def test_telemetry_service_(client, basic_auth_header, testcase):
         
     
 @pytest.mark.parametrize("testcase", metric_reports_testcases)
-def test_metricreports_api(client, basic_auth_header, testcase):
+def test_metricreports_api(client, basic_auth_header, telemetry_reports, testcase):
     """[TestCase] MetricReports API"""
     
     print(f"\n## Testing endpoint: {testcase['endpoint']}")
@@ -238,6 +242,8 @@ def test_metricreports_api(client, basic_auth_header, testcase):
                 assert isinstance(resp_json["Members"], list), "Members excepted list"
                 count = len(resp_json["Members"])
                 assert 0 < count <= 2048, f"Members out of range: {count}"
+                report_ids = [m["@odata.id"].rsplit("/", 1)[-1] for m in resp_json["Members"]]
+                assert all(METRIC_REPORT_ID_PATTERN.match(report_id) for report_id in report_ids), f"invalid report ids: {report_ids}"
                 print(f"PASS: Members: is {count} items")
             else:
                 assert resp_json.get(key) == value, f"{key} mismatch: {resp_json.get(key)} ≠ {value}"
@@ -247,7 +253,7 @@ def test_metricreports_api(client, basic_auth_header, testcase):
             assert False, str(e)
             
 @pytest.mark.parametrize("testcase", metric_report_instance_testcases)
-def test_metric_report_instance_api(client, basic_auth_header, testcase):
+def test_metric_report_instance_api(client, basic_auth_header, telemetry_reports, testcase):
     """[TestCase] MetricReport_id API"""
     
     print(f"\n## Testing endpoint: {testcase['endpoint']}")
@@ -320,8 +326,328 @@ def test_metric_definition_instance_api(client, basic_auth_header, testcase):
     print(f"Response json:\n{json.dumps(resp_json, indent=2, ensure_ascii=False)}")
     for key , value in testcase["assert_cases"].items():
         try:
-            assert resp_json.get(key) == value, f"{key} mismatch: {resp_json.get(key)} ≠ {value}"
+            if key == "MetricValues":
+                assert resp_json[key] and all(set(value) <= set(mv.keys()) for mv in resp_json[key])
+            else:
+                assert resp_json.get(key) == value, f"{key} mismatch: {resp_json.get(key)} ≠ {value}"
             print(f"PASS: {key} = {value}")
         except AssertionError as e:
             print(f"FAIL: {key} check failed. {e}")
-            raise e
\ No newline at end of file
+            raise e
+
+@pytest.fixture
+def telemetry_history(tmp_path, monkeypatch):
+    from mylib.adapters.sensor_csv_adapter import SensorCsvAdapter
+    monkeypatch.setattr(SensorCsvAdapter, "SENSOR_ROOT", str(tmp_path))
+    monkeypatch.setattr(SensorCsvAdapter, "POLL_INTERVAL_SEC", 0)
+    monkeypatch.setattr(SensorCsvAdapter, "HISTORY_CACHE_DIR", "")
+    monkeypatch.setattr(RfTelemetryService, "CACHE_EXPIRATION_SECONDS", 0)
+    monkeypatch.setattr(RfTelemetryService, "_report_ids", [])
+    monkeypatch.setattr(RfTelemetryService, "_report_index", {})
+    monkeypatch.setattr(RfTelemetryService, "_report_index_epoch", None)
+    SensorCsvAdapter.reset()
+    RfTelemetryService._rendered_reports.clear()
+    yield tmp_path / "sensor.log.2025-07-01.csv"
+    SensorCsvAdapter.reset()
+    RfTelemetryService._rendered_reports.clear()
+
+
+@pytest.fixture
+def telemetry_reports(telemetry_history):
+    """寫入 3 份報告的取樣: CDU_Report_20250701T000003Z、...T000011Z、...T000021Z"""
+    header = "time,Coolant Supply Temperature (T1)\n"
+    telemetry_history.write_text(header + "".join(f"2025-07-01T00:00:{s:02d},{s}\n" for s in range(3, 30, 2)))
+    yield telemetry_history
+
+
+def test_metric_report_ids_are_stable(client, basic_auth_header, telemetry_history, monkeypatch):
+    """[TestCase] MetricReport 的 Id 由取樣時間產生，新資料進來時舊報告的 Id 不變"""
+    header = "time,Coolant Supply Temperature (T1)\n"
+    telemetry_history.write_text(header + "".join(f"2025-07-01T00:00:{s:02d},{s}\n" for s in range(3, 30, 2)))
+
+    response = client.get("/redfish/v1/TelemetryService/MetricReports", headers=basic_auth_header)
+    assert response.status_code == 200
+    report_ids = [m["@odata.id"].rsplit("/", 1)[-1] for m in response.json["Members"]]
+    assert report_ids == ["CDU_Report_20250701T000003Z", "CDU_Report_20250701T000011Z", "CDU_Report_20250701T000021Z"]
+    print("PASS: collection is listed from the report index")
+
+    with open(telemetry_history, "a") as f:
+        f.write("".join(f"2025-07-01T00:00:{s:02d},{s}\n" for s in range(31, 60, 2)))
+    monkeypatch.setattr(RfTelemetryService, "MAX_REPORTS", 4)
+    response = client.get("/redfish/v1/TelemetryService/MetricReports", headers=basic_auth_header)
+    report_ids = [m["@odata.id"].rsplit("/", 1)[-1] for m in response.json["Members"]]
+    assert report_ids == [f"CDU_Report_20250701T0000{s}Z" for s in (21, 31, 41, 51)]
+    print("PASS: existing report ids do not shift when new rows arrive")
+
+    render_cnt = {"count": 0}
+    render_report = RfTelemetryService._render_report.__func__
+    def counting_render_report(cls, report_id, ts):
+        render_cnt["count"] += 1
+        return render_report(cls, report_id, ts)
+    monkeypatch.setattr(RfTelemetryService, "_render_report", classmethod(counting_render_report))
+    for _ in range(2):
+        response = client.get("/redfish/v1/TelemetryService/MetricReports/CDU_Report_20250701T000031Z", headers=basic_auth_header)
+        assert response.status_code == 200
+        assert response.json["Timestamp"] == "2025-07-01T00:00:31+00:00"
+        metric_values = {v["MetricId"]: v["MetricValue"] for v in response.json["MetricValues"]}
+        assert metric_values["Coolant Supply Temperature (T1)"] == "31.0"
+    assert render_cnt["count"] == 1
+    print("PASS: report is rendered once and served from the LRU")
+
+    response = client.get("/redfish/v1/TelemetryService/MetricReports/CDU_Report_20250701T000011Z", headers=basic_auth_header)
+    assert response.status_code == 404
+    print("PASS: report outside of the index is not found")
+
+
+def test_metric_report_aggregated_variants(client, basic_auth_header, telemetry_history):
+    """[TestCase] MetricReport 的彙總版本 (<report id>_<function>) 回傳取樣區段內的 Minimum/Maximum/Average/Last"""
+    header = "time,Coolant Supply Temperature (T1)\n"
+    rows = [(3, 4.0), (5, ""), (7, 1.0), (9, 7.0), (11, 2.0)]
+    telemetry_history.write_text(header + "".join(f"2025-07-01T00:00:{s:02d},{v}\n" for s, v in rows))
+
+    response = client.get("/redfish/v1/TelemetryService/MetricReports/CDU_Report_20250701T000003Z", headers=basic_auth_header)
+    assert response.status_code == 200
+    variant_ids = [m["@odata.id"].rsplit("/", 1)[-1] for m in response.json["Oem"]["Supermicro"]["AggregatedReports"]]
+    assert variant_ids == [f"CDU_Report_20250701T000003Z_{f}" for f in ("Minimum", "Maximum", "Average", "Last")]
+    print("PASS: sample report links to its aggregated variants")
+
+    expected = {"Minimum": "1.0", "Maximum": "7.0", "Average": "4.0", "Last": "7.0"}
+    for function, value in expected.items():
+        response = client.get(f"/redfish/v1/TelemetryService/MetricReports/CDU_Report_20250701T000003Z_{function}", headers=basic_auth_header)
+        assert response.status_code == 200
+        assert response.json["Timestamp"] == "2025-07-01T00:00:00+00:00"
+        assert response.json["Oem"]["Supermicro"]["SampleCount"] == 4
+        metric_values = {v["MetricId"]: v["MetricValue"] for v in response.json["MetricValues"]}
+        assert metric_values["Coolant Supply Temperature (T1)"] == value
+        print(f"PASS: {function} of the sampling window = {value}")
+
+    response = client.get("/redfish/v1/TelemetryService/MetricReports", headers=basic_auth_header)
+    assert all(not m["@odata.id"].endswith("_Average") for m in response.json["Members"])
+    response = client.get("/redfish/v1/TelemetryService/MetricReports/CDU_Report_20250701T000003Z_Median", headers=basic_auth_header)
+    assert response.status_code == 404
+    print("PASS: variants are not listed and unknown functions are not found")
+
+
+def test_sensor_statistics_single_pass_query():
+    """[TestCase] get_sensor_statistics 的 SQL 一次掃描計算所有 (field x stat x duration)，結果依查詢順序輸出"""
+    from decimal import Decimal
+    from mylib.adapters.sensor_statistics_query import SensorStatisticsQuery
+    queries = [
+        {"duration": "PT30S", "fields": ["coolant_flow_rate", "pH_PH"], "stats": ["Average", "Maximum"]},
+        {"duration": "PT5M", "fields": ["coolant_flow_rate"], "stats": ["Minimum"]},
+        {"duration": "PT30S", "fields": ["coolant_flow_rate"], "stats": ["Average"]},
+    ]
+    query = SensorStatisticsQuery(queries, {"PT30S": 30, "PT5M": 300})
+    assert query.statement.count("FROM ") == 2 # 只有一個子查詢，沒有 correlated subquery
+    assert query.statement.count("FILTER (WHERE") == 5
+    assert '"pH_PH"' in query.statement
+    assert query.param_types == ["timestamptz", "integer", "integer"]
+    assert query.build_params("end") == ["end", 30, 300]
+    print("PASS: one scan with a FILTER per aggregate")
+
+    same_shape = SensorStatisticsQuery(queries, {"PT30S": 10, "PT5M": 60})
+    assert same_shape.statement_name == query.statement_name
+    print("PASS: durations are parameters so the prepared statement is reused")
+
+    result = query.map_row([Decimal("1.50"), Decimal("2.00"), Decimal("7.00"), None, Decimal("0.50")])
+    assert [(r["metric_id"], r["property"], r["value"]) for r in result] == [
+        ("coolant_flow_rate", "Average_PT30S", "1.5"),
+        ("coolant_flow_rate", "Maximum_PT30S", "2.0"),
+        ("pH_PH", "Average_PT30S", "7.0"),
+        ("coolant_flow_rate", "Minimum_PT5M", "0.5"),
+        ("coolant_flow_rate", "Average_PT30S", "1.5"),
+    ]
+    print("PASS: result row is mapped back to the output format")
+
+
+def test_sensor_statistics_rollup_planner():
+    """[TestCase] 長區間以最粗的完整 bucket 計算，兩端不足的部份由較細的彙總表與原始資料補齊"""
+    from datetime import datetime, timezone
+    from decimal import Decimal
+    from mylib.adapters.sensor_rollup import SensorRollup
+    from mylib.adapters.sensor_statistics_query import SensorRollupQuery
+    rollup = SensorRollup(["coolant_flow_rate", "pH_PH"])
+    end_ts = datetime(2025, 7, 4, 1, 2, 3, tzinfo=timezone.utc).timestamp()
+    plan = rollup.plan(end_ts - 3 * 86400, end_ts)
+    assert [(level.name if level else "raw", end - start) for level, start, end in plan] == [
+        ("raw", 57), ("1m", 57 * 60), ("1h", 22 * 3600), ("1d", 2 * 86400), ("1h", 3600), ("1m", 120), ("raw", 3),
+    ]
+    assert all(a[2] == b[1] for a, b in zip(plan, plan[1:]))
+    assert [level.name if level else "raw" for level, _, _ in rollup.plan(end_ts - 30, end_ts)] == ["raw"]
+    print("PASS: the coarsest complete buckets cover the window")
+
+    queries = [
+        {"duration": "P3D", "fields": ["coolant_flow_rate"], "stats": ["Average", "Maximum"]},
+        {"duration": "PT2H", "fields": ["pH_PH"], "stats": ["Minimum"]},
+    ]
+    query = SensorRollupQuery(rollup, queries, {"P3D": 3 * 86400, "PT2H": 7200})
+    statements = query.build_statements(datetime.fromtimestamp(end_ts, timezone.utc))
+    assert len(statements) == 2
+    sql, params = statements[0]
+    assert sql.count(" UNION ALL ") == 6 and len(params) == 14
+    assert "FROM sensor_data_rollup_1d" in sql and '"pH_PH' not in sql
+    assert "SUM(\"coolant_flow_rate__sum\") / NULLIF(SUM(\"coolant_flow_rate__count\"), 0)" in sql
+    print("PASS: one statement per duration merges rollups and raw edges")
+
+    plan = query.plan(end_ts - 3 * 86400, end_ts, rollup_until=end_ts - 5400)
+    assert [(level.name if level else "raw", end - start) for level, start, end in plan] == [
+        ("raw", 57), ("1m", 57 * 60), ("1h", 22 * 3600), ("1d", 86400), ("1h", 23 * 3600), ("1m", 32 * 60), ("raw", 3), ("raw", 5400),
+    ]
+    assert all(a[2] == b[1] for a, b in zip(plan, plan[1:]))
+    sql, _ = query.build_statements(datetime.fromtimestamp(end_ts, timezone.utc), rollup_until=None)[0]
+    assert "sensor_data_rollup" not in sql
+    print("PASS: rollups are used only up to the ingest high-water mark")
+
+    result = query.map_rows([(Decimal("1.25"), Decimal("3.00")), (Decimal("6.80"),)])
+    assert [(r["metric_id"], r["property"], r["value"]) for r in result] == [
+        ("coolant_flow_rate", "Average_P3D", "1.25"),
+        ("coolant_flow_rate", "Maximum_P3D", "3.0"),
+        ("pH_PH", "Minimum_PT2H", "6.8"),
+    ]
+    upsert = rollup.build_upsert_sql(SensorRollup.LEVELS[1])
+    assert "date_bin(make_interval(secs => 3600)" in upsert and "ON CONFLICT (bucket) DO UPDATE" in upsert
+    print("PASS: rows are mapped back and rollups are merged on conflict")
+
+
+def test_sensor_statistics_aligned_buckets():
+    """[TestCase] aligned 模式以 date_bin 一次計算所有對齊 UTC 的 bucket，沒有資料的 bucket 也會輸出"""
+    from datetime import datetime, timezone
+    from decimal import Decimal
+    from mylib.adapters.sensor_rollup import SensorRollup
+    from mylib.adapters.sensor_statistics_query import SensorAlignedQuery
+    rollup = SensorRollup(["coolant_flow_rate"])
+    queries = [
+        {"duration": "PT1M", "fields": ["coolant_flow_rate"], "stats": ["Average", "Maximum"]},
+        {"duration": "PT10S", "fields": ["coolant_flow_rate"], "stats": ["Minimum"]},
+    ]
+    query = SensorAlignedQuery(rollup, queries, {"PT1M": 60, "PT10S": 10}, window_sec=3600)
+    end_time = datetime(2025, 7, 1, 12, 34, 20, tzinfo=timezone.utc)
+    assert query.bucket_count(60) == 60 and query.bucket_count(10) == 360
+    assert query.bucket_range(60, end_time.timestamp()) == (end_time.timestamp() - 20 - 59 * 60, end_time.timestamp() + 40)
+    minute_sql, minute_params = query.build_statements(end_time)[0]
+    assert "date_bin(make_interval(secs => %s), t, TIMESTAMPTZ 'epoch')" in minute_sql and "GROUP BY 1" in minute_sql
+    assert "FROM sensor_data_rollup_1m" in minute_sql and "sensor_data_rollup_1h" not in minute_sql
+    assert minute_params[0] == 60 and len(minute_params) == 1 + 2 * 2
+    ten_sec_sql, _ = query.build_statements(end_time)[1]
+    assert "sensor_data_rollup" not in ten_sec_sql
+    print("PASS: one date_bin statement per duration, rollups only when bucket widths divide evenly")
+
+    last_bucket = datetime(2025, 7, 1, 12, 34, tzinfo=timezone.utc)
+    series = query.map_series([[(last_bucket, Decimal("1.25"), Decimal("2.00"))], []], end_time)
+    assert [s["duration"] for s in series] == ["PT1M", "PT10S"]
+    minute_buckets = series[0]["buckets"]
+    assert len(minute_buckets) == 60 and minute_buckets[0]["values"] == []
+    assert minute_buckets[-1]["start_time"] == "2025-07-01T12:34:00+00:00"
+    assert minute_buckets[-1]["end_time"] == "2025-07-01T12:35:00+00:00"
+    assert [(v["property"], v["value"]) for v in minute_buckets[-1]["values"]] == [("Average_PT1M", "1.25"), ("Maximum_PT1M", "2.0")]
+    print("PASS: rows are mapped to buckets and empty buckets are kept")
+
+    with pytest.raises(ValueError):
+        SensorAlignedQuery(rollup, queries, {"PT1M": 60, "PT10S": 1}, window_sec=3600)
+    print("PASS: too many buckets are rejected")
+
+
+def test_sensor_statistics_aligned_mode_from_history(telemetry_history):
+    """[TestCase] aligned 模式的資料在歷史資料內時，由 SensorHistoryStore 計算各 bucket"""
+    from datetime import datetime, timezone
+    header = "time,Coolant Supply Temperature (T1)\n"
+    telemetry_history.write_text(header + "".join(f"2025-07-01T00:{m:02d}:{s:02d},{m * 10 + s // 10}\n" for m in range(3) for s in (0, 30)))
+    result = RfTelemetryService().get_sensor_statistics(
+        [{"duration": "PT1M", "fields": ["coolant_supply_temperature"], "stats": ["Average", "Maximum"]}],
+        mode="aligned",
+        end_time=datetime(2025, 7, 1, 0, 3, tzinfo=timezone.utc),
+        window="PT2M",
+    )
+    buckets = result["series"][0]["buckets"]
+    assert [b["start_time"] for b in buckets] == ["2025-07-01T00:01:00+00:00", "2025-07-01T00:02:00+00:00"]
+    assert [[v["value"] for v in b["values"]] for b in buckets] == [["11.5", "13.0"], ["21.5", "23.0"]]
+    print("PASS: buckets are aggregated from the history store")
+
+    with pytest.raises(ValueError):
+        RfTelemetryService().get_sensor_statistics([{"duration": "PT1M", "stats": ["Average"]}], mode="other")
+    print("PASS: unknown mode is rejected")
+
+
+def test_metric_report_definition_crud(client, basic_auth_header):
+    """[TestCase] MetricReportDefinition 的 POST/PATCH/DELETE，每個定義只訂閱指定的 metric"""
+    base = "/redfish/v1/TelemetryService/MetricReportDefinitions"
+    client.delete(f"{base}/TestFlow", headers=basic_auth_header)
+    body = {
+        "Id": "TestFlow",
+        "Schedule": {"RecurrenceInterval": "PT1M"},
+        "ReportUpdates": "NewReport",
+        "AppendLimit": 10,
+        "Metrics": [{"MetricId": "coolant_flow_rate", "CollectionFunction": "Average"}],
+    }
+    response = client.post(base, headers=basic_auth_header, json=body)
+    assert response.status_code == 201, response.json
+    assert response.headers["Location"] == f"{base}/TestFlow"
+    assert response.json["MetricReportDefinitionEnabled"] is True
+    assert [m["MetricId"] for m in response.json["Metrics"]] == ["coolant_flow_rate"]
+    members = [m["@odata.id"] for m in client.get(base, headers=basic_auth_header).json["Members"]]
+    assert f"{base}/1" in members and f"{base}/TestFlow" in members
+    assert client.post(base, headers=basic_auth_header, json=body).status_code == 409
+    for reserved_id in ("CDU_Report", "CDU_Report_1"):
+        assert client.post(base, headers=basic_auth_header, json={**body, "Id": reserved_id}).status_code == 400
+    print("PASS: definition is created")
+
+    response = client.patch(f"{base}/TestFlow", headers=basic_auth_header, json={"AppendLimit": 20, "MetricReportDefinitionEnabled": False})
+    assert response.status_code == 200
+    assert response.json["AppendLimit"] == 20 and response.json["Status"]["State"] == "Disabled"
+    assert response.json["ReportUpdates"] == "NewReport"
+    bad_metric = {"Metrics": [{"MetricId": "no_such_metric"}]}
+    assert client.patch(f"{base}/TestFlow", headers=basic_auth_header, json=bad_metric).status_code == 400
+    print("PASS: definition is patched and validated")
+
+    assert client.delete(f"{base}/TestFlow", headers=basic_auth_header).status_code == 204
+    assert client.get(f"{base}/TestFlow", headers=basic_auth_header).status_code == 404
+    assert client.delete(f"{base}/1", headers=basic_auth_header).status_code == 405
+    print("PASS: definition is deleted and the built-in one is kept")
+
+
+def test_trigger_crud(client, basic_auth_header):
+    """[TestCase] Trigger 的 POST/PATCH/DELETE，MetricProperties 只接受 sensor 讀值"""
+    base = "/redfish/v1/TelemetryService/Triggers"
+    client.delete(f"{base}/TestHighSupply", headers=basic_auth_header)
+    metric_property = "/redfish/v1/Chassis/1/Sensors/PrimarySupplyTemperatureCelsius/Reading"
+    body = {
+        "Id": "TestHighSupply",
+        "MetricProperties": [metric_property],
+        "NumericThresholds": {
+            "UpperCritical": {"Reading": 60, "DwellTime": "PT10S", "HysteresisReading": 1},
+            "UpperCaution": {"Reading": 50},
+        },
+    }
+    response = client.post(base, headers=basic_auth_header, json=body)
+    assert response.status_code == 201, response.json
+    assert response.headers["Location"] == f"{base}/TestHighSupply"
+    assert response.json["MetricType"] == "Numeric" and response.json["TriggerActions"] == ["RedfishEvent"]
+    assert response.json["NumericThresholds"]["UpperCritical"] == {
+        "Activation": "Increasing", "DwellTime": "PT10S", "HysteresisReading": 1, "Reading": 60,
+    }
+    members = [m["@odata.id"] for m in client.get(base, headers=basic_auth_header).json["Members"]]
+    assert f"{base}/TestHighSupply" in members
+    assert client.post(base, headers=basic_auth_header, json=body).status_code == 409
+    print("PASS: trigger is created")
+
+    response = client.patch(f"{base}/TestHighSupply", headers=basic_auth_header, json={"TriggerEnabled": False})
+    assert response.status_code == 200
+    assert response.json["Status"]["State"] == "Disabled" and response.json["MetricProperties"] == [metric_property]
+    bad_property = {"MetricProperties": ["/redfish/v1/Chassis/1/Sensors/NoSuchSensor/Reading"]}
+    assert client.patch(f"{base}/TestHighSupply", headers=basic_auth_header, json=bad_property).status_code == 400
+    bad_activation = {"NumericThresholds": {"LowerCritical": {"Reading": 5, "Activation": "Increasing"}}}
+    assert client.patch(f"{base}/TestHighSupply", headers=basic_auth_header, json=bad_activation).status_code == 400
+    print("PASS: trigger is patched and validated")
+
+    patch_thresholds = {"NumericThresholds": {"UpperCritical": {"Reading": 65, "Activation": "Either"}}}
+    response = client.patch(f"{base}/TestHighSupply", headers=basic_auth_header, json=patch_thresholds)
+    assert response.status_code == 200, response.json
+    assert response.json["NumericThresholds"] == {
+        "UpperCritical": {"Activation": "Either", "DwellTime": "PT10S", "HysteresisReading": 1, "Reading": 65},
+        "UpperCaution": {"Activation": "Increasing", "Reading": 50},
+    }
+    print("PASS: NumericThresholds are merged per level and Either is accepted")
+
+    assert client.delete(f"{base}/TestHighSupply", headers=basic_auth_header).status_code == 204
+    assert client.get(f"{base}/TestHighSupply", headers=basic_auth_header).status_code == 404
+    print("PASS: trigger is deleted")
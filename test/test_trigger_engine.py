@@ -0,0 +1,128 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mylib.adapters.sensor_snapshot_poller import SensorSnapshot
+from mylib.adapters.trigger_engine import TriggerEngine, TriggerDefinition, TriggerMetric, TriggerThreshold
+from mylib.utils.SensorCatalog import SensorCatalog
+
+SUPPLY = "/redfish/v1/Chassis/1/Sensors/Supply/Reading"
+DELTA = "/redfish/v1/Chassis/1/Sensors/DeltaTemp/Reading"
+
+
+def _engine() -> TriggerEngine:
+    catalog = SensorCatalog.compile({
+        "id_readingInfo_map": {
+            "Supply": {"ReadingUnits": "Celsius", "fieldNameToFetchSensorValue": "temp_coolant_supply"},
+            "DeltaTemp": {"ReadingUnits": "Celsius", "fieldNameToFetchSensorValue": "temp_coolant_return,temp_coolant_supply"},
+        }
+    }, {})
+    return TriggerEngine(lambda: catalog)
+
+
+def _summary(supply, ret=50.0) -> dict:
+    status = {"state": "Enabled", "health": "OK"}
+    return {
+        "temp_coolant_supply": {"reading": supply, "status": status},
+        "temp_coolant_return": {"reading": ret, "status": status},
+    }
+
+
+def test_trigger_engine_dwell_and_hysteresis():
+    """[TestCase] 門檻持續超過 DwellTime 才觸發，回到門檻內超過 HysteresisReading 才解除"""
+    engine = _engine()
+    engine.upsert(TriggerDefinition("Hot", "Hot", (TriggerMetric(SUPPLY, "Supply"),), (
+        TriggerThreshold("UpperCritical", 45, dwell_sec=10, hysteresis=2),
+        TriggerThreshold("UpperCaution", 40),
+    )))
+    assert engine.evaluate(_summary(38), 0) == []
+    events = engine.evaluate(_summary(46), 1)
+    assert [(e["MessageId"], e["MessageSeverity"]) for e in events] == [
+        ("TelemetryService.1.0.TriggerNumericAboveUpperCaution", "Warning"),
+    ]
+    assert engine.evaluate(_summary(46), 10) == []
+    events = engine.evaluate(_summary(47), 11)
+    assert [e["Oem"]["Supermicro"]["Threshold"] for e in events] == ["UpperCritical"]
+    assert events[0]["MessageArgs"] == [SUPPLY, "47", "45"]
+    assert events[0]["OriginOfCondition"] == {"@odata.id": "/redfish/v1/TelemetryService/Triggers/Hot"}
+    print("PASS: thresholds assert after the dwell time")
+
+    assert engine.evaluate(_summary(44), 12) == []
+    events = engine.evaluate(_summary(42.5), 13)
+    assert [(e["MessageId"], e["Oem"]["Supermicro"]["Threshold"]) for e in events] == [
+        ("TelemetryService.1.0.TriggerNumericReadingNormal", "UpperCritical"),
+    ]
+    assert [t["Threshold"] for t in engine.active_thresholds("Hot")] == ["UpperCaution"]
+    print("PASS: thresholds deassert only past the hysteresis")
+
+    engine.evaluate(_summary(46), 14)
+    assert engine.evaluate(_summary(44), 20) == [] and engine.evaluate(_summary(46), 21) == []
+    assert engine.stats()["active"] == 1
+    print("PASS: dwell time restarts when the reading returns inside the threshold")
+
+
+def test_trigger_engine_plan_and_snapshots():
+    """[TestCase] 同一 sensor 只讀值一次，定義更新保留未變門檻的狀態，同一版 summary 不重複評估"""
+    engine = _engine()
+    received = []
+    engine.add_listener(received.append)
+    engine.upsert(TriggerDefinition("Low", "Low", (TriggerMetric(SUPPLY, "Supply"),), (TriggerThreshold("LowerCritical", 10),)))
+    engine.upsert(TriggerDefinition("Delta", "Delta", (TriggerMetric(SUPPLY, "Supply"), TriggerMetric(DELTA, "DeltaTemp")), (
+        TriggerThreshold("UpperCaution", 30),
+    )))
+    assert engine.stats()["sensors"] == 2 and engine.stats()["thresholds"] == 3
+
+    events = engine.evaluate(_summary(5, ret=40), 0)
+    assert sorted((e["Oem"]["Supermicro"]["Trigger"], e["MessageArgs"][0]) for e in events) == [
+        ("Delta", DELTA), ("Low", SUPPLY),
+    ]
+    assert received == events
+    print("PASS: each sensor is read once for all triggers and listeners receive the events")
+
+    engine.upsert(TriggerDefinition("Delta", "Delta v2", (TriggerMetric(DELTA, "DeltaTemp"),), (
+        TriggerThreshold("UpperCaution", 30), TriggerThreshold("UpperCritical", 50),
+    )))
+    assert [t["MetricProperty"] for t in engine.active_thresholds("Delta")] == [DELTA]
+    engine.upsert(TriggerDefinition("Low", "Low", (TriggerMetric(SUPPLY, "Supply"),), (TriggerThreshold("LowerCritical", 10),), enabled=False))
+    assert engine.active_thresholds("Low") == [] and engine.stats()["sensors"] == 1
+    print("PASS: updated definitions keep unchanged threshold state")
+
+    snapshot = SensorSnapshot(version=1, timestamp=100, data={"chassis_summary": _summary(20, ret=20)},
+                              source_timestamps={"chassis_summary": 100})
+    engine.on_snapshot(snapshot)
+    engine.on_snapshot(SensorSnapshot(version=2, timestamp=101, data=snapshot.data, source_timestamps=snapshot.source_timestamps))
+    assert [e["MessageId"] for e in engine.events("Delta")][-1] == "TelemetryService.1.0.TriggerNumericReadingNormal"
+    assert engine.stats()["evaluations"] == 2
+    print("PASS: snapshots without a new chassis summary are skipped")
+
+
+def test_trigger_engine_activation_either():
+    """[TestCase] Activation 為 Either 時往上、往下穿越門檻都產生事件，往回穿越需超過 HysteresisReading"""
+    engine = _engine()
+    engine.upsert(TriggerDefinition("Cross", "Cross", (TriggerMetric(SUPPLY, "Supply"),), (
+        TriggerThreshold("UpperCaution", 40, dwell_sec=5, hysteresis=2, activation="Either"),
+    )))
+    assert engine.evaluate(_summary(45), 0) == []
+    print("PASS: the first reading only sets the side of the threshold")
+
+    assert engine.evaluate(_summary(39), 1) == [] and engine.evaluate(_summary(37), 5) == []
+    events = engine.evaluate(_summary(37), 6)
+    assert [(e["MessageId"], e["MessageSeverity"], e["Oem"]["Supermicro"]["Asserted"]) for e in events] == [
+        ("TelemetryService.1.0.TriggerNumericBelowUpperCaution", "Warning", True),
+    ]
+    assert engine.active_thresholds("Cross") == []
+    print("PASS: crossing downward asserts after the dwell time")
+
+    assert engine.evaluate(_summary(41), 8) == [] and engine.evaluate(_summary(41), 20) == []
+    engine.evaluate(_summary(43), 21)
+    events = engine.evaluate(_summary(43), 26)
+    assert [e["MessageId"] for e in events] == ["TelemetryService.1.0.TriggerNumericAboveUpperCaution"]
+    print("PASS: crossing back upward needs the hysteresis and asserts again")
+
+    try:
+        engine.upsert(TriggerDefinition("Bad", "Bad", (TriggerMetric(SUPPLY, "Supply"),), (
+            TriggerThreshold("UpperCaution", 40, activation="Decreasing"),
+        )))
+        assert False, "Decreasing is not valid for an upper threshold"
+    except ValueError:
+        pass
+    print("PASS: activation opposite to the threshold direction is rejected")
@@ -0,0 +1,70 @@
+import os
+import pytest
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mylib.services.version_info_service import VersionInfoService
+from mylib.utils.CircuitBreaker import CircuitBreaker
+
+
+class _FakeResponse:
+    def __init__(self, json_data):
+        self._json_data = json_data
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._json_data
+
+
+@pytest.fixture
+def fake_version_api(monkeypatch):
+    counter = {"calls": 0}
+
+    def send_get(url, opts={}):
+        counter["calls"] += 1
+        return _FakeResponse({
+            "version": {"WebUI": f"01{counter['calls']:02d}", "PLC": "0107D", "Release_Time": "2025-02-21"},
+            "fw_info": {"SN": "130001", "Model": "CDU", "Version": "1", "PartNumber": "LCS-SCDU-1K3LR001"},
+        })
+
+    monkeypatch.setattr("mylib.services.version_info_service.HttpRequestUtil.send_get", send_get)
+    CircuitBreaker.get_instance(VersionInfoService.BREAKER_NAME).reset()
+    VersionInfoService.invalidate()
+    yield counter
+    VersionInfoService.invalidate()
+
+
+def test_version_info_service_cached(client, fake_version_api):
+    """[TestCase] 版本資訊長時間 cache，多次讀取只打一次 RestAPI"""
+    for _ in range(10):
+        assert VersionInfoService.get_versions()["WebUI"] == "0101"
+        assert VersionInfoService.get_fw_info()["Model"] == "CDU"
+    assert fake_version_api["calls"] == 1
+    print("PASS: version info is cached")
+
+
+def test_version_info_service_invalidate(client, fake_version_api):
+    """[TestCase] invalidate() 後重新讀取"""
+    assert VersionInfoService.get_versions()["WebUI"] == "0101"
+    VersionInfoService.invalidate()
+    assert VersionInfoService.get_versions()["WebUI"] == "0102"
+    assert fake_version_api["calls"] == 2
+    print("PASS: version info is refreshed after invalidate")
+
+
+def test_version_info_service_expect_change(client, fake_version_api, monkeypatch):
+    """[TestCase] expect_change() 後一段時間內使用短的 cache 時間，期間過後恢復長時間 cache"""
+    monkeypatch.setattr(VersionInfoService, "CHANGE_TTL_SEC", 0)
+    monkeypatch.setattr(VersionInfoService, "_change_until", 0.0)
+    assert VersionInfoService.get_versions()["WebUI"] == "0101"
+    VersionInfoService.expect_change()
+    assert VersionInfoService.get_versions()["WebUI"] == "0102"
+    assert VersionInfoService.get_versions()["WebUI"] == "0103"
+    print("PASS: version info is re-read while a change is expected")
+
+    monkeypatch.setattr(VersionInfoService, "_change_until", 0.0)
+    assert VersionInfoService.get_versions()["WebUI"] == "0103"
+    assert fake_version_api["calls"] == 3
+    print("PASS: long cache is used after the change window")